@@ -0,0 +1,125 @@
+#!/usr/bin/env python3
+""" Benchmarks the async toolkit against the sync path.
+Runs N resource group checks and template deployments against
+the in-process fake ARM - sequential sync vs concurrent async.
+
+    python benchmarks/bench_aio.py --targets 20 --latency 0.02 --duration 0.5
+"""
+import argparse
+import asyncio
+import contextlib
+import io
+import json
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+# pylint: disable=wrong-import-position
+from azure.core.pipeline.policies import SansIOHTTPPolicy
+from pyazuretoolkit import az_deploy, az_polling, az_throttle
+from pyazuretoolkit.aio import az_deploy as aio_deploy
+from pyazuretoolkit.aio.az_login import AzureSession
+from tests.fake_arm import FakeArm, FakeArmAsyncTransport
+
+__SUBSCRIPTION_ID = "00000000-0000-0000-0000-000000000000"
+
+# ******************************************************************************** #
+
+
+class BenchCredential:
+    """Async credential that is never asked for a token - the fake does not
+    check them and the session skips the authentication policy"""
+
+    async def close(self) -> None:
+        """nothing to close"""
+
+
+# ******************************************************************************** #
+
+
+def run_sync(arm: FakeArm, template_file: str, targets: int) -> float:
+    """
+    Deploys every target one after another with the sync helper
+    """
+    client = arm.client(__SUBSCRIPTION_ID)
+    strategy = az_polling.WaitStrategy(initial_delay=0.05, max_delay=0.5)
+    start = time.perf_counter()
+    for index in range(targets):
+        deploy = az_deploy.DeploymentHelper(
+            __SUBSCRIPTION_ID,
+            f"rg-sync-{index:04d}",
+            "australiaeast",
+            credentials=object(),
+            resource_client=client,
+            wait_strategy=strategy,
+        )
+        deploy.deploy_resource_template(template_file, None)
+    elapsed = time.perf_counter() - start
+    client.close()
+    return elapsed
+
+
+# ******************************************************************************** #
+
+
+async def run_async(arm: FakeArm, template_file: str, targets: int) -> float:
+    """
+    Deploys every target concurrently on one event loop and HTTP session
+    """
+
+    async def deploy_one(session: AzureSession, index: int) -> None:
+        async with aio_deploy.DeploymentHelper(
+            __SUBSCRIPTION_ID, f"rg-async-{index:04d}", "australiaeast", session=session
+        ) as deploy:
+            await deploy.deploy_resource_template(template_file, None)
+
+    start = time.perf_counter()
+    async with AzureSession(
+        BenchCredential(),
+        check_login=False,
+        transport=FakeArmAsyncTransport(arm),
+        authentication_policy=SansIOHTTPPolicy(),
+    ) as session:
+        await asyncio.gather(*(deploy_one(session, i) for i in range(targets)))
+    return time.perf_counter() - start
+
+
+# ******************************************************************************** #
+
+
+def main() -> None:
+    """Main function"""
+    parser = argparse.ArgumentParser(description="Sync vs async toolkit benchmark.")
+    parser.add_argument("--targets", type=int, default=20)
+    parser.add_argument("--latency", type=float, default=0.02)
+    parser.add_argument("--duration", type=float, default=0.5)
+    args = parser.parse_args()
+
+    arm = FakeArm(latency=args.latency, lro_duration=args.duration, poll_interval=0.05)
+    # lift the client side token buckets, they would pace the deployments
+    az_throttle.get_throttle(
+        __SUBSCRIPTION_ID,
+        limits={kind: (1e9, 1e9) for kind in az_throttle.DEFAULT_LIMITS},
+    )
+
+    with tempfile.NamedTemporaryFile("w", suffix=".json", delete=False) as file:
+        json.dump({"$schema": "", "contentVersion": "1.0.0.0", "resources": []}, file)
+
+    try:
+        with contextlib.redirect_stdout(io.StringIO()):
+            sync_elapsed = run_sync(arm, file.name, args.targets)
+            async_elapsed = asyncio.run(run_async(arm, file.name, args.targets))
+    finally:
+        os.unlink(file.name)
+
+    print(f"targets={args.targets} latency={args.latency}s duration={args.duration}s")
+    print(f"sync  : {sync_elapsed:8.3f}s")
+    print(f"async : {async_elapsed:8.3f}s ({sync_elapsed / async_elapsed:.1f}x)")
+
+
+# Main check
+if __name__ == "__main__":
+    main()
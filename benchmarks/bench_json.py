@@ -0,0 +1,143 @@
+#!/usr/bin/env python3
+""" Benchmarks template parsing over synthetic ARM templates of 1 KB - 50 MB.
+Reports parse time and peak RSS growth for every installed JSON backend,
+and for the streaming 'parameters' extraction against a full parse.
+Each measurement runs in a fresh interpreter so peak RSS is not shared.
+
+    python benchmarks/bench_json.py --sizes 1K 1M 50M
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+
+__SRC_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src")
+
+__CHILD = """
+import json, resource, sys, time
+from pyazuretoolkit import az_json
+mode, backend, file_name = sys.argv[1:4]
+az_json.set_backend(backend)
+before = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+start = time.perf_counter()
+if mode == "stream":
+    az_json.extract_key(file_name, "parameters")
+else:
+    az_json.load_file(file_name)["parameters"]
+elapsed = time.perf_counter() - start
+after = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+# ru_maxrss is KiB on Linux, bytes on macOS
+scale = 1 if sys.platform == "darwin" else 1024
+print(json.dumps({"elapsed": elapsed, "peak_rss": (after - before) * scale}))
+"""
+
+__UNITS = {"K": 1024, "M": 1024 * 1024}
+
+# ******************************************************************************** #
+
+
+def parse_size(size: str) -> int:
+    """
+    Parses sizes like 1K, 10M
+    """
+    unit = size[-1].upper()
+    if unit in __UNITS:
+        return int(float(size[:-1]) * __UNITS[unit])
+    return int(size)
+
+
+# ******************************************************************************** #
+
+
+def write_template(file_name: str, size: int) -> None:
+    """
+    Writes a synthetic template of roughly size bytes - storage accounts with
+    embedded deployment scripts, and a parameters block at the end
+    """
+    script = "echo 'provisioning'\\n" * 20
+    with open(file_name, "w") as file:
+        file.write('{"$schema": "https://schema.management.azure.com/schemas/'
+                   '2019-04-01/deploymentTemplate.json#", "contentVersion": '
+                   '"1.0.0.0", "resources": [')
+        written = 0
+        index = 0
+        while written < size:
+            resource = json.dumps(
+                {
+                    "type": "Microsoft.Resources/deploymentScripts",
+                    "apiVersion": "2020-10-01",
+                    "name": f"script{index}",
+                    "location": "[resourceGroup().location]",
+                    "dependsOn": [f"[resourceId('x', 'script{index - 1}')]"],
+                    "properties": {"scriptContent": script, "retentionInterval": "P1D"},
+                }
+            )
+            file.write(("," if index else "") + resource)
+            written += len(resource) + 1
+            index += 1
+        file.write(
+            '], "parameters": {"storageAccountType": {"value": "Standard_LRS"}}}'
+        )
+
+
+# ******************************************************************************** #
+
+
+def run_case(mode: str, backend: str, file_name: str) -> dict:
+    """
+    Runs one parse in a fresh interpreter and returns its measurements
+    """
+    env = dict(os.environ, PYTHONPATH=__SRC_DIR)
+    output = subprocess.run(
+        [sys.executable, "-c", __CHILD, mode, backend, file_name],  # noqa: S603
+        capture_output=True,
+        text=True,
+        check=True,
+        env=env,
+    ).stdout
+    return json.loads(output)
+
+
+# ******************************************************************************** #
+
+
+def main() -> None:
+    """Main function"""
+    parser = argparse.ArgumentParser(description="Template parsing benchmark.")
+    parser.add_argument(
+        "--sizes", nargs="+", default=["1K", "100K", "1M", "10M", "50M"]
+    )
+    args = parser.parse_args()
+
+    sys.path.insert(0, __SRC_DIR)
+    # pylint: disable=import-outside-toplevel
+    from pyazuretoolkit import az_json
+
+    backends = []
+    for backend in az_json.BACKENDS:
+        try:
+            az_json.set_backend(backend)
+            backends.append(backend)
+        except ImportError:
+            continue
+
+    print(f"{'size':>6} {'backend':8} {'mode':7} {'time':>10} {'peak RSS':>12}")
+    with tempfile.TemporaryDirectory() as temp_dir:
+        for size in args.sizes:
+            file_name = os.path.join(temp_dir, f"template-{size}.json")
+            write_template(file_name, parse_size(size))
+            for backend in backends:
+                for mode in ("full", "stream"):
+                    result = run_case(mode, backend, file_name)
+                    print(
+                        f"{size:>6} {backend:8} {mode:7}"
+                        f" {result['elapsed'] * 1000:8.2f}ms"
+                        f" {result['peak_rss'] / (1024 * 1024):9.1f}MiB"
+                    )
+
+
+# Main check
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+""" Benchmarks the overhead of the logging_helper.log decorator.
+Compares a plain call, a decorated call with DEBUG off and a decorated
+call with DEBUG on (records go to a NullHandler), passing a large
+template dict as the argument.
+
+    python benchmarks/bench_logging.py --calls 200000
+"""
+import argparse
+import logging
+import os
+import sys
+import timeit
+
+__SRC_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src")
+
+# ******************************************************************************** #
+
+
+def deploy(template: dict, mode: str = "Incremental") -> int:
+    """
+    Stand-in for an instrumented toolkit function
+    """
+    return len(template)
+
+
+# ******************************************************************************** #
+
+
+def main() -> None:
+    """Main function"""
+    parser = argparse.ArgumentParser(description="Logging decorator benchmark.")
+    parser.add_argument("--calls", type=int, default=200_000)
+    parser.add_argument(
+        "--debug-calls", type=int, default=20_000, help="calls with DEBUG on"
+    )
+    parser.add_argument("--resources", type=int, default=5_000)
+    args = parser.parse_args()
+
+    sys.path.insert(0, __SRC_DIR)
+    # pylint: disable=import-outside-toplevel
+    from pyazuretoolkit.logging_helper import log, logger
+
+    template = {
+        "resources": [
+            {"name": f"res{i}", "properties": {}} for i in range(args.resources)
+        ]
+    }
+    decorated = log(deploy)
+
+    def measure(func: callable, calls: int) -> float:
+        elapsed = min(timeit.repeat(lambda: func(template), number=calls, repeat=3))
+        return elapsed / calls * 1e9
+
+    plain = measure(deploy, args.calls)
+    logger.setLevel(logging.INFO)
+    debug_off = measure(decorated, args.calls)
+    # DEBUG on formats every call - fewer calls keep the run short
+    logger.setLevel(logging.DEBUG)
+    debug_on = measure(decorated, args.debug_calls)
+    logger.setLevel(logging.NOTSET)
+
+    print(f"{'case':12} {'ns/call':>10} {'overhead':>10}")
+    print(f"{'plain':12} {plain:10.1f} {'':>10}")
+    print(f"{'debug off':12} {debug_off:10.1f} {debug_off - plain:10.1f}")
+    print(f"{'debug on':12} {debug_on:10.1f} {debug_on - plain:10.1f}")
+
+
+# Main check
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+#!/usr/bin/env python3
+""" Benchmarks the login check - Azure CLI invocation vs the lightweight path.
+Each mode runs in a fresh interpreter so import time and peak RSS are
+measured from a cold start. Needs an 'az login'-ed environment.
+
+    python benchmarks/bench_login.py -sub 00000000-0000-0000-0000-000000000000
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+
+__SRC_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src")
+
+__CHILD = """
+import json, resource, sys, time
+start = time.perf_counter()
+from pyazuretoolkit import az_login
+from pyazuretoolkit.az_client_cache import get_registry
+credentials = get_registry().get_credential() if sys.argv[2] == "sdk" else None
+az_login.check_azure_login(sys.argv[1], credentials, use_cli=sys.argv[2] == "cli")
+elapsed = time.perf_counter() - start
+# ru_maxrss is KiB on Linux, bytes on macOS
+scale = 1 if sys.platform == "darwin" else 1024
+peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * scale
+print(json.dumps({"elapsed": elapsed, "peak_rss": peak}))
+"""
+
+# ******************************************************************************** #
+
+
+def run_mode(subscription_id: str, mode: str) -> dict:
+    """
+    Runs one login check in a fresh interpreter and returns its measurements
+    """
+    env = dict(os.environ, PYTHONPATH=__SRC_DIR)
+    output = subprocess.run(
+        [sys.executable, "-c", __CHILD, subscription_id, mode],  # noqa: S603
+        capture_output=True,
+        text=True,
+        check=True,
+        env=env,
+    ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+# ******************************************************************************** #
+
+
+def main() -> None:
+    """Main function"""
+    parser = argparse.ArgumentParser(description="Login check benchmark.")
+    parser.add_argument("--SubscriptionId", "-sub", required=True)
+    parser.add_argument("--runs", type=int, default=3)
+    args = parser.parse_args()
+
+    # cli     - the old path, azure.cli.core 'account show'
+    # profile - azureProfile.json lookup only
+    # sdk     - profile lookup plus token validation
+    for mode in ("cli", "profile", "sdk"):
+        results = [run_mode(args.SubscriptionId, mode) for _ in range(args.runs)]
+        elapsed = min(result["elapsed"] for result in results)
+        peak = max(result["peak_rss"] for result in results) / (1024 * 1024)
+        print(f"{mode:8}: {elapsed:7.3f}s  peak RSS {peak:8.1f} MiB")
+
+
+# Main check
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,141 @@
+#!/usr/bin/env python3
+""" Benchmarks the multi-process deployment pipeline.
+Renders many per-tenant parameter files for one synthetic template and
+times preparing them - load, validate, fingerprint, serialise - with
+1 to N worker processes. With --submit the prepared bodies are also
+deployed to the in-process fake ARM from the single submitter thread.
+
+    python benchmarks/bench_prepare.py --variants 2000 --resources 200
+"""
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+import uuid
+from types import SimpleNamespace
+
+from bench_validate import synthetic_template
+
+__SRC_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src")
+
+# ******************************************************************************** #
+
+
+def write_variants(
+    directory: str, variants: int, resources: int, subscription_id: str
+) -> list:
+    """
+    Writes the template and one parameters file per tenant,
+    returns a deployment target per tenant
+    """
+    # pylint: disable=import-outside-toplevel
+    from pyazuretoolkit.az_manifest import DeploymentTarget
+
+    template_file = os.path.join(directory, "main.json")
+    with open(template_file, "w") as file:
+        json.dump(synthetic_template(resources), file)
+
+    targets = []
+    for tenant in range(variants):
+        params_file = os.path.join(directory, f"tenant{tenant}.params.json")
+        with open(params_file, "w") as file:
+            json.dump(
+                {
+                    "parameters": {
+                        "prefix": {"value": f"t{tenant}"},
+                        "adminPassword": {"value": "not-a-secret"},
+                    }
+                },
+                file,
+            )
+        targets.append(
+            DeploymentTarget(
+                subscription_id,
+                f"rg-tenant{tenant}",
+                "eastus",
+                template_file,
+                params_file,
+            )
+        )
+    return targets
+
+
+# ******************************************************************************** #
+
+
+def main() -> None:
+    """Main function"""
+    parser = argparse.ArgumentParser(
+        description="Multi-process pipeline benchmark."
+    )
+    parser.add_argument("--variants", type=int, default=1000)
+    parser.add_argument("--resources", type=int, default=200)
+    parser.add_argument(
+        "--processes", type=int, nargs="+", default=None,
+        help="worker process counts, defaults to 1 up to the CPU count",
+    )
+    parser.add_argument(
+        "--submit", action="store_true", help="also deploy to the fake ARM"
+    )
+    args = parser.parse_args()
+
+    sys.path.insert(0, __SRC_DIR)
+    # pylint: disable=import-outside-toplevel
+    from pyazuretoolkit import az_prepare, az_throttle
+
+    cpus = os.cpu_count() or 1
+    counts = args.processes or sorted({1, *range(2, cpus + 1, 2), cpus})
+    subscription_id = str(uuid.uuid4())
+    # measure the pipeline, not the client side rate limit
+    az_throttle.get_throttle(
+        subscription_id,
+        limits={kind: (1e9, 1e9) for kind in az_throttle.DEFAULT_LIMITS},
+    )
+
+    with tempfile.TemporaryDirectory() as directory:
+        targets = write_variants(
+            directory, args.variants, args.resources, subscription_id
+        )
+        print(
+            f"{args.variants} variants of a {args.resources} resource template,"
+            f" {cpus} CPUs"
+        )
+        print(
+            f"{'processes':>10} {'seconds':>9} {'targets/s':>10}"
+            f" {'speedup':>8} {'body':>9}"
+        )
+        baseline = None
+        for processes in counts:
+            start = time.perf_counter()
+            if args.submit:
+                from tests.fake_arm import FakeArm
+
+                client = FakeArm().client(subscription_id)
+                results = az_prepare.deploy_targets_multiprocess(
+                    targets,
+                    processes,
+                    registry=SimpleNamespace(
+                        get_client=lambda _, client=client: client
+                    ),
+                    max_in_flight=64,
+                )
+                body = 0
+                failed = sum(1 for result in results if not result.succeeded)
+            else:
+                prepared = list(az_prepare.prepare_deployments(targets, processes))
+                body = sum(len(p.body or b"") for p in prepared) / len(prepared)
+                failed = sum(1 for p in prepared if p.error)
+            elapsed = time.perf_counter() - start
+            baseline = baseline or elapsed
+            print(
+                f"{processes:>10} {elapsed:9.2f} {args.variants / elapsed:10.1f}"
+                f" {baseline / elapsed:7.2f}x {body / 1e3:7.1f}KB"
+                + (f"  {failed} failed" if failed else "")
+            )
+
+
+# Main check
+if __name__ == "__main__":
+    main()
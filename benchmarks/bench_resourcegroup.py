@@ -0,0 +1,75 @@
+#!/usr/bin/env python3
+""" Benchmarks resource group existence checks - one HEAD call per group
+against a single paged list() scan, against the in-process fake ARM with
+per-request latency.
+
+    python benchmarks/bench_resourcegroup.py --groups 10 100 500 --latency 0.03
+"""
+import argparse
+import os
+import sys
+import time
+import uuid
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+# pylint: disable=wrong-import-position
+from pyazuretoolkit import az_resourcegroup, az_throttle
+from tests.fake_arm import FakeArm
+
+# ******************************************************************************** #
+
+
+def fake_client(existing: int, latency: float, page_size: int) -> tuple:
+    """
+    A FakeArm holding existing resource groups and a client of a fresh
+    subscription, so neither the client cache nor the token buckets carry
+    over between runs
+    """
+    subscription_id = str(uuid.uuid4())
+    az_throttle.get_throttle(
+        subscription_id,
+        limits={kind: (1e9, 1e9) for kind in az_throttle.DEFAULT_LIMITS},
+    )
+    arm = FakeArm(latency=latency, page_size=page_size)
+    for index in range(existing):
+        arm.add_resource_group(subscription_id, f"rg-{index:05d}", "australiaeast")
+    return arm, arm.client(subscription_id)
+
+
+# ******************************************************************************** #
+
+
+def main() -> None:
+    """Main function"""
+    parser = argparse.ArgumentParser(description="Resource group check benchmark.")
+    parser.add_argument("--groups", type=int, nargs="+", default=[10, 100, 500])
+    parser.add_argument("--existing", type=int, default=2000)
+    parser.add_argument("--latency", type=float, default=0.03)
+    parser.add_argument("--page-size", type=int, default=1000)
+    args = parser.parse_args()
+
+    print(f"{'groups':>7} {'HEAD calls':>18} {'list scan':>18}")
+    for count in args.groups:
+        names = [f"rg-{index * 3:05d}" for index in range(count)]
+
+        arm, client = fake_client(args.existing, args.latency, args.page_size)
+        start = time.perf_counter()
+        for name in names:
+            az_resourcegroup.get_resource_group(client, name)
+        head_elapsed, head_requests = time.perf_counter() - start, arm.requests
+
+        arm, client = fake_client(args.existing, args.latency, args.page_size)
+        start = time.perf_counter()
+        az_resourcegroup.get_resource_groups(client, names)
+        list_elapsed, list_requests = time.perf_counter() - start, arm.requests
+
+        print(
+            f"{count:>7} {head_elapsed:8.3f}s ({head_requests:4d} req)"
+            f" {list_elapsed:8.3f}s ({list_requests:4d} req)"
+        )
+
+
+# Main check
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+#!/usr/bin/env python3
+""" Benchmarks subscription id validation.
+Compares the previous re.search based check against check_valid_sub_id,
+the SubscriptionId type and validate_many, over a manifest-like list of
+ids where each subscription appears many times.
+
+    python benchmarks/bench_subscription.py --targets 10000 --subscriptions 50
+"""
+import argparse
+import os
+import re
+import sys
+import time
+import uuid
+
+__SRC_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src")
+
+# ******************************************************************************** #
+
+
+def legacy_check_valid_sub_id(subscription_id: str) -> bool:
+    """
+    The check as it was before the SubscriptionId type
+    """
+    if isinstance(subscription_id, str):
+        re_result = re.search(
+            r"^(\{{0,1}([0-9a-fA-F]){8}-([0-9a-fA-F]){4}-([0-9a-fA-F]){4}"
+            r"-([0-9a-fA-F]){4}-([0-9a-fA-F]){12}\}{0,1})$",
+            subscription_id,
+        )
+        return bool(re_result)
+    return False
+
+
+# ******************************************************************************** #
+
+
+def main() -> None:
+    """Main function"""
+    parser = argparse.ArgumentParser(
+        description="Subscription id validation benchmark."
+    )
+    parser.add_argument("--targets", type=int, default=10_000)
+    parser.add_argument("--subscriptions", type=int, default=50)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    sys.path.insert(0, __SRC_DIR)
+    # pylint: disable=import-outside-toplevel
+    from pyazuretoolkit.az_subscription import (
+        SubscriptionId,
+        check_valid_sub_id,
+        validate_many,
+    )
+
+    subscriptions = [str(uuid.uuid4()) for _ in range(args.subscriptions)]
+    ids = [subscriptions[i % len(subscriptions)] for i in range(args.targets)]
+
+    cases = {
+        "legacy re.search": lambda: [legacy_check_valid_sub_id(s) for s in ids],
+        "check_valid_sub_id": lambda: [check_valid_sub_id(s) for s in ids],
+        "SubscriptionId": lambda: [SubscriptionId(s) for s in ids],
+        "validate_many": lambda: validate_many(ids),
+    }
+
+    print(f"{args.targets} ids, {args.subscriptions} distinct")
+    print(f"{'case':20} {'total':>10} {'per id':>10}")
+    for name, case in cases.items():
+        best = float("inf")
+        for _ in range(args.repeat):
+            # cold - as on the first read of a manifest
+            SubscriptionId._cache.clear()
+            start = time.perf_counter()
+            case()
+            best = min(best, time.perf_counter() - start)
+        print(f"{name:20} {best * 1000:8.2f}ms {best / args.targets * 1e9:8.0f}ns")
+
+
+# Main check
+if __name__ == "__main__":
+    main()
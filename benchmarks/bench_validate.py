@@ -0,0 +1,179 @@
+#!/usr/bin/env python3
+""" Benchmarks offline template validation.
+Builds synthetic templates of a few thousand resources - storage accounts,
+networks with subnets and VMs chained through resourceId() dependsOn - and
+times validate_template on them, cold and with the parse cache warm.
+
+    python benchmarks/bench_validate.py --resources 2000 5000 10000
+"""
+import argparse
+import json
+import os
+import sys
+import time
+
+__SRC_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src")
+
+# ******************************************************************************** #
+
+
+def synthetic_template(resources: int) -> dict:
+    """
+    Returns a template with about this many resources, groups of a network,
+    a subnet, a NIC and a VM depending on each other and on a shared account
+    """
+    template = {
+        "$schema": "https://schema.management.azure.com/schemas/2019-04-01/deploymentTemplate.json#",
+        "contentVersion": "1.0.0.0",
+        "parameters": {
+            "prefix": {"type": "string", "defaultValue": "bench", "maxLength": 10},
+            "location": {
+                "type": "string",
+                "defaultValue": "[resourceGroup().location]",
+            },
+            "vmSize": {
+                "type": "string",
+                "defaultValue": "Standard_B2s",
+                "allowedValues": ["Standard_B1s", "Standard_B2s", "Standard_D2s_v5"],
+            },
+            "adminPassword": {"type": "securestring"},
+        },
+        "variables": {
+            "storageName": (
+                "[toLower(concat(parameters('prefix'),"
+                " uniqueString(resourceGroup().id)))]"
+            ),
+            "tags": {"env": "bench", "owner": "[parameters('prefix')]"},
+        },
+        "resources": [
+            {
+                "type": "Microsoft.Storage/storageAccounts",
+                "apiVersion": "2023-01-01",
+                "name": "[variables('storageName')]",
+                "location": "[parameters('location')]",
+                "sku": {"name": "Standard_LRS"},
+                "kind": "StorageV2",
+                "tags": "[variables('tags')]",
+            }
+        ],
+        "outputs": {},
+    }
+    storage_id = (
+        "[resourceId('Microsoft.Storage/storageAccounts', variables('storageName'))]"
+    )
+    for group in range(max(1, resources // 4)):
+        vnet = f"[concat(parameters('prefix'), '-vnet-{group}')]"
+        vnet_id = (
+            "[resourceId('Microsoft.Network/virtualNetworks',"
+            f" concat(parameters('prefix'), '-vnet-{group}'))]"
+        )
+        subnet_id = (
+            "[resourceId('Microsoft.Network/virtualNetworks/subnets',"
+            f" concat(parameters('prefix'), '-vnet-{group}'), 'default')]"
+        )
+        nic_id = (
+            "[resourceId('Microsoft.Network/networkInterfaces',"
+            f" concat(parameters('prefix'), '-nic-{group}'))]"
+        )
+        template["resources"] += [
+            {
+                "type": "Microsoft.Network/virtualNetworks",
+                "apiVersion": "2023-05-01",
+                "name": vnet,
+                "location": "[parameters('location')]",
+                "tags": "[variables('tags')]",
+                "properties": {
+                    "addressSpace": {"addressPrefixes": [f"10.{group % 256}.0.0/16"]}
+                },
+            },
+            {
+                "type": "Microsoft.Network/virtualNetworks/subnets",
+                "apiVersion": "2023-05-01",
+                "name": f"[concat(parameters('prefix'), '-vnet-{group}', '/default')]",
+                "dependsOn": [vnet_id],
+                "properties": {"addressPrefix": f"10.{group % 256}.0.0/24"},
+            },
+            {
+                "type": "Microsoft.Network/networkInterfaces",
+                "apiVersion": "2023-05-01",
+                "name": f"[concat(parameters('prefix'), '-nic-{group}')]",
+                "location": "[parameters('location')]",
+                "dependsOn": [subnet_id],
+                "properties": {
+                    "ipConfigurations": [
+                        {
+                            "name": "ipconfig1",
+                            "properties": {
+                                "subnet": {"id": subnet_id},
+                                "privateIPAllocationMethod": "Dynamic",
+                            },
+                        }
+                    ]
+                },
+            },
+            {
+                "type": "Microsoft.Compute/virtualMachines",
+                "apiVersion": "2023-03-01",
+                "name": f"[concat(parameters('prefix'), '-vm-{group}')]",
+                "location": "[parameters('location')]",
+                "dependsOn": [nic_id, storage_id],
+                "properties": {
+                    "hardwareProfile": {"vmSize": "[parameters('vmSize')]"},
+                    "osProfile": {
+                        "computerName": f"vm{group}",
+                        "adminUsername": "azureuser",
+                        "adminPassword": "[parameters('adminPassword')]",
+                    },
+                    "networkProfile": {"networkInterfaces": [{"id": nic_id}]},
+                    "diagnosticsProfile": {
+                        "bootDiagnostics": {
+                            "enabled": True,
+                            "storageUri": (
+                                f"[reference({storage_id[1:-1]})"
+                                ".primaryEndpoints.blob]"
+                            ),
+                        }
+                    },
+                },
+            },
+        ]
+    return template
+
+
+# ******************************************************************************** #
+
+
+def main() -> None:
+    """Main function"""
+    parser = argparse.ArgumentParser(description="Template validation benchmark.")
+    parser.add_argument("--resources", type=int, nargs="+", default=[1000, 5000, 10000])
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    sys.path.insert(0, __SRC_DIR)
+    # pylint: disable=import-outside-toplevel
+    from pyazuretoolkit import az_validate
+
+    parameters = {"adminPassword": {"value": "not-a-secret"}}
+    print(f"{'resources':>10} {'size':>8} {'cold':>10} {'warm':>10} {'issues':>7}")
+    for count in args.resources:
+        template = synthetic_template(count)
+        size = len(json.dumps(template))
+        cold = warm = float("inf")
+        for _ in range(args.repeat):
+            az_validate.clear_caches()
+            start = time.perf_counter()
+            report = az_validate.validate_template(template, parameters)
+            cold = min(cold, time.perf_counter() - start)
+            start = time.perf_counter()
+            az_validate.validate_template(template, parameters)
+            warm = min(warm, time.perf_counter() - start)
+        print(
+            f"{report.resources:>10} {size / 1e6:6.1f}MB {cold * 1000:8.1f}ms"
+            f" {warm * 1000:8.1f}ms {len(report.issues):>7}"
+        )
+
+
+# Main check
+if __name__ == "__main__":
+    main()
@@ -1,11 +1,10 @@
 #!/usr/bin/env python3  
 """ A python script to deploy an Azure Bicep or ARM Template.
 """
-import argparse
 import sys
 
 from src.pyazuretoolkit import (
-    az_deploy,
+    cli,
     console_helper,
 )
 
@@ -35,45 +34,8 @@ def main() -> None:
 
     # ******************************************************************************** #
 
-    # help message string
-    # pylint: disable=line-too-long
-    help_msg: str = (
-        "Deploys an Azure Bicep or ARM Template"
-        "to a given Subscription and Resource Group."
-        " **Assumes you are logged in to the AzureCLI."
-    )
-
-    # add Args
-    parser = argparse.ArgumentParser(description=help_msg)
-    parser.add_argument(
-        "--SubscriptionId", "-sub", required=True, help="Subscription Id."
-    )
-    parser.add_argument(
-        "--ResourceGroup", "-rsg", required=True, help="Resource Group."
-    )
-    parser.add_argument(
-        "--Location", "-loc", required=True, help="Target Location/Region."
-    )
-    parser.add_argument(
-        "--template", "-temp", required=True, help="Resource Template file."
-    )
-    parser.add_argument(
-        "--params", "-params", required=False, help="Resource Template Parameters file."
-    )
-    args = parser.parse_args()
-
-    # ******************************************************************************** #
-
-    # set values from command line
-    subscription_id = args.SubscriptionId
-    resource_group_name = args.ResourceGroup
-    location = args.Location
-
-    # Call the deploy class
-    deploy = az_deploy.DeploymentHelper(subscription_id, resource_group_name, location)
-    deploy.deploy_resource_group()
-
-    # deploy template
+    # parse the arguments and deploy
+    cli.main()
 
     # ******************************************************************************** #
 
@@ -11,6 +11,22 @@ REQUIREMENTS = [
     "azure-common"
 ]
 
+AIO_REQUIREMENTS = [
+    "aiohttp"
+]
+
+FASTJSON_REQUIREMENTS = [
+    "orjson"
+]
+
+TELEMETRY_REQUIREMENTS = [
+    "opentelemetry-api"
+]
+
+YAML_REQUIREMENTS = [
+    "pyyaml"
+]
+
 DEV_REQUIREMENTS = [
     "azure-cli",
     "azure-cli-core",
@@ -19,7 +35,8 @@ DEV_REQUIREMENTS = [
     "azure-common"
     "mypy",
     "ruff",
-    "pytest"
+    "pytest",
+    "pytest-benchmark"
 ]
 
 setup(
@@ -39,9 +56,16 @@ setup(
         "License :: OSI Approved :: MIT License",
         "Operating System :: OS Independent",
     ],
+    entry_points={
+        "console_scripts": ["pyazuretoolkit=pyazuretoolkit.cli:main"],
+    },
     install_requires=REQUIREMENTS,
     extras_require={
         "dev": DEV_REQUIREMENTS,
+        "aio": AIO_REQUIREMENTS,
+        "fastjson": FASTJSON_REQUIREMENTS,
+        "telemetry": TELEMETRY_REQUIREMENTS,
+        "yaml": YAML_REQUIREMENTS,
     },
     python_requires=">=3.11",
 )
@@ -1 +1,59 @@
-__all__ = ["*"]
\ No newline at end of file
+"""
+Python Azure Toolkit
+Submodules are imported lazily on first attribute access (PEP 562),
+so importing the package does not load the Azure SDK.
+"""
+import importlib
+
+__all__ = [
+    "aio",
+    "az_bicep",
+    "az_client_cache",
+    "az_deploy",
+    "az_fingerprint",
+    "az_history",
+    "az_journal",
+    "az_json",
+    "az_login",
+    "az_manifest",
+    "az_parallel",
+    "az_pipeline",
+    "az_polling",
+    "az_prepare",
+    "az_resourcegroup",
+    "az_results",
+    "az_scheduler",
+    "az_state",
+    "az_subscription",
+    "az_subset",
+    "az_telemetry",
+    "az_template_store",
+    "az_throttle",
+    "az_validate",
+    "cli",
+    "console_helper",
+    "logging_helper",
+]
+
+# ******************************************************************************** #
+
+
+def __getattr__(name: str) -> object:
+    """
+    Imports a submodule the first time it is accessed
+    """
+    if name in __all__:
+        module = importlib.import_module(f".{name}", __name__)
+        globals()[name] = module
+        return module
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+# ******************************************************************************** #
+
+
+def __dir__() -> list:
+    return sorted(set(globals()) | set(__all__))
+
+
+# ******************************************************************************** #
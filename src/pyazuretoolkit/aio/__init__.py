@@ -0,0 +1,35 @@
+"""
+Async counterparts of the toolkit built on azure.mgmt.resource.resources.aio
+Submodules are imported lazily on first attribute access (PEP 562),
+they need the aio extra (aiohttp).
+"""
+import importlib
+
+__all__ = [
+    "az_deploy",
+    "az_login",
+    "az_resourcegroup",
+]
+
+# ******************************************************************************** #
+
+
+def __getattr__(name: str) -> object:
+    """
+    Imports a submodule the first time it is accessed
+    """
+    if name in __all__:
+        module = importlib.import_module(f".{name}", __name__)
+        globals()[name] = module
+        return module
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+# ******************************************************************************** #
+
+
+def __dir__() -> list:
+    return sorted(set(globals()) | set(__all__))
+
+
+# ******************************************************************************** #
@@ -0,0 +1,163 @@
+"""
+Deploys Azure resources using the
+async Azure Python SDK
+"""
+import asyncio
+from typing import Optional
+
+from pyazuretoolkit.az_deploy import deployment_properties, load_deployment_params
+from pyazuretoolkit.az_history import make_deployment_name
+from pyazuretoolkit.console_helper import (
+    print_command_message,
+    print_error_message,
+)
+
+from .az_login import AzureSession
+from .az_resourcegroup import (
+    create_resource_group,
+    delete_resource_group,
+    get_resource_group,
+)
+
+# ******************************************************************************** #
+
+
+class DeploymentHelper:
+    """
+    Async deployment class - Deploys Azure resources
+    Use as an async context manager:
+
+        async with DeploymentHelper(sub_id, rg_name, location) as deploy:
+            await deploy.deploy_resource_template(template, params)
+    """
+
+    # ******************************************************************************** #
+
+    def __init__(
+        self,
+        subscription_id: str,
+        resource_group_name: str,
+        location: str,
+        session: Optional[AzureSession] = None,
+        timeout: Optional[float] = None,
+    ) -> None:
+        """Init function.
+        Parameters
+        ----------
+        subscription_id: str
+        resource_group_name: str
+        location: str
+        session: optional AzureSession shared with other helpers
+        timeout: optional overall timeout in seconds for each deployment
+        """
+        self.subscription_id = subscription_id
+        self.resource_group_name = resource_group_name
+        self.location = location
+        self.timeout = timeout
+
+        self.__owns_session = session is None
+        self.session = session if session is not None else AzureSession()
+        self.resource_client = None
+
+    async def __aenter__(self) -> "DeploymentHelper":
+        # Do login
+        self.resource_client = await self.session.get_client(self.subscription_id)
+        if self.resource_client is None:
+            await self.__aexit__(None, None, None)
+            raise ValueError(f"Invalid SubscriptionID - '{self.subscription_id}'")
+        return self
+
+    async def __aexit__(self, *exc_details) -> None:
+        if self.__owns_session:
+            await self.session.close()
+
+    # ******************************************************************************** #
+
+    async def __do_resource_deployment(
+        self, deployment_name: str, deployment_params: dict
+    ) -> object:
+        """do the deployment and print a status message
+        Parameters
+        ----------
+        deployment_name: str
+        deployment_params: deployment properties
+        """
+        poller = await self.resource_client.deployments.begin_create_or_update(
+            self.resource_group_name,
+            deployment_name,
+            {"properties": deployment_properties(deployment_params)},
+        )
+
+        # awaiting the result is event driven, no status loop needed
+        print_command_message("**Deployment started **")
+        result = await asyncio.wait_for(poller.result(), self.timeout)
+
+        # print the result
+        print_command_message(f"Deployment result - {result}")
+        return result
+
+    # ******************************************************************************** #
+
+    async def deploy_resource_template(
+        self,
+        template_file: str,
+        template_params_file: str,
+        deploy_prefix: str = "pydeploy",
+    ) -> object:
+        """Deploys a template to the resource group
+        Parameters
+        ----------
+        template_file - ARM template file
+        template_params_file: - Template params file
+        deploy_prefix: - Deployment name prefix
+
+        Returns
+        -------
+        the deployment result or None if the template was not found
+        """
+        # unique per submission, same day reruns do not overwrite each other
+        deployment_name = make_deployment_name(deploy_prefix)
+
+        # check if the resource exists..if not create it
+        await self.deploy_resource_group()
+
+        # file parsing blocks, keep it off the event loop
+        try:
+            deployment_params = await asyncio.to_thread(
+                load_deployment_params, template_file, template_params_file
+            )
+        except FileNotFoundError as ex:
+            print_error_message(f"##ERROR - {ex.filename} not found>!")
+            return None
+
+        print_command_message("**Deploying template **")
+
+        # do the deployment
+        result = await self.__do_resource_deployment(deployment_name, deployment_params)
+        print_command_message("**Deployment completed. **")
+        return result
+
+    # ******************************************************************************** #
+
+    async def deploy_resource_group(self) -> None:
+        """
+        creates a resource group..if it doesnt exist
+        """
+        if not await get_resource_group(self.resource_client, self.resource_group_name):
+            await create_resource_group(
+                self.resource_client, self.resource_group_name, self.location
+            )
+
+    # ******************************************************************************** #
+
+    async def destroy_resource_group(self) -> None:
+        """
+        Deletes a resource group if it exists and waits for the delete
+        """
+        if await get_resource_group(self.resource_client, self.resource_group_name):
+            poller = await delete_resource_group(
+                self.resource_client, self.resource_group_name
+            )
+            await poller.result()
+
+    # ******************************************************************************** #
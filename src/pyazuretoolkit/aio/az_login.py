@@ -0,0 +1,184 @@
+""" Async login helpers
+Shares one credential and one HTTP session across async management clients
+"""
+import asyncio
+from typing import Optional
+
+from aiohttp import ClientSession
+from azure.core.pipeline.transport import AioHttpTransport
+from azure.identity.aio import AzureCliCredential
+from azure.mgmt.resource.resources.aio import ResourceManagementClient
+
+from pyazuretoolkit.az_login import check_azure_login
+from pyazuretoolkit.az_pipeline import apply_pipeline_policies
+from pyazuretoolkit.az_subscription import check_valid_sub_id
+
+# ******************************************************************************** #
+
+
+class AzureSession:
+    """
+    Async context manager owning a credential and an aiohttp session.
+    Every client it hands out shares the session's connection pool.
+    """
+
+    def __init__(
+        self,
+        credentials: Optional[AzureCliCredential] = None,
+        check_login: bool = True,
+        **client_kwargs,
+    ) -> None:
+        """Init function.
+        Parameters
+        ----------
+        credentials: optional async credential, AzureCliCredential by default
+        check_login: bool - run the Azure CLI login check per subscription
+        client_kwargs: extra keyword arguments for every ResourceManagementClient,
+            a transport replaces the shared aiohttp one
+        """
+        self.__owns_credentials = credentials is None
+        self.credentials = credentials
+        self.check_login = check_login
+        self.client_kwargs = client_kwargs
+        self.__session: ClientSession = None
+        self.__clients: dict = {}
+        self.__lock = asyncio.Lock()
+
+    async def __aenter__(self) -> "AzureSession":
+        await self.open()
+        return self
+
+    async def __aexit__(self, *exc_details) -> None:
+        await self.close()
+
+    # ******************************************************************************** #
+
+    async def open(self) -> None:
+        """
+        Opens the shared HTTP session
+        """
+        if self.credentials is None:
+            self.credentials = AzureCliCredential()
+        if self.__session is None:
+            self.__session = ClientSession()
+
+    # ******************************************************************************** #
+
+    async def close(self) -> None:
+        """
+        Closes every client, the shared HTTP session and owned credentials
+        """
+        clients, self.__clients = list(self.__clients.values()), {}
+        for client in clients:
+            await client.close()
+        if self.__session is not None:
+            await self.__session.close()
+            self.__session = None
+        if self.__owns_credentials and self.credentials is not None:
+            await self.credentials.close()
+            self.credentials = None
+
+    # ******************************************************************************** #
+
+    async def get_client(self, subscription_id: str) -> ResourceManagementClient:
+        """Returns the shared client for a subscription, logging in once
+        Parameters
+        ----------
+        subscription_id : string
+
+        Returns
+        -------
+        ResourceManagementClient or None if the subscription id is invalid
+        """
+        async with self.__lock:
+            if subscription_id not in self.__clients:
+                await self.open()
+                client_kwargs = dict(self.client_kwargs)
+                client_kwargs.setdefault(
+                    "transport",
+                    AioHttpTransport(session=self.__session, session_owner=False),
+                )
+                client = await do_login(
+                    subscription_id,
+                    self.credentials,
+                    check_login=self.check_login,
+                    **client_kwargs,
+                )
+                if client is None:
+                    return None
+                self.__clients[subscription_id] = client
+            return self.__clients[subscription_id]
+
+
+# ******************************************************************************** #
+
+
+class BlockingCredential:
+    """
+    Blocking view of an async credential for the sync login check, which
+    runs in a worker thread while the event loop keeps serving get_token
+    """
+
+    def __init__(
+        self, credentials: AzureCliCredential, loop: asyncio.AbstractEventLoop
+    ) -> None:
+        """Init function.
+        Parameters
+        ----------
+        credentials: async credential
+        loop: the event loop the credential belongs to
+        """
+        self.credentials = credentials
+        self.loop = loop
+
+    def get_token(self, *scopes, **kwargs) -> object:
+        """
+        Returns an AccessToken from the async credential
+        """
+        return asyncio.run_coroutine_threadsafe(
+            self.credentials.get_token(*scopes, **kwargs), self.loop
+        ).result()
+
+
+# ******************************************************************************** #
+
+
+async def do_login(
+    subscription_id: str,
+    credentials: AzureCliCredential,
+    check_login: bool = True,
+    **client_kwargs,
+) -> ResourceManagementClient:
+    """
+    Do the login
+
+    Parameters
+    ----------
+    subscription_id : string
+    credentials: async AzureCliCredential
+    check_login: bool - run the Azure CLI login check first
+    client_kwargs: extra keyword arguments for ResourceManagementClient,
+        i.e. a shared transport
+
+    Returns
+    -------
+    ResourceManagementClient or None if the subscription id is invalid
+    """
+    # Check if SubscriptionID is valid
+    if check_valid_sub_id(subscription_id):
+        # the CLI login check blocks, keep it off the event loop - the token
+        # is still validated through the async credential
+        if check_login:
+            await asyncio.to_thread(
+                check_azure_login,
+                subscription_id,
+                BlockingCredential(credentials, asyncio.get_running_loop()),
+            )
+
+        # Obtain the management object for resources - throttled, retried and counted
+        apply_pipeline_policies(client_kwargs, is_async=True)
+        return ResourceManagementClient(credentials, subscription_id, **client_kwargs)
+    return None
+
+
+# ******************************************************************************** #
@@ -0,0 +1,96 @@
+"""
+Async resource group helper
+"""
+from typing import TYPE_CHECKING
+
+from pyazuretoolkit.az_resourcegroup import get_resource_group_cache
+from pyazuretoolkit.console_helper import (
+    print_command_message,
+)
+
+if TYPE_CHECKING:
+    from azure.core.polling import AsyncLROPoller
+    from azure.mgmt.resource.resources.aio import ResourceManagementClient
+
+# ******************************************************************************** #
+
+
+async def create_resource_group(
+    resource_client: "ResourceManagementClient", resource_group_name: str, location: str
+) -> None:
+    """Deploys a new Azure resource group
+    Parameters
+    ----------
+    resource_client: async ResourceManagementClient
+    resource_group_name: str
+    location: str
+
+    Returns
+    -------
+    nothing
+        Displays output status of the Resource group deployment.
+    """
+    print_command_message(
+        f"Creating resource group - '{resource_group_name}'."
+    )
+    await resource_client.resource_groups.create_or_update(
+        resource_group_name, {"location": location}
+    )
+    get_resource_group_cache(resource_client).set(resource_group_name, True)
+
+
+# ******************************************************************************** #
+
+
+async def delete_resource_group(
+    resource_client: "ResourceManagementClient", resource_group_name: str
+) -> "AsyncLROPoller":
+    """Destroys the Azure resource group
+    Parameters
+    ----------
+    resource_client: async ResourceManagementClient
+    resource_group_name: str
+
+    Returns
+    -------
+    AsyncLROPoller for the delete, await result() to wait for it
+    """
+    print_command_message(
+        f"Deleting resource group - '{resource_group_name}'."
+    )
+    # the group exists until the delete completes - ask ARM next time
+    get_resource_group_cache(resource_client).invalidate(resource_group_name)
+    return await resource_client.resource_groups.begin_delete(resource_group_name)
+
+
+# ******************************************************************************** #
+
+
+async def get_resource_group(
+    resource_client: "ResourceManagementClient",
+    resource_group_name: str,
+    use_cache: bool = True,
+) -> bool:
+    """Checks if the given resource group exists
+    Parameters
+    ----------
+    resource_client: async ResourceManagementClient
+    resource_group_name: str
+    use_cache: bool - answer from the client's resource group cache if fresh
+
+    Returns
+    -------
+    bool resource group exists
+    """
+    cache = get_resource_group_cache(resource_client)
+    if use_cache:
+        exists = cache.get(resource_group_name)
+        if exists is not None:
+            return exists
+
+    exists = await resource_client.resource_groups.check_existence(resource_group_name)
+    cache.set(resource_group_name, exists)
+    return exists
+
+
+# ******************************************************************************** #
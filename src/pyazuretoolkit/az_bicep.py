@@ -0,0 +1,343 @@
+"""
+Bicep helper
+Compiles .bicep files to ARM JSON with a content-addressed compile cache
+"""
+import hashlib
+import json
+import os
+import re
+import shutil
+import subprocess
+import tempfile
+import threading
+from typing import Optional
+
+from .az_state import get_cache_dir
+
+# module 'x.bicep', import ... from 'x.bicep' and using 'x.bicep' statements
+__REFERENCE_PATTERN = re.compile(
+    r"^\s*(?:module\s+\S+\s+|import\s+.*?\bfrom\s+|using\s+)'([^']+)'",
+    re.MULTILINE,
+)
+# loadTextContent('x.txt') and friends - files compiled into the template
+__LOAD_PATTERN = re.compile(
+    r"\bload(?:TextContent|JsonContent|YamlContent|FileAsBase64)\(\s*'([^']+)'"
+)
+
+# ******************************************************************************** #
+
+
+def find_module_files(bicep_file: str) -> list:
+    """Finds a Bicep file, its transitive local module imports and the
+    files they load with loadTextContent(), loadJsonContent(),
+    loadYamlContent() or loadFileAsBase64().
+    Registry references (br:, ts:, br/alias:) are not followed.
+    Parameters
+    ----------
+    bicep_file: str
+
+    Returns
+    -------
+    list of absolute file paths, the root file first
+    """
+    root = os.path.abspath(bicep_file)
+    found = [root]
+    seen = {root}
+    loaded = set()
+    index = 0
+    while index < len(found):
+        current = found[index]
+        index += 1
+        if current in loaded:
+            continue
+        with open(current, "r", encoding="utf-8") as file:
+            source = file.read()
+        references = [(ref, False) for ref in __REFERENCE_PATTERN.findall(source)]
+        references += [(ref, True) for ref in __LOAD_PATTERN.findall(source)]
+        for reference, is_load in references:
+            if ":" in reference.split("/", 1)[0]:
+                continue
+            path = os.path.normpath(os.path.join(os.path.dirname(current), reference))
+            if path not in seen and os.path.isfile(path):
+                seen.add(path)
+                found.append(path)
+                if is_load:
+                    loaded.add(path)
+    return found
+
+
+# ******************************************************************************** #
+
+
+class BicepCompiler:
+    """
+    Runs the Bicep compiler - the standalone 'bicep' CLI
+    when on the PATH, otherwise 'az bicep'
+    """
+
+    def __init__(self, command: Optional[list] = None) -> None:
+        """Init function.
+        Parameters
+        ----------
+        command: list - compiler command, i.e. ["bicep"] or ["az", "bicep"]
+        """
+        if command is None:
+            if shutil.which("bicep"):
+                command = ["bicep"]
+            elif shutil.which("az"):
+                command = ["az", "bicep"]
+            else:
+                raise FileNotFoundError(
+                    "##ERROR - Bicep compiler not found, install bicep or the Azure CLI"
+                )
+        self.command = command
+        self.__version: str = None
+
+    @property
+    def version(self) -> str:
+        """
+        Compiler version string, queried once per instance
+        """
+        if self.__version is None:
+            self.__version = subprocess.run(
+                [*self.command, "--version"],  # noqa: S603 - fixed compiler command
+                capture_output=True,
+                text=True,
+                check=True,
+            ).stdout.strip()
+        return self.__version
+
+    def build(self, bicep_file: str) -> str:
+        """Compiles a Bicep file and returns the ARM JSON text
+        Parameters
+        ----------
+        bicep_file: str
+        """
+        if self.command[0] == "bicep":
+            args = [*self.command, "build", bicep_file, "--stdout"]
+        else:
+            args = [*self.command, "build", "--file", bicep_file, "--stdout"]
+        return subprocess.run(
+            args,  # noqa: S603 - the compiler and a file name, no shell
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout
+
+
+# ******************************************************************************** #
+
+
+class BicepCompileCache:
+    """
+    On-disk cache of compiled Bicep templates.
+    Entries are keyed by a hash of the compiler version and the contents
+    of the Bicep file plus its transitive module imports, and evicted
+    least recently used first once the cache exceeds max_bytes.
+    """
+
+    def __init__(
+        self,
+        cache_dir: Optional[str] = None,
+        max_bytes: int = 256 * 1024 * 1024,
+        compiler: Optional[BicepCompiler] = None,
+    ) -> None:
+        """Init function.
+        Parameters
+        ----------
+        cache_dir: str - defaults to the toolkit cache 'bicep' directory
+        max_bytes: int - size bound of the cache directory
+        compiler: BicepCompiler - created on first compile if not passed in
+        """
+        self.cache_dir = cache_dir or get_cache_dir("bicep")
+        os.makedirs(self.cache_dir, exist_ok=True)
+        self.max_bytes = max_bytes
+        self.compiler = compiler
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.__lock = threading.Lock()
+
+    # ******************************************************************************** #
+
+    def cache_key(self, bicep_file: str) -> str:
+        """Returns the content-addressed cache key of a Bicep file
+        Parameters
+        ----------
+        bicep_file: str
+        """
+        if self.compiler is None:
+            self.compiler = BicepCompiler()
+
+        files = find_module_files(bicep_file)
+        root_dir = os.path.dirname(files[0])
+        digest = hashlib.sha256(self.compiler.version.encode())
+        for path in sorted(files):
+            with open(path, "rb") as file:
+                content_hash = hashlib.sha256(file.read()).hexdigest()
+            relative_path = os.path.relpath(path, root_dir)
+            digest.update(f"\0{relative_path}\0{content_hash}".encode())
+        return digest.hexdigest()
+
+    # ******************************************************************************** #
+
+    def compile(self, bicep_file: str) -> dict:
+        """Returns the ARM template for a Bicep file, compiling on a cache miss
+        Parameters
+        ----------
+        bicep_file: str
+
+        Returns
+        -------
+        dict ARM template
+        """
+        entry = os.path.join(self.cache_dir, f"{self.cache_key(bicep_file)}.json")
+
+        try:
+            with open(entry, "r", encoding="utf-8") as file:
+                template = json.load(file)
+            # mark as recently used
+            os.utime(entry)
+        except (OSError, ValueError):
+            template = None
+
+        if template is not None:
+            with self.__lock:
+                self.hits += 1
+            return template
+
+        with self.__lock:
+            self.misses += 1
+        compiled = self.compiler.build(bicep_file)
+        template = json.loads(compiled)
+
+        # write atomically so concurrent deployments never read a partial file
+        file_handle, temp_name = tempfile.mkstemp(dir=self.cache_dir, suffix=".tmp")
+        with os.fdopen(file_handle, "w", encoding="utf-8") as file:
+            file.write(compiled)
+        os.replace(temp_name, entry)
+
+        self.evict()
+        return template
+
+    # ******************************************************************************** #
+
+    def __entries(self) -> list:
+        """
+        Returns (mtime, size, path) of every cache entry, oldest first
+        """
+        entries = []
+        for name in os.listdir(self.cache_dir):
+            if name.endswith(".json"):
+                path = os.path.join(self.cache_dir, name)
+                try:
+                    stat = os.stat(path)
+                except OSError:
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, path))
+        return sorted(entries)
+
+    # ******************************************************************************** #
+
+    def evict(self) -> None:
+        """
+        Removes least recently used entries until the cache fits max_bytes
+        """
+        with self.__lock:
+            entries = self.__entries()
+            total = sum(size for _, size, _ in entries)
+            for _, size, path in entries:
+                if total <= self.max_bytes:
+                    break
+                try:
+                    os.remove(path)
+                except OSError:
+                    continue
+                total -= size
+                self.evictions += 1
+
+    # ******************************************************************************** #
+
+    def clear(self) -> None:
+        """
+        Removes every cache entry
+        """
+        with self.__lock:
+            for _, _, path in self.__entries():
+                os.remove(path)
+
+    # ******************************************************************************** #
+
+    @property
+    def stats(self) -> dict:
+        """
+        Hit/miss/eviction counters and current cache size
+        """
+        with self.__lock:
+            entries = self.__entries()
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "entries": len(entries),
+                "bytes": sum(size for _, size, _ in entries),
+            }
+
+
+# ******************************************************************************** #
+
+__COMPILE_CACHE: BicepCompileCache = None
+__COMPILE_CACHE_LOCK = threading.Lock()
+
+
+def get_compile_cache() -> BicepCompileCache:
+    """
+    Returns the process-wide BicepCompileCache
+    """
+    global __COMPILE_CACHE
+    with __COMPILE_CACHE_LOCK:
+        if __COMPILE_CACHE is None:
+            __COMPILE_CACHE = BicepCompileCache()
+        return __COMPILE_CACHE
+
+
+# ******************************************************************************** #
+
+
+def compile_bicep(bicep_file: str) -> dict:
+    """Compiles a Bicep file to an ARM template through the shared cache
+    Parameters
+    ----------
+    bicep_file: str
+
+    Returns
+    -------
+    dict ARM template
+    """
+    return get_compile_cache().compile(bicep_file)
+
+
+# ******************************************************************************** #
+
+
+def load_error_message(ex: Exception) -> str:
+    """Returns the message printed for a template that could not be loaded
+    Parameters
+    ----------
+    ex: FileNotFoundError, or the CalledProcessError of a failed bicep build
+
+    Returns
+    -------
+    str - the missing file, the compiler's own message when no compiler is
+        installed, or the compiler's stderr
+    """
+    if isinstance(ex, subprocess.CalledProcessError):
+        detail = (ex.stderr or ex.stdout or "").strip() or str(ex)
+        return f"##ERROR - Bicep build failed:\n{detail}"
+    # a missing bicep compiler has no file name, its message says it all
+    if getattr(ex, "filename", None):
+        return f"##ERROR - {ex.filename} not found>!"
+    return str(ex)
+
+
+# ******************************************************************************** #
@@ -0,0 +1,276 @@
+"""
+Client and credential registry
+Reuses credentials, access tokens and ResourceManagementClients
+across DeploymentHelper instances in the same process
+"""
+import threading
+import time
+from typing import Callable, Optional
+
+import requests
+from azure.core.pipeline.transport import RequestsTransport
+from azure.mgmt.resource import ResourceManagementClient
+
+from .az_login import do_login
+
+# ******************************************************************************** #
+
+
+def __cli_credential() -> object:
+    from azure.identity import AzureCliCredential
+
+    return AzureCliCredential()
+
+
+def __default_credential() -> object:
+    from azure.identity import DefaultAzureCredential
+
+    return DefaultAzureCredential()
+
+
+def __managed_identity_credential() -> object:
+    from azure.identity import ManagedIdentityCredential
+
+    return ManagedIdentityCredential()
+
+
+CREDENTIAL_FACTORIES: dict = {
+    "cli": __cli_credential,
+    "default": __default_credential,
+    "managed_identity": __managed_identity_credential,
+}
+
+# ******************************************************************************** #
+
+
+class CachedTokenCredential:
+    """
+    Wraps a credential and caches its access tokens per scope until
+    shortly before they expire, so AzureCliCredential only shells out
+    to 'az' once per token lifetime instead of once per client.
+    """
+
+    def __init__(self, credential: object, refresh_margin: float = 300.0) -> None:
+        """Init function.
+        Parameters
+        ----------
+        credential: any azure-identity style credential with get_token()
+        refresh_margin: float - seconds before expiry a token is refreshed
+        """
+        self.credential = credential
+        self.refresh_margin = refresh_margin
+        self.hits = 0
+        self.misses = 0
+        self.__tokens: dict = {}
+        self.__lock = threading.Lock()
+
+    def get_token(
+        self,
+        *scopes,
+        claims: Optional[str] = None,
+        tenant_id: Optional[str] = None,
+        **kwargs,
+    ):
+        """Returns a cached token for the scopes, fetching a new one if needed
+        Parameters
+        ----------
+        scopes: token scopes
+        claims: additional claims - always bypasses the cache
+        tenant_id: optional tenant
+        """
+        if claims is not None:
+            return self.credential.get_token(
+                *scopes, claims=claims, tenant_id=tenant_id, **kwargs
+            )
+
+        key = (scopes, tenant_id)
+        with self.__lock:
+            token = self.__tokens.get(key)
+            if token is not None and (
+                token.expires_on - self.refresh_margin > time.time()
+            ):
+                self.hits += 1
+                return token
+
+            self.misses += 1
+            if tenant_id is not None:
+                kwargs["tenant_id"] = tenant_id
+            token = self.credential.get_token(*scopes, **kwargs)
+            self.__tokens[key] = token
+            return token
+
+    def clear(self) -> None:
+        """
+        Drops every cached token
+        """
+        with self.__lock:
+            self.__tokens.clear()
+
+    def close(self) -> None:
+        """
+        Closes the wrapped credential
+        """
+        self.clear()
+        close = getattr(self.credential, "close", None)
+        if close is not None:
+            close()
+
+
+# ******************************************************************************** #
+
+
+class ClientRegistry:
+    """
+    Process-wide registry of credentials and ResourceManagementClients
+    keyed by (subscription id, credential type). Every client shares one
+    HTTP session so connections are pooled across subscriptions.
+    """
+
+    def __init__(
+        self,
+        credential_factories: Optional[dict] = None,
+        client_factory: Callable = do_login,
+    ) -> None:
+        """Init function.
+        Parameters
+        ----------
+        credential_factories: dict - credential type to a no argument factory,
+            defaults to CREDENTIAL_FACTORIES
+        client_factory: callable(subscription_id, credential, **client_kwargs)
+            returning a client or None, defaults to do_login
+        """
+        self.credential_factories = credential_factories or CREDENTIAL_FACTORIES
+        self.client_factory = client_factory
+        self.client_hits = 0
+        self.client_misses = 0
+        self.__credentials: dict = {}
+        self.__clients: dict = {}
+        self.__session: requests.Session = None
+        self.__lock = threading.RLock()
+
+    # ******************************************************************************** #
+
+    def get_credential(self, credential_type: str = "cli") -> CachedTokenCredential:
+        """Returns the shared token caching credential for a credential type
+        Parameters
+        ----------
+        credential_type: str - key of credential_factories
+        """
+        with self.__lock:
+            credential = self.__credentials.get(credential_type)
+            if credential is None:
+                try:
+                    factory = self.credential_factories[credential_type]
+                except KeyError as ex:
+                    raise ValueError(
+                        f"Unknown credential type - '{credential_type}'"
+                    ) from ex
+                credential = CachedTokenCredential(factory())
+                self.__credentials[credential_type] = credential
+            return credential
+
+    # ******************************************************************************** #
+
+    def get_client(
+        self, subscription_id: str, credential_type: str = "cli"
+    ) -> ResourceManagementClient:
+        """Returns the shared client for a subscription, logging in on first use
+        Parameters
+        ----------
+        subscription_id: str
+        credential_type: str - key of credential_factories
+
+        Returns
+        -------
+        ResourceManagementClient or None if the subscription id is invalid
+        """
+        key = (subscription_id.lower(), credential_type)
+        with self.__lock:
+            client = self.__clients.get(key)
+            if client is not None:
+                self.client_hits += 1
+                return client
+
+            self.client_misses += 1
+            if self.__session is None:
+                self.__session = requests.Session()
+            client = self.client_factory(
+                subscription_id,
+                self.get_credential(credential_type),
+                transport=RequestsTransport(
+                    session=self.__session, session_owner=False
+                ),
+            )
+            if client is not None:
+                self.__clients[key] = client
+            return client
+
+    # ******************************************************************************** #
+
+    def evict(self, subscription_id: str, credential_type: str = "cli") -> None:
+        """Closes and forgets the client for a subscription
+        Parameters
+        ----------
+        subscription_id: str
+        credential_type: str
+        """
+        with self.__lock:
+            client = self.__clients.pop(
+                (subscription_id.lower(), credential_type), None
+            )
+        if client is not None:
+            client.close()
+
+    # ******************************************************************************** #
+
+    def close(self) -> None:
+        """
+        Closes every client, credential and the shared HTTP session
+        """
+        with self.__lock:
+            clients, self.__clients = list(self.__clients.values()), {}
+            credentials, self.__credentials = list(self.__credentials.values()), {}
+            session, self.__session = self.__session, None
+        for client in clients:
+            client.close()
+        for credential in credentials:
+            credential.close()
+        if session is not None:
+            session.close()
+
+    # ******************************************************************************** #
+
+    @property
+    def stats(self) -> dict:
+        """
+        Hit/miss counters for clients and tokens
+        """
+        with self.__lock:
+            credentials = list(self.__credentials.values())
+            return {
+                "clients": len(self.__clients),
+                "client_hits": self.client_hits,
+                "client_misses": self.client_misses,
+                "token_hits": sum(c.hits for c in credentials),
+                "token_misses": sum(c.misses for c in credentials),
+            }
+
+
+# ******************************************************************************** #
+
+__REGISTRY: ClientRegistry = None
+__REGISTRY_LOCK = threading.Lock()
+
+
+def get_registry() -> ClientRegistry:
+    """
+    Returns the process-wide ClientRegistry
+    """
+    global __REGISTRY
+    with __REGISTRY_LOCK:
+        if __REGISTRY is None:
+            __REGISTRY = ClientRegistry()
+        return __REGISTRY
+
+
+# ******************************************************************************** #
@@ -2,28 +2,190 @@
 Deploys Azure resources using the 
 Azure Python SDK 
 """
-import json
 import os
+import subprocess
 import time
-from datetime import datetime
+from typing import Optional
 
 from azure.core.polling import LROPoller
 from azure.identity import AzureCliCredential
+from azure.mgmt.resource import ResourceManagementClient
 from azure.mgmt.resource.resources.models import DeploymentMode
 
+from .az_bicep import compile_bicep, load_error_message
+from .az_client_cache import get_registry
+from .az_fingerprint import (
+    FingerprintStore,
+    change_type,
+    deployment_fingerprint,
+    has_changes,
+    print_changes,
+    what_if_changes,
+)
+from .az_history import (
+    DeploymentHistoryManager,
+    RetentionPolicy,
+    deployment_name_pattern,
+    make_deployment_name,
+)
+from .az_journal import FAILED, SUCCEEDED, DeploymentJournal, JournalEntry
 from .az_login import (
     do_login,
 )
+from .az_polling import (
+    StrategyPolling,
+    WaitStrategy,
+    wait_for_completion,
+)
 from .az_resourcegroup import (
     create_resource_group,
     delete_resource_group,
     get_resource_group,
 )
+from .az_results import DeploymentOutcome, ResultStore, output_values
+from .az_subset import plan_subset, print_plan
+from .az_telemetry import span
+from .az_template_store import get_template_store, thaw, unwrap, wrap
+from .az_validate import ValidationContext, print_report, validate_template
 from .console_helper import (
+    end_progress,
     print_command_message,
     print_error_message,
+    print_ok_message,
+    print_progress,
 )
 
+# ******************************************************************************** #
+
+
+class UnsafeDeploymentError(ValueError):
+    """
+    Raised when a Complete mode deployment would delete resources
+    and deletes were not allowed
+    """
+
+
+# ******************************************************************************** #
+
+
+def read_template_data(template_file: str) -> dict:
+    """
+    Returns a read-only view of the ARM template for a template file,
+    .bicep files are compiled through the shared compile cache,
+    JSON templates are parsed once through the shared template store.
+    """
+    if template_file.lower().endswith(".bicep"):
+        return wrap(compile_bicep(template_file))
+    return get_template_store().load(template_file)
+
+
+# ******************************************************************************** #
+
+
+def build_deployment_params(
+    template_data: dict,
+    parameter_data: object,
+    mode: str = DeploymentMode.INCREMENTAL,
+) -> dict:
+    """creates a new deployment params dict
+    Parameters
+    ----------
+    template_data: template body
+    parameter_data: template parameters, left out when None
+    mode: DeploymentMode or "Incremental" / "Complete"
+    """
+    deployment_params = {"mode": DeploymentMode(mode), "template": template_data}
+    if parameter_data is not None:
+        deployment_params["parameters"] = parameter_data
+    return deployment_params
+
+
+# ******************************************************************************** #
+
+
+def load_deployment_params(
+    template_file: str,
+    template_params_file: str,
+    mode: str = DeploymentMode.INCREMENTAL,
+) -> dict:
+    """Loads the template and parameter files into a deployment params dict
+    Files are parsed once per process through the shared template store,
+    the template and parameters are read-only views of the shared data.
+    Parameters
+    ----------
+    template_file: str - ARM template or Bicep file
+    template_params_file: str - Template params file, can be None
+    mode: DeploymentMode or "Incremental" / "Complete"
+
+    Raises
+    ------
+    FileNotFoundError if either file or the bicep compiler does not exist
+    CalledProcessError if the bicep build fails
+    """
+    # convert the template string to json - compiling bicep if needed
+    template_body = read_template_data(template_file)
+
+    # only stream the "parameters" value out of the param file
+    extracted_params = None
+    if template_params_file is not None:
+        extracted_params = get_template_store().load(
+            template_params_file, "parameters"
+        )
+
+    return build_deployment_params(template_body, extracted_params, mode)
+
+
+# ******************************************************************************** #
+
+
+def apply_parameter_overrides(deployment_params: dict, overrides: dict) -> dict:
+    """Returns deployment params with some parameter values replaced,
+    the shared template store data is not modified
+    Parameters
+    ----------
+    deployment_params: dict - mode, template and parameters
+    overrides: dict of parameter name to value, i.e. outputs of another deployment
+    """
+    if not overrides:
+        return deployment_params
+    parameters = dict(unwrap(deployment_params.get("parameters")) or {})
+    for name, value in overrides.items():
+        parameters[name] = {"value": value}
+    return {**deployment_params, "parameters": wrap(parameters)}
+
+
+# ******************************************************************************** #
+
+
+def deployment_properties(deployment_params: dict) -> dict:
+    """Returns a private, mutable copy of deployment params to hand to the SDK,
+    the views over the shared template store data are not passed on
+    Parameters
+    ----------
+    deployment_params: dict - mode, template and parameters
+    """
+    return thaw(deployment_params)
+
+
+# ******************************************************************************** #
+
+
+def deployment_outputs(deployment: object) -> dict:
+    """Returns the outputs of a deployment as plain values
+    Parameters
+    ----------
+    deployment: DeploymentExtended
+
+    Returns
+    -------
+    dict of output name to value
+    """
+    properties = getattr(deployment, "properties", None)
+    return output_values(getattr(properties, "outputs", None))
+
+
+# ******************************************************************************** #
+
 
 class DeploymentHelper:
     """
@@ -34,92 +196,212 @@ class DeploymentHelper:
     # ******************************************************************************** #
 
     def __init__(
-        self, subscription_id: str, resource_group_name: str, location: str
+        self,
+        subscription_id: str,
+        resource_group_name: str,
+        location: str,
+        credentials: Optional[AzureCliCredential] = None,
+        resource_client: Optional[ResourceManagementClient] = None,
+        wait_strategy: Optional[WaitStrategy] = None,
+        fingerprint_store: Optional[FingerprintStore] = None,
+        journal: Optional[DeploymentJournal] = None,
+        retention_policy: Optional[RetentionPolicy] = None,
+        result_store: Optional[ResultStore] = None,
     ) -> None:
-        """Init function."""
-        # Acquire a credential object using CLI-based authentication.
-        azure_cli_credential = AzureCliCredential()
-        self.credentials = azure_cli_credential
-
+        """Init function.
+        Parameters
+        ----------
+        subscription_id: str
+        resource_group_name: str
+        location: str
+        credentials: optional credential object, by default the
+            credential and client come from the process-wide registry
+        resource_client: optional shared ResourceManagementClient,
+            skips the login when passed in
+        wait_strategy: optional WaitStrategy used to wait on deployments
+        fingerprint_store: optional FingerprintStore, when passed deployments
+            identical to the last successful one are skipped
+        journal: optional DeploymentJournal, when passed submitted deployments
+            are journaled and an interrupted one is reattached to on the next run
+        retention_policy: optional RetentionPolicy, when passed older deployments
+            with the same prefix are pruned after each successful deployment
+        result_store: optional ResultStore, when passed the outcome of every
+            deployment is stored and outputs are read from it before ARM
+        """
         # local variables
         self.subscription_id = subscription_id
         self.resource_group_name = resource_group_name
         self.location = location
-
-        # Do login
-        self.resource_client = do_login(self.subscription_id, self.credentials)
-
-    # ******************************************************************************** #
-
-    def __build_deployment_params(
-        self, template_data: dict, parameter_data: object
-    ) -> dict:
-        """creates a new deployment params dict
-        Parameters
-        ----------
-        template_data: template body
-        parameter_data: template body
-        """
-        deployment_params: dict
-
-        # we dont have function overloading in Py so this is the only option
-        # if we have parameters passed in, add them to the dict
-        if parameter_data is not None:
-            deployment_params = {
-                "mode": DeploymentMode.INCREMENTAL,
-                "template": template_data,
-                "parameters": parameter_data,
-            }
-        else:
-            deployment_params = {
-                "mode": DeploymentMode.INCREMENTAL,
-                "template": template_data,
-            }
-
-        return deployment_params
+        self.wait_strategy = wait_strategy
+        self.fingerprint_store = fingerprint_store
+        self.journal = journal
+        self.retention_policy = retention_policy
+        self.result_store = result_store
+
+        # Acquire a credential object using CLI-based authentication
+        # and do login - shared process-wide unless passed in
+        if credentials is None and resource_client is None:
+            registry = get_registry()
+            credentials = registry.get_credential()
+            resource_client = registry.get_client(self.subscription_id)
+        elif credentials is None:
+            credentials = AzureCliCredential()
+        elif resource_client is None:
+            resource_client = do_login(self.subscription_id, credentials)
+
+        self.credentials = credentials
+        self.resource_client = resource_client
 
     # ******************************************************************************** #
 
     def __deploy_resources(
-        self, resource_group_name: str, deployment_name: str, deployment_params: dict
+        self,
+        resource_group_name: str,
+        deployment_name: str,
+        deployment_params: dict,
+        continuation_token: Optional[str] = None,
     ) -> LROPoller:
         """do the deployment and return a status message
         Parameters
         ----------
         template_data: template payload
         parameter_data: template parameters
+        continuation_token: rebuilds the poller of a submitted deployment
+            (LROPoller.from_continuation_token) instead of submitting
         """
+        # ARM is polled on the wait strategy's schedule, not every 30s
+        polling = StrategyPolling(self.wait_strategy)
+        if continuation_token is not None:
+            return self.resource_client.deployments.begin_create_or_update(
+                self.resource_group_name, deployment_name,
+                {"properties": deployment_properties(deployment_params)},
+                continuation_token=continuation_token,
+                polling=polling,
+            )
         return self.resource_client.deployments.begin_create_or_update(
-            self.resource_group_name, deployment_name, 
-            {"properties": deployment_params} 
+            self.resource_group_name, deployment_name,
+            {"properties": deployment_properties(deployment_params)},
+            polling=polling,
         )
 
     # ******************************************************************************** #
 
     def __do_resource_deployment(
-        self, deployment_name: str, deployment_params: dict
-    ) -> None:
+        self,
+        deployment_name: str,
+        deployment_params: dict,
+        deploy_prefix: Optional[str] = None,
+        fingerprint: Optional[str] = None,
+        in_flight: Optional[JournalEntry] = None,
+    ) -> tuple:
         """do the deployment and print a status message
         Parameters
         ----------
         template_data: template payload
         parameter_data: template parameters
+        deploy_prefix: journal key of the deployment
+        fingerprint: journaled with the deployment
+        in_flight: journal entry of a running deployment to reattach to
+
+        Returns
+        -------
+        tuple of the DeploymentExtended and the epoch time it was submitted
+        """
+        deploy_result = None
+        if in_flight is not None:
+            # it has been running since the interrupted run submitted it
+            submitted_at = in_flight.submitted_at
+            deploy_result = self.__reattach(
+                deployment_name, deploy_prefix, in_flight.continuation_token
+            )
+        if deploy_result is None:
+            # Do the deployment and get a result
+            submitted_at = time.time()
+            with span("deploy.submit", deployment_name=deployment_name):
+                deploy_result = self.__deploy_resources(
+                    self.resource_group_name, deployment_name, deployment_params
+                )
+            if self.journal is not None:
+                self.journal.record_submitted(
+                    self.subscription_id,
+                    self.resource_group_name,
+                    deploy_prefix,
+                    deployment_name,
+                    fingerprint,
+                    deploy_result.continuation_token(),
+                )
+
+        # wait for the deployment, status changes update one progress line
+        # an interrupt or timeout leaves the journal entry running to reattach to
+        print_command_message("**Deployment started **")
+        try:
+            with span("deploy.poll", deployment_name=deployment_name):
+                result = wait_for_completion(
+                    deploy_result,
+                    self.wait_strategy,
+                    status_callback=lambda status: print_progress(
+                        f"Deployment status - {status}"
+                    ),
+                )
+        except TimeoutError:
+            raise
+        except Exception:
+            self.__journal_status(deploy_prefix, FAILED)
+            raise
+        finally:
+            end_progress()
+        self.__journal_status(deploy_prefix, SUCCEEDED)
+        return result, submitted_at
+
+    # ******************************************************************************** #
+
+    def __find_in_flight(self, deploy_prefix: str, fingerprint: str) -> JournalEntry:
         """
-        # Do the deployment and get a result
-        deploy_result = self.__deploy_resources(
-            self.resource_group_name, deployment_name, deployment_params
+        Returns the journal entry of a deployment left running with the
+        same fingerprint, None if there is nothing to reattach to
+        """
+        if self.journal is None:
+            return None
+        entry = self.journal.find_in_flight(
+            self.subscription_id, self.resource_group_name, deploy_prefix
         )
+        if entry is None or entry.fingerprint != fingerprint:
+            return None
+        return entry
 
-        # get the status for the deployment
-        print_command_message("**Deployment started **")
-        deployment_status = deploy_result.status()
-        while deployment_status == "InProgress":
-            print_command_message("Deployment in progress..")
-            deployment_status = deploy_result.status()
-            time.sleep(3)
+    # ******************************************************************************** #
+
+    def __reattach(
+        self, deployment_name: str, deploy_prefix: str, continuation_token: str
+    ) -> LROPoller:
+        """
+        Returns the poller of a running deployment, None if it cannot be rebuilt
+        """
+        print_command_message(
+            f"**Reattaching to running deployment '{deployment_name}' **"
+        )
+        try:
+            with span("deploy.reattach", deployment_name=deployment_name):
+                return self.__deploy_resources(
+                    self.resource_group_name, deployment_name, None,
+                    continuation_token=continuation_token,
+                )
+        # pylint: disable=broad-exception-caught
+        except Exception as ex:  # noqa: BLE001
+            print_error_message(f"##ERROR - cannot reattach, redeploying - {ex}")
+            self.__journal_status(deploy_prefix, FAILED)
+            return None
+
+    # ******************************************************************************** #
 
-        # print the result
-        print(f"Deployment result - {deploy_result.result()}")
+    def __journal_status(self, deploy_prefix: str, status: str) -> None:
+        """
+        Updates the journal entry of a deployment, if journaled
+        """
+        if self.journal is not None:
+            self.journal.mark(
+                self.subscription_id, self.resource_group_name, deploy_prefix, status
+            )
 
     # ******************************************************************************** #
 
@@ -128,68 +410,397 @@ class DeploymentHelper:
         template_file: str,
         template_params_file: str,
         deploy_prefix: str = "pydeploy",
-    ) -> None:
+        what_if: bool = False,
+        force: bool = False,
+        parameter_overrides: Optional[dict] = None,
+        validate: bool = True,
+        mode: str = DeploymentMode.INCREMENTAL,
+        allow_deletes: bool = False,
+        previous_template_file: Optional[str] = None,
+        previous_params_file: Optional[str] = None,
+    ) -> DeploymentOutcome:
         """Deploys a template to the resource group
         Parameters
         ----------
         template_file - ARM or Bicep file
         template_params: - Template params file as string
         deployment_name: - Deployment Name
+        what_if: - run an ARM what-if first and skip if nothing would change
+        force: - deploy even if the fingerprint is unchanged
+        parameter_overrides: - parameter name to value, replaces file values
+        validate: - check the template and parameters offline before deploying
+        mode: - "Incremental" or "Complete", Complete deletes every resource
+            of the resource group that is not in the template
+        allow_deletes: - let a Complete mode deployment delete resources,
+            otherwise the what-if deletes are listed and nothing is deployed
+        previous_template_file: - the template as last deployed, only the
+            resources changed since then and their dependencies are deployed
+        previous_params_file: - its params file, defaults to template_params_file
 
         Returns
         -------
-        nothing
-            Displays output status of the Resource group deployment.
+        DeploymentOutcome with the outputs, resource ids and timings - with
+            skipped_reason set if nothing needed deploying, or error set if
+            the template or params files could not be loaded
+
+        Raises
+        ------
+        TemplateValidationError if validate is set and the template has errors
+        UnsafeDeploymentError if a Complete mode deployment would delete
+            resources and allow_deletes is not set
+        ValueError if a subset deployment is asked for in Complete mode
         """
+        mode = DeploymentMode(mode)
+        if previous_template_file is not None and mode == DeploymentMode.COMPLETE:
+            raise ValueError(
+                "Subset deployments are Incremental only - in Complete mode"
+                " every resource left out of the subset would be deleted"
+            )
 
         ## ref: https://github.com/p-prakash/serverless-url-shortener-azure/blob/main/deploy.py
         ## https://github.com/Azure/azure-sdk-for-python/blob/main/sdk/resources/azure-mgmt-resource/tests/test_mgmt_resource.py
         ## https://learn.microsoft.com/en-us/azure/azure-resource-manager/templates/deploy-python
         ## https://learn.microsoft.com/en-us/python/api/azure-core/azure.core.polling.lropoller?view=azure-python
 
-        # generate a random deployment name - YY-MM-DD
-        today = datetime.now().strftime("%Y-%m-%d")
-        deployment_name = f"{deploy_prefix}{today}"
+        with span(
+            "deploy",
+            subscription_id=self.subscription_id,
+            resource_group=self.resource_group_name,
+            template=os.path.basename(template_file),
+        ) as deploy_span:
+            return self.__deploy_template(
+                deploy_span, template_file, template_params_file,
+                deploy_prefix, what_if, force, parameter_overrides, validate,
+                mode, allow_deletes, previous_template_file, previous_params_file,
+            )
+
+    # ******************************************************************************** #
+
+    def __deploy_template(
+        self,
+        deploy_span: object,
+        template_file: str,
+        template_params_file: str,
+        deploy_prefix: str,
+        what_if: bool,
+        force: bool,
+        parameter_overrides: dict,
+        validate: bool,
+        mode: DeploymentMode,
+        allow_deletes: bool,
+        previous_template_file: str,
+        previous_params_file: str,
+    ) -> DeploymentOutcome:
+        """
+        deploy_resource_template inside its telemetry span
+        """
+        # unique per submission, same day reruns do not overwrite each other
+        started_at = time.time()
+        deployment_name = make_deployment_name(deploy_prefix)
+
+        # load the template and params - each file is only parsed once
+        try:
+            with span("deploy.load_files"):
+                deployment_params = load_deployment_params(
+                    template_file, template_params_file, mode
+                )
+        except (FileNotFoundError, subprocess.CalledProcessError) as ex:
+            error = load_error_message(ex)
+            print_error_message(error)
+            return self.__not_deployed(
+                deploy_prefix, deployment_name, started_at, error=error
+            )
+        deployment_params = apply_parameter_overrides(
+            deployment_params, parameter_overrides
+        )
+
+        # catch template mistakes locally, before anything is sent to ARM
+        if validate:
+            with span("deploy.validate"):
+                report = validate_template(
+                    unwrap(deployment_params["template"]),
+                    unwrap(deployment_params.get("parameters")),
+                    ValidationContext(
+                        self.subscription_id,
+                        self.resource_group_name,
+                        self.location,
+                        deployment_name,
+                    ),
+                )
+            if report.issues:
+                print_report(report)
+            report.raise_for_errors()
+
+        # Complete mode deletes whatever the template leaves out
+        if (
+            mode == DeploymentMode.COMPLETE
+            and not allow_deletes
+            and not deployment_params["template"].get("resources")
+        ):
+            raise UnsafeDeploymentError(
+                "Complete mode deployment of a template without resources"
+                " would empty the resource group - pass allow_deletes"
+            )
+
+        # only deploy the resources changed since the previous template
+        carried_outputs: dict = {}
+        if previous_template_file is not None:
+            try:
+                with span("deploy.subset"):
+                    plan = self.__plan_subset(
+                        deployment_params,
+                        previous_template_file,
+                        previous_params_file or template_params_file,
+                        parameter_overrides,
+                        deployment_name,
+                    )
+            except (FileNotFoundError, subprocess.CalledProcessError) as ex:
+                error = load_error_message(ex)
+                print_error_message(error)
+                return self.__not_deployed(
+                    deploy_prefix, deployment_name, started_at, error=error
+                )
+            print_plan(plan)
+            if plan.empty and not force:
+                deploy_span.set_attribute("skipped", "no_changed_resources")
+                print_ok_message("**No resources changed - skipped. **")
+                return self.__not_deployed(
+                    deploy_prefix, deployment_name, started_at,
+                    skipped_reason="no_changed_resources",
+                )
+            if not plan.empty:
+                carried_outputs = self.__carried_outputs(
+                    deployment_params, plan, deploy_prefix
+                )
+                deployment_params = {
+                    **deployment_params, "template": wrap(plan.template)
+                }
 
         # check if the resource exists..if not create it
-        self.deploy_resource_group()
+        with span("deploy.resource_group"):
+            self.deploy_resource_group()
+
+        # skip deployments identical to the last successful one
+        fingerprint = None
+        if self.fingerprint_store is not None or self.journal is not None:
+            with span("deploy.fingerprint"):
+                fingerprint = deployment_fingerprint(
+                    self.subscription_id, self.resource_group_name, deployment_params
+                )
+        if self.fingerprint_store is not None:
+            unchanged = fingerprint == self.fingerprint_store.get(
+                self.subscription_id, self.resource_group_name, deploy_prefix
+            )
+            if not force and unchanged:
+                deploy_span.set_attribute("skipped", "unchanged")
+                print_ok_message("**Template and parameters unchanged - skipped. **")
+                return self.__not_deployed(
+                    deploy_prefix, deployment_name, started_at,
+                    skipped_reason="unchanged",
+                )
+
+        # reattach to the same deployment if an earlier run was interrupted
+        in_flight = self.__find_in_flight(deploy_prefix, fingerprint)
+        if in_flight is not None:
+            deployment_name = in_flight.deployment_name
+
+        # skip deployments that would not change any resource, Complete mode
+        # always runs the what-if to list the resources it would delete
+        complete = mode == DeploymentMode.COMPLETE
+        if (what_if or complete) and in_flight is None:
+            with span("deploy.what_if"):
+                changes = what_if_changes(
+                    self.resource_client,
+                    self.resource_group_name,
+                    deployment_name,
+                    deployment_params,
+                )
+            print_changes(changes)
+            deletes = [c for c in changes if change_type(c) == "Delete"]
+            if complete and deletes and not allow_deletes:
+                deploy_span.set_attribute("skipped", "unsafe_deletes")
+                raise UnsafeDeploymentError(
+                    f"Complete mode deployment would delete {len(deletes)} resource(s)"
+                    " - pass allow_deletes to deploy"
+                )
+            if what_if and not force and not has_changes(changes):
+                deploy_span.set_attribute("skipped", "no_changes")
+                self.__record_fingerprint(deploy_prefix, fingerprint, deployment_name)
+                print_ok_message("**No resource changes - skipped. **")
+                return self.__not_deployed(
+                    deploy_prefix, deployment_name, started_at,
+                    skipped_reason="no_changes",
+                )
+
+        # do the deployment
+        print_command_message("**Deploying template **")
+        result, submitted_at = self.__do_resource_deployment(
+            deployment_name, deployment_params, deploy_prefix, fingerprint,
+            in_flight,
+        )
+        outcome = DeploymentOutcome.from_deployment(
+            result,
+            self.subscription_id,
+            self.resource_group_name,
+            deploy_prefix,
+            deployment_name,
+            started_at,
+            submitted_at,
+        )
+        if carried_outputs and outcome.succeeded:
+            outcome.outputs = {**carried_outputs, **outcome.outputs}
+        if self.result_store is not None:
+            self.result_store.record(outcome)
+        print_command_message(
+            f"Deployment result - {outcome.provisioning_state}"
+            f" in {outcome.elapsed:.1f}s, {len(outcome.resource_ids)} resource(s),"
+            f" correlation id {outcome.correlation_id}"
+        )
+        print_command_message("**Deployment completed. **")
+        # a failed deployment is neither skipped next time nor a reason to prune
+        if outcome.succeeded:
+            self.__record_fingerprint(deploy_prefix, fingerprint, deployment_name)
+            self.prune_history(deploy_prefix)
+        return outcome
 
-        # check the file path exists
-        if os.path.isfile(template_file):
-            print_command_message("**Deploying template **")
+    # ******************************************************************************** #
 
-            # convert the template string to json
-            template_body = self.__read_file_data(template_file)
+    def __not_deployed(
+        self,
+        deploy_prefix: str,
+        deployment_name: str,
+        started_at: float,
+        skipped_reason: Optional[str] = None,
+        error: Optional[str] = None,
+    ) -> DeploymentOutcome:
+        """
+        Outcome of a deployment that was skipped or could not start
+        """
+        return DeploymentOutcome.not_deployed(
+            self.subscription_id,
+            self.resource_group_name,
+            deploy_prefix,
+            deployment_name,
+            started_at,
+            skipped_reason=skipped_reason,
+            error=error,
+        )
 
-            # Load the param file as a string
-            params_body = self.__read_file_data(template_params_file)
+    # ******************************************************************************** #
 
-            # Get the params from the dict using a get()
-            extracted_params = params_body.get("parameters")
+    def __carried_outputs(
+        self, deployment_params: dict, plan: object, deploy_prefix: str
+    ) -> dict:
+        """
+        Values of the template outputs a subset deployment leaves out, from
+        the target's last deployment - a subset outcome stored as the latest
+        still has every output of the template
+        """
+        dropped = set(deployment_params["template"].get("outputs") or {}) - set(
+            plan.template.get("outputs") or {}
+        )
+        if not dropped:
+            return {}
+        previous = self.get_deployment_outputs(deploy_prefix)
+        return {name: value for name, value in previous.items() if name in dropped}
 
-            # build properties
-            deployment_params = self.__build_deployment_params(
-                template_body, extracted_params
-            )
+    # ******************************************************************************** #
 
-            # do the deployment
-            self.__do_resource_deployment(deployment_name, deployment_params)
-            print_command_message("**Deployment completed. **")
+    def __plan_subset(
+        self,
+        deployment_params: dict,
+        previous_template_file: str,
+        previous_params_file: str,
+        parameter_overrides: dict,
+        deployment_name: str,
+    ) -> object:
+        """
+        Diffs the deployment against the previous template and params files
+        """
+        previous_params = apply_parameter_overrides(
+            load_deployment_params(previous_template_file, previous_params_file),
+            parameter_overrides,
+        )
+        return plan_subset(
+            unwrap(previous_params["template"]),
+            unwrap(deployment_params["template"]),
+            unwrap(deployment_params.get("parameters")),
+            unwrap(previous_params.get("parameters")),
+            ValidationContext(
+                self.subscription_id,
+                self.resource_group_name,
+                self.location,
+                deployment_name,
+            ),
+        )
 
-        else:
-            print_error_message(f"##ERROR - {template_file} not found>!")
+    # ******************************************************************************** #
+
+    def prune_history(self, deploy_prefix: Optional[str] = None) -> None:
+        """Prunes the resource group's deployment history under the
+        retention policy, failures are reported but not raised
+        Parameters
+        ----------
+        deploy_prefix: str - only prune deployments with this prefix
+        """
+        if self.retention_policy is None:
+            return
+        result = DeploymentHistoryManager(
+            self.resource_client, self.resource_group_name, self.retention_policy
+        ).prune(deploy_prefix)
+        for name, error in result.failed.items():
+            print_error_message(f"##ERROR - could not prune '{name}' - {error}")
 
     # ******************************************************************************** #
 
-    def __read_file_data(self, file_name: str) -> dict:
+    def get_deployment_outputs(self, deploy_prefix: str = "pydeploy") -> dict:
+        """Returns the outputs of the newest succeeded deployment with a prefix,
+        i.e. for a deployment that was skipped as unchanged. Read from the
+        result store when it has the target, otherwise listed from ARM.
+        Parameters
+        ----------
+        deploy_prefix: str
+
+        Returns
+        -------
+        dict of output name to value, empty if there is no such deployment
         """
-        Opens a given parameters file and returns a JSON string
+        if self.result_store is not None:
+            outputs = self.result_store.outputs(
+                self.subscription_id, self.resource_group_name, deploy_prefix
+            )
+            if outputs is not None:
+                return outputs
+
+        latest = None
+        pattern = deployment_name_pattern(deploy_prefix)
+        for deployment in self.resource_client.deployments.list_by_resource_group(
+            self.resource_group_name, filter="provisioningState eq 'Succeeded'"
+        ):
+            if not pattern.fullmatch(deployment.name):
+                continue
+            if latest is None or (
+                deployment.properties.timestamp > latest.properties.timestamp
+            ):
+                latest = deployment
+        return deployment_outputs(latest)
+
+    # ******************************************************************************** #
+
+    def __record_fingerprint(
+        self, deploy_prefix: str, fingerprint: str, deployment_name: str
+    ) -> None:
         """
-        if os.path.isfile(file_name):
-            with open(file_name, "r") as file:
-                return json.load(file)
-        else:
-            return None
+        Records the fingerprint of a successful deployment, if tracked
+        """
+        if self.fingerprint_store is not None and fingerprint is not None:
+            self.fingerprint_store.record(
+                self.subscription_id,
+                self.resource_group_name,
+                deploy_prefix,
+                fingerprint,
+                deployment_name,
+            )
 
     # ******************************************************************************** #
 
@@ -208,11 +819,12 @@ class DeploymentHelper:
 
     def destroy_resource_group(self) -> None:
         """
-        Deletes a resource group if it exists
+        Deletes a resource group if it exists and waits for the delete
         """
-        if get_resource_group(self.resource_client, 
-                                               self.resource_group_name):
-            delete_resource_group(self.resource_client, 
-                                                   self.resource_group_name)
+        if get_resource_group(self.resource_client, self.resource_group_name):
+            poller = delete_resource_group(
+                self.resource_client, self.resource_group_name
+            )
+            wait_for_completion(poller, self.wait_strategy)
 
     # ******************************************************************************** #
@@ -0,0 +1,279 @@
+"""
+Deployment fingerprint helper
+Records a hash of every successful deployment so unchanged
+deployments can be skipped, and wraps the ARM what-if pre-check
+"""
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from typing import TYPE_CHECKING, Optional
+
+from .az_state import get_cache_dir
+from .az_template_store import thaw, unwrap
+from .console_helper import (
+    print_command_message,
+    print_ok_message,
+)
+
+if TYPE_CHECKING:
+    from azure.mgmt.resource import ResourceManagementClient
+
+# what-if change types that leave the resource untouched
+NO_CHANGE_TYPES: frozenset = frozenset({"NoChange", "Ignore"})
+
+# ******************************************************************************** #
+
+
+def canonical_json(value: object) -> bytes:
+    """Serialises a value to canonical JSON - sorted keys, no whitespace
+    Parameters
+    ----------
+    value: JSON compatible value
+    """
+    return json.dumps(
+        value, sort_keys=True, separators=(",", ":"), ensure_ascii=False
+    ).encode()
+
+
+# ******************************************************************************** #
+
+
+def canonical_template(template: dict) -> bytes:
+    """
+    Canonical JSON of a template as fingerprinted, without compiler metadata
+    """
+    template = dict(template or {})
+    # compiler metadata does not change what is deployed
+    template.pop("metadata", None)
+    return canonical_json(template)
+
+
+# ******************************************************************************** #
+
+
+def deployment_fingerprint(
+    subscription_id: str,
+    resource_group_name: str,
+    deployment_params: dict,
+    template_json: Optional[bytes] = None,
+) -> str:
+    """Returns the fingerprint of a deployment
+    Parameters
+    ----------
+    subscription_id: str
+    resource_group_name: str
+    deployment_params: dict - mode, template and parameters
+    template_json: bytes - canonical_template() of the template, when it
+        is fingerprinted for many parameter sets
+
+    Returns
+    -------
+    str sha256 hex digest of the normalised target, mode, template and parameters
+    """
+    if template_json is None:
+        template_json = canonical_template(
+            unwrap(deployment_params.get("template"))
+        )
+
+    digest = hashlib.sha256()
+    digest.update(f"{subscription_id.lower()}/{resource_group_name.lower()}".encode())
+    mode = deployment_params.get("mode")
+    digest.update(b"\0" + str(getattr(mode, "value", mode)).encode())
+    digest.update(b"\0" + template_json)
+    parameters = unwrap(deployment_params.get("parameters"))
+    digest.update(b"\0" + canonical_json(parameters))
+    return digest.hexdigest()
+
+
+# ******************************************************************************** #
+
+
+class FingerprintStore:
+    """
+    Local SQLite store of the last successful deployment fingerprint
+    per (subscription, resource group, deployment key)
+    """
+
+    def __init__(self, db_file: Optional[str] = None) -> None:
+        """Init function.
+        Parameters
+        ----------
+        db_file: str - defaults to fingerprints.db in the toolkit cache directory
+        """
+        self.db_file = db_file or os.path.join(get_cache_dir(), "fingerprints.db")
+        self.__lock = threading.Lock()
+        self.__connection = sqlite3.connect(self.db_file, check_same_thread=False)
+        with self.__connection:
+            self.__connection.execute(
+                "CREATE TABLE IF NOT EXISTS fingerprints ("
+                " subscription_id TEXT NOT NULL,"
+                " resource_group TEXT NOT NULL,"
+                " deployment_key TEXT NOT NULL,"
+                " fingerprint TEXT NOT NULL,"
+                " deployment_name TEXT,"
+                " updated_at REAL NOT NULL,"
+                " PRIMARY KEY (subscription_id, resource_group, deployment_key))"
+            )
+
+    # ******************************************************************************** #
+
+    def get(
+        self, subscription_id: str, resource_group_name: str, deployment_key: str
+    ) -> str:
+        """Returns the last recorded fingerprint, None if there is none
+        Parameters
+        ----------
+        subscription_id: str
+        resource_group_name: str
+        deployment_key: str - stable deployment identity, i.e. the deploy prefix
+        """
+        with self.__lock:
+            row = self.__connection.execute(
+                "SELECT fingerprint FROM fingerprints"
+                " WHERE subscription_id = ? AND resource_group = ?"
+                " AND deployment_key = ?",
+                (subscription_id.lower(), resource_group_name.lower(), deployment_key),
+            ).fetchone()
+        return row[0] if row else None
+
+    # ******************************************************************************** #
+
+    def record(
+        self,
+        subscription_id: str,
+        resource_group_name: str,
+        deployment_key: str,
+        fingerprint: str,
+        deployment_name: Optional[str] = None,
+    ) -> None:
+        """Records the fingerprint of a successful deployment
+        Parameters
+        ----------
+        subscription_id: str
+        resource_group_name: str
+        deployment_key: str
+        fingerprint: str
+        deployment_name: str - ARM deployment name, informational
+        """
+        with self.__lock, self.__connection:
+            self.__connection.execute(
+                "INSERT OR REPLACE INTO fingerprints VALUES (?, ?, ?, ?, ?, ?)",
+                (
+                    subscription_id.lower(),
+                    resource_group_name.lower(),
+                    deployment_key,
+                    fingerprint,
+                    deployment_name,
+                    time.time(),
+                ),
+            )
+
+    # ******************************************************************************** #
+
+    def forget(
+        self,
+        subscription_id: str,
+        resource_group_name: str,
+        deployment_key: Optional[str] = None,
+    ) -> None:
+        """Removes recorded fingerprints, forcing the next deployment
+        Parameters
+        ----------
+        subscription_id: str
+        resource_group_name: str
+        deployment_key: str - None forgets every deployment in the group
+        """
+        query = (
+            "DELETE FROM fingerprints"
+            " WHERE subscription_id = ? AND resource_group = ?"
+        )
+        args = [subscription_id.lower(), resource_group_name.lower()]
+        if deployment_key is not None:
+            query += " AND deployment_key = ?"
+            args.append(deployment_key)
+        with self.__lock, self.__connection:
+            self.__connection.execute(query, args)
+
+    # ******************************************************************************** #
+
+    def close(self) -> None:
+        """
+        Closes the database
+        """
+        with self.__lock:
+            self.__connection.close()
+
+
+# ******************************************************************************** #
+
+
+def what_if_changes(
+    resource_client: "ResourceManagementClient",
+    resource_group_name: str,
+    deployment_name: str,
+    deployment_params: dict,
+) -> list:
+    """Runs an ARM what-if for the deployment and returns the resource changes
+    Parameters
+    ----------
+    resource_client: ResourceManagementClient
+    resource_group_name: str
+    deployment_name: str
+    deployment_params: dict - mode, template and parameters
+
+    Returns
+    -------
+    list of WhatIfChange
+    """
+    poller = resource_client.deployments.begin_what_if(
+        resource_group_name,
+        deployment_name,
+        {"properties": thaw(deployment_params)},
+    )
+    return poller.result().changes or []
+
+
+# ******************************************************************************** #
+
+
+def change_type(change: object) -> str:
+    """
+    Returns the what-if change type of a WhatIfChange as a plain string
+    """
+    return getattr(change.change_type, "value", change.change_type)
+
+
+# ******************************************************************************** #
+
+
+def has_changes(changes: list) -> bool:
+    """Checks if any what-if change would modify a resource
+    Parameters
+    ----------
+    changes: list of WhatIfChange
+    """
+    return any(change_type(change) not in NO_CHANGE_TYPES for change in changes)
+
+
+# ******************************************************************************** #
+
+
+def print_changes(changes: list) -> None:
+    """Prints the resource level what-if changes
+    Parameters
+    ----------
+    changes: list of WhatIfChange
+    """
+    changed = [c for c in changes if change_type(c) not in NO_CHANGE_TYPES]
+    if not changed:
+        print_ok_message("What-if: no resource changes.")
+        return
+    print_command_message(f"What-if: {len(changed)} resource change(s).")
+    for change in changed:
+        print_command_message(f"  {change_type(change):<10} {change.resource_id}")
+
+
+# ******************************************************************************** #
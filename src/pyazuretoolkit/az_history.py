@@ -0,0 +1,294 @@
+"""
+Deployment history helper
+Unique deployment names, and pruning of a resource group's deployment
+history under a retention policy so it stays well below the ARM limit
+"""
+import re
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from typing import TYPE_CHECKING, Optional
+
+from .az_resourcegroup import BulkResult
+from .az_telemetry import span
+from .console_helper import print_command_message
+
+if TYPE_CHECKING:
+    from azure.mgmt.resource import ResourceManagementClient
+
+# ARM keeps at most this many deployments per resource group
+ARM_HISTORY_LIMIT: int = 800
+# deployment names - at most 64 of these characters
+MAX_NAME_LENGTH: int = 64
+__INVALID_NAME_CHARS = re.compile(r"[^\w\-.()]")
+# what make_deployment_name appends - -YYYYMMDD-HHMMSSmmm-xxxxxxxx
+__NAME_SUFFIX = r"-\d{8}-\d{9}-[0-9a-f]{8}"
+__NAME_SUFFIX_LENGTH = 28
+# deployments still running must not be deleted
+__ACTIVE_STATES: frozenset = frozenset(
+    {"Accepted", "Running", "Creating", "Updating", "Deleting", "Waiting"}
+)
+
+# ******************************************************************************** #
+
+
+def make_deployment_name(
+    deploy_prefix: str = "pydeploy", now: Optional[datetime] = None
+) -> str:
+    """Returns a unique deployment name - prefix, UTC timestamp to the
+    millisecond and a random suffix, within the 64 character ARM limit
+    Parameters
+    ----------
+    deploy_prefix: str - characters ARM does not allow are replaced with '-'
+    now: datetime - timestamp to use, the current UTC time by default
+
+    Returns
+    -------
+    str i.e. pydeploy-20240131-235959123-1a2b3c4d
+    """
+    now = now or datetime.now(timezone.utc)
+    timestamp = f"{now:%Y%m%d-%H%M%S}{now.microsecond // 1000:03d}"
+    return f"{__name_prefix(deploy_prefix)}-{timestamp}-{uuid.uuid4().hex[:8]}"
+
+
+# ******************************************************************************** #
+
+
+def deployment_name_pattern(deploy_prefix: str) -> re.Pattern:
+    """Returns a pattern that fullmatches exactly the names
+    make_deployment_name generates for a prefix
+    Parameters
+    ----------
+    deploy_prefix: str - as passed to make_deployment_name
+
+    Returns
+    -------
+    re.Pattern i.e. for 'app' it matches app-20240131-235959123-1a2b3c4d
+    but not app-db-20240131-235959123-1a2b3c4d
+    """
+    return re.compile(re.escape(__name_prefix(deploy_prefix)) + __NAME_SUFFIX)
+
+
+# ******************************************************************************** #
+
+
+def __name_prefix(deploy_prefix: str) -> str:
+    """
+    The deploy prefix with characters ARM does not allow replaced,
+    short enough to leave room for the unique suffix
+    """
+    prefix = __INVALID_NAME_CHARS.sub("-", deploy_prefix).rstrip("-")
+    return prefix[: MAX_NAME_LENGTH - __NAME_SUFFIX_LENGTH]
+
+
+# ******************************************************************************** #
+
+
+@dataclass
+class RetentionPolicy:
+    """
+    Which deployments to keep - a deployment is kept if any rule keeps it.
+    Running deployments are always kept.
+
+    keep_last: int - newest deployments kept, failed ones not counted
+    max_age_days: float - deployments younger than this are kept
+    keep_failed: int - newest failed deployments kept, for troubleshooting
+    """
+
+    keep_last: int = 50
+    max_age_days: float = None
+    keep_failed: int = 5
+
+    # provisioning states of running deployments, bound below the class
+    _active_states = frozenset()
+
+    def __post_init__(self) -> None:
+        if self.keep_last + self.keep_failed >= ARM_HISTORY_LIMIT:
+            raise ValueError(
+                f"Retention must keep fewer than {ARM_HISTORY_LIMIT} deployments"
+            )
+
+    def select_for_pruning(
+        self, deployments: list, now: Optional[datetime] = None
+    ) -> list:
+        """Picks the deployments the policy does not keep
+        Parameters
+        ----------
+        deployments: list of DeploymentExtended
+        now: datetime - reference time for max_age_days
+
+        Returns
+        -------
+        list of DeploymentExtended, oldest first
+        """
+        now = now or datetime.now(timezone.utc)
+        cutoff = (
+            now - timedelta(days=self.max_age_days)
+            if self.max_age_days is not None
+            else None
+        )
+        newest_first = sorted(deployments, key=deployment_timestamp, reverse=True)
+
+        prune = []
+        kept = failed_kept = 0
+        for deployment in newest_first:
+            state = deployment_state(deployment)
+            if state in self._active_states:
+                continue
+            if state == "Failed":
+                if failed_kept < self.keep_failed:
+                    failed_kept += 1
+                    continue
+            elif kept < self.keep_last:
+                kept += 1
+                continue
+            if cutoff is not None and deployment_timestamp(deployment) >= cutoff:
+                continue
+            prune.append(deployment)
+        return prune[::-1]
+
+
+RetentionPolicy._active_states = __ACTIVE_STATES
+
+# ******************************************************************************** #
+
+
+def deployment_timestamp(deployment: object) -> datetime:
+    """
+    Returns when a deployment last changed, the epoch if unknown
+    """
+    timestamp = getattr(deployment.properties, "timestamp", None)
+    if timestamp is None:
+        return datetime.min.replace(tzinfo=timezone.utc)
+    if timestamp.tzinfo is None:
+        return timestamp.replace(tzinfo=timezone.utc)
+    return timestamp
+
+
+# ******************************************************************************** #
+
+
+def deployment_state(deployment: object) -> str:
+    """
+    Returns the provisioning state of a deployment as a plain string
+    """
+    state = getattr(deployment.properties, "provisioning_state", None)
+    return getattr(state, "value", state)
+
+
+# ******************************************************************************** #
+
+
+class DeploymentHistoryManager:
+    """
+    Lists and prunes the deployment history of one resource group
+    """
+
+    def __init__(
+        self,
+        resource_client: "ResourceManagementClient",
+        resource_group_name: str,
+        policy: Optional[RetentionPolicy] = None,
+        max_workers: int = 8,
+    ) -> None:
+        """Init function.
+        Parameters
+        ----------
+        resource_client: ResourceManagementClient
+        resource_group_name: str
+        policy: RetentionPolicy - RetentionPolicy() by default
+        max_workers: int - maximum concurrent delete submissions
+        """
+        self.resource_client = resource_client
+        self.resource_group_name = resource_group_name
+        self.policy = policy or RetentionPolicy()
+        self.max_workers = max_workers
+
+    # ******************************************************************************** #
+
+    def list(self, deploy_prefix: Optional[str] = None) -> list:
+        """Pages through the resource group's deployments
+        Parameters
+        ----------
+        deploy_prefix: str - only deployments make_deployment_name named
+            with this prefix
+
+        Returns
+        -------
+        list of DeploymentExtended
+        """
+        pager = self.resource_client.deployments.list_by_resource_group(
+            self.resource_group_name
+        )
+        pattern = None
+        if deploy_prefix is not None:
+            pattern = deployment_name_pattern(deploy_prefix)
+        deployments = []
+        with span("history.list", resource_group=self.resource_group_name) as list_span:
+            pages = 0
+            for page in pager.by_page():
+                pages += 1
+                deployments.extend(
+                    d
+                    for d in page
+                    if pattern is None or pattern.fullmatch(d.name)
+                )
+            list_span.set_attribute("pages", pages)
+        return deployments
+
+    # ******************************************************************************** #
+
+    def prune(
+        self,
+        deploy_prefix: Optional[str] = None,
+        dry_run: bool = False,
+        timeout: Optional[float] = None,
+    ) -> BulkResult:
+        """Deletes the deployments the retention policy does not keep.
+        Deletes are submitted concurrently and then waited on, deleting
+        history does not touch the deployed resources.
+        Parameters
+        ----------
+        deploy_prefix: str - only prune deployments named with this prefix
+        dry_run: bool - report what would be deleted without deleting
+        timeout: float - seconds to wait for each delete, None waits forever
+
+        Returns
+        -------
+        BulkResult of deployment names
+        """
+        candidates = self.policy.select_for_pruning(self.list(deploy_prefix))
+        names = [deployment.name for deployment in candidates]
+        if dry_run or not names:
+            return BulkResult(succeeded=names)
+
+        print_command_message(
+            f"Pruning {len(names)} deployment(s) from '{self.resource_group_name}'."
+        )
+        result = BulkResult()
+        with span("history.prune", resource_group=self.resource_group_name):
+            with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+                futures = {
+                    name: executor.submit(
+                        self.resource_client.deployments.begin_delete,
+                        self.resource_group_name,
+                        name,
+                    )
+                    for name in names
+                }
+            for name, future in futures.items():
+                try:
+                    poller = future.result()
+                    poller.result(timeout)
+                    if not poller.done():
+                        raise TimeoutError(f"Delete still running after {timeout}s")
+                # pylint: disable=broad-exception-caught
+                except Exception as ex:  # noqa: BLE001
+                    result.failed[name] = str(ex)
+                else:
+                    result.succeeded.append(name)
+        return result
+
+
+# ******************************************************************************** #
@@ -0,0 +1,200 @@
+"""
+Deployment journal
+Records every submitted deployment with its LRO continuation token, so an
+interrupted run can reattach to the deployment still running in Azure
+instead of submitting it again
+"""
+import os
+import sqlite3
+import threading
+import time
+from dataclasses import dataclass
+from typing import Optional
+
+from .az_state import get_cache_dir
+
+# journal states
+RUNNING: str = "running"
+SUCCEEDED: str = "succeeded"
+FAILED: str = "failed"
+
+# ******************************************************************************** #
+
+
+@dataclass
+class JournalEntry:
+    """
+    A journaled deployment
+    """
+
+    subscription_id: str
+    resource_group_name: str
+    deployment_key: str
+    deployment_name: str
+    fingerprint: str
+    continuation_token: str
+    status: str
+    submitted_at: float
+    updated_at: float
+
+
+# ******************************************************************************** #
+
+
+class DeploymentJournal:
+    """
+    Local SQLite journal of submitted deployments, one row per
+    (subscription, resource group, deployment key)
+    """
+
+    def __init__(self, db_file: Optional[str] = None) -> None:
+        """Init function.
+        Parameters
+        ----------
+        db_file: str - defaults to journal.db in the toolkit cache directory
+        """
+        self.db_file = db_file or os.path.join(get_cache_dir(), "journal.db")
+        self.__lock = threading.Lock()
+        self.__connection = sqlite3.connect(self.db_file, check_same_thread=False)
+        with self.__connection:
+            self.__connection.execute(
+                "CREATE TABLE IF NOT EXISTS deployments ("
+                " subscription_id TEXT NOT NULL,"
+                " resource_group TEXT NOT NULL,"
+                " deployment_key TEXT NOT NULL,"
+                " deployment_name TEXT NOT NULL,"
+                " fingerprint TEXT,"
+                " continuation_token TEXT,"
+                " status TEXT NOT NULL,"
+                " submitted_at REAL NOT NULL,"
+                " updated_at REAL NOT NULL,"
+                " PRIMARY KEY (subscription_id, resource_group, deployment_key))"
+            )
+
+    # ******************************************************************************** #
+
+    def record_submitted(
+        self,
+        subscription_id: str,
+        resource_group_name: str,
+        deployment_key: str,
+        deployment_name: str,
+        fingerprint: str,
+        continuation_token: str,
+    ) -> None:
+        """Records a deployment as running, replacing the previous entry
+        Parameters
+        ----------
+        subscription_id: str
+        resource_group_name: str
+        deployment_key: str - stable deployment identity, i.e. the deploy prefix
+        deployment_name: str - ARM deployment name
+        fingerprint: str - deployment fingerprint, None if not computed
+        continuation_token: str - from LROPoller.continuation_token()
+        """
+        now = time.time()
+        with self.__lock, self.__connection:
+            self.__connection.execute(
+                "INSERT OR REPLACE INTO deployments VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (
+                    subscription_id.lower(),
+                    resource_group_name.lower(),
+                    deployment_key,
+                    deployment_name,
+                    fingerprint,
+                    continuation_token,
+                    RUNNING,
+                    now,
+                    now,
+                ),
+            )
+
+    # ******************************************************************************** #
+
+    def mark(
+        self,
+        subscription_id: str,
+        resource_group_name: str,
+        deployment_key: str,
+        status: str,
+    ) -> None:
+        """Updates the status of a journaled deployment
+        Parameters
+        ----------
+        subscription_id: str
+        resource_group_name: str
+        deployment_key: str
+        status: str - SUCCEEDED or FAILED
+        """
+        with self.__lock, self.__connection:
+            self.__connection.execute(
+                "UPDATE deployments SET status = ?, updated_at = ?"
+                " WHERE subscription_id = ? AND resource_group = ?"
+                " AND deployment_key = ?",
+                (
+                    status,
+                    time.time(),
+                    subscription_id.lower(),
+                    resource_group_name.lower(),
+                    deployment_key,
+                ),
+            )
+
+    # ******************************************************************************** #
+
+    def get(
+        self, subscription_id: str, resource_group_name: str, deployment_key: str
+    ) -> JournalEntry:
+        """Returns the journaled deployment, None if there is none
+        Parameters
+        ----------
+        subscription_id: str
+        resource_group_name: str
+        deployment_key: str
+        """
+        with self.__lock:
+            row = self.__connection.execute(
+                "SELECT * FROM deployments"
+                " WHERE subscription_id = ? AND resource_group = ?"
+                " AND deployment_key = ?",
+                (subscription_id.lower(), resource_group_name.lower(), deployment_key),
+            ).fetchone()
+        return JournalEntry(*row) if row else None
+
+    # ******************************************************************************** #
+
+    def find_in_flight(
+        self, subscription_id: str, resource_group_name: str, deployment_key: str
+    ) -> JournalEntry:
+        """
+        Returns the journaled deployment if it was left running, None otherwise
+        """
+        entry = self.get(subscription_id, resource_group_name, deployment_key)
+        if entry is None or entry.status != RUNNING or not entry.continuation_token:
+            return None
+        return entry
+
+    # ******************************************************************************** #
+
+    def in_flight(self) -> list:
+        """
+        Returns every deployment left running, oldest first
+        """
+        with self.__lock:
+            rows = self.__connection.execute(
+                "SELECT * FROM deployments WHERE status = ? ORDER BY submitted_at",
+                (RUNNING,),
+            ).fetchall()
+        return [JournalEntry(*row) for row in rows]
+
+    # ******************************************************************************** #
+
+    def close(self) -> None:
+        """
+        Closes the database
+        """
+        with self.__lock:
+            self.__connection.close()
+
+
+# ******************************************************************************** #
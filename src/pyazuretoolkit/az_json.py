@@ -0,0 +1,196 @@
+"""
+JSON helper
+Pluggable JSON backend - orjson or ujson when installed, stdlib json otherwise -
+and a streaming reader that pulls a single top-level key out of a large file
+"""
+import importlib
+import json
+import mmap
+import re
+from typing import Optional
+
+# preferred backends, fastest first
+BACKENDS: tuple = ("orjson", "ujson", "json")
+
+# JSON string - unrolled so long embedded scripts do not backtrack
+__STRING = re.compile(rb'"[^"\\]*(?:\\.[^"\\]*)*"')
+# anything that changes nesting depth, strings are matched whole so
+# brackets inside them are ignored
+__TOKEN = re.compile(rb'"[^"\\]*(?:\\.[^"\\]*)*"|[{}\[\]]')
+__SCALAR = re.compile(rb"[^,}\]\s]+")
+__WHITESPACE = re.compile(rb"[ \t\r\n]*")
+
+__BACKEND: dict = {}
+
+# ******************************************************************************** #
+
+
+def set_backend(name: Optional[str] = None) -> str:
+    """Selects the JSON backend
+    Parameters
+    ----------
+    name: str - 'orjson', 'ujson' or 'json', None picks the fastest installed
+
+    Returns
+    -------
+    str name of the selected backend
+
+    Raises
+    ------
+    ImportError if the named backend is not installed
+    """
+    names = BACKENDS if name is None else (name,)
+    for backend in names:
+        try:
+            module = importlib.import_module(backend)
+        except ImportError:
+            if name is not None:
+                raise
+            continue
+        __BACKEND["name"] = backend
+        __BACKEND["loads"] = module.loads
+        return backend
+    raise ImportError("No JSON backend available")
+
+
+# ******************************************************************************** #
+
+
+def get_backend() -> str:
+    """
+    Returns the name of the JSON backend in use
+    """
+    if not __BACKEND:
+        set_backend()
+    return __BACKEND["name"]
+
+
+# ******************************************************************************** #
+
+
+def loads(data: bytes) -> object:
+    """Parses a JSON document with the selected backend
+    Parameters
+    ----------
+    data: bytes or str, a UTF-8 byte order mark is skipped
+    """
+    if not __BACKEND:
+        set_backend()
+    if data[:3] == b"\xef\xbb\xbf":
+        data = data[3:]
+    return __BACKEND["loads"](data)
+
+
+# ******************************************************************************** #
+
+
+def load_file(file_name: str) -> object:
+    """Parses a JSON file with the selected backend
+    Parameters
+    ----------
+    file_name: str
+    """
+    with open(file_name, "rb") as file:
+        return loads(file.read())
+
+
+# ******************************************************************************** #
+
+
+def __skip_whitespace(buffer: object, pos: int) -> int:
+    return __WHITESPACE.match(buffer, pos).end()
+
+
+# ******************************************************************************** #
+
+
+def __value_end(buffer: object, pos: int) -> int:
+    """
+    Returns the offset just past the JSON value starting at pos,
+    without building it
+    """
+    first = buffer[pos : pos + 1]
+    if first == b'"':
+        return __STRING.match(buffer, pos).end()
+    if first not in (b"{", b"["):
+        return __SCALAR.match(buffer, pos).end()
+
+    depth = 0
+    for match in __TOKEN.finditer(buffer, pos):
+        token = match.group()
+        if token in (b"{", b"["):
+            depth += 1
+        elif token in (b"}", b"]"):
+            depth -= 1
+            if depth == 0:
+                return match.end()
+    raise ValueError("Unterminated JSON value")
+
+
+# ******************************************************************************** #
+
+
+def __extract(buffer: object, key: str) -> object:
+    """
+    Walks the top-level object in buffer and parses only the value of key
+    """
+    pos = __skip_whitespace(buffer, 3 if buffer[:3] == b"\xef\xbb\xbf" else 0)
+    if buffer[pos : pos + 1] != b"{":
+        raise ValueError("Top-level JSON value is not an object")
+    pos += 1
+
+    while True:
+        pos = __skip_whitespace(buffer, pos)
+        if buffer[pos : pos + 1] == b"}":
+            return None
+
+        match = __STRING.match(buffer, pos)
+        if match is None:
+            raise ValueError(f"Expected a key at offset {pos}")
+        name = json.loads(match.group())
+
+        pos = __skip_whitespace(buffer, match.end())
+        if buffer[pos : pos + 1] != b":":
+            raise ValueError(f"Expected ':' at offset {pos}")
+        pos = __skip_whitespace(buffer, pos + 1)
+
+        end = __value_end(buffer, pos)
+        if name == key:
+            return loads(buffer[pos:end])
+
+        pos = __skip_whitespace(buffer, end)
+        if buffer[pos : pos + 1] == b",":
+            pos += 1
+
+
+# ******************************************************************************** #
+
+
+def extract_key(file_name: str, key: str = "parameters") -> object:
+    """Parses only one top-level key of a JSON file.
+    The file is memory mapped and the other values are skipped without
+    being built, so a large parameters file costs about the size of its
+    'parameters' value rather than the whole document tree.
+    Parameters
+    ----------
+    file_name: str
+    key: str - top-level key to extract
+
+    Returns
+    -------
+    the parsed value, None if the key is not present
+    """
+    with open(file_name, "rb") as file:
+        try:
+            buffer = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            # empty files cannot be mapped
+            buffer = file.read()
+        try:
+            return __extract(buffer, key)
+        finally:
+            if isinstance(buffer, mmap.mmap):
+                buffer.close()
+
+
+# ******************************************************************************** #
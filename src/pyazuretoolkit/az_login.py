@@ -1,22 +1,134 @@
 #!/usr/bin/env python
 """ Checks to see if we are logged into the Azure CLI
+The subscription is resolved from the CLI's cached azureProfile.json or
+the management SDK - the Azure CLI itself is only loaded as a fallback.
 """
+import json
+import os
 
-from azure.cli.core import get_default_cli
+from azure.core.exceptions import ClientAuthenticationError, HttpResponseError
 from azure.identity import AzureCliCredential
-from azure.mgmt.resource import ResourceManagementClient
+from azure.mgmt.resource import ResourceManagementClient, SubscriptionClient
 
+from .az_pipeline import apply_pipeline_policies, pipeline_kwargs
 from .az_subscription import check_valid_sub_id
+from .az_telemetry import span
 from .console_helper import (
     print_confirmation_message,
     print_error_message,
     print_warning_message,
 )
 
+__ARM_SCOPE: str = "https://management.azure.com/.default"
+
+# cached (path, mtime, size) and subscriptions of the last profile read
+__PROFILE_CACHE: dict = {}
+
+# ******************************************************************************** #
+
+
+def get_profile_path() -> str:
+    """
+    Returns the path of the Azure CLI azureProfile.json
+    """
+    config_dir = os.environ.get("AZURE_CONFIG_DIR") or os.path.join(
+        os.path.expanduser("~"), ".azure"
+    )
+    return os.path.join(config_dir, "azureProfile.json")
+
+
+# ******************************************************************************** #
+
+
+def get_profile_subscription(subscription_id: str) -> dict:
+    """Looks up a subscription in the Azure CLI profile without loading the CLI
+    Parameters
+    ----------
+    subscription_id : string
+
+    Returns
+    -------
+    dict - the profile entry for the subscription, None if not found
+    """
+    profile_path = get_profile_path()
+    try:
+        stat = os.stat(profile_path)
+    except OSError:
+        return None
+
+    # only re-read the profile when it changes
+    key = (profile_path, stat.st_mtime_ns, stat.st_size)
+    if __PROFILE_CACHE.get("key") != key:
+        try:
+            # the CLI writes the profile with a BOM
+            with open(profile_path, "r", encoding="utf-8-sig") as file:
+                profile = json.load(file)
+        except (OSError, ValueError):
+            return None
+        __PROFILE_CACHE["key"] = key
+        __PROFILE_CACHE["subscriptions"] = {
+            entry.get("id", "").lower(): entry
+            for entry in profile.get("subscriptions", [])
+        }
+
+    return __PROFILE_CACHE["subscriptions"].get(subscription_id.strip("{}").lower())
+
+
+# ******************************************************************************** #
+
+
+def get_subscription_name(subscription_id: str, credentials: object) -> str:
+    """Resolves the subscription name through the management SDK
+    Parameters
+    ----------
+    subscription_id : string
+    credentials: credential object
+
+    Returns
+    -------
+    str subscription display name
+    """
+    with SubscriptionClient(credentials, **pipeline_kwargs()) as subscription_client:
+        return subscription_client.subscriptions.get(subscription_id).display_name
+
+
+# ******************************************************************************** #
+
+
+def __cli_login(subscription_id: str) -> None:
+    """
+    Fallback - checks the login through the Azure CLI itself.
+    The CLI is only imported here as it loads the whole command table.
+    """
+    # pylint: disable=import-outside-toplevel
+    from azure.cli.core import get_default_cli
+
+    # get the cli instance
+    az_cli = get_default_cli()
+
+    # Get subscription info if logged in
+    account_response = az_cli.invoke(
+        ["account", "show", "--subscription", subscription_id]
+    )
+    if account_response == 0:
+        subscription_name: str = az_cli.result.result["name"]
+        # pylint: disable=line-too-long
+        print_confirmation_message(
+            f"Deploying: '{subscription_name}' with Id: '{subscription_id}'"
+        )
+    else:
+        # pylint: disable=line-too-long
+        print_warning_message("Logging in to Azure CLI.")
+        az_cli.invoke(["login"])
+        az_cli.invoke(["account", "set", "--subscription", subscription_id])
+
+
 # ******************************************************************************** #
 
 
-def check_azure_login(subscription_id: str) -> None:
+def check_azure_login(
+    subscription_id: str, credentials: object = None, use_cli: bool = False
+) -> None:
     """
     Checks to see if we are logged into the AzureCLI.
     Will login if we aren't logged in.
@@ -24,6 +136,9 @@ def check_azure_login(subscription_id: str) -> None:
     Parameters
     ----------
     subscription_id : string
+    credentials: optional credential, when passed the token is validated
+        and unknown subscriptions are resolved through the SDK
+    use_cli: bool - skip the lightweight checks and invoke the Azure CLI
 
     Returns
     -------
@@ -31,33 +146,44 @@ def check_azure_login(subscription_id: str) -> None:
         Logs in if not logged on
     """
     # Check if Subscription is valid
-    if check_valid_sub_id(subscription_id):
-        # get the cli instance
-        az_cli = get_default_cli()
+    if not check_valid_sub_id(subscription_id):
+        print_error_message("##ERROR - Invalid SubscriptionID!")
+        return
 
-        # Get subscription info if logged in
-        account_response = az_cli.invoke(
-            ["account", "show", "--subscription", subscription_id]
-        )
-        if account_response == 0:
-            subscription_name: str = az_cli.result.result["name"]
+    if not use_cli:
+        subscription_name: str = None
+        try:
+            if credentials is not None:
+                # a token means we are logged in
+                with span("login.token"):
+                    credentials.get_token(__ARM_SCOPE)
+
+            subscription = get_profile_subscription(subscription_id)
+            if subscription is not None:
+                subscription_name = subscription.get("name")
+            elif credentials is not None:
+                with span("login.subscription"):
+                    subscription_name = get_subscription_name(
+                        subscription_id, credentials
+                    )
+        except (ClientAuthenticationError, HttpResponseError):
+            subscription_name = None
+
+        if subscription_name is not None:
             # pylint: disable=line-too-long
             print_confirmation_message(
                 f"Deploying: '{subscription_name}' with Id: '{subscription_id}'"
             )
-        else:
-            # pylint: disable=line-too-long
-            print_warning_message("Logging in to Azure CLI.")
-            az_cli.invoke(["login"])
-            az_cli.invoke(["account", "set", "--subscription", subscription_id])
-    else:
-        print_error_message("##ERROR - Invalid SubscriptionID!")
+            return
+
+    with span("login.cli"):
+        __cli_login(subscription_id)
 
 
 # ******************************************************************************** #
 
 def do_login(
-    subscription_id: str, credentials: AzureCliCredential
+    subscription_id: str, credentials: AzureCliCredential, **client_kwargs
 ) -> ResourceManagementClient:
     """
     Do the login
@@ -66,6 +192,8 @@ def do_login(
     ----------
     subscription_id : string
     credentials: AzureCliCredential
+    client_kwargs: extra keyword arguments for ResourceManagementClient,
+        i.e. a shared transport
 
     Returns
     -------
@@ -75,10 +203,12 @@ def do_login(
     # Check if SubscriptionID is valid
     if check_valid_sub_id(subscription_id):
         # Do login if not already
-        check_azure_login(subscription_id)
+        with span("login", subscription_id=subscription_id):
+            check_azure_login(subscription_id, credentials)
 
-        # Obtain the management object for resources.
-        return ResourceManagementClient(credentials, subscription_id)
+        # Obtain the management object for resources - throttled, retried and counted
+        apply_pipeline_policies(client_kwargs)
+        return ResourceManagementClient(credentials, subscription_id, **client_kwargs)
     return None
-    
+
 # ******************************************************************************** #
@@ -0,0 +1,211 @@
+"""
+Deployment manifest helper
+Loads a list of deployment targets from a JSON or YAML manifest file
+"""
+import json
+import os
+from dataclasses import dataclass, field
+
+from .az_subscription import validate_many
+
+# ******************************************************************************** #
+
+
+@dataclass
+class DeploymentTarget:
+    """
+    A single deployment target - one template into one resource group
+    """
+
+    subscription_id: str
+    resource_group_name: str
+    location: str
+    template_file: str
+    template_params_file: str = None
+    deploy_prefix: str = "pydeploy"
+    name: str = None
+    depends_on: list = field(default_factory=list)
+    inputs: dict = field(default_factory=dict)
+
+    def __post_init__(self) -> None:
+        if self.name is None:
+            self.name = self.label
+
+    @property
+    def label(self) -> str:
+        """short display name for the target"""
+        return f"{self.subscription_id}/{self.resource_group_name}"
+
+
+# ******************************************************************************** #
+
+
+def __resolve_path(base_dir: str, file_name: str) -> str:
+    """
+    Resolves a manifest file path relative to the manifest location
+    """
+    if file_name is None or os.path.isabs(file_name):
+        return file_name
+    return os.path.normpath(os.path.join(base_dir, file_name))
+
+
+# ******************************************************************************** #
+
+
+def parse_manifest(manifest_data: dict, base_dir: str = ".") -> list:
+    """Builds the deployment targets from a manifest dict
+    Parameters
+    ----------
+    manifest_data: dict - manifest body, values in "defaults"
+        are applied to every entry in "targets"
+    base_dir: str - directory relative file paths are resolved against
+
+    Returns
+    -------
+    list of DeploymentTarget
+
+    Raises
+    ------
+    ValueError for missing keys, duplicate names and unknown dependencies
+    """
+    defaults = {
+        key: value
+        for key, value in manifest_data.get("defaults", {}).items()
+        if key != "name"
+    }
+    targets = []
+    names: set = set()
+
+    for index, entry in enumerate(manifest_data.get("targets", [])):
+        values = {**defaults, **entry}
+        try:
+            target = DeploymentTarget(
+                subscription_id=values["subscriptionId"],
+                resource_group_name=values["resourceGroup"],
+                location=values["location"],
+                template_file=__resolve_path(base_dir, values["template"]),
+                template_params_file=__resolve_path(base_dir, values.get("params")),
+                deploy_prefix=values.get("deployPrefix", "pydeploy"),
+                name=values.get("name"),
+                depends_on=list(values.get("dependsOn", values.get("depends_on", []))),
+                inputs=dict(values.get("inputs", {})),
+            )
+        except KeyError as ex:
+            raise ValueError(
+                f"Manifest target {index} is missing required key {ex}"
+            ) from ex
+
+        if target.name in names:
+            if "name" in values:
+                raise ValueError(f"Manifest target name '{target.name}' is not unique")
+            # unnamed targets sharing a resource group stay distinct
+            target.name = f"{target.name}#{index}"
+        names.add(target.name)
+        targets.append(target)
+
+    for target in targets:
+        # an input implies a dependency on the deployment producing it
+        for source in target.inputs.values():
+            dependency = source.rpartition(".")[0]
+            if dependency and dependency not in target.depends_on:
+                target.depends_on.append(dependency)
+        for dependency in target.depends_on:
+            if dependency not in names:
+                raise ValueError(
+                    f"Manifest target '{target.name}' depends on unknown"
+                    f" target '{dependency}'"
+                )
+
+    return targets
+
+
+# ******************************************************************************** #
+
+
+def read_manifest_file(manifest_file: str) -> dict:
+    """Reads a JSON or, with PyYAML installed, a YAML manifest file
+    Parameters
+    ----------
+    manifest_file: str - .yaml and .yml files are read as YAML
+
+    Returns
+    -------
+    dict manifest body
+    """
+    with open(manifest_file, "r", encoding="utf-8") as file:
+        if not manifest_file.lower().endswith((".yaml", ".yml")):
+            return json.load(file)
+        try:
+            # pylint: disable=import-outside-toplevel
+            import yaml
+        except ImportError as ex:
+            raise ImportError(
+                "YAML manifests need PyYAML - pip install pyazuretoolkit[yaml]"
+            ) from ex
+        return yaml.safe_load(file)
+
+
+# ******************************************************************************** #
+
+
+def load_manifest(manifest_file: str) -> list:
+    """Loads the deployment targets from a JSON or YAML manifest file
+    Parameters
+    ----------
+    manifest_file: str
+
+    Returns
+    -------
+    list of DeploymentTarget
+
+    Raises
+    ------
+    ValueError for invalid subscription ids and manifest errors
+    FileNotFoundError if a template or params file does not exist
+
+    Example manifest
+    ----------------
+    {
+        "defaults": {"location": "australiaeast", "template": "main.json"},
+        "targets": [
+            {"subscriptionId": "...", "resourceGroup": "rg-app-001"},
+            {"subscriptionId": "...", "resourceGroup": "rg-app-002",
+             "params": "app-002.params.json"}
+        ]
+    }
+
+    Targets can be named and depend on each other, inputs pass outputs of
+    a dependency ("<target name>.<output name>") as parameters
+
+    targets:
+      - name: network
+        resourceGroup: rg-network
+        template: network.json
+      - name: app
+        resourceGroup: rg-app
+        template: app.json
+        dependsOn: [network]
+        inputs:
+          subnetId: network.subnetId
+    """
+    manifest_data = read_manifest_file(manifest_file)
+
+    targets = parse_manifest(
+        manifest_data, os.path.dirname(os.path.abspath(manifest_file))
+    )
+
+    # fail fast before any deployment starts,
+    # every subscription id is checked in a single scan
+    subscription_ids = validate_many(target.subscription_id for target in targets)
+    for target, subscription_id in zip(targets, subscription_ids):
+        if subscription_id is None:
+            raise ValueError(f"{target.label} - invalid subscription id")
+    for target in targets:
+        for file_name in (target.template_file, target.template_params_file):
+            if file_name is not None and not os.path.isfile(file_name):
+                raise FileNotFoundError(f"{target.label} - {file_name} not found")
+
+    return targets
+
+
+# ******************************************************************************** #
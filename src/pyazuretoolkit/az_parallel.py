@@ -0,0 +1,198 @@
+"""
+Parallel deployment helper
+Fans a template deployment out to many resource groups and subscriptions
+"""
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Optional
+
+from .az_client_cache import ClientRegistry, get_registry
+from .az_deploy import DeploymentHelper
+from .az_fingerprint import FingerprintStore
+from .az_history import RetentionPolicy
+from .az_journal import DeploymentJournal
+from .az_manifest import DeploymentTarget
+from .az_polling import WaitStrategy
+from .az_results import DeploymentOutcome, ResultStore
+from .console_helper import (
+    print_command_message,
+    print_confirmation_message,
+    print_error_message,
+    print_ok_message,
+    target_prefix,
+)
+
+# ******************************************************************************** #
+
+
+@dataclass
+class TargetResult:
+    """
+    Outcome of a single target deployment
+    """
+
+    target: DeploymentTarget
+    succeeded: bool
+    elapsed: float
+    error: Optional[str] = None
+    outcome: Optional[DeploymentOutcome] = None
+
+    @property
+    def skipped(self) -> bool:
+        """nothing needed deploying"""
+        return self.outcome is not None and self.outcome.skipped
+
+
+# ******************************************************************************** #
+
+
+def __deploy_target(
+    target: DeploymentTarget,
+    credentials: object,
+    resource_client,
+    fingerprint_store: FingerprintStore,
+    journal: DeploymentJournal,
+    retention_policy: RetentionPolicy,
+    result_store: ResultStore,
+    what_if: bool,
+    validate: bool,
+    wait_strategy: WaitStrategy,
+) -> TargetResult:
+    """
+    Deploys a single target and times it, errors are captured not raised
+    """
+    start = time.perf_counter()
+    if resource_client is None:
+        return TargetResult(target, False, 0.0, "Invalid SubscriptionID")
+    # every line this target writes carries its label
+    with target_prefix(target.label):
+        try:
+            deploy = DeploymentHelper(
+                target.subscription_id,
+                target.resource_group_name,
+                target.location,
+                credentials=credentials,
+                resource_client=resource_client,
+                fingerprint_store=fingerprint_store,
+                journal=journal,
+                retention_policy=retention_policy,
+                result_store=result_store,
+                wait_strategy=wait_strategy,
+            )
+            outcome = deploy.deploy_resource_template(
+                target.template_file,
+                target.template_params_file,
+                target.deploy_prefix,
+                what_if=what_if,
+                validate=validate,
+            )
+        # pylint: disable=broad-exception-caught
+        except Exception as ex:  # noqa: BLE001
+            return TargetResult(target, False, time.perf_counter() - start, str(ex))
+        elapsed = time.perf_counter() - start
+        if outcome.failed:
+            error = outcome.error or f"provisioning state {outcome.provisioning_state}"
+            return TargetResult(target, False, elapsed, error, outcome)
+        return TargetResult(target, True, elapsed, outcome=outcome)
+
+
+# ******************************************************************************** #
+
+
+def deploy_targets(
+    targets: list,
+    max_workers: int = 4,
+    registry: Optional[ClientRegistry] = None,
+    fingerprint_store: Optional[FingerprintStore] = None,
+    what_if: bool = False,
+    journal: Optional[DeploymentJournal] = None,
+    retention_policy: Optional[RetentionPolicy] = None,
+    validate: bool = True,
+    result_store: Optional[ResultStore] = None,
+    wait_strategy: Optional[WaitStrategy] = None,
+) -> list:
+    """Deploys many targets concurrently with a bounded worker pool
+    Parameters
+    ----------
+    targets: list of DeploymentTarget
+    max_workers: int - maximum concurrent deployments
+    registry: optional ClientRegistry, defaults to the process-wide one
+    fingerprint_store: optional FingerprintStore to skip unchanged targets
+    what_if: bool - run an ARM what-if per target and skip unchanged ones
+    journal: optional DeploymentJournal to reattach to interrupted deployments
+    retention_policy: optional RetentionPolicy to prune each target's history
+    validate: bool - validate each target's template offline before deploying
+    result_store: optional ResultStore to keep each target's outcome
+    wait_strategy: optional WaitStrategy used to wait on the deployments
+
+    Returns
+    -------
+    list of TargetResult - in the same order as targets
+    """
+    if registry is None:
+        registry = get_registry()
+    credentials = registry.get_credential()
+
+    # login once per subscription up front and share the clients,
+    # the CLI login check is not safe to run from worker threads
+    resource_clients = {
+        target.subscription_id: registry.get_client(target.subscription_id)
+        for target in targets
+    }
+
+    print_command_message(
+        f"**Deploying {len(targets)} targets with {max_workers} workers **"
+    )
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        futures = [
+            executor.submit(
+                __deploy_target,
+                target,
+                credentials,
+                resource_clients[target.subscription_id],
+                fingerprint_store,
+                journal,
+                retention_policy,
+                result_store,
+                what_if,
+                validate,
+                wait_strategy,
+            )
+            for target in targets
+        ]
+        return [future.result() for future in futures]
+
+
+# ******************************************************************************** #
+
+
+def print_results(results: list) -> None:
+    """Prints a per-target summary of a parallel deployment
+    Parameters
+    ----------
+    results: list of TargetResult
+    """
+    print_confirmation_message("**Deployment summary **")
+    for result in results:
+        if result.skipped:
+            print_ok_message(
+                f"SKIPPED {result.target.label} - {result.outcome.skipped_reason}"
+            )
+        elif result.succeeded:
+            print_ok_message(
+                f"OK      {result.target.label} - {result.elapsed:.1f}s"
+            )
+        else:
+            print_error_message(
+                f"FAILED  {result.target.label} - {result.elapsed:.1f}s"
+                f" - {result.error}"
+            )
+
+    failed = sum(1 for result in results if not result.succeeded)
+    print_confirmation_message(
+        f"{len(results) - failed} succeeded, {failed} failed."
+    )
+
+
+# ******************************************************************************** #
@@ -0,0 +1,231 @@
+"""
+ARM request pipeline
+Policies shared by every management client the toolkit creates - a
+client-side token bucket per subscription that follows ARM's
+x-ms-ratelimit-remaining-* headers, and retries with jittered backoff so
+parallel workers do not retry throttled requests in lockstep
+"""
+import asyncio
+import random
+import time
+from typing import Optional
+
+from azure.core.pipeline.policies import (
+    AsyncHTTPPolicy,
+    AsyncRetryPolicy,
+    HTTPPolicy,
+    RetryPolicy,
+)
+
+from .az_telemetry import count, create_telemetry_policy
+from .az_throttle import (
+    ThrottleMetrics,
+    get_metrics,
+    get_throttle,
+    subscription_from_url,
+)
+
+# ******************************************************************************** #
+
+
+def _before_send(request: object, metrics: ThrottleMetrics) -> float:
+    """
+    Takes a token from the request's subscription bucket, returns the seconds to wait
+    """
+    http_request = request.http_request
+    metrics.add(requests=1)
+    subscription_id = subscription_from_url(http_request.url)
+    if subscription_id is None:
+        return 0.0
+    delay = get_throttle(subscription_id).reserve(http_request.method)
+    if delay > 0:
+        metrics.add(waits=1, wait_seconds=delay)
+        count("arm.throttle_waits", method=http_request.method)
+    return delay
+
+
+def _after_send(request: object, response: object, metrics: ThrottleMetrics) -> None:
+    """
+    Feeds the rate limit headers and throttled responses back into the bucket
+    """
+    http_request = request.http_request
+    http_response = response.http_response
+    subscription_id = subscription_from_url(http_request.url)
+    throttle = get_throttle(subscription_id) if subscription_id else None
+
+    status = http_response.status_code
+    if status == 429:
+        metrics.add(throttled=1)
+        # ARM said stop - empty the bucket so the other workers back off too
+        bucket = throttle.bucket(http_request.method) if throttle else None
+        if bucket is not None:
+            bucket.observe_remaining(0)
+    elif status >= 500:
+        metrics.add(server_errors=1)
+    if throttle is not None:
+        throttle.observe_headers(http_response.headers, metrics)
+
+
+# ******************************************************************************** #
+
+
+class ThrottlePolicy(HTTPPolicy):
+    """
+    Per-retry policy waiting for the subscription's token bucket before
+    every attempt
+    """
+
+    def __init__(self, metrics: Optional[ThrottleMetrics] = None) -> None:
+        """Init function.
+        Parameters
+        ----------
+        metrics: ThrottleMetrics - the process-wide metrics by default
+        """
+        super().__init__()
+        self.metrics = metrics or get_metrics()
+
+    def send(self, request):
+        delay = _before_send(request, self.metrics)
+        if delay > 0:
+            time.sleep(delay)
+        response = self.next.send(request)
+        _after_send(request, response, self.metrics)
+        return response
+
+
+# ******************************************************************************** #
+
+
+class AsyncThrottlePolicy(AsyncHTTPPolicy):
+    """
+    Async ThrottlePolicy - waits without blocking the event loop
+    """
+
+    def __init__(self, metrics: Optional[ThrottleMetrics] = None) -> None:
+        """Init function.
+        Parameters
+        ----------
+        metrics: ThrottleMetrics - the process-wide metrics by default
+        """
+        super().__init__()
+        self.metrics = metrics or get_metrics()
+
+    async def send(self, request):
+        delay = _before_send(request, self.metrics)
+        if delay > 0:
+            await asyncio.sleep(delay)
+        response = await self.next.send(request)
+        _after_send(request, response, self.metrics)
+        return response
+
+
+# ******************************************************************************** #
+
+
+def _jittered_backoff(settings: dict) -> float:
+    """
+    Full jitter - a random wait up to the exponential backoff, so workers
+    throttled together do not retry together
+    """
+    attempts = len(settings["history"])
+    if attempts == 0:
+        return 0.0
+    backoff = min(settings["max_backoff"], settings["backoff"] * (2 ** (attempts - 1)))
+    return random.uniform(0.0, backoff)  # noqa: S311 - retry jitter, not crypto
+
+
+class JitteredRetryPolicy(RetryPolicy):
+    """
+    RetryPolicy with full jitter backoff, counting retries in the throttle
+    metrics. A Retry-After header from ARM still takes precedence.
+    """
+
+    def __init__(self, metrics: Optional[ThrottleMetrics] = None, **kwargs) -> None:
+        """Init function.
+        Parameters
+        ----------
+        metrics: ThrottleMetrics - the process-wide metrics by default
+        kwargs: RetryPolicy settings, i.e. retry_total
+        """
+        super().__init__(**kwargs)
+        self.metrics = metrics or get_metrics()
+
+    def get_backoff_time(self, settings: dict) -> float:
+        return _jittered_backoff(settings)
+
+    def increment(self, settings, response=None, error=None) -> bool:
+        retry = super().increment(settings, response, error)
+        if retry:
+            self.metrics.add(retries=1)
+        return retry
+
+
+# ******************************************************************************** #
+
+
+class AsyncJitteredRetryPolicy(AsyncRetryPolicy):
+    """
+    Async JitteredRetryPolicy
+    """
+
+    def __init__(self, metrics: Optional[ThrottleMetrics] = None, **kwargs) -> None:
+        """Init function.
+        Parameters
+        ----------
+        metrics: ThrottleMetrics - the process-wide metrics by default
+        kwargs: AsyncRetryPolicy settings, i.e. retry_total
+        """
+        super().__init__(**kwargs)
+        self.metrics = metrics or get_metrics()
+
+    def get_backoff_time(self, settings: dict) -> float:
+        return _jittered_backoff(settings)
+
+    def increment(self, settings, response=None, error=None) -> bool:
+        retry = super().increment(settings, response, error)
+        if retry:
+            self.metrics.add(retries=1)
+        return retry
+
+
+# ******************************************************************************** #
+
+
+def pipeline_kwargs(is_async: bool = False, **retry_settings) -> dict:
+    """Returns the client keyword arguments installing the toolkit's
+    retry, throttling and telemetry policies
+    Parameters
+    ----------
+    is_async: bool - policies for an azure.mgmt.*.aio client
+    retry_settings: RetryPolicy settings, i.e. retry_total=5
+
+    Returns
+    -------
+    dict of retry_policy and per_retry_policies
+    """
+    if is_async:
+        retry_policy = AsyncJitteredRetryPolicy(**retry_settings)
+        throttle_policy = AsyncThrottlePolicy()
+    else:
+        retry_policy = JitteredRetryPolicy(**retry_settings)
+        throttle_policy = ThrottlePolicy()
+    return {
+        "retry_policy": retry_policy,
+        "per_retry_policies": [create_telemetry_policy(), throttle_policy],
+    }
+
+
+# ******************************************************************************** #
+
+
+def apply_pipeline_policies(client_kwargs: dict, is_async: bool = False) -> dict:
+    """
+    Adds the toolkit's pipeline policies to client keyword arguments,
+    policies the caller passed are kept
+    """
+    for key, value in pipeline_kwargs(is_async).items():
+        client_kwargs.setdefault(key, value)
+    return client_kwargs
+
+
+# ******************************************************************************** #
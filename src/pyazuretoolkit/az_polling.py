@@ -0,0 +1,225 @@
+"""
+Long running operation helper
+Waits on an LROPoller without a fixed sleep loop, and polls ARM on the
+same backoff schedule instead of the SDK's fixed polling interval
+"""
+import time
+from email.utils import parsedate_to_datetime
+from typing import TYPE_CHECKING, Callable, Optional
+
+from azure.mgmt.core.polling.arm_polling import ARMPolling
+
+if TYPE_CHECKING:
+    from azure.core.pipeline import PipelineResponse
+    from azure.core.polling import LROPoller
+
+# ******************************************************************************** #
+
+
+class WaitStrategy:
+    """
+    Pluggable wait strategy for LROPoller.
+    Exponential backoff between status checks, capped at max_delay,
+    honouring the service Retry-After header and an overall timeout.
+    Subclass and override next_delay() for a different schedule.
+    """
+
+    def __init__(
+        self,
+        initial_delay: float = 1.0,
+        max_delay: float = 30.0,
+        factor: float = 2.0,
+        timeout: Optional[float] = None,
+        honour_retry_after: bool = True,
+    ) -> None:
+        """Init function.
+        Parameters
+        ----------
+        initial_delay: float - seconds before the first status check
+        max_delay: float - cap on the delay between status checks
+        factor: float - backoff multiplier
+        timeout: float - overall timeout in seconds, None waits forever
+        honour_retry_after: bool - use the service Retry-After when larger
+        """
+        self.initial_delay = initial_delay
+        self.max_delay = max_delay
+        self.factor = factor
+        self.timeout = timeout
+        self.honour_retry_after = honour_retry_after
+
+    def next_delay(self, previous_delay: float, retry_after: float) -> float:
+        """Returns the delay before the next status check
+        Parameters
+        ----------
+        previous_delay: float - last delay used, None on the first wait
+        retry_after: float - Retry-After hint from the service or None
+        """
+        if previous_delay is None:
+            delay = self.initial_delay
+        else:
+            delay = min(previous_delay * self.factor, self.max_delay)
+
+        if self.honour_retry_after and retry_after is not None:
+            delay = max(delay, min(retry_after, self.max_delay))
+        return delay
+
+
+# ******************************************************************************** #
+
+
+def __parse_retry_after(value: str) -> float:
+    """
+    Parses a Retry-After header - either delta seconds or an HTTP date
+    """
+    try:
+        return max(float(value), 0.0)
+    except ValueError:
+        pass
+    try:
+        return max(parsedate_to_datetime(value).timestamp() - time.time(), 0.0)
+    except (TypeError, ValueError):
+        return None
+
+
+# ******************************************************************************** #
+
+
+def get_retry_after(poller: "LROPoller") -> float:
+    """Reads the Retry-After header from the poller's last response
+    Parameters
+    ----------
+    poller: LROPoller
+
+    Returns
+    -------
+    float seconds or None when the service did not send one
+    """
+    polling_method = poller.polling_method()
+    return get_response_retry_after(
+        getattr(polling_method, "_pipeline_response", None)
+    )
+
+
+# ******************************************************************************** #
+
+
+def get_response_retry_after(pipeline_response: "PipelineResponse") -> float:
+    """Reads the Retry-After header from a response
+    Parameters
+    ----------
+    pipeline_response: PipelineResponse, can be None
+
+    Returns
+    -------
+    float seconds or None when the service did not send one
+    """
+    if pipeline_response is None:
+        return None
+
+    headers = pipeline_response.http_response.headers
+    value = headers.get("retry-after-ms")
+    if value is not None:
+        try:
+            return max(float(value) / 1000.0, 0.0)
+        except ValueError:
+            pass
+
+    value = headers.get("Retry-After")
+    if value is None:
+        return None
+    return __parse_retry_after(value)
+
+
+# ******************************************************************************** #
+
+
+class StrategyPolling(ARMPolling):
+    """
+    ARM polling method that requests the operation status on a WaitStrategy
+    schedule. The SDK default polls every polling_interval (30s) unless the
+    service sends Retry-After, pass it as the polling argument of begin_*
+    """
+
+    def __init__(self, strategy: Optional[WaitStrategy] = None, **kwargs) -> None:
+        """Init function.
+        Parameters
+        ----------
+        strategy: WaitStrategy - defaults to WaitStrategy()
+        kwargs: passed on to ARMPolling, i.e. lro_options
+        """
+        self.strategy = strategy or WaitStrategy()
+        self.__delay = None
+        super().__init__(self.strategy.initial_delay, **kwargs)
+
+    def _extract_delay(self) -> float:
+        """
+        Seconds before the next status request - the strategy's backoff,
+        never shorter than the service Retry-After if honoured
+        """
+        self.__delay = self.strategy.next_delay(
+            self.__delay, get_response_retry_after(self._pipeline_response)
+        )
+        return self.__delay
+
+
+# ******************************************************************************** #
+
+
+def wait_for_completion(
+    poller: "LROPoller",
+    strategy: Optional[WaitStrategy] = None,
+    done_callback: Optional[Callable] = None,
+    status_callback: Optional[Callable] = None,
+) -> object:
+    """Waits for a long running operation and returns its result
+    Parameters
+    ----------
+    poller: LROPoller
+    strategy: WaitStrategy - defaults to WaitStrategy()
+    done_callback: called with the poller once the operation completes
+    status_callback: called with the status string whenever it changes
+
+    Returns
+    -------
+    the poller result
+
+    Raises
+    ------
+    TimeoutError when the strategy timeout elapses first,
+        the operation keeps running in Azure
+    """
+    if strategy is None:
+        strategy = WaitStrategy()
+    if done_callback is not None:
+        poller.add_done_callback(done_callback)
+
+    deadline = None
+    if strategy.timeout is not None:
+        deadline = time.monotonic() + strategy.timeout
+
+    delay = None
+    last_status = None
+    while not poller.done():
+        # only report status transitions, not every wake up
+        status = poller.status()
+        if status != last_status:
+            last_status = status
+            if status_callback is not None:
+                status_callback(status)
+
+        delay = strategy.next_delay(delay, get_retry_after(poller))
+        if deadline is not None:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                raise TimeoutError(
+                    f"Operation still '{status}' after {strategy.timeout}s."
+                )
+            delay = min(delay, remaining)
+
+        # wait() returns as soon as the operation completes
+        poller.wait(delay)
+
+    return poller.result()
+
+
+# ******************************************************************************** #
@@ -0,0 +1,544 @@
+"""
+Multi-process deployment pipeline
+Prepares many targets - loading, parameter extraction, validation,
+fingerprinting and serialising the request body - in a pool of worker
+processes, and submits the ready bodies from a single thread in this one.
+
+Workers send back the request body as JSON bytes, which pickle as a
+single copy, and keep their own template store and expression caches, so
+the thousand parameter files of one template parse it once per worker.
+"""
+import json
+import math
+import os
+import subprocess
+import time
+from collections import OrderedDict, deque
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from typing import Optional
+
+from .az_client_cache import ClientRegistry, get_registry
+from .az_deploy import load_deployment_params
+from .az_fingerprint import (
+    FingerprintStore,
+    canonical_template,
+    deployment_fingerprint,
+)
+from .az_history import make_deployment_name
+from .az_journal import FAILED, SUCCEEDED, DeploymentJournal, JournalEntry
+from .az_manifest import DeploymentTarget
+from .az_parallel import TargetResult
+from .az_polling import StrategyPolling, WaitStrategy, wait_for_completion
+from .az_resourcegroup import create_resource_group, get_resource_group
+from .az_results import DeploymentOutcome, ResultStore
+from .az_telemetry import span
+from .az_template_store import unwrap
+from .az_validate import ValidationContext, validate_template
+from .console_helper import (
+    print_command_message,
+    print_error_message,
+    print_ok_message,
+    print_warning_message,
+    target_prefix,
+)
+
+# serialised templates kept per worker process
+__MAX_TEMPLATES: int = 16
+
+# ******************************************************************************** #
+
+
+@dataclass
+class PreparedDeployment:
+    """
+    A target ready to submit - or the reason it is not
+    """
+
+    target: DeploymentTarget
+    deployment_name: str = None
+    body: bytes = None
+    fingerprint: str = None
+    warnings: list = field(default_factory=list)
+    error: str = None
+    started_at: float = None
+    elapsed: float = 0.0
+
+
+# ******************************************************************************** #
+
+__SERIALISED: OrderedDict = OrderedDict()
+
+
+def __serialise_template(template: dict) -> tuple:
+    """
+    Returns the request body JSON and the canonical fingerprint JSON of a
+    template, serialised once per worker - the template store hands out
+    the same object for every parameter file of a template
+    """
+    entry = __SERIALISED.get(id(template))
+    if entry is None or entry[0] is not template:
+        # the template is held in the entry, so its id is not reused
+        entry = (
+            template,
+            json.dumps(template, separators=(",", ":")).encode(),
+            canonical_template(template),
+        )
+        __SERIALISED[id(template)] = entry
+        while len(__SERIALISED) > __MAX_TEMPLATES:
+            __SERIALISED.popitem(last=False)
+    __SERIALISED.move_to_end(id(template))
+    return entry[1], entry[2]
+
+
+# ******************************************************************************** #
+
+
+def prepare_target(
+    target: DeploymentTarget, validate: bool = True
+) -> PreparedDeployment:
+    """Loads, validates, fingerprints and serialises one target, runs in a
+    worker process - load, parse, bicep and validation errors are returned
+    in the error field, not raised
+    Parameters
+    ----------
+    target: DeploymentTarget
+    validate: bool - validate the template and parameters offline
+
+    Returns
+    -------
+    PreparedDeployment with the deployment request body as JSON bytes
+    """
+    started_at = time.time()
+    start = time.perf_counter()
+    prepared = PreparedDeployment(
+        target, make_deployment_name(target.deploy_prefix), started_at=started_at
+    )
+    try:
+        deployment_params = load_deployment_params(
+            target.template_file, target.template_params_file
+        )
+        if validate:
+            report = validate_template(
+                unwrap(deployment_params["template"]),
+                unwrap(deployment_params.get("parameters")),
+                ValidationContext(
+                    target.subscription_id,
+                    target.resource_group_name,
+                    target.location,
+                    prepared.deployment_name,
+                ),
+            )
+            prepared.warnings = [str(issue) for issue in report.warnings]
+            report.raise_for_errors()
+
+        template_body, template_json = __serialise_template(
+            unwrap(deployment_params["template"])
+        )
+        prepared.fingerprint = deployment_fingerprint(
+            target.subscription_id,
+            target.resource_group_name,
+            deployment_params,
+            template_json,
+        )
+        # spliced around the serialised template, the template is not re-encoded
+        mode = deployment_params["mode"]
+        body = [
+            b'{"properties":{"mode":',
+            json.dumps(getattr(mode, "value", mode)).encode(),
+            b',"template":',
+            template_body,
+        ]
+        if deployment_params.get("parameters") is not None:
+            parameters = unwrap(deployment_params["parameters"])
+            body += [b',"parameters":', json.dumps(parameters).encode()]
+        body.append(b"}}")
+        prepared.body = b"".join(body)
+    except FileNotFoundError as ex:
+        # a missing bicep compiler has no file name, its message says it all
+        prepared.error = f"{ex.filename} not found" if ex.filename else str(ex)
+    except subprocess.CalledProcessError as ex:
+        detail = (ex.stderr or ex.stdout or "").strip() or str(ex)
+        prepared.error = f"Bicep build failed - {detail}"
+    # TemplateValidationError and unparsable files are ValueErrors
+    except (ValueError, OSError) as ex:
+        prepared.error = str(ex)
+    prepared.elapsed = time.perf_counter() - start
+    return prepared
+
+
+# ******************************************************************************** #
+
+
+def prepare_deployments(
+    targets: list, processes: Optional[int] = None, validate: bool = True
+) -> object:
+    """Prepares targets in a pool of worker processes
+    Parameters
+    ----------
+    targets: list of DeploymentTarget
+    processes: int - worker processes, defaults to the CPU count,
+        1 prepares in this process without a pool
+    validate: bool - validate each target offline
+
+    Returns
+    -------
+    iterator of PreparedDeployment in target order, each yielded as soon
+        as it and the ones before it are ready
+    """
+    processes = processes or os.cpu_count() or 1
+    if processes == 1 or len(targets) < 2:
+        for target in targets:
+            yield prepare_target(target, validate)
+        return
+
+    # a few chunks per worker, consecutive targets mostly share a template
+    chunksize = max(1, math.ceil(len(targets) / (processes * 4)))
+    with ProcessPoolExecutor(max_workers=processes) as executor:
+        yield from executor.map(
+            prepare_target, targets, [validate] * len(targets), chunksize=chunksize
+        )
+
+
+# ******************************************************************************** #
+
+
+class DeploymentSubmitter:
+    """
+    Submits prepared deployments from one thread and waits on them,
+    with at most max_in_flight deployments running at once
+    """
+
+    def __init__(
+        self,
+        registry: Optional[ClientRegistry] = None,
+        max_in_flight: int = 16,
+        wait_strategy: Optional[WaitStrategy] = None,
+        fingerprint_store: Optional[FingerprintStore] = None,
+        journal: Optional[DeploymentJournal] = None,
+        result_store: Optional[ResultStore] = None,
+    ) -> None:
+        """Init function.
+        Parameters
+        ----------
+        registry: optional ClientRegistry, defaults to the process-wide one
+        max_in_flight: int - deployments submitted and not yet finished
+        wait_strategy: optional WaitStrategy used to wait on deployments
+        fingerprint_store: optional FingerprintStore to skip unchanged targets
+        journal: optional DeploymentJournal of the submitted deployments
+        result_store: optional ResultStore to keep each target's outcome
+        """
+        self.registry = registry if registry is not None else get_registry()
+        self.max_in_flight = max_in_flight
+        self.wait_strategy = wait_strategy
+        self.fingerprint_store = fingerprint_store
+        self.journal = journal
+        self.result_store = result_store
+        self.__clients: dict = {}
+        self.__resource_groups: set = set()
+
+    # ******************************************************************************** #
+
+    def __client(self, target: DeploymentTarget) -> object:
+        """
+        Returns the subscription's client, creating the resource group once
+        """
+        client = self.__clients.get(target.subscription_id)
+        if client is None:
+            client = self.registry.get_client(target.subscription_id)
+            self.__clients[target.subscription_id] = client
+        if client is None:
+            raise ValueError("Invalid SubscriptionID")
+
+        key = (target.subscription_id.lower(), target.resource_group_name.lower())
+        if key not in self.__resource_groups:
+            if not get_resource_group(client, target.resource_group_name):
+                create_resource_group(
+                    client, target.resource_group_name, target.location
+                )
+            self.__resource_groups.add(key)
+        return client
+
+    # ******************************************************************************** #
+
+    def __submit(self, prepared: PreparedDeployment) -> tuple:
+        """
+        Submits one prepared deployment, returns what __finish needs -
+        reattaches instead to the same deployment left running by an
+        interrupted run
+        """
+        target = prepared.target
+        client = self.__client(target)
+        in_flight = self.__find_in_flight(prepared)
+        if in_flight is not None:
+            poller = self.__reattach(client, prepared, in_flight)
+            if poller is not None:
+                # it has been running since the interrupted run submitted it
+                submitted_at = in_flight.submitted_at
+                return prepared, in_flight.deployment_name, poller, submitted_at
+
+        deployment_name = prepared.deployment_name
+        submitted_at = time.time()
+        with span("deploy.submit", deployment_name=deployment_name):
+            # the body goes out as it is - no model serialisation
+            poller = client.deployments.begin_create_or_update(
+                target.resource_group_name,
+                deployment_name,
+                prepared.body,
+                content_type="application/json",
+                polling=StrategyPolling(self.wait_strategy),
+            )
+        if self.journal is not None:
+            self.journal.record_submitted(
+                target.subscription_id,
+                target.resource_group_name,
+                target.deploy_prefix,
+                deployment_name,
+                prepared.fingerprint,
+                poller.continuation_token(),
+            )
+        return prepared, deployment_name, poller, submitted_at
+
+    # ******************************************************************************** #
+
+    def __find_in_flight(self, prepared: PreparedDeployment) -> JournalEntry:
+        """
+        Returns the journal entry of a deployment left running with the
+        same fingerprint, None if there is nothing to reattach to
+        """
+        if self.journal is None:
+            return None
+        target = prepared.target
+        entry = self.journal.find_in_flight(
+            target.subscription_id, target.resource_group_name, target.deploy_prefix
+        )
+        if entry is None or entry.fingerprint != prepared.fingerprint:
+            return None
+        return entry
+
+    # ******************************************************************************** #
+
+    def __reattach(
+        self, client: object, prepared: PreparedDeployment, entry: JournalEntry
+    ) -> object:
+        """
+        Returns the poller of a running deployment, None if it cannot be rebuilt
+        """
+        target = prepared.target
+        with target_prefix(target.label):
+            print_command_message(
+                f"**Reattaching to running deployment '{entry.deployment_name}' **"
+            )
+            try:
+                with span("deploy.reattach", deployment_name=entry.deployment_name):
+                    return client.deployments.begin_create_or_update(
+                        target.resource_group_name,
+                        entry.deployment_name,
+                        prepared.body,
+                        content_type="application/json",
+                        continuation_token=entry.continuation_token,
+                        polling=StrategyPolling(self.wait_strategy),
+                    )
+            # pylint: disable=broad-exception-caught
+            except Exception as ex:  # noqa: BLE001
+                print_error_message(f"##ERROR - cannot reattach, redeploying - {ex}")
+                self.__journal_status(target, FAILED)
+                return None
+
+    # ******************************************************************************** #
+
+    def __finish(self, submitted: tuple) -> TargetResult:
+        """
+        Waits for a submitted deployment and records its outcome
+        """
+        prepared, deployment_name, poller, submitted_at = submitted
+        target = prepared.target
+        try:
+            with span("deploy.poll", deployment_name=deployment_name):
+                result = wait_for_completion(poller, self.wait_strategy)
+        # a timeout leaves the journal entry running to reattach to
+        except TimeoutError as ex:
+            return self.__failed(prepared, str(ex) or "timed out")
+        # pylint: disable=broad-exception-caught
+        except Exception as ex:  # noqa: BLE001
+            self.__journal_status(target, FAILED)
+            return self.__failed(prepared, str(ex))
+        self.__journal_status(target, SUCCEEDED)
+
+        outcome = DeploymentOutcome.from_deployment(
+            result,
+            target.subscription_id,
+            target.resource_group_name,
+            target.deploy_prefix,
+            deployment_name,
+            prepared.started_at,
+            submitted_at,
+        )
+        if self.result_store is not None:
+            self.result_store.record(outcome)
+        if outcome.failed:
+            error = outcome.error or f"provisioning state {outcome.provisioning_state}"
+            return self.__failed(prepared, error, outcome)
+        if self.fingerprint_store is not None:
+            self.fingerprint_store.record(
+                target.subscription_id,
+                target.resource_group_name,
+                target.deploy_prefix,
+                prepared.fingerprint,
+                deployment_name,
+            )
+        return TargetResult(target, True, outcome.elapsed, outcome=outcome)
+
+    # ******************************************************************************** #
+
+    def __journal_status(self, target: DeploymentTarget, status: str) -> None:
+        """
+        Updates the journal entry of a deployment, if journaled
+        """
+        if self.journal is not None:
+            self.journal.mark(
+                target.subscription_id, target.resource_group_name,
+                target.deploy_prefix, status,
+            )
+
+    # ******************************************************************************** #
+
+    @staticmethod
+    def __failed(
+        prepared: PreparedDeployment,
+        error: str,
+        outcome: Optional[DeploymentOutcome] = None,
+    ) -> TargetResult:
+        """
+        Reports a target that failed to prepare, submit or deploy
+        """
+        with target_prefix(prepared.target.label):
+            print_error_message(f"##ERROR - {error}")
+        elapsed = time.time() - prepared.started_at if prepared.started_at else 0.0
+        return TargetResult(prepared.target, False, elapsed, error, outcome)
+
+    # ******************************************************************************** #
+
+    @staticmethod
+    def __skipped(prepared: PreparedDeployment) -> TargetResult:
+        """
+        Reports a target identical to its last successful deployment
+        """
+        target = prepared.target
+        with target_prefix(target.label):
+            print_ok_message("**Template and parameters unchanged - skipped. **")
+        outcome = DeploymentOutcome.not_deployed(
+            target.subscription_id,
+            target.resource_group_name,
+            target.deploy_prefix,
+            prepared.deployment_name,
+            prepared.started_at,
+            skipped_reason="unchanged",
+        )
+        return TargetResult(target, True, prepared.elapsed, outcome=outcome)
+
+    # ******************************************************************************** #
+
+    def __unchanged(self, prepared: PreparedDeployment) -> bool:
+        """
+        Checks if the target's last successful deployment had the same fingerprint
+        """
+        if self.fingerprint_store is None:
+            return False
+        target = prepared.target
+        return prepared.fingerprint == self.fingerprint_store.get(
+            target.subscription_id, target.resource_group_name, target.deploy_prefix
+        )
+
+    # ******************************************************************************** #
+
+    def run(self, prepared_deployments: object) -> list:
+        """Submits every prepared deployment and waits for all of them
+        Parameters
+        ----------
+        prepared_deployments: iterable of PreparedDeployment, i.e. from
+            prepare_deployments - submitting starts with the first one ready
+
+        Returns
+        -------
+        list of TargetResult in the order of the prepared deployments
+        """
+        results: list = []
+        in_flight: deque = deque()
+        for prepared in prepared_deployments:
+            index = len(results)
+            results.append(None)
+            with target_prefix(prepared.target.label):
+                for warning in prepared.warnings:
+                    print_warning_message(f"WARNING - {warning}")
+            if prepared.error is not None:
+                results[index] = self.__failed(prepared, prepared.error)
+                continue
+            if self.__unchanged(prepared):
+                results[index] = self.__skipped(prepared)
+                continue
+
+            # the oldest deployment is most likely done by now
+            while len(in_flight) >= self.max_in_flight:
+                done_index, submitted = in_flight.popleft()
+                results[done_index] = self.__finish(submitted)
+            try:
+                in_flight.append((index, self.__submit(prepared)))
+            # pylint: disable=broad-exception-caught
+            except Exception as ex:  # noqa: BLE001
+                results[index] = self.__failed(prepared, str(ex))
+
+        while in_flight:
+            done_index, submitted = in_flight.popleft()
+            results[done_index] = self.__finish(submitted)
+        return results
+
+
+# ******************************************************************************** #
+
+
+def deploy_targets_multiprocess(
+    targets: list,
+    processes: Optional[int] = None,
+    registry: Optional[ClientRegistry] = None,
+    max_in_flight: int = 16,
+    validate: bool = True,
+    fingerprint_store: Optional[FingerprintStore] = None,
+    journal: Optional[DeploymentJournal] = None,
+    result_store: Optional[ResultStore] = None,
+    wait_strategy: Optional[WaitStrategy] = None,
+) -> list:
+    """Deploys many targets, preparing them in worker processes and
+    submitting from this one
+    Parameters
+    ----------
+    targets: list of DeploymentTarget
+    processes: int - worker processes, defaults to the CPU count
+    registry: optional ClientRegistry, defaults to the process-wide one
+    max_in_flight: int - deployments running in Azure at once
+    validate: bool - validate each target offline before submitting
+    fingerprint_store: optional FingerprintStore to skip unchanged targets
+    journal: optional DeploymentJournal of the submitted deployments
+    result_store: optional ResultStore to keep each target's outcome
+    wait_strategy: optional WaitStrategy used to wait on the deployments
+
+    Returns
+    -------
+    list of TargetResult - in the same order as targets
+    """
+    processes = processes or os.cpu_count() or 1
+    print_command_message(
+        f"**Preparing {len(targets)} targets in {processes} processes **"
+    )
+    submitter = DeploymentSubmitter(
+        registry,
+        max_in_flight=max_in_flight,
+        wait_strategy=wait_strategy,
+        fingerprint_store=fingerprint_store,
+        journal=journal,
+        result_store=result_store,
+    )
+    return submitter.run(prepare_deployments(targets, processes, validate))
+
+
+# ******************************************************************************** #
@@ -1,17 +1,121 @@
 """
 Resource group helper
 """
-from azure.mgmt.resource import ResourceManagementClient
+import threading
+import time
+import weakref
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import TYPE_CHECKING, Optional
 
+from .az_telemetry import count, span
 from .console_helper import (
     print_command_message,
 )
 
+if TYPE_CHECKING:
+    from azure.core.polling import LROPoller
+    from azure.mgmt.resource import ResourceManagementClient
+
+# ******************************************************************************** #
+
+
+class ResourceGroupCache:
+    """
+    Short-TTL cache of resource group existence for one client.
+    Create and delete through this module update or invalidate it, so
+    repeated checks within a run do not go back to ARM.
+    """
+
+    def __init__(self, ttl: float = 30.0) -> None:
+        """Init function.
+        Parameters
+        ----------
+        ttl: float - seconds an existence answer stays valid
+        """
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self.__entries: dict = {}
+        self.__lock = threading.Lock()
+
+    def get(self, resource_group_name: str) -> bool:
+        """
+        Returns the cached existence, None when unknown or expired
+        """
+        key = resource_group_name.lower()
+        with self.__lock:
+            entry = self.__entries.get(key)
+            if entry is not None and entry[1] > time.monotonic():
+                self.hits += 1
+                return entry[0]
+            self.misses += 1
+            return None
+
+    def set(self, resource_group_name: str, exists: bool) -> None:
+        """
+        Caches the existence of a resource group for ttl seconds
+        """
+        with self.__lock:
+            self.__entries[resource_group_name.lower()] = (
+                exists,
+                time.monotonic() + self.ttl,
+            )
+
+    def invalidate(self, resource_group_name: Optional[str] = None) -> None:
+        """
+        Forgets one resource group, or every group when no name is passed
+        """
+        with self.__lock:
+            if resource_group_name is None:
+                self.__entries.clear()
+            else:
+                self.__entries.pop(resource_group_name.lower(), None)
+
+    @property
+    def stats(self) -> dict:
+        """
+        hits are ARM calls saved, misses are ARM calls made
+        """
+        with self.__lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "entries": len(self.__entries),
+            }
+
+
+# ******************************************************************************** #
+
+__CACHES: weakref.WeakKeyDictionary = weakref.WeakKeyDictionary()
+__CACHES_LOCK = threading.Lock()
+
+
+def get_resource_group_cache(resource_client: object) -> ResourceGroupCache:
+    """Returns the resource group cache shared by everything using a client
+    Parameters
+    ----------
+    resource_client: ResourceManagementClient
+
+    Returns
+    -------
+    ResourceGroupCache - a throwaway cache if the client cannot be weakly referenced
+    """
+    with __CACHES_LOCK:
+        try:
+            cache = __CACHES.get(resource_client)
+            if cache is None:
+                cache = __CACHES[resource_client] = ResourceGroupCache()
+        except TypeError:
+            cache = ResourceGroupCache(ttl=0.0)
+        return cache
+
+
 # ******************************************************************************** #
 
 
 def create_resource_group(
-    resource_client: ResourceManagementClient, resource_group_name: str, location: str
+    resource_client: "ResourceManagementClient", resource_group_name: str, location: str
 ) -> None:
     """Deploys a new Azure resource group
     Parameters
@@ -28,17 +132,19 @@ def create_resource_group(
     print_command_message(
         f"Creating resource group - '{resource_group_name}'."
     )
-    resource_client.resource_groups.create_or_update(
-        resource_group_name, {"location": location}   
-    )
+    with span("resource_group.create", resource_group=resource_group_name):
+        resource_client.resource_groups.create_or_update(
+            resource_group_name, {"location": location}
+        )
+    get_resource_group_cache(resource_client).set(resource_group_name, True)
 
 
 # ******************************************************************************** #
 
 
 def delete_resource_group(
-    resource_client: ResourceManagementClient, resource_group_name: str
-) -> None:
+    resource_client: "ResourceManagementClient", resource_group_name: str
+) -> "LROPoller":
     """Destroys the Azure resource group
     Parameters
     ----------
@@ -47,32 +153,249 @@ def delete_resource_group(
 
     Returns
     -------
-    nothing
-        Displays output status of the Resource group deployment.
+    LROPoller for the delete, call result() to wait for it
     """
     print_command_message(
         f"Deleting resource group - '{resource_group_name}'."
     )
-    resource_client.resource_groups.begin_delete(resource_group_name)
+    # the group exists until the delete completes - ask ARM next time
+    get_resource_group_cache(resource_client).invalidate(resource_group_name)
+    with span("resource_group.delete", resource_group=resource_group_name):
+        return resource_client.resource_groups.begin_delete(resource_group_name)
 
 
 # ******************************************************************************** #
 
 
 def get_resource_group(
-    resource_client: ResourceManagementClient, resource_group_name: str
+    resource_client: "ResourceManagementClient",
+    resource_group_name: str,
+    use_cache: bool = True,
 ) -> bool:
     """Checks if the given resource group exists
     Parameters
     ----------
     resource_client: ResourceManagementClient
     resource_group_name: str
+    use_cache: bool - answer from the client's resource group cache if fresh
 
     Returns
     -------
     bool resource group exists
     """
-    return resource_client.resource_groups.check_existence(resource_group_name)
+    cache = get_resource_group_cache(resource_client)
+    if use_cache:
+        exists = cache.get(resource_group_name)
+        if exists is not None:
+            count("resource_group.cache_hits")
+            return exists
+
+    with span("resource_group.check", resource_group=resource_group_name):
+        exists = resource_client.resource_groups.check_existence(resource_group_name)
+    cache.set(resource_group_name, exists)
+    return exists
+
+
+# ******************************************************************************** #
+
+
+class ResourceGroupIndex:
+    """
+    In-memory name and tag index of a subscription's resource groups,
+    built from a single paged list() call
+    """
+
+    def __init__(self, resource_groups: list) -> None:
+        """Init function.
+        Parameters
+        ----------
+        resource_groups: iterable of ResourceGroup models
+        """
+        self.__by_name: dict = {}
+        self.__by_tag: dict = {}
+        for group in resource_groups:
+            self.__by_name[group.name.lower()] = group
+            for tag_name in group.tags or {}:
+                self.__by_tag.setdefault(tag_name.lower(), []).append(group)
+
+    @classmethod
+    def build(
+        cls,
+        resource_client: "ResourceManagementClient",
+        list_filter: Optional[str] = None,
+    ) -> "ResourceGroupIndex":
+        """Lists every resource group once and indexes them
+        Parameters
+        ----------
+        resource_client: ResourceManagementClient
+        list_filter: str - optional OData filter, i.e. "tagName eq 'env'"
+        """
+        return cls(resource_client.resource_groups.list(filter=list_filter))
+
+    def __contains__(self, resource_group_name: str) -> bool:
+        return resource_group_name.lower() in self.__by_name
+
+    def __len__(self) -> int:
+        return len(self.__by_name)
+
+    def get(self, resource_group_name: str) -> object:
+        """
+        Returns the ResourceGroup model, None if it does not exist
+        """
+        return self.__by_name.get(resource_group_name.lower())
+
+    def exists(self, resource_group_names: list) -> dict:
+        """Answers many existence queries at once
+        Parameters
+        ----------
+        resource_group_names: list of str
+
+        Returns
+        -------
+        dict of name to bool
+        """
+        return {name: name.lower() in self.__by_name for name in resource_group_names}
+
+    def with_tag(self, tag_name: str, tag_value: Optional[str] = None) -> list:
+        """Returns the resource groups carrying a tag
+        Parameters
+        ----------
+        tag_name: str - case insensitive
+        tag_value: str - optional exact tag value
+        """
+        groups = self.__by_tag.get(tag_name.lower(), [])
+        if tag_value is None:
+            return list(groups)
+        return [
+            group
+            for group in groups
+            if any(
+                key.lower() == tag_name.lower() and value == tag_value
+                for key, value in group.tags.items()
+            )
+        ]
+
+
+# ******************************************************************************** #
+
+
+def get_resource_groups(
+    resource_client: "ResourceManagementClient", resource_group_names: list
+) -> dict:
+    """Checks if many resource groups exist with a single list scan
+    Parameters
+    ----------
+    resource_client: ResourceManagementClient
+    resource_group_names: list of str
+
+    Returns
+    -------
+    dict of name to bool resource group exists
+    """
+    with span("resource_group.list", names=len(resource_group_names)):
+        exists = ResourceGroupIndex.build(resource_client).exists(resource_group_names)
+    cache = get_resource_group_cache(resource_client)
+    for name, found in exists.items():
+        cache.set(name, found)
+    return exists
+
+
+# ******************************************************************************** #
+
+
+@dataclass
+class BulkResult:
+    """
+    Outcome of a bulk resource group operation
+    """
+
+    succeeded: list = field(default_factory=list)
+    failed: dict = field(default_factory=dict)
+
+    @property
+    def ok(self) -> bool:
+        """True if every operation succeeded"""
+        return not self.failed
+
+
+# ******************************************************************************** #
+
+
+def create_resource_groups(
+    resource_client: "ResourceManagementClient",
+    resource_groups: dict,
+    max_workers: int = 8,
+) -> BulkResult:
+    """Creates many resource groups concurrently
+    Parameters
+    ----------
+    resource_client: ResourceManagementClient
+    resource_groups: dict of resource group name to location
+    max_workers: int - maximum concurrent requests
+
+    Returns
+    -------
+    BulkResult - failures map the group name to the error message
+    """
+    result = BulkResult()
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        futures = {
+            name: executor.submit(
+                create_resource_group, resource_client, name, location
+            )
+            for name, location in resource_groups.items()
+        }
+    for name, future in futures.items():
+        error = future.exception()
+        if error is None:
+            result.succeeded.append(name)
+        else:
+            result.failed[name] = str(error)
+    return result
+
+
+# ******************************************************************************** #
+
+
+def delete_resource_groups(
+    resource_client: "ResourceManagementClient",
+    resource_group_names: list,
+    max_workers: int = 8,
+    timeout: Optional[float] = None,
+) -> BulkResult:
+    """Deletes many resource groups concurrently and waits for every delete
+    Parameters
+    ----------
+    resource_client: ResourceManagementClient
+    resource_group_names: list of str
+    max_workers: int - maximum concurrent delete submissions
+    timeout: float - seconds to wait for each delete, None waits forever
+
+    Returns
+    -------
+    BulkResult - failures map the group name to the error message
+    """
+    result = BulkResult()
+
+    # submit every delete first so the LROs run in parallel in Azure
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        futures = {
+            name: executor.submit(delete_resource_group, resource_client, name)
+            for name in resource_group_names
+        }
+
+    for name, future in futures.items():
+        try:
+            poller = future.result()
+            poller.result(timeout)
+            if not poller.done():
+                raise TimeoutError(f"Delete still running after {timeout}s")
+        # pylint: disable=broad-exception-caught
+        except Exception as ex:  # noqa: BLE001
+            result.failed[name] = str(ex)
+        else:
+            result.succeeded.append(name)
+    return result
 
 
 # ******************************************************************************** #
@@ -0,0 +1,401 @@
+"""
+Deployment results
+The outcome of every finished deployment - outputs, provisioned resource
+ids, timings and correlation id - kept in a local SQLite store, so later
+steps read outputs by target or deployment name without calling ARM
+"""
+import json
+import os
+import sqlite3
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Optional
+
+from .az_state import get_cache_dir
+
+# ******************************************************************************** #
+
+
+def output_values(outputs: dict) -> dict:
+    """Returns deployment outputs as plain values
+    Parameters
+    ----------
+    outputs: dict of output name to {"type": ..., "value": ...}
+    """
+    return {
+        name: output.get("value") if isinstance(output, dict) else output
+        for name, output in (outputs or {}).items()
+    }
+
+
+# ******************************************************************************** #
+
+
+@dataclass
+class DeploymentOutcome:
+    """
+    A finished deployment, or one that was skipped or never started -
+    those have no provisioning state and are not stored
+    """
+
+    subscription_id: str
+    resource_group_name: str
+    deploy_prefix: str
+    deployment_name: str
+    provisioning_state: Optional[str]
+    outputs: dict = field(default_factory=dict)
+    resource_ids: list = field(default_factory=list)
+    correlation_id: Optional[str] = None
+    started_at: Optional[float] = None
+    submitted_at: Optional[float] = None
+    finished_at: Optional[float] = None
+    # DeploymentExtended returned by ARM, not persisted
+    deployment: object = field(default=None, repr=False, compare=False)
+    # why nothing was deployed, not persisted
+    skipped_reason: Optional[str] = None
+    error: Optional[str] = None
+
+    @property
+    def succeeded(self) -> bool:
+        """the deployment finished with provisioning state Succeeded"""
+        return self.provisioning_state == "Succeeded"
+
+    @property
+    def skipped(self) -> bool:
+        """nothing needed deploying"""
+        return self.skipped_reason is not None
+
+    @property
+    def failed(self) -> bool:
+        """the deployment could not start or did not succeed"""
+        return self.error is not None or not (self.skipped or self.succeeded)
+
+    @property
+    def elapsed(self) -> float:
+        """seconds from loading the template to the deployment finishing"""
+        return self.finished_at - self.started_at
+
+    @property
+    def wait_time(self) -> float:
+        """seconds ARM took after the deployment was submitted"""
+        return self.finished_at - self.submitted_at
+
+    # ******************************************************************************** #
+
+    @classmethod
+    def from_deployment(
+        cls,
+        deployment: object,
+        subscription_id: str,
+        resource_group_name: str,
+        deploy_prefix: str,
+        deployment_name: str,
+        started_at: float,
+        submitted_at: float,
+        finished_at: Optional[float] = None,
+    ) -> "DeploymentOutcome":
+        """Builds the outcome of a deployment returned by ARM
+        Parameters
+        ----------
+        deployment: DeploymentExtended
+        subscription_id: str
+        resource_group_name: str
+        deploy_prefix: str
+        deployment_name: str
+        started_at: float - epoch seconds the deployment started
+        submitted_at: float - epoch seconds it was submitted to ARM
+        finished_at: float - epoch seconds it finished, defaults to now
+        """
+        properties = getattr(deployment, "properties", None)
+        return cls(
+            subscription_id,
+            resource_group_name,
+            deploy_prefix,
+            deployment_name,
+            getattr(properties, "provisioning_state", None),
+            output_values(getattr(properties, "outputs", None)),
+            [
+                resource.id
+                for resource in getattr(properties, "output_resources", None) or []
+            ],
+            getattr(properties, "correlation_id", None),
+            started_at,
+            submitted_at,
+            finished_at if finished_at is not None else time.time(),
+            deployment,
+        )
+
+    # ******************************************************************************** #
+
+    @classmethod
+    def not_deployed(
+        cls,
+        subscription_id: str,
+        resource_group_name: str,
+        deploy_prefix: str,
+        deployment_name: str,
+        started_at: float,
+        skipped_reason: Optional[str] = None,
+        error: Optional[str] = None,
+    ) -> "DeploymentOutcome":
+        """Builds the outcome of a deployment that was never submitted
+        Parameters
+        ----------
+        subscription_id: str
+        resource_group_name: str
+        deploy_prefix: str
+        deployment_name: str - the name it would have been deployed as
+        started_at: float - epoch seconds the deployment started
+        skipped_reason: str - why it was skipped
+        error: str - why it could not start
+        """
+        return cls(
+            subscription_id,
+            resource_group_name,
+            deploy_prefix,
+            deployment_name,
+            None,
+            started_at=started_at,
+            finished_at=time.time(),
+            skipped_reason=skipped_reason,
+            error=error,
+        )
+
+
+# ******************************************************************************** #
+
+
+class ResultStore:
+    """
+    Local SQLite store of deployment outcomes, one row per
+    (subscription, resource group, deployment name), indexed by
+    deployment prefix for the latest outputs of a target
+    """
+
+    # the only conditions the store queries by
+    __SUBSCRIPTION = "subscription_id = ?"
+    __RESOURCE_GROUP = "resource_group = ?"
+    __PREFIX = "deploy_prefix = ?"
+    __NAME = "deployment_name = ?"
+    __SUCCEEDED = "provisioning_state = 'Succeeded'"
+
+    def __init__(self, db_file: Optional[str] = None) -> None:
+        """Init function.
+        Parameters
+        ----------
+        db_file: str - defaults to results.db in the toolkit cache directory
+        """
+        self.db_file = db_file or os.path.join(get_cache_dir(), "results.db")
+        self.__lock = threading.Lock()
+        self.__connection = sqlite3.connect(self.db_file, check_same_thread=False)
+        with self.__connection:
+            self.__connection.execute(
+                "CREATE TABLE IF NOT EXISTS results ("
+                " subscription_id TEXT NOT NULL,"
+                " resource_group TEXT NOT NULL,"
+                " deploy_prefix TEXT,"
+                " deployment_name TEXT NOT NULL,"
+                " provisioning_state TEXT,"
+                " outputs TEXT NOT NULL,"
+                " resource_ids TEXT NOT NULL,"
+                " correlation_id TEXT,"
+                " started_at REAL,"
+                " submitted_at REAL,"
+                " finished_at REAL NOT NULL,"
+                " PRIMARY KEY (subscription_id, resource_group, deployment_name))"
+            )
+            self.__connection.execute(
+                "CREATE INDEX IF NOT EXISTS results_by_prefix ON results"
+                " (subscription_id, resource_group, deploy_prefix, finished_at)"
+            )
+            self.__connection.execute(
+                "CREATE INDEX IF NOT EXISTS results_by_name"
+                " ON results (deployment_name)"
+            )
+
+    # ******************************************************************************** #
+
+    def record(self, outcome: DeploymentOutcome) -> None:
+        """Stores an outcome, replacing an earlier one of the same deployment
+        Parameters
+        ----------
+        outcome: DeploymentOutcome
+        """
+        with self.__lock, self.__connection:
+            self.__connection.execute(
+                "INSERT OR REPLACE INTO results"
+                " VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (
+                    outcome.subscription_id.lower(),
+                    outcome.resource_group_name.lower(),
+                    outcome.deploy_prefix,
+                    outcome.deployment_name,
+                    outcome.provisioning_state,
+                    json.dumps(outcome.outputs),
+                    json.dumps(outcome.resource_ids),
+                    outcome.correlation_id,
+                    outcome.started_at,
+                    outcome.submitted_at,
+                    outcome.finished_at,
+                ),
+            )
+
+    # ******************************************************************************** #
+
+    def __select(
+        self, clauses: tuple, args: tuple, limit: Optional[int] = None
+    ) -> list:
+        """
+        Returns the outcomes matching every clause, newest first - clauses
+        are the fixed column conditions above, values are always bound
+        """
+        sql = (
+            "SELECT * FROM results WHERE "  # noqa: S608 - fixed clauses only
+            + " AND ".join(clauses or ("1 = 1",))
+            + " ORDER BY finished_at DESC LIMIT ?"
+        )
+        # a negative LIMIT is no limit in SQLite
+        args = (*args, -1 if limit is None else limit)
+        with self.__lock:
+            rows = self.__connection.execute(sql, args).fetchall()
+        return [
+            DeploymentOutcome(
+                *row[:5], json.loads(row[5]), json.loads(row[6]), *row[7:]
+            )
+            for row in rows
+        ]
+
+    # ******************************************************************************** #
+
+    def get(
+        self, subscription_id: str, resource_group_name: str, deployment_name: str
+    ) -> DeploymentOutcome:
+        """Returns the outcome of a deployment, None if it is not stored
+        Parameters
+        ----------
+        subscription_id: str
+        resource_group_name: str
+        deployment_name: str - ARM deployment name
+        """
+        found = self.__select(
+            (self.__SUBSCRIPTION, self.__RESOURCE_GROUP, self.__NAME),
+            (subscription_id.lower(), resource_group_name.lower(), deployment_name),
+        )
+        return found[0] if found else None
+
+    # ******************************************************************************** #
+
+    def find(self, deployment_name: str) -> DeploymentOutcome:
+        """
+        Returns the outcome of a deployment by its name alone - deployment
+        names are unique per submission - None if it is not stored
+        """
+        found = self.__select((self.__NAME,), (deployment_name,), limit=1)
+        return found[0] if found else None
+
+    # ******************************************************************************** #
+
+    def latest(
+        self,
+        subscription_id: str,
+        resource_group_name: str,
+        deploy_prefix: str,
+        succeeded_only: bool = True,
+    ) -> DeploymentOutcome:
+        """Returns the newest outcome of a target, None if there is none
+        Parameters
+        ----------
+        subscription_id: str
+        resource_group_name: str
+        deploy_prefix: str - the target's deployment prefix
+        succeeded_only: bool - ignore failed deployments
+        """
+        clauses = (self.__SUBSCRIPTION, self.__RESOURCE_GROUP, self.__PREFIX)
+        if succeeded_only:
+            clauses += (self.__SUCCEEDED,)
+        found = self.__select(
+            clauses,
+            (subscription_id.lower(), resource_group_name.lower(), deploy_prefix),
+            limit=1,
+        )
+        return found[0] if found else None
+
+    # ******************************************************************************** #
+
+    def outputs(
+        self, subscription_id: str, resource_group_name: str, deploy_prefix: str
+    ) -> dict:
+        """Returns the outputs of a target's newest succeeded deployment
+        Returns
+        -------
+        dict of output name to value, None if the target has no stored outcome
+        """
+        outcome = self.latest(subscription_id, resource_group_name, deploy_prefix)
+        return outcome.outputs if outcome is not None else None
+
+    # ******************************************************************************** #
+
+    def history(
+        self,
+        subscription_id: Optional[str] = None,
+        resource_group_name: Optional[str] = None,
+        deploy_prefix: Optional[str] = None,
+        limit: Optional[int] = None,
+    ) -> list:
+        """Returns stored outcomes newest first, filtered by whichever
+        of subscription, resource group and prefix are passed
+        Parameters
+        ----------
+        subscription_id: str
+        resource_group_name: str
+        deploy_prefix: str
+        limit: int - at most this many outcomes
+        """
+        clauses, args = (), ()
+        for clause, value in (
+            (self.__SUBSCRIPTION, subscription_id and subscription_id.lower()),
+            (
+                self.__RESOURCE_GROUP,
+                resource_group_name and resource_group_name.lower(),
+            ),
+            (self.__PREFIX, deploy_prefix),
+        ):
+            if value is not None:
+                clauses += (clause,)
+                args += (value,)
+        return self.__select(clauses, args, limit)
+
+    # ******************************************************************************** #
+
+    def prune(self, keep_last: int) -> int:
+        """Deletes all but the newest outcomes of every target
+        Parameters
+        ----------
+        keep_last: int - outcomes kept per (subscription, resource group, prefix)
+
+        Returns
+        -------
+        int number of outcomes deleted
+        """
+        with self.__lock, self.__connection:
+            return self.__connection.execute(
+                "DELETE FROM results WHERE rowid IN ("
+                " SELECT rowid FROM (SELECT rowid, ROW_NUMBER() OVER ("
+                "  PARTITION BY subscription_id, resource_group, deploy_prefix"
+                "  ORDER BY finished_at DESC) AS position FROM results)"
+                " WHERE position > ?)",
+                (keep_last,),
+            ).rowcount
+
+    # ******************************************************************************** #
+
+    def close(self) -> None:
+        """
+        Closes the database
+        """
+        with self.__lock:
+            self.__connection.close()
+
+
+# ******************************************************************************** #
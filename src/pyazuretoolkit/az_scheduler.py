@@ -0,0 +1,397 @@
+"""
+Deployment scheduler
+Deploys manifest targets in dependency order - independent branches run
+concurrently up to a limit, and outputs of a deployment are passed as
+parameters to the deployments depending on it
+"""
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from dataclasses import dataclass, field
+from typing import Optional
+
+from .az_manifest import DeploymentTarget
+from .az_telemetry import span
+from .console_helper import (
+    print_command_message,
+    print_confirmation_message,
+    print_error_message,
+    print_ok_message,
+    print_warning_message,
+    target_prefix,
+)
+
+# ******************************************************************************** #
+
+
+class CycleError(ValueError):
+    """
+    Raised when the targets' dependencies form a cycle
+    """
+
+
+# ******************************************************************************** #
+
+
+def topological_order(targets: list) -> list:
+    """Orders targets so every target comes after its dependencies
+    Parameters
+    ----------
+    targets: list of DeploymentTarget
+
+    Returns
+    -------
+    list of DeploymentTarget - manifest order is kept where dependencies allow
+
+    Raises
+    ------
+    ValueError for unknown dependencies, CycleError for cycles
+    """
+    by_name = {target.name: target for target in targets}
+    pending = {target.name: set(target.depends_on) for target in targets}
+    for name, dependencies in pending.items():
+        unknown = dependencies - by_name.keys()
+        if unknown:
+            raise ValueError(f"'{name}' depends on unknown target(s) {sorted(unknown)}")
+
+    ordered = []
+    while pending:
+        ready = [name for name, dependencies in pending.items() if not dependencies]
+        if not ready:
+            raise CycleError(f"Dependency cycle between {sorted(pending)}")
+        for name in ready:
+            del pending[name]
+            ordered.append(by_name[name])
+        for dependencies in pending.values():
+            dependencies.difference_update(ready)
+    return ordered
+
+
+# ******************************************************************************** #
+
+
+@dataclass
+class NodeResult:
+    """
+    Outcome of one scheduled deployment
+    """
+
+    target: DeploymentTarget
+    succeeded: bool = False
+    skipped: bool = False
+    start: float = 0.0
+    end: float = 0.0
+    outputs: dict = field(default_factory=dict)
+    error: str = None
+
+    @property
+    def elapsed(self) -> float:
+        """seconds the deployment ran"""
+        return self.end - self.start
+
+
+# ******************************************************************************** #
+
+
+@dataclass
+class ScheduleResult:
+    """
+    Outcome of a scheduled run, with its critical path - the chain of
+    dependent deployments that took longest end to end
+    """
+
+    results: dict
+    elapsed: float
+    critical_path: list
+    critical_path_time: float
+
+    @property
+    def succeeded(self) -> bool:
+        """True if every deployment succeeded"""
+        return all(result.succeeded for result in self.results.values())
+
+
+# ******************************************************************************** #
+
+
+def critical_path(targets: list, results: dict) -> tuple:
+    """Finds the longest chain of dependent deployments by run time
+    Parameters
+    ----------
+    targets: list of DeploymentTarget in topological order
+    results: dict of target name to NodeResult
+
+    Returns
+    -------
+    tuple of (list of target names, seconds)
+    """
+    longest: dict = {}
+    previous: dict = {}
+    for target in targets:
+        before = max(target.depends_on, key=lambda d: longest[d], default=None)
+        longest[target.name] = results[target.name].elapsed + (
+            longest[before] if before is not None else 0.0
+        )
+        previous[target.name] = before
+
+    if not longest:
+        return [], 0.0
+    name = max(longest, key=longest.get)
+    total = longest[name]
+    path = []
+    while name is not None:
+        path.append(name)
+        name = previous[name]
+    return path[::-1], total
+
+
+# ******************************************************************************** #
+
+
+def resolve_inputs(target: DeploymentTarget, results: dict) -> dict:
+    """Maps a target's inputs to the outputs of its dependencies
+    Parameters
+    ----------
+    target: DeploymentTarget - inputs are "<target name>.<output name>"
+    results: dict of target name to NodeResult
+
+    Returns
+    -------
+    dict of parameter name to value
+
+    Raises
+    ------
+    KeyError if a dependency did not produce the output
+    """
+    overrides = {}
+    for parameter, source in target.inputs.items():
+        dependency, _, output = source.rpartition(".")
+        outputs = results[dependency].outputs
+        if output not in outputs:
+            raise KeyError(f"'{dependency}' has no output '{output}'")
+        overrides[parameter] = outputs[output]
+    return overrides
+
+
+# ******************************************************************************** #
+
+
+class DeploymentScheduler:
+    """
+    Runs deployments in dependency order with bounded concurrency.
+    A failed deployment skips everything depending on it, independent
+    branches carry on.
+    """
+
+    def __init__(
+        self,
+        targets: list,
+        max_concurrency: int = 4,
+        deploy_func: Optional[callable] = None,
+        registry: object = None,
+        fingerprint_store: object = None,
+        journal: object = None,
+        retention_policy: object = None,
+        result_store: object = None,
+        what_if: bool = False,
+        validate: bool = True,
+    ) -> None:
+        """Init function.
+        Parameters
+        ----------
+        targets: list of DeploymentTarget
+        max_concurrency: int - maximum deployments running at once
+        deploy_func: callable(target, parameter_overrides) returning the
+            deployment outputs dict, DeploymentHelper by default
+        registry: optional ClientRegistry for the default deploy_func
+        fingerprint_store: optional FingerprintStore for the default deploy_func
+        journal: optional DeploymentJournal for the default deploy_func
+        retention_policy: optional RetentionPolicy for the default deploy_func
+        result_store: optional ResultStore for the default deploy_func, also
+            answers the outputs of targets skipped as unchanged
+        what_if: bool - what-if pre-check in the default deploy_func
+        validate: bool - offline template validation in the default deploy_func
+        """
+        self.targets = topological_order(targets)
+        self.max_concurrency = max_concurrency
+        self.registry = registry
+        self.fingerprint_store = fingerprint_store
+        self.journal = journal
+        self.retention_policy = retention_policy
+        self.result_store = result_store
+        self.what_if = what_if
+        self.validate = validate
+        self.deploy_func = deploy_func or self.__deploy_target
+        self.__clients: dict = {}
+        self.__credentials = None
+
+    # ******************************************************************************** #
+
+    def __login(self) -> None:
+        """
+        Logs in once per subscription, before any worker starts - the CLI
+        login check is not safe to run from worker threads
+        """
+        # pylint: disable=import-outside-toplevel
+        from .az_client_cache import get_registry
+
+        if self.registry is None:
+            self.registry = get_registry()
+        self.__credentials = self.registry.get_credential()
+        for target in self.targets:
+            if target.subscription_id not in self.__clients:
+                self.__clients[target.subscription_id] = self.registry.get_client(
+                    target.subscription_id
+                )
+
+    # ******************************************************************************** #
+
+    def __deploy_target(self, target: DeploymentTarget, overrides: dict) -> dict:
+        """
+        Default deploy_func - deploys with DeploymentHelper and returns its outputs
+        """
+        # pylint: disable=import-outside-toplevel
+        from .az_deploy import DeploymentHelper
+
+        resource_client = self.__clients.get(target.subscription_id)
+        if resource_client is None:
+            raise ValueError("Invalid SubscriptionID")
+        deploy = DeploymentHelper(
+            target.subscription_id,
+            target.resource_group_name,
+            target.location,
+            credentials=self.__credentials,
+            resource_client=resource_client,
+            fingerprint_store=self.fingerprint_store,
+            journal=self.journal,
+            retention_policy=self.retention_policy,
+            result_store=self.result_store,
+        )
+        result = deploy.deploy_resource_template(
+            target.template_file,
+            target.template_params_file,
+            target.deploy_prefix,
+            what_if=self.what_if,
+            parameter_overrides=overrides,
+            validate=self.validate,
+        )
+        if result.failed:
+            raise ValueError(
+                result.error or f"provisioning state {result.provisioning_state}"
+            )
+        if result.skipped:
+            # nothing deployed - dependents still need the outputs
+            return deploy.get_deployment_outputs(target.deploy_prefix)
+        return result.outputs
+
+    # ******************************************************************************** #
+
+    def __run_node(self, node: NodeResult, results: dict) -> NodeResult:
+        with target_prefix(node.target.name), span(
+            "schedule.target", target=node.target.name
+        ):
+            node.start = time.perf_counter()
+            try:
+                overrides = resolve_inputs(node.target, results)
+                node.outputs = self.deploy_func(node.target, overrides) or {}
+                node.succeeded = True
+            # pylint: disable=broad-exception-caught
+            except Exception as ex:  # noqa: BLE001
+                node.error = str(ex)
+                print_error_message(f"##ERROR - {ex}")
+            node.end = time.perf_counter()
+        return node
+
+    # ******************************************************************************** #
+
+    def run(self) -> ScheduleResult:
+        """Deploys every target
+        Returns
+        -------
+        ScheduleResult - results keyed by target name
+        """
+        if self.deploy_func == self.__deploy_target:
+            self.__login()
+
+        results = {target.name: NodeResult(target) for target in self.targets}
+        waiting = {target.name: set(target.depends_on) for target in self.targets}
+        dependents: dict = {target.name: [] for target in self.targets}
+        for target in self.targets:
+            for dependency in target.depends_on:
+                dependents[dependency].append(target.name)
+
+        print_command_message(
+            f"**Deploying {len(self.targets)} targets,"
+            f" at most {self.max_concurrency} at once **"
+        )
+        start = time.perf_counter()
+        running: dict = {}
+        with ThreadPoolExecutor(max_workers=self.max_concurrency) as executor:
+
+            def submit_ready() -> None:
+                for name in [n for n, deps in waiting.items() if not deps]:
+                    del waiting[name]
+                    future = executor.submit(self.__run_node, results[name], results)
+                    running[future] = name
+
+            submit_ready()
+            while running:
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    name = running.pop(future)
+                    if results[name].succeeded:
+                        for dependent in dependents[name]:
+                            waiting[dependent].discard(name)
+                    else:
+                        self.__skip_dependents(name, dependents, waiting, results)
+                submit_ready()
+
+        path, path_time = critical_path(self.targets, results)
+        return ScheduleResult(results, time.perf_counter() - start, path, path_time)
+
+    # ******************************************************************************** #
+
+    @staticmethod
+    def __skip_dependents(
+        failed: str, dependents: dict, waiting: dict, results: dict
+    ) -> None:
+        """
+        Marks everything downstream of a failed deployment as skipped
+        """
+        stack = list(dependents[failed])
+        while stack:
+            name = stack.pop()
+            if name not in waiting:
+                continue
+            del waiting[name]
+            results[name].skipped = True
+            results[name].error = f"dependency '{failed}' failed"
+            stack.extend(dependents[name])
+
+
+# ******************************************************************************** #
+
+
+def print_schedule(schedule: ScheduleResult) -> None:
+    """Prints a per-target summary and the critical path of a scheduled run
+    Parameters
+    ----------
+    schedule: ScheduleResult
+    """
+    print_confirmation_message("**Deployment summary **")
+    for name, result in schedule.results.items():
+        if result.succeeded:
+            print_ok_message(f"OK      {name} - {result.elapsed:.1f}s")
+        elif result.skipped:
+            print_warning_message(f"SKIPPED {name} - {result.error}")
+        else:
+            print_error_message(
+                f"FAILED  {name} - {result.elapsed:.1f}s - {result.error}"
+            )
+
+    print_confirmation_message(
+        f"Critical path {schedule.critical_path_time:.1f}s of"
+        f" {schedule.elapsed:.1f}s total: {' -> '.join(schedule.critical_path)}"
+    )
+
+
+# ******************************************************************************** #
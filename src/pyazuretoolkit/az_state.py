@@ -0,0 +1,33 @@
+"""
+Local state helper
+Locates the toolkit's on-disk cache directory
+"""
+import os
+
+# ******************************************************************************** #
+
+
+def get_cache_dir(*parts: str) -> str:
+    """Returns (and creates) a directory under the toolkit cache root
+    Parameters
+    ----------
+    parts: sub directory names
+
+    Returns
+    -------
+    str - $PYAZURETOOLKIT_CACHE_DIR, else $XDG_CACHE_HOME/pyazuretoolkit,
+        else ~/.cache/pyazuretoolkit, joined with parts
+    """
+    root = os.environ.get("PYAZURETOOLKIT_CACHE_DIR")
+    if not root:
+        root = os.path.join(
+            os.environ.get("XDG_CACHE_HOME")
+            or os.path.join(os.path.expanduser("~"), ".cache"),
+            "pyazuretoolkit",
+        )
+    path = os.path.join(root, *parts)
+    os.makedirs(path, exist_ok=True)
+    return path
+
+
+# ******************************************************************************** #
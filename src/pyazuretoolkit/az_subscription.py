@@ -1,6 +1,93 @@
 """ Azure subscription helpers
 """
+import itertools
 import re
+from typing import ClassVar
+
+# 00000000-0000-0000-0000-000000000000, optionally in braces
+__PATTERN = re.compile(
+    r"\{?[0-9a-fA-F]{8}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{12}\}?"
+)
+# the same, one id per line - validates a joined batch in a single scan
+__PATTERN_LINES = re.compile(rf"^(?:{__PATTERN.pattern})$", re.MULTILINE)
+
+# ******************************************************************************** #
+
+
+class SubscriptionId:
+    """
+    Validated Azure subscription id - lower case, without braces.
+    Instances are cached per raw string, so validating the same id
+    again is a dictionary lookup. A full cache drops its oldest quarter.
+    Compares equal to any string spelling of the same id.
+    """
+
+    __slots__ = ("value",)
+
+    # raw string to instance, pattern bound below the class
+    _cache: ClassVar[dict] = {}
+    _max_cache: int = 65536
+    _pattern: re.Pattern = None
+
+    def __new__(cls, subscription_id: str) -> "SubscriptionId":
+        """
+        Raises
+        ------
+        ValueError if subscription_id is not a valid subscription id
+        """
+        if isinstance(subscription_id, SubscriptionId):
+            return subscription_id
+        if not isinstance(subscription_id, str):
+            raise ValueError(f"Invalid subscription id: {subscription_id!r}")
+        instance = cls._cache.get(subscription_id)
+        if instance is None:
+            if not cls._pattern.fullmatch(subscription_id):
+                raise ValueError(f"Invalid subscription id: {subscription_id!r}")
+            instance = cls._from_valid(subscription_id)
+        return instance
+
+    @classmethod
+    def _from_valid(cls, subscription_id: str) -> "SubscriptionId":
+        """
+        Builds and caches an instance for an already validated string
+        """
+        instance = object.__new__(cls)
+        instance.value = subscription_id.strip("{}").lower()
+        if len(cls._cache) >= cls._max_cache:
+            oldest = itertools.islice(cls._cache, max(1, cls._max_cache // 4))
+            for key in list(oldest):
+                del cls._cache[key]
+        cls._cache[subscription_id] = instance
+        return instance
+
+    @classmethod
+    def parse(cls, subscription_id: str) -> "SubscriptionId":
+        """
+        Returns the SubscriptionId, None if subscription_id is not valid
+        """
+        try:
+            return cls(subscription_id)
+        except ValueError:
+            return None
+
+    def __str__(self) -> str:
+        return self.value
+
+    def __repr__(self) -> str:
+        return f"SubscriptionId({self.value!r})"
+
+    def __eq__(self, other: object) -> bool:
+        if isinstance(other, SubscriptionId):
+            return self.value == other.value
+        if isinstance(other, str):
+            return self.value == other.strip("{}").lower()
+        return NotImplemented
+
+    def __hash__(self) -> int:
+        return hash(self.value)
+
+
+SubscriptionId._pattern = __PATTERN
 
 # ******************************************************************************** #
 
@@ -10,16 +97,52 @@ def check_valid_sub_id(subscription_id: str) -> bool:
     checks for a valid Azure Sub ID
     Format 00000000-0000-0000-0000-000000000000
     """
+    if isinstance(subscription_id, SubscriptionId):
+        return True
     # check if a string
     if isinstance(subscription_id, str):
-        # pylint: disable=line-too-long
-        # pylint: disable=anomalous-backslash-in-string
-        re_result = re.search(
-            "^(\{{0,1}([0-9a-fA-F]){8}-([0-9a-fA-F]){4}-([0-9a-fA-F]){4}-([0-9a-fA-F]){4}-([0-9a-fA-F]){12}\}{0,1})$",
-            subscription_id,
-        )
-        return bool(re_result)
+        return SubscriptionId.parse(subscription_id) is not None
     return False
 
 
 # ******************************************************************************** #
+
+
+def validate_many(subscription_ids: list) -> list:
+    """Validates many subscription ids at once, i.e. every target of a manifest.
+    Distinct ids are joined and checked in a single regular expression scan.
+    Parameters
+    ----------
+    subscription_ids: iterable of str
+
+    Returns
+    -------
+    list of SubscriptionId, None for invalid ids - in the same order
+    """
+    subscription_ids = list(subscription_ids)
+    cache = SubscriptionId._cache
+    # the batch's own results - the shared cache may evict them mid-call
+    found, unknown = {}, set()
+    for subscription_id in subscription_ids:
+        if isinstance(subscription_id, str) and subscription_id not in found:
+            instance = cache.get(subscription_id)
+            if instance is not None:
+                found[subscription_id] = instance
+            elif "\n" not in subscription_id:
+                # only ids not validated before need the scan
+                unknown.add(subscription_id)
+    for match in __PATTERN_LINES.finditer("\n".join(unknown)):
+        found[match.group()] = SubscriptionId._from_valid(match.group())
+
+    results = []
+    for subscription_id in subscription_ids:
+        if isinstance(subscription_id, SubscriptionId):
+            results.append(subscription_id)
+        elif isinstance(subscription_id, str):
+            results.append(found.get(subscription_id))
+        else:
+            results.append(None)
+    return results
+
+
+# ******************************************************************************** #
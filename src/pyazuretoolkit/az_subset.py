@@ -0,0 +1,326 @@
+"""
+Resource subset deployments
+Diffs a template against its previous version and builds a minimal
+template with only the added or changed resources and everything they
+depend on, so ARM evaluates a handful of resources instead of all of them.
+Incremental mode only - in Complete mode the missing resources would be deleted.
+"""
+import copy
+import json
+import re
+from dataclasses import dataclass, field
+from typing import Optional
+
+from .az_validate import (
+    ExpressionError,
+    ExpressionEvaluator,
+    ResourceIndex,
+    ValidationContext,
+    is_expression,
+    parse_expression,
+)
+from .console_helper import print_command_message, print_ok_message
+
+# top-level resource of a ResourceIndex node path
+_TOP_LEVEL = re.compile(r"resources(?:\[\d+\]|\.[^.]+)")
+
+# ******************************************************************************** #
+
+
+@dataclass
+class SubsetPlan:
+    """
+    The resources of a subset deployment and its minimal template
+    """
+
+    changed: list = field(default_factory=list)
+    removed: list = field(default_factory=list)
+    included: list = field(default_factory=list)
+    total: int = 0
+    template: dict = None
+
+    @property
+    def empty(self) -> bool:
+        """no resource was added or changed"""
+        return not self.changed
+
+
+# ******************************************************************************** #
+
+
+def _unparse(node: tuple) -> str:
+    """
+    Turns an expression AST back into expression text
+    """
+    kind = node[0]
+    if kind == "lit":
+        value = node[1]
+        if isinstance(value, str):
+            return "'" + value.replace("'", "''") + "'"
+        return json.dumps(value)
+    if kind == "call":
+        return f"{node[1]}({', '.join(_unparse(arg) for arg in node[2])})"
+    if kind == "prop":
+        return f"{_unparse(node[1])}.{node[2]}"
+    return f"{_unparse(node[1])}[{_unparse(node[2])}]"
+
+
+# ******************************************************************************** #
+
+
+def _referenced(value: object) -> list:
+    """
+    Returns the first argument of every reference() and list*() call in a
+    value, as expression text - the implicit dependencies ARM derives
+    """
+    found = []
+    stack = [value]
+    while stack:
+        value = stack.pop()
+        if isinstance(value, dict):
+            stack.extend(value.values())
+        elif isinstance(value, list):
+            stack.extend(value)
+        elif is_expression(value):
+            try:
+                nodes = [parse_expression(value)]
+            except ExpressionError:
+                continue
+            while nodes:
+                node = nodes.pop()
+                if node[0] == "call":
+                    name, args = node[1], node[2]
+                    if args and (name == "reference" or name.startswith("list")):
+                        found.append(f"[{_unparse(args[0])}]")
+                    nodes.extend(args)
+                elif node[0] in ("prop", "index"):
+                    nodes.extend(
+                        child for child in node[1:] if isinstance(child, tuple)
+                    )
+    return found
+
+
+# ******************************************************************************** #
+
+
+class _TemplateResources:
+    """
+    A template's top-level resources with their diff keys, and the
+    dependencies between them - explicit dependsOn and implicit reference()
+    """
+
+    def __init__(self, template: dict, evaluator: ExpressionEvaluator) -> None:
+        self.template = template
+        self.evaluator = evaluator
+        resources = template.get("resources") or []
+        self.symbolic = isinstance(resources, dict)
+        self.items = list(resources.items() if self.symbolic else enumerate(resources))
+        self.index = ResourceIndex(template, evaluator)
+
+        # top-level position of every indexed node, nested children included
+        positions = {
+            (f"resources.{key}" if self.symbolic else f"resources[{key}]"): position
+            for position, (key, _) in enumerate(self.items)
+        }
+        self.owners = [
+            positions[_TOP_LEVEL.match(node.path).group(0)] for node in self.index.nodes
+        ]
+        self.keys = [None] * len(self.items)
+        for node, position in zip(self.index.nodes, self.owners):
+            if self.keys[position] is None:
+                self.keys[position] = self.__key(node, *self.items[position])
+
+    @staticmethod
+    def __key(node: object, key: object, resource: dict) -> str:
+        """
+        Stable diff key - the symbolic name, else the evaluated 'type/name',
+        else the raw type and name
+        """
+        if isinstance(key, str):
+            return key
+        if isinstance(node.resource_type, str) and isinstance(node.name, str):
+            return f"{node.resource_type}/{node.name}".lower()
+        return f"{resource.get('type')}/{resource.get('name')}"
+
+    def dependencies(self, value: object, position: Optional[int] = None) -> set:
+        """Top-level positions a value depends on
+        Parameters
+        ----------
+        value: resource, output or any template value
+        position: int - the resource's position, adds its dependsOn
+
+        Returns
+        -------
+        set of positions, None if one is only known at deployment time
+        """
+        references = _referenced(value)
+        if position is not None:
+            for node, owner in zip(self.index.nodes, self.owners):
+                if owner == position:
+                    references.extend(node.depends_on)
+        found = set()
+        for reference in references:
+            target = self.index.resolve(reference)
+            if target is None:
+                return None
+            # -1 is a resource outside the template, it is not deployed here
+            if target >= 0 and self.owners[target] != position:
+                found.add(self.owners[target])
+        return found
+
+    def fingerprint(self, position: int) -> str:
+        """
+        The resource as written and as evaluated - a changed variable or
+        parameter value changes only the evaluated form
+        """
+        resource = self.items[position][1]
+        evaluated = self.evaluator.evaluate_value(resource)
+        return json.dumps([resource, evaluated], sort_keys=True, default=repr)
+
+
+
+# ******************************************************************************** #
+
+
+def __values(parameters: dict) -> dict:
+    """
+    Parameter values of the "parameters" of a parameter file
+    """
+    return {
+        name: entry["value"]
+        for name, entry in (parameters or {}).items()
+        if isinstance(entry, dict) and "value" in entry
+    }
+
+
+# ******************************************************************************** #
+
+
+def __closure(resources: _TemplateResources, positions: set) -> set:
+    """
+    The positions and everything they depend on, transitively - every
+    position when a dependency cannot be resolved offline
+    """
+    included = set(positions)
+    pending = list(positions)
+    while pending:
+        position = pending.pop()
+        dependencies = resources.dependencies(resources.items[position][1], position)
+        if dependencies is None:
+            return set(range(len(resources.items)))
+        for dependency in dependencies - included:
+            included.add(dependency)
+            pending.append(dependency)
+    return included
+
+
+# ******************************************************************************** #
+
+
+def subset_template(
+    template: dict, resources: _TemplateResources, positions: set
+) -> dict:
+    """Returns a copy of the template with only some of its resources, and
+    only the outputs that do not need the others
+    Parameters
+    ----------
+    template: dict - ARM template
+    resources: _TemplateResources of the template
+    positions: set of the top-level resource positions to keep
+    """
+    kept = [resources.items[position] for position in sorted(positions)]
+    subset = dict(template)
+    if resources.symbolic:
+        subset["resources"] = dict(kept)
+    else:
+        subset["resources"] = [resource for _, resource in kept]
+
+    outputs = {}
+    for name, output in (template.get("outputs") or {}).items():
+        dependencies = resources.dependencies(output)
+        if dependencies is not None and dependencies <= positions:
+            outputs[name] = output
+    if "outputs" in template:
+        subset["outputs"] = outputs
+    return copy.deepcopy(subset)
+
+
+# ******************************************************************************** #
+
+
+def plan_subset(
+    previous_template: dict,
+    template: dict,
+    parameters: Optional[dict] = None,
+    previous_parameters: Optional[dict] = None,
+    context: Optional[ValidationContext] = None,
+) -> SubsetPlan:
+    """Diffs a template against its previous version and plans the minimal
+    deployment of the added and changed resources
+    Parameters
+    ----------
+    previous_template: dict - the template as last deployed
+    template: dict - the template to deploy
+    parameters: dict - the "parameters" of the parameter file, can be None
+    previous_parameters: dict - the parameters last deployed, defaults to parameters
+    context: ValidationContext - deployment scope for resourceGroup() and friends
+
+    Returns
+    -------
+    SubsetPlan - its template holds the changed resources with their dependsOn
+        and reference() closure, and the outputs that only need those
+    """
+    if previous_parameters is None:
+        previous_parameters = parameters
+    current = _TemplateResources(
+        template, ExpressionEvaluator(template, __values(parameters), context)
+    )
+    previous = _TemplateResources(
+        previous_template,
+        ExpressionEvaluator(previous_template, __values(previous_parameters), context),
+    )
+
+    before = {
+        key: previous.fingerprint(position)
+        for position, key in enumerate(previous.keys)
+    }
+    changed = {
+        position
+        for position, key in enumerate(current.keys)
+        if before.get(key) != current.fingerprint(position)
+    }
+    included = __closure(current, changed) if changed else set()
+    return SubsetPlan(
+        changed=[current.keys[position] for position in sorted(changed)],
+        removed=sorted(set(previous.keys) - set(current.keys)),
+        included=[current.keys[position] for position in sorted(included)],
+        total=len(current.keys),
+        template=subset_template(template, current, included),
+    )
+
+
+# ******************************************************************************** #
+
+
+def print_plan(plan: SubsetPlan) -> None:
+    """Prints what a subset deployment deploys
+    Parameters
+    ----------
+    plan: SubsetPlan
+    """
+    if plan.empty:
+        print_ok_message("Subset: no resources added or changed.")
+        return
+    print_command_message(
+        f"Subset: {len(plan.changed)} changed, deploying {len(plan.included)}"
+        f" of {plan.total} resource(s)."
+    )
+    for key in plan.changed:
+        print_command_message(f"  changed    {key}")
+    for key in sorted(set(plan.included) - set(plan.changed)):
+        print_command_message(f"  dependency {key}")
+    for key in plan.removed:
+        print_command_message(f"  removed    {key} - left in place, incremental mode")
+
+
+# ******************************************************************************** #
@@ -0,0 +1,327 @@
+"""
+Deployment telemetry
+Timing spans and counters for the login, resource group and deployment
+hot paths, with pluggable exporters. With no exporter registered span()
+and count() return immediately, so instrumentation costs next to nothing.
+"""
+import contextvars
+import itertools
+import json
+import threading
+import time
+
+__EXPORTERS: list = []
+__SPAN_IDS = itertools.count(1)
+__CURRENT_SPAN: contextvars.ContextVar = contextvars.ContextVar(
+    "pyazuretoolkit_span", default=None
+)
+
+# ******************************************************************************** #
+
+
+class TelemetryExporter:
+    """
+    Exporter interface - override the methods you need
+    """
+
+    def export_span(self, span: dict) -> None:
+        """Receives a finished span
+        Parameters
+        ----------
+        span: dict - name, span_id, parent_id, start (epoch seconds),
+            duration_ms, status, error and attributes
+        """
+
+    def export_metric(self, name: str, value: float, attributes: dict) -> None:
+        """Receives a counter increment
+        Parameters
+        ----------
+        name: str
+        value: float
+        attributes: dict
+        """
+
+    def close(self) -> None:
+        """
+        Flushes and releases the exporter
+        """
+
+
+# ******************************************************************************** #
+
+
+class JsonLinesExporter(TelemetryExporter):
+    """
+    Appends every span and metric as one JSON object per line to a file
+    """
+
+    def __init__(self, file_name: str) -> None:
+        """Init function.
+        Parameters
+        ----------
+        file_name: str - JSON lines file, appended to
+        """
+        self.file_name = file_name
+        self.__file = open(file_name, "a", encoding="utf-8")  # noqa: SIM115
+        self.__lock = threading.Lock()
+
+    def __write(self, record: dict) -> None:
+        line = json.dumps(record, default=str)
+        with self.__lock:
+            self.__file.write(line + "\n")
+
+    def export_span(self, span: dict) -> None:
+        self.__write({"type": "span", **span})
+
+    def export_metric(self, name: str, value: float, attributes: dict) -> None:
+        self.__write(
+            {
+                "type": "metric",
+                "name": name,
+                "value": value,
+                "time": time.time(),
+                "attributes": attributes,
+            }
+        )
+
+    def close(self) -> None:
+        with self.__lock:
+            self.__file.close()
+
+
+# ******************************************************************************** #
+
+
+class OpenTelemetryExporter(TelemetryExporter):
+    """
+    Forwards spans and counters to the OpenTelemetry API.
+    Needs the opentelemetry-api package and a configured SDK provider.
+    """
+
+    def __init__(self, name: str = "pyazuretoolkit") -> None:
+        """Init function.
+        Parameters
+        ----------
+        name: str - instrumentation scope name
+        """
+        # pylint: disable=import-outside-toplevel
+        from opentelemetry import metrics, trace
+
+        self.__tracer = trace.get_tracer(name)
+        self.__meter = metrics.get_meter(name)
+        self.__counters: dict = {}
+        self.__lock = threading.Lock()
+
+    def export_span(self, span: dict) -> None:
+        start_ns = int(span["start"] * 1e9)
+        otel_span = self.__tracer.start_span(
+            span["name"], start_time=start_ns, attributes=span["attributes"]
+        )
+        if span["error"] is not None:
+            otel_span.set_attribute("error", span["error"])
+        otel_span.end(end_time=start_ns + int(span["duration_ms"] * 1e6))
+
+    def export_metric(self, name: str, value: float, attributes: dict) -> None:
+        with self.__lock:
+            counter = self.__counters.get(name)
+            if counter is None:
+                counter = self.__counters[name] = self.__meter.create_counter(name)
+        counter.add(value, attributes)
+
+
+# ******************************************************************************** #
+
+
+def add_exporter(exporter: TelemetryExporter) -> None:
+    """
+    Registers an exporter, telemetry is enabled while any is registered
+    """
+    __EXPORTERS.append(exporter)
+
+
+# ******************************************************************************** #
+
+
+def remove_exporter(exporter: TelemetryExporter) -> None:
+    """
+    Unregisters and closes an exporter
+    """
+    if exporter in __EXPORTERS:
+        __EXPORTERS.remove(exporter)
+        exporter.close()
+
+
+# ******************************************************************************** #
+
+
+def enabled() -> bool:
+    """
+    True if any exporter is registered
+    """
+    return bool(__EXPORTERS)
+
+
+# ******************************************************************************** #
+
+
+class _NoopSpan:
+    """
+    Shared span returned while telemetry is disabled
+    """
+
+    __slots__ = ()
+
+    def __enter__(self) -> "_NoopSpan":
+        return self
+
+    def __exit__(self, *exc_details) -> None:
+        return None
+
+    def set_attribute(self, key: str, value: object) -> None:
+        """does nothing"""
+
+
+__NOOP_SPAN = _NoopSpan()
+
+# ******************************************************************************** #
+
+
+class Span:
+    """
+    Timing span - use through span()
+    """
+
+    __slots__ = (
+        "name", "attributes", "span_id", "parent_id", "_start", "_t0", "_token"
+    )
+
+    # module state, bound below the class
+    _ids: itertools.count = None
+    _current: contextvars.ContextVar = None
+    _exporters: list = None
+
+    def __init__(self, name: str, attributes: dict) -> None:
+        self.name = name
+        self.attributes = attributes
+        self.span_id = next(self._ids)
+        self.parent_id = None
+
+    def set_attribute(self, key: str, value: object) -> None:
+        """
+        Adds an attribute to the span
+        """
+        self.attributes[key] = value
+
+    def __enter__(self) -> "Span":
+        parent = self._current.get()
+        self.parent_id = parent.span_id if parent is not None else None
+        self._token = self._current.set(self)
+        self._start = time.time()
+        self._t0 = time.perf_counter()
+        return self
+
+    def __exit__(
+        self, exc_type: type, exc_value: BaseException, traceback: object
+    ) -> None:
+        duration_ms = (time.perf_counter() - self._t0) * 1000.0
+        self._current.reset(self._token)
+        record = {
+            "name": self.name,
+            "span_id": self.span_id,
+            "parent_id": self.parent_id,
+            "start": self._start,
+            "duration_ms": duration_ms,
+            "status": "error" if exc_type is not None else "ok",
+            "error": repr(exc_value) if exc_value is not None else None,
+            "attributes": self.attributes,
+        }
+        for exporter in list(self._exporters):
+            exporter.export_span(record)
+
+
+Span._ids = __SPAN_IDS
+Span._current = __CURRENT_SPAN
+Span._exporters = __EXPORTERS
+
+# ******************************************************************************** #
+
+
+def span(name: str, **attributes) -> object:
+    """Times a block of code
+    Parameters
+    ----------
+    name: str - i.e. 'deploy.submit'
+    attributes: span attributes
+
+    Returns
+    -------
+    context manager - a shared no-op when telemetry is disabled
+
+    Usage
+    -----
+    with span("deploy.poll", resource_group=name):
+        ...
+    """
+    if not __EXPORTERS:
+        return __NOOP_SPAN
+    return Span(name, attributes)
+
+
+# ******************************************************************************** #
+
+
+def count(name: str, value: float = 1, **attributes) -> None:
+    """Increments a counter
+    Parameters
+    ----------
+    name: str - i.e. 'arm.requests'
+    value: float
+    attributes: counter attributes
+    """
+    if not __EXPORTERS:
+        return
+    for exporter in list(__EXPORTERS):
+        exporter.export_metric(name, value, attributes)
+
+
+# ******************************************************************************** #
+
+__POLICY: dict = {}
+
+
+def create_telemetry_policy() -> object:
+    """Returns an azure-core pipeline policy counting ARM requests,
+    retries and throttled responses. Add it as a per-retry policy.
+    """
+    policy_class = __POLICY.get("class")
+    if policy_class is None:
+        # pylint: disable=import-outside-toplevel
+        from azure.core.pipeline.policies import SansIOHTTPPolicy
+
+        class ArmTelemetryPolicy(SansIOHTTPPolicy):
+            """counts every HTTP attempt made by the pipeline"""
+
+            def on_request(self, request) -> None:
+                if not enabled():
+                    return
+                method = request.http_request.method
+                # the context is shared by every attempt of one call
+                if request.context.get("pyazuretoolkit_attempted"):
+                    count("arm.retries", method=method)
+                request.context["pyazuretoolkit_attempted"] = True
+                count("arm.requests", method=method)
+
+            def on_response(self, request, response) -> None:
+                if not enabled():
+                    return
+                status = response.http_response.status_code
+                if status == 429:
+                    count("arm.throttled", method=request.http_request.method)
+                elif status >= 500:
+                    count("arm.server_errors", method=request.http_request.method)
+
+        policy_class = __POLICY["class"] = ArmTelemetryPolicy
+    return policy_class()
+
+
+# ******************************************************************************** #
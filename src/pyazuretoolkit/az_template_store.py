@@ -0,0 +1,255 @@
+"""
+Template store
+Parses template and parameter files once and shares the result
+across deployments as read-only views
+"""
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+from collections.abc import Mapping, Sequence
+from typing import Optional
+
+from .az_json import extract_key, load_file, loads
+
+# ******************************************************************************** #
+
+
+class ReadOnlyDict(Mapping):
+    """
+    Read-only view over a parsed JSON object.
+    Nested objects and arrays are wrapped lazily on access, nothing is copied.
+    """
+
+    __slots__ = ("_data",)
+
+    def __init__(self, data: dict) -> None:
+        self._data = data
+
+    def __getitem__(self, key: str) -> object:
+        return wrap(self._data[key])
+
+    def __iter__(self):
+        return iter(self._data)
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def __repr__(self) -> str:
+        return f"ReadOnlyDict({self._data!r})"
+
+    def __eq__(self, other: object) -> bool:
+        return self._data == unwrap(other)
+
+    __hash__ = None
+
+
+# ******************************************************************************** #
+
+
+class ReadOnlyList(Sequence):
+    """
+    Read-only view over a parsed JSON array
+    """
+
+    __slots__ = ("_data",)
+
+    def __init__(self, data: list) -> None:
+        self._data = data
+
+    def __getitem__(self, index: int) -> object:
+        if isinstance(index, slice):
+            return ReadOnlyList(self._data[index])
+        return wrap(self._data[index])
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def __repr__(self) -> str:
+        return f"ReadOnlyList({self._data!r})"
+
+    def __eq__(self, other: object) -> bool:
+        return self._data == unwrap(other)
+
+    __hash__ = None
+
+
+# ******************************************************************************** #
+
+
+def wrap(value: object) -> object:
+    """
+    Wraps dicts and lists in read-only views, other values are immutable
+    """
+    if isinstance(value, dict):
+        return ReadOnlyDict(value)
+    if isinstance(value, list):
+        return ReadOnlyList(value)
+    return value
+
+
+# ******************************************************************************** #
+
+
+def unwrap(value: object) -> object:
+    """
+    Returns the shared object behind a read-only view - callers must not
+    mutate it, i.e. it may only be handed to serialisers
+    """
+    if isinstance(value, (ReadOnlyDict, ReadOnlyList)):
+        return value._data
+    return value
+
+
+# ******************************************************************************** #
+
+
+def thaw(value: object) -> object:
+    """
+    Returns a private, mutable deep copy of a read-only view,
+    views nested in plain dicts and lists are copied as well
+    """
+    value = unwrap(value)
+    if isinstance(value, dict):
+        return {key: thaw(item) for key, item in value.items()}
+    if isinstance(value, list):
+        return [thaw(item) for item in value]
+    return value
+
+
+# ******************************************************************************** #
+
+
+class TemplateStore:
+    """
+    Process-wide cache of parsed JSON files, keyed on the resolved path
+    and invalidated when the file's mtime or size (or optionally its
+    content hash) changes. Least recently used files are dropped once
+    more than max_entries are held.
+    """
+
+    def __init__(
+        self,
+        max_entries: int = 64,
+        verify_hash: bool = False,
+        stream_threshold: int = 4 * 1024 * 1024,
+    ) -> None:
+        """Init function.
+        Parameters
+        ----------
+        max_entries: int - maximum number of parsed files held
+        verify_hash: bool - also compare a sha256 of the content on every load,
+            catches rewrites within the filesystem timestamp resolution
+        stream_threshold: int - files at least this size are streamed when a
+            single key is requested, smaller ones are faster to parse whole
+        """
+        self.max_entries = max_entries
+        self.verify_hash = verify_hash
+        self.stream_threshold = stream_threshold
+        self.hits = 0
+        self.misses = 0
+        self.__entries: OrderedDict = OrderedDict()
+        self.__lock = threading.Lock()
+
+    # ******************************************************************************** #
+
+    def load(self, file_name: str, key: Optional[str] = None) -> object:
+        """Returns a read-only view of a parsed JSON file
+        Parameters
+        ----------
+        file_name: str
+        key: str - only stream out and parse this top-level key,
+            i.e. 'parameters' of a parameters file
+
+        Returns
+        -------
+        ReadOnlyDict (or ReadOnlyList) of the file contents or of the key's
+        value, None if the key is not present
+
+        Raises
+        ------
+        FileNotFoundError if the file does not exist
+        """
+        path = os.path.realpath(file_name)
+        stat = os.stat(path)
+        signature = (stat.st_mtime_ns, stat.st_size)
+
+        raw: bytes = None
+        content_hash: str = None
+        if self.verify_hash:
+            with open(path, "rb") as file:
+                raw = file.read()
+            content_hash = hashlib.sha256(raw).hexdigest()
+
+        entry_key = (path, key)
+        with self.__lock:
+            entry = self.__entries.get(entry_key)
+            if entry is not None and entry[0] == signature and entry[1] == content_hash:
+                self.__entries.move_to_end(entry_key)
+                self.hits += 1
+                return wrap(entry[2])
+            self.misses += 1
+
+        if key is not None and stat.st_size >= self.stream_threshold:
+            data = extract_key(path, key)
+        else:
+            data = loads(raw) if raw is not None else load_file(path)
+            if key is not None:
+                data = data.get(key)
+
+        with self.__lock:
+            self.__entries[entry_key] = (signature, content_hash, data)
+            self.__entries.move_to_end(entry_key)
+            while len(self.__entries) > self.max_entries:
+                self.__entries.popitem(last=False)
+        return wrap(data)
+
+    # ******************************************************************************** #
+
+    def invalidate(self, file_name: Optional[str] = None) -> None:
+        """Drops one file, or every file, from the store
+        Parameters
+        ----------
+        file_name: str - None clears the whole store
+        """
+        with self.__lock:
+            if file_name is None:
+                self.__entries.clear()
+            else:
+                path = os.path.realpath(file_name)
+                for entry_key in [k for k in self.__entries if k[0] == path]:
+                    del self.__entries[entry_key]
+
+    # ******************************************************************************** #
+
+    @property
+    def stats(self) -> dict:
+        """
+        Hit/miss counters and number of parsed files held
+        """
+        with self.__lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "entries": len(self.__entries),
+            }
+
+
+# ******************************************************************************** #
+
+__TEMPLATE_STORE: TemplateStore = None
+__TEMPLATE_STORE_LOCK = threading.Lock()
+
+
+def get_template_store() -> TemplateStore:
+    """
+    Returns the process-wide TemplateStore
+    """
+    global __TEMPLATE_STORE
+    with __TEMPLATE_STORE_LOCK:
+        if __TEMPLATE_STORE is None:
+            __TEMPLATE_STORE = TemplateStore()
+        return __TEMPLATE_STORE
+
+
+# ******************************************************************************** #
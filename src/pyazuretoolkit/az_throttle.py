@@ -0,0 +1,270 @@
+"""
+Client-side throttling
+Token buckets per subscription and request kind, mirroring ARM's own
+per-subscription limits, and counters for throttle events. The buckets
+are shared by every client in the process and slowed down further when
+ARM reports few remaining requests.
+"""
+import re
+import threading
+import time
+from dataclasses import dataclass
+from typing import Optional
+
+# ARM subscription limits - bucket size and refill per second
+DEFAULT_LIMITS: dict = {
+    "reads": (250, 25.0),
+    "writes": (200, 10.0),
+    "deletes": (200, 10.0),
+}
+# remaining counts below this start slowing requests down
+LOW_REMAINING: int = 20
+
+__METHOD_KINDS: dict = {
+    "GET": "reads",
+    "HEAD": "reads",
+    "PUT": "writes",
+    "POST": "writes",
+    "PATCH": "writes",
+    "DELETE": "deletes",
+}
+__SUBSCRIPTION_URL = re.compile(r"/subscriptions/([^/?#]+)", re.IGNORECASE)
+
+# ******************************************************************************** #
+
+
+def request_kind(method: str) -> str:
+    """
+    Maps an HTTP method to the ARM limit it counts against
+    """
+    return __METHOD_KINDS.get(method.upper(), "writes")
+
+
+# ******************************************************************************** #
+
+
+def subscription_from_url(url: str) -> str:
+    """
+    Returns the lower case subscription id of an ARM request URL, None if there is none
+    """
+    match = __SUBSCRIPTION_URL.search(url)
+    return match.group(1).lower() if match else None
+
+
+# ******************************************************************************** #
+
+
+class TokenBucket:
+    """
+    Thread-safe token bucket. reserve() takes a token and returns how long
+    the caller must wait for it, so sync and async callers can both sleep
+    their own way.
+    """
+
+    def __init__(self, capacity: float, refill_rate: float) -> None:
+        """Init function.
+        Parameters
+        ----------
+        capacity: float - maximum burst
+        refill_rate: float - tokens added per second
+        """
+        self.capacity = capacity
+        self.refill_rate = refill_rate
+        self.__tokens = float(capacity)
+        self.__updated = time.monotonic()
+        self.__lock = threading.Lock()
+
+    def __refill(self, now: float) -> None:
+        self.__tokens = min(
+            self.capacity, self.__tokens + (now - self.__updated) * self.refill_rate
+        )
+        self.__updated = now
+
+    def reserve(self, tokens: float = 1.0) -> float:
+        """Takes tokens, going into debt if there are not enough
+        Returns
+        -------
+        float seconds until the reserved tokens are available, 0.0 if now
+        """
+        with self.__lock:
+            now = time.monotonic()
+            self.__refill(now)
+            self.__tokens -= tokens
+            if self.__tokens >= 0:
+                return 0.0
+            return -self.__tokens / self.refill_rate
+
+    def observe_remaining(self, remaining: int) -> None:
+        """
+        Caps the tokens at what ARM reports is left of the subscription's quota
+        """
+        with self.__lock:
+            self.__refill(time.monotonic())
+            self.__tokens = min(self.__tokens, float(remaining))
+
+    @property
+    def tokens(self) -> float:
+        """tokens available now"""
+        with self.__lock:
+            self.__refill(time.monotonic())
+            return self.__tokens
+
+
+# ******************************************************************************** #
+
+
+@dataclass
+class ThrottleMetrics:
+    """
+    Throttle event counters, shared by every client
+    """
+
+    requests: int = 0
+    throttled: int = 0
+    server_errors: int = 0
+    retries: int = 0
+    waits: int = 0
+    wait_seconds: float = 0.0
+
+    def __post_init__(self) -> None:
+        self.lowest_remaining: dict = {}
+        self.__lock = threading.Lock()
+
+    def add(self, **counts) -> None:
+        """
+        Adds to counters, i.e. add(throttled=1)
+        """
+        with self.__lock:
+            for name, value in counts.items():
+                setattr(self, name, getattr(self, name) + value)
+
+    def observe_remaining(self, header: str, remaining: int) -> None:
+        """
+        Records the lowest remaining count seen for a rate limit header
+        """
+        with self.__lock:
+            lowest = self.lowest_remaining.get(header)
+            if lowest is None or remaining < lowest:
+                self.lowest_remaining[header] = remaining
+
+    def snapshot(self) -> dict:
+        """
+        Returns a copy of the counters
+        """
+        with self.__lock:
+            return {
+                "requests": self.requests,
+                "throttled": self.throttled,
+                "server_errors": self.server_errors,
+                "retries": self.retries,
+                "waits": self.waits,
+                "wait_seconds": self.wait_seconds,
+                "lowest_remaining": dict(self.lowest_remaining),
+            }
+
+    def reset(self) -> None:
+        """
+        Zeroes every counter
+        """
+        with self.__lock:
+            self.requests = self.throttled = self.server_errors = 0
+            self.retries = self.waits = 0
+            self.wait_seconds = 0.0
+            self.lowest_remaining.clear()
+
+
+# ******************************************************************************** #
+
+
+class SubscriptionThrottle:
+    """
+    The reads, writes and deletes buckets of one subscription
+    """
+
+    def __init__(
+        self, limits: Optional[dict] = None, low_remaining: int = LOW_REMAINING
+    ) -> None:
+        """Init function.
+        Parameters
+        ----------
+        limits: dict - kind to (capacity, refill per second), DEFAULT_LIMITS by default
+        low_remaining: int - remaining counts below this cap the bucket
+        """
+        self.low_remaining = low_remaining
+        self.buckets = {
+            kind: TokenBucket(capacity, rate)
+            for kind, (capacity, rate) in (limits or DEFAULT_LIMITS).items()
+        }
+
+    def bucket(self, method: str) -> TokenBucket:
+        """
+        Returns the bucket an HTTP method counts against, None if it is not limited
+        """
+        return self.buckets.get(request_kind(method))
+
+    def reserve(self, method: str) -> float:
+        """
+        Takes a token for a request, returns the seconds to wait before sending it
+        """
+        bucket = self.bucket(method)
+        return bucket.reserve() if bucket is not None else 0.0
+
+    def observe_headers(
+        self, headers: object, metrics: Optional[ThrottleMetrics] = None
+    ) -> None:
+        """Reads x-ms-ratelimit-remaining-subscription-* response headers
+        Parameters
+        ----------
+        headers: case insensitive mapping of response headers
+        metrics: optional ThrottleMetrics to record the remaining counts in
+        """
+        for kind, bucket in self.buckets.items():
+            header = f"x-ms-ratelimit-remaining-subscription-{kind}"
+            value = headers.get(header)
+            if value is None:
+                continue
+            try:
+                remaining = int(value)
+            except ValueError:
+                continue
+            if metrics is not None:
+                metrics.observe_remaining(header, remaining)
+            if remaining < self.low_remaining:
+                bucket.observe_remaining(remaining)
+
+
+# ******************************************************************************** #
+
+__THROTTLES: dict = {}
+__THROTTLES_LOCK = threading.Lock()
+__METRICS = ThrottleMetrics()
+
+
+def get_throttle(
+    subscription_id: str, limits: Optional[dict] = None
+) -> SubscriptionThrottle:
+    """Returns the process-wide throttle of a subscription
+    Parameters
+    ----------
+    subscription_id: str
+    limits: dict - only used when the throttle is first created
+    """
+    key = (subscription_id or "").lower()
+    with __THROTTLES_LOCK:
+        throttle = __THROTTLES.get(key)
+        if throttle is None:
+            throttle = __THROTTLES[key] = SubscriptionThrottle(limits)
+        return throttle
+
+
+# ******************************************************************************** #
+
+
+def get_metrics() -> ThrottleMetrics:
+    """
+    Returns the process-wide throttle metrics
+    """
+    return __METRICS
+
+
+# ******************************************************************************** #
@@ -0,0 +1,1332 @@
+"""
+Offline template validation
+Pre-flight checks run locally before a template is sent to ARM - parameter
+values against the template's parameter schema, the syntax and references
+of ARM template expressions, and the resource dependsOn graph for cycles
+and dangling references
+"""
+import hashlib
+import json
+import re
+import uuid
+from dataclasses import dataclass, field
+from functools import lru_cache
+from typing import ClassVar, Optional
+
+from .az_bicep import compile_bicep
+from .az_template_store import get_template_store, unwrap
+from .console_helper import print_error_message, print_ok_message, print_warning_message
+
+ERROR: str = "error"
+WARNING: str = "warning"
+
+# parameter types - case insensitive in ARM
+__PARAMETER_TYPES: dict = {
+    "string": str,
+    "securestring": str,
+    "int": int,
+    "bool": bool,
+    "object": dict,
+    "secureobject": dict,
+    "array": list,
+}
+
+# expression tokens - strings use '' to escape a quote, anything else
+# that is not whitespace is a single character token
+__TOKEN = re.compile(
+    r"'[^']*(?:''[^']*)*'|-?\d+(?:\.\d+)?|[A-Za-z_$][\w$]*(?:\.[A-Za-z_$][\w$]*)*|\S"
+)
+__FORMAT_ITEM = re.compile(r"\{(\d+)(?::[^}]*)?\}")
+__IDENTIFIER = re.compile(r"[A-Za-z_$][\w$]*")
+__DEFINITION_REF = "#/definitions/"
+
+# functions only ARM can evaluate - known, but resolve to UNKNOWN locally
+__RUNTIME_FUNCTIONS: frozenset = frozenset(
+    {
+        "reference", "references", "list", "utcnow", "newguid", "copyindex",
+        "environment", "tenant", "managementgroup", "managementgroupresourceid",
+        "extensionresourceid", "tenantresourceid", "pickzones", "providers",
+        "deployer", "datauri", "datauritostring", "base64", "base64tostring",
+        "base64tojson", "uri", "uricomponent", "uricomponenttostring", "padleft",
+        "indexof", "lastindexof", "intersection", "items", "lambda", "lambdavariables",
+        "filter", "map", "reduce", "sort", "toobject", "flatten", "objectkeys",
+        "shallowmerge", "tryget", "parsecidr", "cidrsubnet", "cidrhost",
+        "datetimeadd", "datetimefromepoch", "datetimetoepoch", "mapvalues",
+        "groupby", "loadtextcontent", "loadfileasbase64", "loadjsoncontent",
+    }
+)
+
+# ******************************************************************************** #
+
+
+class ExpressionError(ValueError):
+    """
+    Raised for template expressions that do not parse
+    """
+
+
+# ******************************************************************************** #
+
+
+class TemplateValidationError(ValueError):
+    """
+    Raised when a template fails pre-flight validation, carries the report
+    """
+
+    def __init__(self, report: "ValidationReport") -> None:
+        errors = report.errors
+        super().__init__(
+            f"Template validation failed with {len(errors)} error(s): "
+            + "; ".join(str(issue) for issue in errors[:5])
+        )
+        self.report = report
+
+
+# ******************************************************************************** #
+
+
+class _Unknown:
+    """
+    A value only known at deployment time, i.e. reference() or copyIndex()
+    """
+
+    def __repr__(self) -> str:
+        return "UNKNOWN"
+
+    def __bool__(self) -> bool:
+        return False
+
+
+UNKNOWN = _Unknown()
+
+# ******************************************************************************** #
+
+
+@dataclass
+class ValidationIssue:
+    """
+    One problem found in a template or parameter file
+    """
+
+    severity: str
+    path: str
+    message: str
+
+    def __str__(self) -> str:
+        return f"{self.path}: {self.message}"
+
+
+# ******************************************************************************** #
+
+
+@dataclass
+class ValidationReport:
+    """
+    Issues found by validate_template, with a few counters
+    """
+
+    issues: list = field(default_factory=list)
+    resources: int = 0
+    expressions: int = 0
+
+    def add(self, severity: str, path: str, message: str) -> None:
+        """adds an issue"""
+        self.issues.append(ValidationIssue(severity, path, message))
+
+    @property
+    def errors(self) -> list:
+        """issues that make ARM reject the template"""
+        return [issue for issue in self.issues if issue.severity == ERROR]
+
+    @property
+    def warnings(self) -> list:
+        """issues worth a look that may still deploy"""
+        return [issue for issue in self.issues if issue.severity == WARNING]
+
+    @property
+    def ok(self) -> bool:
+        """True if there are no errors"""
+        return not self.errors
+
+    def raise_for_errors(self) -> None:
+        """
+        Raises TemplateValidationError if there are errors
+        """
+        if not self.ok:
+            raise TemplateValidationError(self)
+
+
+# ******************************************************************************** #
+
+
+@dataclass
+class ValidationContext:
+    """
+    Deployment scope the deployment-time functions resolve against,
+    i.e. resourceGroup().location
+    """
+
+    subscription_id: str = "00000000-0000-0000-0000-000000000000"
+    resource_group_name: str = "resource-group"
+    location: str = "location"
+    deployment_name: str = "deployment"
+
+
+# ******************************************************************************** #
+
+
+def is_expression(value: object) -> bool:
+    """
+    True for strings ARM evaluates - '[...]' but not the '[[' escape
+    """
+    return (
+        isinstance(value, str)
+        and value.startswith("[")
+        and value.endswith("]")
+        and not value.startswith("[[")
+    )
+
+
+# ******************************************************************************** #
+
+
+@lru_cache(maxsize=65536)
+def parse_expression(text: str) -> tuple:
+    """Parses an ARM template expression, memoised - templates repeat
+    the same expressions many times
+    Parameters
+    ----------
+    text: str - the expression with or without its enclosing brackets
+
+    Returns
+    -------
+    tuple AST - ("lit", value), ("call", name, args),
+        ("prop", node, name) or ("index", node, node). A lambda
+        x => body is the call lambda('x', body), and x in its body
+        the call lambdaVariables('x'), as in the JSON form
+
+    Raises
+    ------
+    ExpressionError if the expression does not parse
+    """
+    body = text[1:-1] if is_expression(text) else text
+    tokens = __TOKEN.findall(body)
+    node, pos = __parse_node(tokens, 0)
+    if pos != len(tokens):
+        raise ExpressionError(f"Unexpected '{tokens[pos]}' in '{text}'")
+    return node
+
+
+def __expect(tokens: list, pos: int, value: str) -> int:
+    if pos >= len(tokens) or tokens[pos] != value:
+        found = tokens[pos] if pos < len(tokens) else "end of expression"
+        raise ExpressionError(f"Expected '{value}' but found '{found}'")
+    return pos + 1
+
+
+def __lambda_parameters(tokens: list, pos: int) -> tuple:
+    """
+    The parameter names of a lambda starting at pos - x => or (x, y) => -
+    and the position of its body, None and pos if no lambda starts there
+    """
+    if tokens[pos] == "(":
+        names, end = [], pos + 1
+        while end < len(tokens) and tokens[end] != ")":
+            if tokens[end] != ",":
+                names.append(tokens[end])
+            end += 1
+        end += 1
+    else:
+        names, end = [tokens[pos]], pos + 1
+    if (
+        names
+        and tokens[end : end + 2] == ["=", ">"]
+        and all(__IDENTIFIER.fullmatch(name) for name in names)
+    ):
+        return names, end + 2
+    return None, pos
+
+
+def __parse_node(tokens: list, pos: int, bound: frozenset = frozenset()) -> tuple:
+    """
+    Recursive descent over the tokens - returns the node and the next position,
+    bound holds the lambda variables in scope
+    """
+    if pos >= len(tokens):
+        raise ExpressionError("Unexpected end of expression")
+    names, body = __lambda_parameters(tokens, pos)
+    if names is not None:
+        node, pos = __parse_node(tokens, body, bound | frozenset(names))
+        return ("call", "lambda", (*(("lit", name) for name in names), node)), pos
+
+    token = tokens[pos]
+    pos += 1
+    first = token[0]
+    if first == "'":
+        node = ("lit", token[1:-1].replace("''", "'"))
+    elif first.isdigit() or (first == "-" and len(token) > 1):
+        node = ("lit", float(token) if "." in token else int(token))
+    elif first.isalpha() or first in "_$":
+        if pos < len(tokens) and tokens[pos] == "(":
+            pos += 1
+            args = []
+            if pos < len(tokens) and tokens[pos] == ")":
+                pos += 1
+            else:
+                while True:
+                    arg, pos = __parse_node(tokens, pos, bound)
+                    args.append(arg)
+                    if pos < len(tokens) and tokens[pos] == ",":
+                        pos += 1
+                        continue
+                    pos = __expect(tokens, pos, ")")
+                    break
+            node = ("call", token.lower(), tuple(args))
+        elif token in ("true", "false", "null"):
+            node = ("lit", {"true": True, "false": False, "null": None}[token])
+        elif token.split(".")[0] in bound:
+            name, *properties = token.split(".")
+            node = ("call", "lambdavariables", (("lit", name),))
+            for part in properties:
+                node = ("prop", node, part)
+        else:
+            raise ExpressionError(f"'{token}' is not a function call")
+    else:
+        raise ExpressionError(f"Unexpected '{token}'")
+
+    # property access and indexing
+    while pos < len(tokens):
+        token = tokens[pos]
+        if token == ".":  # noqa: S105 - expression token, not a secret
+            name = tokens[pos + 1] if pos + 1 < len(tokens) else ""
+            if not (name[:1].isalpha() or name[:1] in ("_", "$")):
+                raise ExpressionError("Expected a property name after '.'")
+            for part in name.split("."):
+                node = ("prop", node, part)
+            pos += 2
+        elif token == "[":  # noqa: S105 - expression token, not a secret
+            index, pos = __parse_node(tokens, pos + 1, bound)
+            pos = __expect(tokens, pos, "]")
+            node = ("index", node, index)
+        else:
+            break
+    return node, pos
+
+
+# ******************************************************************************** #
+
+
+def __walk_calls(node: tuple):
+    """yields every call node of an AST"""
+    stack = [node]
+    while stack:
+        node = stack.pop()
+        if node[0] == "call":
+            yield node
+            stack.extend(node[2])
+        elif node[0] == "prop":
+            stack.append(node[1])
+        elif node[0] == "index":
+            stack.append(node[1])
+            stack.append(node[2])
+
+
+# ******************************************************************************** #
+
+
+def _unique_string(*values) -> str:
+    """
+    Deterministic 13 character stand-in for uniqueString - not ARM's value,
+    but equal inputs give equal names so references still line up
+    """
+    digest = hashlib.sha256("|".join(values).encode("utf-8")).digest()
+    return __base32(digest)[:13]
+
+
+def __base32(data: bytes) -> str:
+    alphabet = "abcdefghijklmnopqrstuvwxyz234567"
+    number = int.from_bytes(data[:10], "big")
+    return "".join(alphabet[(number >> shift) & 31] for shift in range(75, -1, -5))
+
+
+def _format(template: str, *args) -> str:
+    """ARM format() - .NET style {0} placeholders, format specifiers ignored"""
+    return __FORMAT_ITEM.sub(lambda m: _to_string(args[int(m.group(1))]), template)
+
+
+def _to_string(value: object) -> str:
+    if isinstance(value, bool):
+        return "True" if value else "False"
+    if isinstance(value, (dict, list)):
+        return json.dumps(value, separators=(",", ":"))
+    return str(value)
+
+
+def _concat(*args) -> object:
+    if args and all(isinstance(arg, list) for arg in args):
+        return [item for arg in args for item in arg]
+    return "".join(_to_string(arg) for arg in args)
+
+
+def _union(*args) -> object:
+    if all(isinstance(arg, dict) for arg in args):
+        merged = {}
+        for arg in args:
+            merged.update(arg)
+        return merged
+    merged = []
+    for arg in args:
+        merged.extend(item for item in arg if item not in merged)
+    return merged
+
+
+def _resource_id(scope: str, *args) -> str:
+    """
+    resourceId style functions - the first argument with a '/' is the
+    resource type, the ones before it the scope, the ones after it names
+    """
+    type_at = next((i for i, arg in enumerate(args) if "/" in str(arg)), None)
+    if type_at is None:
+        raise ValueError("resourceId needs a resource type")
+    namespace, *types = str(args[type_at]).split("/")
+    names = [str(name) for name in args[type_at + 1 :]]
+    if len(names) != len(types):
+        raise ValueError(
+            f"resourceId for '{args[type_at]}' needs {len(types)} name(s),"
+            f" got {len(names)}"
+        )
+    path = "/".join(f"{t}/{n}" for t, n in zip(types, names))
+    return f"{scope}/providers/{namespace}/{path}"
+
+
+# ******************************************************************************** #
+
+
+class ExpressionEvaluator:
+    """
+    Evaluates template expressions against parameter values, variables
+    and a ValidationContext. Results are memoised per expression text.
+    Deployment-time values (reference(), copyIndex(), ...) come back as UNKNOWN.
+    """
+
+    # pure functions, bound below the class
+    _functions: ClassVar[dict] = {}
+
+    def __init__(
+        self,
+        template: dict,
+        parameter_values: Optional[dict] = None,
+        context: Optional[ValidationContext] = None,
+    ) -> None:
+        """Init function.
+        Parameters
+        ----------
+        template: dict - ARM template
+        parameter_values: dict - parameter name to value, defaults are used
+            for parameters without one
+        context: ValidationContext - deployment scope
+        """
+        self.template = template
+        self.parameter_values = parameter_values or {}
+        self.context = context or ValidationContext()
+        self.__definitions = {
+            name.lower(): definition
+            for name, definition in (template.get("parameters") or {}).items()
+        }
+        self.__variables = {
+            name.lower(): value
+            for name, value in (template.get("variables") or {}).items()
+        }
+        self.__values = {
+            name.lower(): value for name, value in self.parameter_values.items()
+        }
+        self.__memo: dict = {}
+        self.__resolved_parameters: dict = {}
+        self.__resolved_variables: dict = {}
+        self.__resolving: set = set()
+
+    # ******************************************************************************** #
+
+    def evaluate(self, text: str) -> object:
+        """Evaluates a template string - expressions are evaluated, other strings
+        returned as they are
+        Returns
+        -------
+        the value, UNKNOWN if it is only known at deployment time
+        """
+        if not is_expression(text):
+            return text[1:] if isinstance(text, str) and text.startswith("[[") else text
+        value = self.__memo.get(text, self)
+        if value is self:
+            try:
+                value = compile_expression(text)(self)
+            except (
+                ExpressionError, ArithmeticError, LookupError, TypeError, ValueError
+            ):
+                value = UNKNOWN
+            self.__memo[text] = value
+        return value
+
+    # ******************************************************************************** #
+
+    def evaluate_value(self, value: object) -> object:
+        """
+        Evaluates every expression in a nested value, members only known
+        at deployment time are UNKNOWN
+        """
+        if isinstance(value, str):
+            return self.evaluate(value)
+        if isinstance(value, dict):
+            return {key: self.evaluate_value(item) for key, item in value.items()}
+        if isinstance(value, list):
+            return [self.evaluate_value(item) for item in value]
+        return value
+
+    # ******************************************************************************** #
+
+    def parameter(self, name: str) -> object:
+        """
+        Returns a parameter's value - from the parameter values,
+        else its evaluated default
+        """
+        key = name.lower()
+        if key in self.__values:
+            return self.__values[key]
+        if key not in self.__definitions:
+            raise KeyError(f"parameter '{name}' is not defined")
+        definition = self.__definitions[key]
+        missing = None if definition.get("nullable") else UNKNOWN
+        return self.__resolve(
+            ("parameters", key),
+            self.__resolved_parameters,
+            lambda: self.evaluate_value(definition.get("defaultValue", missing)),
+        )
+
+    def variable(self, name: str) -> object:
+        """
+        Returns a variable's evaluated value
+        """
+        key = name.lower()
+        if key not in self.__variables:
+            raise KeyError(f"variable '{name}' is not defined")
+        if key == "copy":
+            return UNKNOWN
+        return self.__resolve(
+            ("variables", key),
+            self.__resolved_variables,
+            lambda: self.evaluate_value(self.__variables[key]),
+        )
+
+    def __resolve(self, key: tuple, resolved: dict, compute: callable) -> object:
+        if key[1] in resolved:
+            return resolved[key[1]]
+        if key in self.__resolving:
+            # self-referencing - ARM rejects it, validate_template reports it
+            return UNKNOWN
+        self.__resolving.add(key)
+        try:
+            value = resolved[key[1]] = compute()
+        finally:
+            self.__resolving.discard(key)
+        return value
+
+    # ******************************************************************************** #
+
+    def scope_function(self, name: str, args: list) -> object:
+        """
+        resourceGroup(), subscription(), deployment() and the resourceId functions
+        """
+        context = self.context
+        subscription = f"/subscriptions/{context.subscription_id}"
+        group = f"{subscription}/resourceGroups/{context.resource_group_name}"
+        if name == "resourcegroup":
+            return {
+                "id": group,
+                "name": context.resource_group_name,
+                "type": "Microsoft.Resources/resourceGroups",
+                "location": context.location,
+                "properties": {"provisioningState": "Succeeded"},
+            }
+        if name == "subscription":
+            return {
+                "id": subscription,
+                "subscriptionId": context.subscription_id,
+                "displayName": context.subscription_id,
+            }
+        if name == "deployment":
+            return {"name": context.deployment_name, "properties": {}}
+        if name == "subscriptionresourceid":
+            return _resource_id(subscription, *args)
+        # resourceId([subscriptionId], [resourceGroupName], type, names...)
+        type_at = next((i for i, arg in enumerate(args) if "/" in str(arg)), 0)
+        scope_args = [str(arg) for arg in args[:type_at]]
+        if len(scope_args) == 2:
+            group = f"/subscriptions/{scope_args[0]}/resourceGroups/{scope_args[1]}"
+        elif len(scope_args) == 1:
+            group = f"{subscription}/resourceGroups/{scope_args[0]}"
+        return _resource_id(group, *args[type_at:])
+
+
+ExpressionEvaluator._functions = {
+    "concat": _concat,
+    "format": _format,
+    "string": _to_string,
+    "tolower": lambda value: value.lower(),
+    "toupper": lambda value: value.upper(),
+    "trim": lambda value: value.strip(),
+    "replace": lambda value, old, new: value.replace(old, new),
+    "split": lambda value, separator: value.split(separator),
+    "substring": lambda value, start, length=None: (
+        value[start:] if length is None else value[start : start + length]
+    ),
+    "startswith": lambda value, prefix: value.lower().startswith(prefix.lower()),
+    "endswith": lambda value, suffix: value.lower().endswith(suffix.lower()),
+    "int": int,
+    "bool": lambda value: (
+        value if isinstance(value, bool) else str(value).lower() == "true"
+    ),
+    "json": json.loads,
+    "add": lambda a, b: a + b,
+    "sub": lambda a, b: a - b,
+    "mul": lambda a, b: a * b,
+    "div": lambda a, b: int(a / b),
+    "mod": lambda a, b: a % b,
+    "min": lambda *args: min(args[0] if len(args) == 1 else args),
+    "max": lambda *args: max(args[0] if len(args) == 1 else args),
+    "range": lambda start, count: list(range(start, start + count)),
+    "equals": lambda a, b: a == b,
+    "less": lambda a, b: a < b,
+    "lessorequals": lambda a, b: a <= b,
+    "greater": lambda a, b: a > b,
+    "greaterorequals": lambda a, b: a >= b,
+    "not": lambda value: not value,
+    "and": lambda *args: all(args),
+    "or": lambda *args: any(args),
+    "true": lambda: True,
+    "false": lambda: False,
+    "null": lambda: None,
+    "coalesce": lambda *args: next((arg for arg in args if arg is not None), None),
+    "length": len,
+    "empty": lambda value: value is None or len(value) == 0,
+    "contains": lambda container, item: item in container,
+    "first": lambda value: value[0],
+    "last": lambda value: value[-1],
+    "take": lambda value, count: value[:count],
+    "skip": lambda value, count: value[count:],
+    "union": _union,
+    "array": lambda value: value if isinstance(value, list) else [value],
+    "createarray": lambda *args: list(args),
+    "createobject": lambda *args: dict(zip(args[::2], args[1::2])),
+    "uniquestring": _unique_string,
+    "guid": lambda *args: str(uuid.uuid5(uuid.NAMESPACE_URL, "|".join(args))),
+}
+
+# every function the linter accepts without a warning
+KNOWN_FUNCTIONS: frozenset = (
+    frozenset(ExpressionEvaluator._functions)
+    | __RUNTIME_FUNCTIONS
+    | {"if", "parameters", "variables", "resourcegroup", "subscription",
+       "deployment", "resourceid", "subscriptionresourceid"}
+)
+
+
+# ******************************************************************************** #
+
+__SCOPE_FUNCTIONS: frozenset = frozenset(
+    {
+        "resourcegroup",
+        "subscription",
+        "deployment",
+        "resourceid",
+        "subscriptionresourceid",
+    }
+)
+
+
+@lru_cache(maxsize=65536)
+def compile_expression(text: str) -> callable:
+    """Compiles an ARM template expression into a function of an
+    ExpressionEvaluator, memoised - each distinct expression is parsed and
+    compiled once per process
+    Parameters
+    ----------
+    text: str - the expression
+
+    Returns
+    -------
+    callable(ExpressionEvaluator) returning the value or UNKNOWN
+
+    Raises
+    ------
+    ExpressionError if the expression does not parse
+    """
+    return __compile_node(parse_expression(text))
+
+
+def __compile_node(node: tuple) -> callable:
+    kind = node[0]
+    if kind == "lit":
+        value = node[1]
+        return lambda evaluator: value
+    if kind == "prop":
+        return __compile_lookup(
+            __compile_node(node[1]), lambda evaluator, name=node[2]: name
+        )
+    if kind == "index":
+        return __compile_lookup(__compile_node(node[1]), __compile_node(node[2]))
+
+    name = node[1]
+    args = [__compile_node(arg) for arg in node[2]]
+    if name == "if":
+        condition, when_true, when_false = args
+
+        # only the branch taken is evaluated
+        def if_(evaluator):
+            chosen = condition(evaluator)
+            if chosen is UNKNOWN:
+                return UNKNOWN
+            return when_true(evaluator) if chosen else when_false(evaluator)
+
+        return if_
+
+    if name == "parameters":
+
+        def function(evaluator, values):
+            return evaluator.parameter(*values)
+
+    elif name == "variables":
+
+        def function(evaluator, values):
+            return evaluator.variable(*values)
+
+    elif name in __SCOPE_FUNCTIONS:
+
+        def function(evaluator, values):
+            return evaluator.scope_function(name, values)
+
+    else:
+        pure = ExpressionEvaluator._functions.get(name)
+        if pure is None:
+            # deployment-time or unknown function
+            return lambda evaluator: UNKNOWN
+
+        def function(evaluator, values):
+            return pure(*values)
+
+    def call(evaluator):
+        values = [arg(evaluator) for arg in args]
+        for value in values:
+            if value is UNKNOWN:
+                return UNKNOWN
+        return function(evaluator, values)
+
+    return call
+
+
+def __compile_lookup(target: callable, key: callable) -> callable:
+    def lookup(evaluator):
+        container = target(evaluator)
+        index = key(evaluator)
+        if container is UNKNOWN or index is UNKNOWN:
+            return UNKNOWN
+        return container[index]
+
+    return lookup
+
+
+# ******************************************************************************** #
+
+
+@dataclass
+class ResourceNode:
+    """
+    A resource in the dependsOn index
+    """
+
+    path: str
+    resource_type: object
+    name: object
+    depends_on: list
+    aliases: list
+
+
+# ******************************************************************************** #
+
+
+class ResourceIndex:
+    """
+    Index of a template's resources by every name dependsOn can use -
+    symbolic name, copy loop name, 'type/name' and plain name - and the
+    dependency edges between them
+    """
+
+    def __init__(self, template: dict, evaluator: ExpressionEvaluator) -> None:
+        """Init function.
+        Parameters
+        ----------
+        template: dict - ARM template, resources as a list or keyed by symbolic name
+        evaluator: ExpressionEvaluator resolving resource names
+        """
+        self.evaluator = evaluator
+        self.nodes: list = []
+        self.__lookup: dict = {}
+        # resource types with a name only known at deployment time
+        self.__unresolved_types: set = set()
+
+        resources = template.get("resources") or []
+        if isinstance(resources, dict):
+            items = [(f"resources.{name}", name, r) for name, r in resources.items()]
+        else:
+            items = [(f"resources[{i}]", None, r) for i, r in enumerate(resources)]
+        stack = [
+            (path, symbol, resource, None, None) for path, symbol, resource in items
+        ]
+        stack.reverse()
+        while stack:
+            path, symbol, resource, parent_type, parent_name = stack.pop()
+            if not isinstance(resource, dict):
+                continue
+            node = self.__add(path, symbol, resource, parent_type, parent_name)
+            children = resource.get("resources") or []
+            for i in range(len(children) - 1, -1, -1):
+                stack.append(
+                    (
+                        f"{path}.resources[{i}]",
+                        None,
+                        children[i],
+                        node.resource_type,
+                        node.name,
+                    )
+                )
+
+    def __add(
+        self,
+        path: str,
+        symbol: str,
+        resource: dict,
+        parent_type: object,
+        parent_name: object,
+    ) -> ResourceNode:
+        evaluate = self.evaluator.evaluate
+        resource_type = evaluate(resource.get("type", ""))
+        name = evaluate(resource.get("name", ""))
+        if parent_type is not None and isinstance(resource_type, str) and (
+            "/" not in resource_type
+        ):
+            # nested child - type and name are relative to the parent
+            resource_type = (
+                f"{parent_type}/{resource_type}"
+                if parent_type is not UNKNOWN
+                else UNKNOWN
+            )
+            name = (
+                f"{parent_name}/{name}"
+                if UNKNOWN not in (parent_name, name)
+                else UNKNOWN
+            )
+
+        aliases = []
+        if symbol:
+            aliases.append(symbol.lower())
+        copy_name = (resource.get("copy") or {}).get("name")
+        if isinstance(copy_name, str):
+            aliases.append(copy_name.lower())
+        if isinstance(resource_type, str) and isinstance(name, str):
+            aliases.append(f"{resource_type}/{name}".lower())
+            aliases.append(name.lower())
+        else:
+            self.__unresolved_types.add(
+                resource_type.lower() if isinstance(resource_type, str) else None
+            )
+
+        depends_on = resource.get("dependsOn") or []
+        node = ResourceNode(path, resource_type, name, list(depends_on), aliases)
+        index = len(self.nodes)
+        self.nodes.append(node)
+        for alias in aliases:
+            self.__lookup.setdefault(alias, index)
+        return node
+
+    # ******************************************************************************** #
+
+    def resolve(self, reference: str) -> object:
+        """Finds the resource a dependsOn entry points to
+        Returns
+        -------
+        int node index, None if the entry cannot be resolved offline,
+        -1 if it points to no resource in the template
+        """
+        value = self.evaluator.evaluate(reference)
+        if not isinstance(value, str):
+            return None
+        key = value.lower()
+        index = self.__lookup.get(key)
+        if index is not None:
+            return index
+        if "/providers/" in key:
+            # a resource id - back to 'type/name'
+            segments = key.split("/providers/", 1)[1].split("/")
+            key = "/".join([segments[0]] + segments[1::2] + segments[2::2])
+            index = self.__lookup.get(key)
+            if index is not None:
+                return index
+        if self.__could_be_unresolved(key):
+            return None
+        return -1
+
+    def __could_be_unresolved(self, key: str) -> bool:
+        """
+        True if a resource whose name is only known at deployment time may match
+        """
+        if not self.__unresolved_types:
+            return False
+        if None in self.__unresolved_types:
+            return True
+        return any(key.startswith(t + "/") for t in self.__unresolved_types) or (
+            "/" not in key
+        )
+
+    # ******************************************************************************** #
+
+    def edges(self, report: Optional[ValidationReport] = None) -> dict:
+        """Resolves every dependsOn entry
+        Parameters
+        ----------
+        report: ValidationReport - dangling references are added to it
+
+        Returns
+        -------
+        dict of node index to set of the node indexes it depends on
+        """
+        edges = {index: set() for index in range(len(self.nodes))}
+        for index, node in enumerate(self.nodes):
+            for i, reference in enumerate(node.depends_on):
+                target = self.resolve(reference)
+                if target is None:
+                    continue
+                if target == -1:
+                    if report is not None:
+                        report.add(
+                            ERROR,
+                            f"{node.path}.dependsOn[{i}]",
+                            f"'{reference}' is not a resource in the template",
+                        )
+                    continue
+                edges[index].add(target)
+        return edges
+
+    # ******************************************************************************** #
+
+    def find_cycles(self, edges: dict) -> list:
+        """Finds dependency cycles
+        Parameters
+        ----------
+        edges: dict from edges()
+
+        Returns
+        -------
+        list of cycles, each a list of node indexes
+        """
+        # peel off everything that is not waiting on a cycle
+        pending = {index: set(targets) for index, targets in edges.items()}
+        dependents: dict = {index: [] for index in edges}
+        for index, targets in edges.items():
+            for target in targets:
+                dependents[target].append(index)
+        ready = [index for index, targets in pending.items() if not targets]
+        while ready:
+            index = ready.pop()
+            del pending[index]
+            for dependent in dependents[index]:
+                waiting = pending.get(dependent)
+                if waiting is not None:
+                    waiting.discard(index)
+                    if not waiting:
+                        ready.append(dependent)
+
+        # every node left depends on another node left - walk to a repeat
+        cycles = []
+        seen: set = set()
+        for start in pending:
+            if start in seen:
+                continue
+            walk = []
+            position: dict = {}
+            node = start
+            while node not in position and node not in seen:
+                position[node] = len(walk)
+                walk.append(node)
+                node = min(pending[node])
+            if node in position:
+                cycles.append(walk[position[node] :])
+            seen.update(walk)
+        return cycles
+
+
+# ******************************************************************************** #
+
+
+def validate_parameters(
+    template: dict,
+    parameters: dict,
+    evaluator: ExpressionEvaluator,
+    report: ValidationReport,
+) -> None:
+    """Checks parameter values against the template's parameter schema
+    Parameters
+    ----------
+    template: dict - ARM template
+    parameters: dict - the "parameters" of a parameter file, name to {"value": ...}
+    evaluator: ExpressionEvaluator for default values
+    report: ValidationReport issues are added to
+    """
+    definitions = template.get("parameters") or {}
+    types = template.get("definitions") or {}
+    by_key = {name.lower(): name for name in definitions}
+    supplied = {}
+    for name, entry in (parameters or {}).items():
+        if name.lower() not in by_key:
+            report.add(
+                ERROR, f"parameters.{name}", "is not a parameter of the template"
+            )
+            continue
+        if isinstance(entry, dict) and "value" in entry:
+            supplied[name.lower()] = entry["value"]
+        elif not (isinstance(entry, dict) and "reference" in entry):
+            report.add(
+                ERROR,
+                f"parameters.{name}",
+                "needs a 'value' or a Key Vault 'reference'",
+            )
+        else:
+            # Key Vault reference - resolved by ARM
+            supplied[name.lower()] = UNKNOWN
+
+    for name, definition in definitions.items():
+        path = f"parameters.{name}"
+        if not isinstance(definition, dict):
+            report.add(ERROR, path, "parameter definition must be an object")
+            continue
+        definition = __resolve_type(definition, types)
+        if name.lower() in supplied:
+            value = supplied[name.lower()]
+        elif "defaultValue" in definition:
+            value = evaluator.parameter(name)
+            path += ".defaultValue"
+        elif definition.get("nullable"):
+            continue
+        else:
+            report.add(ERROR, path, "has no value and no defaultValue")
+            continue
+        if value is not UNKNOWN:
+            __check_value(path, value, definition, report)
+
+
+def __resolve_type(definition: dict, types: dict) -> dict:
+    """
+    A parameter definition with the user-defined type of its $ref merged in,
+    its own keys - i.e. nullable or defaultValue - win
+    """
+    seen = set()
+    while "type" not in definition:
+        ref = definition.get("$ref")
+        if not isinstance(ref, str) or not ref.startswith(__DEFINITION_REF):
+            break
+        target = types.get(ref[len(__DEFINITION_REF) :])
+        if ref in seen or not isinstance(target, dict):
+            break
+        seen.add(ref)
+        own = {key: value for key, value in definition.items() if key != "$ref"}
+        definition = {**target, **own}
+    return definition
+
+
+def __check_value(
+    path: str, value: object, definition: dict, report: ValidationReport
+) -> None:
+    """
+    Checks one parameter value against its type, allowedValues and limits
+    """
+    if value is None and definition.get("nullable"):
+        return
+    type_name = str(definition.get("type", "")).lower()
+    expected = __PARAMETER_TYPES.get(type_name)
+    if expected is None:
+        # i.e. a $ref that does not resolve - ARM checks it on deployment
+        report.add(
+            WARNING,
+            path,
+            f"unknown parameter type '{definition.get('type')}' - not checked",
+        )
+        return
+    # bool is an int in Python but not in ARM
+    if not isinstance(value, expected) or (expected is int and isinstance(value, bool)):
+        report.add(
+            ERROR, path, f"expected {definition['type']} but got {type(value).__name__}"
+        )
+        return
+
+    allowed = definition.get("allowedValues")
+    if allowed is not None:
+        values = value if expected is list else [value]
+        for item in values:
+            if item is not UNKNOWN and item not in allowed:
+                report.add(
+                    ERROR, path, f"{item!r} is not one of the allowedValues {allowed}"
+                )
+
+    if expected is int:
+        if "minValue" in definition and value < definition["minValue"]:
+            report.add(
+                ERROR, path, f"{value} is below minValue {definition['minValue']}"
+            )
+        if "maxValue" in definition and value > definition["maxValue"]:
+            report.add(
+                ERROR, path, f"{value} is above maxValue {definition['maxValue']}"
+            )
+    if expected in (str, list):
+        if "minLength" in definition and len(value) < definition["minLength"]:
+            report.add(
+                ERROR,
+                path,
+                f"length {len(value)} is below minLength {definition['minLength']}",
+            )
+        if "maxLength" in definition and len(value) > definition["maxLength"]:
+            report.add(
+                ERROR,
+                path,
+                f"length {len(value)} is above maxLength {definition['maxLength']}",
+            )
+
+
+# ******************************************************************************** #
+
+
+@lru_cache(maxsize=65536)
+def __lint_expression(text: str, parameters: frozenset, variables: frozenset) -> tuple:
+    """
+    Issues of one expression as (severity, message) pairs, memoised
+    """
+    try:
+        node = parse_expression(text)
+    except ExpressionError as ex:
+        return ((ERROR, f"invalid expression {text!r}: {ex}"),)
+    issues = []
+    for _, name, args in __walk_calls(node):
+        if name in ("parameters", "variables"):
+            if len(args) != 1:
+                issues.append((ERROR, f"{name}() takes one argument in {text!r}"))
+            elif args[0][0] == "lit":
+                known = parameters if name == "parameters" else variables
+                if str(args[0][1]).lower() not in known:
+                    kind = "parameter" if name == "parameters" else "variable"
+                    issues.append((ERROR, f"{kind} '{args[0][1]}' is not defined"))
+        elif (
+            "." not in name
+            and name not in KNOWN_FUNCTIONS
+            and not name.startswith("list")
+        ):
+            issues.append((WARNING, f"unknown function '{name}'"))
+    return tuple(issues)
+
+
+def clear_caches() -> None:
+    """
+    Drops the memoised parse, compile and lint results
+    """
+    parse_expression.cache_clear()
+    compile_expression.cache_clear()
+    __lint_expression.cache_clear()
+
+
+def validate_expressions(template: dict, report: ValidationReport) -> None:
+    """Parses every expression in the template and checks its parameter
+    and variable references. Inner-scope nested deployment templates are
+    skipped, their expressions refer to their own parameters.
+    Parameters
+    ----------
+    template: dict - ARM template
+    report: ValidationReport issues are added to
+    """
+    parameters = frozenset(name.lower() for name in template.get("parameters") or {})
+    variables = frozenset(name.lower() for name in template.get("variables") or {})
+    lint = __lint_expression
+
+    # paths are (parent, key) links, only formatted for issues
+    stack = [
+        ((None, key), template[key])
+        for key in ("outputs", "resources", "variables", "parameters")
+        if isinstance(template.get(key), (dict, list))
+    ]
+    linted: dict = {}
+    count = 0
+    while stack:
+        path, container = stack.pop()
+        if isinstance(container, dict):
+            if __is_inner_scope_deployment(container):
+                container = dict(container)
+                container["properties"] = {
+                    k: v for k, v in container["properties"].items() if k != "template"
+                }
+            items = container.items()
+        else:
+            items = enumerate(container)
+        for key, item in items:
+            # type() - JSON strings are never subclasses, and this loop is hot
+            if type(item) is str:  # pylint: disable=unidiomatic-typecheck
+                if item[:1] != "[" or item[-1:] != "]" or item[:2] == "[[":
+                    continue
+                count += 1
+                issues = linted.get(item)
+                if issues is None:
+                    issues = linted[item] = lint(item, parameters, variables)
+                for severity, message in issues:
+                    report.add(severity, __format_path((path, key)), message)
+            elif isinstance(item, (dict, list)) and key != "metadata":
+                stack.append(((path, key), item))
+    report.expressions += count
+
+
+def __format_path(path: tuple) -> str:
+    """
+    Formats a (parent, key) path chain, i.e. resources[0].properties.name
+    """
+    parts = []
+    while path is not None:
+        path, key = path
+        parts.append(f"[{key}]" if isinstance(key, int) else f".{key}")
+    return "".join(reversed(parts)).lstrip(".")
+
+
+def __is_inner_scope_deployment(value: dict) -> bool:
+    properties = value.get("properties")
+    if not isinstance(properties, dict) or "template" not in properties:
+        return False
+    options = properties.get("expressionEvaluationOptions") or {}
+    return str(options.get("scope", "")).lower() == "inner"
+
+
+# ******************************************************************************** #
+
+
+def validate_dependencies(
+    template: dict, evaluator: ExpressionEvaluator, report: ValidationReport
+) -> ResourceIndex:
+    """Indexes the resources and checks dependsOn for dangling references and cycles
+    Parameters
+    ----------
+    template: dict - ARM template
+    evaluator: ExpressionEvaluator resolving names
+    report: ValidationReport issues are added to
+
+    Returns
+    -------
+    ResourceIndex
+    """
+    index = ResourceIndex(template, evaluator)
+    report.resources += len(index.nodes)
+    edges = index.edges(report)
+    for cycle in index.find_cycles(edges):
+        names = [index.nodes[i].path for i in cycle]
+        report.add(
+            ERROR, names[0], "dependsOn cycle: " + " -> ".join(names + names[:1])
+        )
+    return index
+
+
+# ******************************************************************************** #
+
+
+def validate_template(
+    template: dict,
+    parameters: Optional[dict] = None,
+    context: Optional[ValidationContext] = None,
+) -> ValidationReport:
+    """Runs every offline check on a template
+    Parameters
+    ----------
+    template: dict - ARM template
+    parameters: dict - the "parameters" of a parameter file, can be None
+    context: ValidationContext - deployment scope for resourceGroup() and friends
+
+    Returns
+    -------
+    ValidationReport
+    """
+    report = ValidationReport()
+    if not isinstance(template, dict):
+        report.add(ERROR, "$", "template must be a JSON object")
+        return report
+    for key in ("parameters", "variables", "outputs"):
+        if not isinstance(template.get(key, {}), dict):
+            report.add(ERROR, key, "must be an object")
+            return report
+
+    values = {
+        name: entry["value"]
+        for name, entry in (parameters or {}).items()
+        if isinstance(entry, dict) and "value" in entry
+    }
+    evaluator = ExpressionEvaluator(template, values, context)
+    validate_parameters(template, parameters, evaluator, report)
+    validate_expressions(template, report)
+    validate_dependencies(template, evaluator, report)
+    return report
+
+
+# ******************************************************************************** #
+
+
+def validate_files(
+    template_file: str,
+    template_params_file: Optional[str] = None,
+    context: Optional[ValidationContext] = None,
+) -> ValidationReport:
+    """Validates a template file and its parameters file, without Azure access
+    Parameters
+    ----------
+    template_file: str - ARM template or Bicep file
+    template_params_file: str - parameters file, can be None
+    context: ValidationContext
+
+    Returns
+    -------
+    ValidationReport
+
+    Raises
+    ------
+    FileNotFoundError if either file does not exist
+    """
+    if template_file.lower().endswith(".bicep"):
+        template = compile_bicep(template_file)
+    else:
+        template = unwrap(get_template_store().load(template_file))
+    parameters = None
+    if template_params_file is not None:
+        parameters = unwrap(
+            get_template_store().load(template_params_file, "parameters")
+        )
+    return validate_template(template, parameters, context)
+
+
+# ******************************************************************************** #
+
+
+def print_report(report: ValidationReport) -> None:
+    """Prints the issues of a validation report
+    Parameters
+    ----------
+    report: ValidationReport
+    """
+    for issue in report.errors:
+        print_error_message(f"##ERROR - {issue}")
+    for issue in report.warnings:
+        print_warning_message(f"WARNING - {issue}")
+    if report.ok:
+        print_ok_message(
+            f"**Template valid - {report.resources} resources,"
+            f" {report.expressions} expressions checked. **"
+        )
+
+
+# ******************************************************************************** #
@@ -0,0 +1,428 @@
+""" Command line entry point
+Deploys an Azure Bicep or ARM Template.
+The Azure SDK is only imported once the arguments have been validated,
+so --help and argument errors return immediately.
+"""
+import argparse
+import sys
+from typing import Optional
+
+# ******************************************************************************** #
+
+
+def build_parser() -> argparse.ArgumentParser:
+    """Builds the command line parser
+
+    Returns
+    -------
+    argparse.ArgumentParser
+    """
+    # help message string
+    # pylint: disable=line-too-long
+    help_msg: str = (
+        "Deploys an Azure Bicep or ARM Template"
+        "to a given Subscription and Resource Group."
+        " **Assumes you are logged in to the AzureCLI."
+    )
+
+    # add Args
+    parser = argparse.ArgumentParser(description=help_msg)
+    parser.add_argument(
+        "--SubscriptionId", "-sub", required=False, help="Subscription Id."
+    )
+    parser.add_argument(
+        "--ResourceGroup", "-rsg", required=False, help="Resource Group."
+    )
+    parser.add_argument(
+        "--Location", "-loc", required=False, help="Target Location/Region."
+    )
+    parser.add_argument(
+        "--template", "-temp", required=False, help="Resource Template file."
+    )
+    parser.add_argument(
+        "--params", "-params", required=False, help="Resource Template Parameters file."
+    )
+    parser.add_argument(
+        "--manifest",
+        "-manifest",
+        required=False,
+        help="JSON or YAML manifest of deployment targets, deploys them in"
+        " parallel and in dependency order.",
+    )
+    parser.add_argument(
+        "--workers",
+        "-workers",
+        type=int,
+        default=4,
+        help="Maximum concurrent deployments in manifest mode.",
+    )
+    parser.add_argument(
+        "--skip-unchanged",
+        action="store_true",
+        help="Skip deployments whose template and parameters are unchanged"
+        " since the last successful deployment.",
+    )
+    parser.add_argument(
+        "--what-if",
+        action="store_true",
+        help="Run an ARM what-if first and skip deployments with no resource changes.",
+    )
+    parser.add_argument(
+        "--keep-deployments",
+        type=int,
+        required=False,
+        metavar="N",
+        help="After a successful deployment, prune the resource group's deployment"
+        " history down to the newest N deployments with the same prefix.",
+    )
+    parser.add_argument(
+        "--no-journal",
+        action="store_true",
+        help="Do not journal submitted deployments - an interrupted run"
+        " will not reattach to the deployment it left running.",
+    )
+    parser.add_argument(
+        "--processes",
+        type=int,
+        required=False,
+        metavar="N",
+        help="Manifest mode: prepare the targets (load, validate, fingerprint)"
+        " in N worker processes and submit them from one thread, at most --workers"
+        " deployments in flight. Not used for manifests with dependsOn; cannot be"
+        " combined with --what-if or --keep-deployments.",
+    )
+    parser.add_argument(
+        "--mode",
+        choices=("Incremental", "Complete"),
+        default="Incremental",
+        help="Single target mode: deployment mode. Complete deletes every resource"
+        " of the resource group that is not in the template and runs a what-if"
+        " first - it stops if anything would be deleted, unless --allow-deletes.",
+    )
+    parser.add_argument(
+        "--allow-deletes",
+        action="store_true",
+        help="Let a --mode Complete deployment delete resources.",
+    )
+    parser.add_argument(
+        "--changed-since",
+        required=False,
+        metavar="FILE",
+        help="Single target mode: the template as last deployed - only the resources"
+        " changed since then, and the resources they depend on, are deployed."
+        " Incremental mode only.",
+    )
+    parser.add_argument(
+        "--changed-since-params",
+        required=False,
+        metavar="FILE",
+        help="Parameters file of the --changed-since template, defaults to --params.",
+    )
+    parser.add_argument(
+        "--no-results",
+        action="store_true",
+        help="Do not keep deployment outputs, resource ids and timings in the"
+        " local results store.",
+    )
+    parser.add_argument(
+        "--no-validate",
+        action="store_true",
+        help="Skip the offline template and parameter validation before deploying.",
+    )
+    parser.add_argument(
+        "--validate-only",
+        action="store_true",
+        help="Only validate the template and parameters offline, nothing is"
+        " sent to Azure and no login is needed.",
+    )
+    parser.add_argument(
+        "--telemetry",
+        required=False,
+        metavar="FILE",
+        help="Append timing spans and ARM call counters to a JSON lines file.",
+    )
+    return parser
+
+
+# ******************************************************************************** #
+
+
+def __fingerprint_store(args: argparse.Namespace) -> object:
+    """
+    Returns the local fingerprint store when --skip-unchanged is set
+    """
+    if not args.skip_unchanged:
+        return None
+    # pylint: disable=import-outside-toplevel
+    from .az_fingerprint import FingerprintStore
+
+    return FingerprintStore()
+
+
+# ******************************************************************************** #
+
+
+def __retention_policy(args: argparse.Namespace) -> object:
+    """
+    Returns the deployment history retention policy when --keep-deployments is set
+    """
+    if args.keep_deployments is None:
+        return None
+    # pylint: disable=import-outside-toplevel
+    from .az_history import RetentionPolicy
+
+    return RetentionPolicy(keep_last=args.keep_deployments)
+
+
+# ******************************************************************************** #
+
+
+def __journal(args: argparse.Namespace) -> object:
+    """
+    Returns the local deployment journal unless --no-journal is set
+    """
+    if args.no_journal:
+        return None
+    # pylint: disable=import-outside-toplevel
+    from .az_journal import DeploymentJournal
+
+    return DeploymentJournal()
+
+
+# ******************************************************************************** #
+
+
+def __result_store(args: argparse.Namespace) -> object:
+    """
+    Returns the local deployment results store unless --no-results is set
+    """
+    if args.no_results:
+        return None
+    # pylint: disable=import-outside-toplevel
+    from .az_results import ResultStore
+
+    return ResultStore()
+
+
+# ******************************************************************************** #
+
+
+def main(argv: Optional[list] = None) -> None:
+    """Main function
+    Parameters
+    ----------
+    argv: list - command line arguments, defaults to sys.argv
+
+    Returns
+    -------
+    None
+    """
+    parser = build_parser()
+    args = parser.parse_args(argv)
+
+    if not args.telemetry:
+        __run(parser, args)
+        return
+
+    # pylint: disable=import-outside-toplevel
+    from . import az_telemetry
+
+    exporter = az_telemetry.JsonLinesExporter(args.telemetry)
+    az_telemetry.add_exporter(exporter)
+    try:
+        __run(parser, args)
+    finally:
+        az_telemetry.remove_exporter(exporter)
+
+
+# ******************************************************************************** #
+
+
+def __run(parser: argparse.ArgumentParser, args: argparse.Namespace) -> None:
+    """
+    Runs the deployments selected on the command line
+    """
+    if args.validate_only:
+        __validate_only(parser, args)
+        return
+
+    if args.manifest and (args.mode != "Incremental" or args.changed_since):
+        parser.error("--mode and --changed-since apply to single target mode only")
+    if args.changed_since and args.mode == "Complete":
+        parser.error("--changed-since cannot be combined with --mode Complete")
+    if args.processes and (args.what_if or args.keep_deployments is not None):
+        parser.error(
+            "--what-if and --keep-deployments cannot be combined with --processes"
+        )
+
+    # manifest mode - fan out to every target in the manifest
+    if args.manifest:
+        # pylint: disable=import-outside-toplevel
+        from . import az_manifest, az_parallel, az_scheduler, console_helper
+
+        # workers hand their lines to one writer thread
+        console_helper.configure(background=True)
+        targets = az_manifest.load_manifest(args.manifest)
+
+        # dependent targets go through the scheduler
+        if any(target.depends_on for target in targets):
+            schedule = az_scheduler.DeploymentScheduler(
+                targets,
+                max_concurrency=args.workers,
+                fingerprint_store=__fingerprint_store(args),
+                journal=__journal(args),
+                retention_policy=__retention_policy(args),
+                result_store=__result_store(args),
+                what_if=args.what_if,
+                validate=not args.no_validate,
+            ).run()
+            az_scheduler.print_schedule(schedule)
+            if not schedule.succeeded:
+                sys.exit(1)
+            return
+
+        if args.processes:
+            from . import az_prepare
+
+            results = az_prepare.deploy_targets_multiprocess(
+                targets,
+                processes=args.processes,
+                max_in_flight=args.workers,
+                validate=not args.no_validate,
+                fingerprint_store=__fingerprint_store(args),
+                journal=__journal(args),
+                result_store=__result_store(args),
+            )
+            az_parallel.print_results(results)
+            if not all(result.succeeded for result in results):
+                sys.exit(1)
+            return
+
+        results = az_parallel.deploy_targets(
+            targets,
+            max_workers=args.workers,
+            fingerprint_store=__fingerprint_store(args),
+            journal=__journal(args),
+            retention_policy=__retention_policy(args),
+            what_if=args.what_if,
+            validate=not args.no_validate,
+            result_store=__result_store(args),
+        )
+        az_parallel.print_results(results)
+        if not all(result.succeeded for result in results):
+            sys.exit(1)
+        return
+
+    # single target mode
+    missing = [
+        name
+        for name, value in (
+            ("--SubscriptionId", args.SubscriptionId),
+            ("--ResourceGroup", args.ResourceGroup),
+            ("--Location", args.Location),
+            ("--template", args.template),
+        )
+        if not value
+    ]
+    if missing:
+        parser.error(f"the following arguments are required: {', '.join(missing)}")
+
+    # set values from command line
+    subscription_id = args.SubscriptionId
+    resource_group_name = args.ResourceGroup
+    location = args.Location
+
+    # Call the deploy class
+    # pylint: disable=import-outside-toplevel
+    from . import az_deploy, az_validate
+    from .console_helper import print_error_message
+
+    deploy = az_deploy.DeploymentHelper(
+        subscription_id,
+        resource_group_name,
+        location,
+        fingerprint_store=__fingerprint_store(args),
+        journal=__journal(args),
+        retention_policy=__retention_policy(args),
+        result_store=__result_store(args),
+    )
+    deploy.deploy_resource_group()
+
+    # deploy template - validation errors have been printed already
+    try:
+        outcome = deploy.deploy_resource_template(
+            args.template,
+            args.params,
+            what_if=args.what_if,
+            validate=not args.no_validate,
+            mode=args.mode,
+            allow_deletes=args.allow_deletes,
+            previous_template_file=args.changed_since,
+            previous_params_file=args.changed_since_params,
+        )
+    except az_validate.TemplateValidationError:
+        sys.exit(1)
+    except az_deploy.UnsafeDeploymentError as ex:
+        print_error_message(f"##ERROR - {ex}")
+        sys.exit(1)
+    if outcome.failed:
+        sys.exit(1)
+
+
+# ******************************************************************************** #
+
+
+def __validate_only(parser: argparse.ArgumentParser, args: argparse.Namespace) -> None:
+    """
+    Validates the template, or every manifest target, offline and exits
+    non-zero on errors
+    """
+    # pylint: disable=import-outside-toplevel
+    import subprocess
+
+    from . import az_validate
+    from .az_bicep import load_error_message
+    from .console_helper import print_command_message, print_error_message
+
+    if args.manifest:
+        from . import az_manifest
+
+        checks = [
+            (
+                target.name,
+                target.template_file,
+                target.template_params_file,
+                az_validate.ValidationContext(
+                    target.subscription_id, target.resource_group_name, target.location
+                ),
+            )
+            for target in az_manifest.load_manifest(args.manifest)
+        ]
+    elif args.template:
+        checks = [(args.template, args.template, args.params, None)]
+    else:
+        parser.error("--validate-only needs --template or --manifest")
+
+    failed = False
+    for label, template_file, template_params_file, context in checks:
+        print_command_message(f"**Validating {label} **")
+        try:
+            report = az_validate.validate_files(
+                template_file, template_params_file, context
+            )
+        except (FileNotFoundError, subprocess.CalledProcessError) as ex:
+            print_error_message(load_error_message(ex))
+            failed = True
+            continue
+        az_validate.print_report(report)
+        failed = failed or not report.ok
+    if failed:
+        sys.exit(1)
+
+
+# ******************************************************************************** #
+
+
+# Main check
+if __name__ == "__main__":
+    main()
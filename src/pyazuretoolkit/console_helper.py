@@ -1,8 +1,25 @@
 """ Standard console outputs with colours
 Provides a helper module for displaying output with colours.
-"""
 
-"""color constants to print in the console constants for this module 
+Messages go through a ConsoleWriter to a sink - the console by default.
+Colours are only written to terminals, lines can carry a per-target
+prefix, deployment progress is a single rate-limited status line, and
+configure() can move writing to a background thread or route messages
+to logging instead.
+"""
+import atexit
+import contextlib
+import contextvars
+import logging
+import os
+import queue
+import shutil
+import sys
+import threading
+import time
+from typing import ClassVar, Optional
+
+"""color constants to print in the console constants for this module
 """
 __BLUE: str = "\033[94m"
 __CYAN: str = "\033[96m"
@@ -13,6 +30,383 @@ __ENDC: str = "\033[0m"
 __BOLD: str = "\033[1m"
 __UNDERLINE: str = "\033[4m"
 
+# message styles - colour and logging level
+__STYLES: dict = {
+    "ok": (__OK_GREEN, logging.INFO),
+    "warning": (__WARNING, logging.WARNING),
+    "error": (__ERROR, logging.ERROR),
+    "confirmation": (__BLUE, logging.INFO),
+    "command": (__CYAN, logging.INFO),
+    "bold": (__BOLD, logging.INFO),
+    "progress": (__CYAN, logging.INFO),
+}
+
+__PREFIX: contextvars.ContextVar = contextvars.ContextVar(
+    "pyazuretoolkit_console_prefix", default=None
+)
+
+# ******************************************************************************** #
+
+
+class StreamSink:
+    """
+    Writes messages to a text stream, stdout by default.
+    ANSI colours are only written when the stream is a terminal and
+    NO_COLOR is not set; progress updates one status line in place on
+    terminals and is written as plain lines otherwise.
+    """
+
+    # style table and reset code, bound below the class
+    _styles: ClassVar[dict] = {}
+    _reset: str = ""
+
+    def __init__(
+        self, stream: Optional[object] = None, colour: Optional[bool] = None
+    ) -> None:
+        """Init function.
+        Parameters
+        ----------
+        stream: text stream - None writes to the current sys.stdout
+        colour: bool - force colours on or off, None detects a terminal
+        """
+        self.stream = stream
+        self.colour = colour
+        self.__status: dict = {}
+        self.__status_shown = False
+
+    def __target(self) -> object:
+        return self.stream if self.stream is not None else sys.stdout
+
+    def __is_tty(self, stream: object) -> bool:
+        isatty = getattr(stream, "isatty", None)
+        return bool(isatty and isatty())
+
+    def __use_colour(self, stream: object) -> bool:
+        if self.colour is not None:
+            return self.colour
+        return self.__is_tty(stream) and "NO_COLOR" not in os.environ
+
+    def __clear_status(self, stream: object) -> None:
+        if self.__status_shown:
+            stream.write("\r\033[K")
+            self.__status_shown = False
+
+    def __draw_status(self, stream: object) -> None:
+        if self.__status:
+            width = shutil.get_terminal_size().columns - 1
+            stream.write(" | ".join(self.__status.values())[:width])
+            self.__status_shown = True
+
+    def write(self, style: str, text: str) -> None:
+        """
+        Writes a message line
+        """
+        stream = self.__target()
+        self.__clear_status(stream)
+        if self.__use_colour(stream):
+            stream.write(f"{self._styles[style][0]}{text}{self._reset}\n")
+        else:
+            stream.write(f"{text}\n")
+        self.__draw_status(stream)
+
+    def progress(self, key: str, text: str) -> None:
+        """
+        Updates (or with text None removes) the status of one target
+        """
+        stream = self.__target()
+        if not self.__is_tty(stream):
+            if text is not None:
+                stream.write(f"{text}\n")
+            return
+        if text is None:
+            self.__status.pop(key, None)
+        else:
+            self.__status[key] = text
+        self.__clear_status(stream)
+        self.__draw_status(stream)
+
+    def flush(self) -> None:
+        """
+        Flushes the stream
+        """
+        self.__target().flush()
+
+
+StreamSink._styles = __STYLES
+StreamSink._reset = __ENDC
+
+# ******************************************************************************** #
+
+
+class LoggingSink:
+    """
+    Routes messages to a logger instead of the console,
+    errors and warnings keep their logging level
+    """
+
+    # style table, bound below the class
+    _styles: ClassVar[dict] = {}
+
+    def __init__(self, logger: Optional[logging.Logger] = None) -> None:
+        """Init function.
+        Parameters
+        ----------
+        logger: logging.Logger - 'pyazuretoolkit.console' by default
+        """
+        self.logger = logger or logging.getLogger("pyazuretoolkit.console")
+
+    def write(self, style: str, text: str) -> None:
+        """
+        Logs a message line
+        """
+        self.logger.log(self._styles[style][1], text)
+
+    def progress(self, key: str, text: str) -> None:
+        """
+        Logs a status update
+        """
+        if text is not None:
+            self.logger.info(text)
+
+    def flush(self) -> None:
+        """
+        Nothing buffered
+        """
+
+
+LoggingSink._styles = __STYLES
+
+# ******************************************************************************** #
+
+
+class ConsoleWriter:
+    """
+    Serialises messages to a sink, either on the calling thread or on a
+    background writer thread so workers never block on the console.
+    Progress updates repeating the last status are dropped until
+    progress_interval seconds have passed.
+    """
+
+    def __init__(
+        self,
+        sink: object = None,
+        background: bool = False,
+        progress_interval: float = 1.0,
+    ) -> None:
+        """Init function.
+        Parameters
+        ----------
+        sink: object with write(style, text), progress(key, text) and flush(),
+            a StreamSink on stdout by default
+        background: bool - write from a background thread
+        progress_interval: float - seconds between repeated status updates
+        """
+        self.sink = sink if sink is not None else StreamSink()
+        self.progress_interval = progress_interval
+        self.__lock = threading.Lock()
+        self.__last_progress: dict = {}
+        self.__queue: queue.Queue = None
+        self.__thread: threading.Thread = None
+        if background:
+            self.__queue = queue.Queue()
+            self.__thread = threading.Thread(
+                target=self.__run, name="pyazuretoolkit-console", daemon=True
+            )
+            self.__thread.start()
+
+    # ******************************************************************************** #
+
+    def __run(self) -> None:
+        while True:
+            item = self.__queue.get()
+            try:
+                if item is None:
+                    return
+                self.__emit(*item)
+            finally:
+                self.__queue.task_done()
+
+    def __emit(self, method: str, *args) -> None:
+        with self.__lock:
+            getattr(self.sink, method)(*args)
+
+    def __submit(self, method: str, *args) -> None:
+        if self.__queue is not None:
+            self.__queue.put((method, *args))
+        else:
+            self.__emit(method, *args)
+
+    # ******************************************************************************** #
+
+    def write(self, style: str, text: str) -> None:
+        """Writes a message
+        Parameters
+        ----------
+        style: str - ok, warning, error, confirmation, command or bold
+        text: str
+        """
+        self.__submit("write", style, text)
+
+    # ******************************************************************************** #
+
+    def progress(self, key: str, text: str) -> None:
+        """Updates the status line of a target, rate limited
+        Parameters
+        ----------
+        key: str - target the status belongs to
+        text: str - None removes the target's status
+        """
+        now = time.monotonic()
+        with self.__lock:
+            if text is None:
+                self.__last_progress.pop(key, None)
+            else:
+                last = self.__last_progress.get(key)
+                if (
+                    last is not None
+                    and last[0] == text
+                    and now - last[1] < self.progress_interval
+                ):
+                    return
+                self.__last_progress[key] = (text, now)
+        self.__submit("progress", key, text)
+
+    # ******************************************************************************** #
+
+    def flush(self) -> None:
+        """
+        Waits until every queued message is written and flushes the sink
+        """
+        if self.__queue is not None and self.__thread.is_alive():
+            self.__queue.join()
+        self.__emit("flush")
+
+    # ******************************************************************************** #
+
+    def close(self) -> None:
+        """
+        Flushes and stops the background thread
+        """
+        self.flush()
+        if self.__thread is not None:
+            self.__queue.put(None)
+            self.__thread.join()
+            self.__thread = None
+            self.__queue = None
+
+
+# ******************************************************************************** #
+
+__WRITER: dict = {}
+__WRITER_LOCK = threading.Lock()
+
+
+def get_writer() -> ConsoleWriter:
+    """
+    Returns the process-wide console writer
+    """
+    with __WRITER_LOCK:
+        writer = __WRITER.get("writer")
+        if writer is None:
+            writer = __WRITER["writer"] = ConsoleWriter()
+        return writer
+
+
+# ******************************************************************************** #
+
+
+def configure(
+    sink: object = None, background: bool = False, progress_interval: float = 1.0
+) -> ConsoleWriter:
+    """Replaces the process-wide console writer, flushing the old one
+    Parameters
+    ----------
+    sink: StreamSink, LoggingSink or any object with the same methods
+    background: bool - write from a background thread
+    progress_interval: float - seconds between repeated status updates
+
+    Returns
+    -------
+    ConsoleWriter now in use
+    """
+    writer = ConsoleWriter(sink, background, progress_interval)
+    with __WRITER_LOCK:
+        previous, __WRITER["writer"] = __WRITER.get("writer"), writer
+    if previous is not None:
+        previous.close()
+    return writer
+
+
+# ******************************************************************************** #
+
+
+def flush() -> None:
+    """
+    Writes out every queued message
+    """
+    writer = __WRITER.get("writer")
+    if writer is not None:
+        writer.flush()
+
+
+atexit.register(flush)
+
+# ******************************************************************************** #
+
+
+@contextlib.contextmanager
+def target_prefix(label: str) -> None:
+    """Prefixes every message written in the block, i.e. with the target
+    label in parallel runs. Worker threads must enter it themselves.
+    Parameters
+    ----------
+    label: str
+    """
+    token = __PREFIX.set(f"[{label}] ")
+    try:
+        yield
+    finally:
+        __PREFIX.reset(token)
+
+
+# ******************************************************************************** #
+
+
+def __write(style: str, message_string: str) -> None:
+    prefix = __PREFIX.get()
+    get_writer().write(style, f"{prefix}{message_string}" if prefix else message_string)
+
+
+# ******************************************************************************** #
+
+
+def print_progress(message_string: str) -> None:
+    """Updates the single status line of the current target,
+    repeated updates are rate limited
+
+    Parameters
+    ----------
+    message_string : string - None clears the target's status
+
+    Returns
+    -------
+    nothing - prints formatted output.
+    """
+    prefix = __PREFIX.get() or ""
+    text = f"{prefix}{message_string}" if message_string is not None else None
+    get_writer().progress(prefix, text)
+
+
+# ******************************************************************************** #
+
+
+def end_progress() -> None:
+    """
+    Clears the status line of the current target
+    """
+    print_progress(None)
+
+
 # ******************************************************************************** #
 
 
@@ -27,7 +421,7 @@ def print_ok_message(message_string: str) -> None:
     -------
     nothing - prints formatted output.
     """
-    print(f"{__OK_GREEN}{message_string}{__ENDC}")
+    __write("ok", message_string)
 
 
 # ******************************************************************************** #
@@ -44,7 +438,7 @@ def print_warning_message(message_string: str) -> None:
     -------
     nothing - prints formatted output.
     """
-    print(f"{__WARNING}{message_string}{__ENDC}")
+    __write("warning", message_string)
 
 
 # ******************************************************************************** #
@@ -61,7 +455,7 @@ def print_error_message(message_string: str) -> None:
     -------
     nothing - prints formatted output.
     """
-    print(f"{__ERROR}{message_string}{__ENDC}")
+    __write("error", message_string)
 
 
 # ******************************************************************************** #
@@ -78,7 +472,7 @@ def print_confirmation_message(message_string: str) -> None:
     -------
     nothing - prints formatted output.
     """
-    print(f"{__BLUE}{message_string}{__ENDC}")
+    __write("confirmation", message_string)
 
 
 # ******************************************************************************** #
@@ -95,7 +489,7 @@ def print_command_message(message_string: str) -> None:
     -------
     nothing - prints formatted output.
     """
-    print(f"{__CYAN}{message_string}{__ENDC}")
+    __write("command", message_string)
 
 
 # ******************************************************************************** #
@@ -112,7 +506,7 @@ def print_bold_message(message_string: str) -> None:
     -------
     nothing - prints formatted output.
     """
-    print(f"{__BOLD}{message_string}{__ENDC}")
+    __write("bold", message_string)
 
 
 # ******************************************************************************** #
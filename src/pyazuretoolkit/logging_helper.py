@@ -1,39 +1,103 @@
 """
 Generic logging module
+Everything logs to the 'pyazuretoolkit' logger, which only has a
+NullHandler - the host application decides where records go, i.e.
+
+    logging.getLogger("pyazuretoolkit").setLevel(logging.DEBUG)
 """
 import functools
 import logging
+import reprlib
+import time
+from typing import Optional
+
+logger = logging.getLogger("pyazuretoolkit")
+logger.addHandler(logging.NullHandler())
+
+# template dicts can be megabytes - keep argument reprs short
+__ARG_REPR = reprlib.Repr()
+__ARG_REPR.maxlevel = 3
+__ARG_REPR.maxdict = 8
+__ARG_REPR.maxlist = 8
+__ARG_REPR.maxstring = 80
+__ARG_REPR.maxother = 80
+
+# ******************************************************************************** #
+
+
+class CallSignature:
+    """
+    Argument list of a call, only formatted if the log record is emitted
+    """
+
+    __slots__ = ("args", "kwargs")
 
-# set logging level
-logging.basicConfig(level=logging.INFO)
-logger = logging.getLogger()
+    # truncating repr, bound below the class
+    _repr: callable = repr
+
+    def __init__(self, args: tuple, kwargs: dict) -> None:
+        self.args = args
+        self.kwargs = kwargs
+
+    def __str__(self) -> str:
+        args_repr = [self._repr(a) for a in self.args]
+        kwargs_repr = [f"{k}={self._repr(v)}" for k, v in self.kwargs.items()]
+        return ", ".join(args_repr + kwargs_repr)
+
+
+CallSignature._repr = staticmethod(__ARG_REPR.repr)
 
 # ******************************************************************************** #
 
-def log(func):
+
+def log(func: Optional[callable] = None, *, level: int = logging.DEBUG) -> callable:
     """
-    Logging decorator
+    Logging decorator - logs the call, its arguments and its duration at
+    level, and any exception at ERROR. Arguments are only formatted when
+    level is enabled, so a disabled decorator costs one level check.
     source: https://ankitbko.github.io/blog/2021/04/logging-in-python/
+
+    Usage
+    -----
+    @log
+    def test_func():
+        ...
+
+    @log(level=logging.INFO)
+    def other_func():
+        ...
     """
+    if func is None:
+        return functools.partial(log, level=level)
+
+    name = func.__qualname__
 
     @functools.wraps(func)
     def wrapper(*args, **kwargs):
-        args_repr = [repr(a) for a in args]
-        kwargs_repr = [f"{k}={v!r}" for k, v in kwargs.items()]
-        signature = ", ".join(args_repr + kwargs_repr)
-        logger.debug("function {%f} called with args {%s}", func.__name__, signature)
+        if not logger.isEnabledFor(level):
+            try:
+                return func(*args, **kwargs)
+            except Exception:
+                logger.exception("Exception in %s", name)
+                raise
+
+        logger.log(level, "%s called with (%s)", name, CallSignature(args, kwargs))
+        start = time.perf_counter()
         try:
-            return func(*args, **kwargs)
-        except Exception as ex:
-            # pylint: disable=logging-fstring-interpolation
-            logger.exception(f"Exception in {func.__name__}. exception: {ex!s}")
-            raise ex
+            result = func(*args, **kwargs)
+        except Exception:
+            logger.exception(
+                "Exception in %s after %.3fms",
+                name,
+                (time.perf_counter() - start) * 1000.0,
+            )
+            raise
+        logger.log(
+            level, "%s returned in %.3fms", name, (time.perf_counter() - start) * 1000.0
+        )
+        return result
 
     return wrapper
 
 
 # ******************************************************************************** #
-
-# usage of decorator
-# @log
-# def function test_func():
@@ -0,0 +1,697 @@
+"""
+In-process fake Azure Resource Manager
+Serves resource groups, deployments, what-if and their long running
+operations from memory through an azure-core transport, so a real
+ResourceManagementClient - retry, throttle and LRO polling included -
+runs against it without a subscription or a socket. FakeArmAsyncTransport
+serves the same fake to the async clients.
+
+    arm = FakeArm(latency=0.005, lro_duration=0.05, throttle_every=10)
+    client = arm.client(subscription_id)
+"""
+import asyncio
+import json
+import re
+import threading
+import time
+import uuid
+from collections import Counter
+from datetime import datetime, timezone
+from typing import AsyncIterator, Optional
+from urllib.parse import urlsplit
+
+from azure.core.credentials import AccessToken
+from azure.core.pipeline.transport import (
+    AsyncHttpResponse,
+    AsyncHttpTransport,
+    HttpResponse,
+    HttpTransport,
+)
+from azure.core.utils import CaseInsensitiveDict
+from pyazuretoolkit.az_throttle import request_kind
+from pyazuretoolkit.az_validate import UNKNOWN, ExpressionEvaluator, ValidationContext
+
+BASE_URL = "https://management.azure.com"
+
+# ARM's hourly budget per subscription and request kind
+DEFAULT_REMAINING = {"reads": 12000, "writes": 1200, "deletes": 15000}
+
+__SUBSCRIPTION = r"^/subscriptions/(?P<sub>[^/]+)"
+__RESOURCE_GROUPS = __SUBSCRIPTION + r"/resourcegroups(/\$page/(?P<page>\d+))?"
+__RESOURCE_GROUP = __SUBSCRIPTION + r"/resourcegroups/(?P<rg>[^/]+)"
+__DEPLOYMENTS = __RESOURCE_GROUP + r"/providers/microsoft\.resources/deployments"
+__DEPLOYMENT = __DEPLOYMENTS + r"/(?P<name>[^/]+)"
+ROUTES = [
+    (name, re.compile(pattern + "$", re.IGNORECASE))
+    for name, pattern in (
+        # nextLink of a paged resource group list, ARM's links are opaque
+        ("resource_groups", __RESOURCE_GROUPS),
+        ("resource_group", __RESOURCE_GROUP),
+        ("deployments", __DEPLOYMENTS + "/?"),
+        ("deployment", __DEPLOYMENT),
+        ("deployment_status", __DEPLOYMENT + r"/operationstatuses/(?P<op>[^/]+)"),
+        ("what_if", __DEPLOYMENT + r"/whatif"),
+        ("operation", __SUBSCRIPTION + r"/operationresults/(?P<op>[^/]+)"),
+    )
+]
+
+# ******************************************************************************** #
+
+
+def utc_now() -> str:
+    """
+    ARM style timestamp
+    """
+    return datetime.now(timezone.utc).isoformat().replace("+00:00", "Z")
+
+
+# ******************************************************************************** #
+
+
+def deployment_id(match: re.Match) -> str:
+    """
+    Resource id of the deployment a route matched, cased as ARM returns it
+    """
+    return (
+        f"/subscriptions/{match['sub']}/resourceGroups/{match['rg']}"
+        f"/providers/Microsoft.Resources/deployments/{match['name']}"
+    )
+
+
+# ******************************************************************************** #
+
+
+class FakeArm:
+    """
+    Resource groups and deployments of any number of subscriptions, kept
+    in memory. Every request can be slowed down by a fixed latency, long
+    running operations finish after lro_duration seconds and every
+    throttle_every-th request is answered with a 429.
+    """
+
+    def __init__(
+        self,
+        latency: float = 0.0,
+        lro_duration: float = 0.0,
+        poll_interval: float = 0.01,
+        throttle_every: int = 0,
+        retry_after: float = 0.0,
+        remaining: Optional[dict] = None,
+        page_size: int = 0,
+    ) -> None:
+        """Init function.
+        Parameters
+        ----------
+        latency: float - seconds added to every request
+        lro_duration: float - seconds deployments and deletes stay running
+        poll_interval: float - retry-after-ms sent with running operations
+        throttle_every: int - answer every n-th request with a 429, 0 never
+        retry_after: float - Retry-After seconds sent with a 429
+        remaining: dict - request kind to hourly budget reported in the
+            x-ms-ratelimit-remaining-subscription-* headers, None for no headers
+        page_size: int - resource groups per list page, 0 for a single page
+        """
+        self.latency = latency
+        self.lro_duration = lro_duration
+        self.poll_interval = poll_interval
+        self.throttle_every = throttle_every
+        self.retry_after = retry_after
+        self.remaining = remaining
+        self.page_size = page_size
+        self.resource_groups: dict = {}
+        self.deployments: dict = {}
+        self.operations: dict = {}
+        self.calls: Counter = Counter()
+        self.requests = 0
+        self.throttled = 0
+        self.__used: Counter = Counter()
+        self.__lock = threading.Lock()
+
+    # ******************************************************************************** #
+
+    def client(self, subscription_id: str, **client_kwargs) -> object:
+        """Returns a ResourceManagementClient talking to this fake, with the
+        toolkit's retry and throttle policies unless others are passed
+        Parameters
+        ----------
+        subscription_id: str
+        client_kwargs: extra ResourceManagementClient keyword arguments
+        """
+        # pylint: disable=import-outside-toplevel
+        from azure.mgmt.resource import ResourceManagementClient
+        from pyazuretoolkit.az_pipeline import apply_pipeline_policies
+
+        client_kwargs.setdefault("transport", FakeArmTransport(self))
+        return ResourceManagementClient(
+            FakeCredential(),
+            subscription_id,
+            **apply_pipeline_policies(client_kwargs),
+        )
+
+    # ******************************************************************************** #
+
+    def add_resource_group(
+        self, subscription_id: str, name: str, location: str
+    ) -> None:
+        """
+        Creates a resource group without going through a client
+        """
+        with self.__lock:
+            self.__put_resource_group(subscription_id, name, {"location": location})
+
+    # ******************************************************************************** #
+
+    def handle(self, method: str, url: str, body: bytes) -> tuple:
+        """Answers one ARM request, the transports add the latency
+        Parameters
+        ----------
+        method: str
+        url: str - absolute request url
+        body: bytes - request body, may be empty
+
+        Returns
+        -------
+        tuple of status code, headers dict and response body (dict or None)
+        """
+        path = urlsplit(url).path.rstrip("/")
+        kind = request_kind(method)
+        with self.__lock:
+            self.requests += 1
+            self.__used[kind] += 1
+            if self.throttle_every and self.requests % self.throttle_every == 0:
+                self.throttled += 1
+                return self.__throttled(kind)
+
+            for route, pattern in ROUTES:
+                match = pattern.match(path)
+                if match:
+                    self.calls[f"{method} {route}"] += 1
+                    handler = getattr(self, f"_FakeArm__{route}")
+                    payload = json.loads(body) if body else None
+                    status, headers, response = handler(method, match, payload)
+                    break
+            else:
+                status, headers, response = self.__error(404, "NotFound", path)
+
+        headers.setdefault("x-ms-request-id", str(uuid.uuid4()))
+        if self.remaining is not None and kind in self.remaining:
+            headers[f"x-ms-ratelimit-remaining-subscription-{kind}"] = str(
+                max(self.remaining[kind] - self.__used[kind], 0)
+            )
+        return status, headers, response
+
+    # ******************************************************************************** #
+
+    def __throttled(self, kind: str) -> tuple:
+        """
+        429 with the Retry-After ARM sends when a budget is used up
+        """
+        status, headers, body = self.__error(
+            429, "TooManyRequests", f"Too many {kind} requests, retry later."
+        )
+        headers["Retry-After"] = str(self.retry_after)
+        headers[f"x-ms-ratelimit-remaining-subscription-{kind}"] = "0"
+        return status, headers, body
+
+    # ******************************************************************************** #
+
+    @staticmethod
+    def __error(status: int, code: str, message: str) -> tuple:
+        """
+        ARM error response
+        """
+        return status, {}, {"error": {"code": code, "message": message}}
+
+    # ******************************************************************************** #
+
+    @staticmethod
+    def __resource_group_not_found(match: re.Match) -> tuple:
+        """
+        404 of a request to a missing resource group
+        """
+        return FakeArm.__error(
+            404,
+            "ResourceGroupNotFound",
+            f"Resource group '{match['rg']}' could not be found.",
+        )
+
+    # ******************************************************************************** #
+
+    def __start_operation(
+        self, subscription_id: str, result: Optional[dict] = None
+    ) -> str:
+        """
+        Starts a long running operation, returns its absolute status url
+        """
+        operation_id = uuid.uuid4().hex
+        self.operations[operation_id] = (time.monotonic() + self.lro_duration, result)
+        return (
+            f"{BASE_URL}/subscriptions/{subscription_id}"
+            f"/operationresults/{operation_id}"
+        )
+
+    # ******************************************************************************** #
+
+    def __accepted(self, subscription_id: str, result: Optional[dict] = None) -> tuple:
+        """
+        202 of a request answered by a new long running operation
+        """
+        location = self.__start_operation(subscription_id, result)
+        return 202, self.__polling_headers(location), None
+
+    # ******************************************************************************** #
+
+    def __polling_headers(self, location: str) -> dict:
+        """
+        Headers of a running operation
+        """
+        return {
+            "Location": location,
+            "retry-after-ms": str(int(self.poll_interval * 1000)),
+        }
+
+    # ******************************************************************************** #
+
+    def __operation(self, method: str, match: re.Match, body: dict) -> tuple:
+        """
+        GET subscriptions/{sub}/operationresults/{op}
+        """
+        operation = self.operations.get(match["op"])
+        if operation is None:
+            return self.__error(404, "OperationNotFound", match["op"])
+        done_at, result = operation
+        if time.monotonic() < done_at:
+            return 202, self.__polling_headers(f"{BASE_URL}{match.group(0)}"), None
+        return (200, {}, result) if result is not None else (204, {}, None)
+
+    # ******************************************************************************** #
+
+    def __put_resource_group(
+        self, subscription_id: str, name: str, body: dict
+    ) -> dict:
+        """
+        Creates or updates a resource group, returns the stored one
+        """
+        key = (subscription_id.lower(), name.lower())
+        resource_group = self.resource_groups.get(key) or {
+            "id": f"/subscriptions/{subscription_id}/resourceGroups/{name}",
+            "name": name,
+            "type": "Microsoft.Resources/resourceGroups",
+            "properties": {"provisioningState": "Succeeded"},
+        }
+        resource_group["location"] = body.get(
+            "location", resource_group.get("location")
+        )
+        resource_group["tags"] = (
+            body.get("tags") or resource_group.get("tags") or {}
+        )
+        self.resource_groups[key] = resource_group
+        return resource_group
+
+    # ******************************************************************************** #
+
+    def __resource_groups(self, method: str, match: re.Match, body: dict) -> tuple:
+        """
+        GET subscriptions/{sub}/resourcegroups, page_size groups per page
+        """
+        subscription_id = match["sub"].lower()
+        resource_groups = [
+            resource_group
+            for (sub, _), resource_group in self.resource_groups.items()
+            if sub == subscription_id
+        ]
+        if not self.page_size:
+            return 200, {}, {"value": resource_groups}
+
+        page = int(match["page"] or 0)
+        start = page * self.page_size
+        response = {"value": resource_groups[start : start + self.page_size]}
+        if start + self.page_size < len(resource_groups):
+            response["nextLink"] = (
+                f"{BASE_URL}/subscriptions/{match['sub']}"
+                f"/resourcegroups/$page/{page + 1}"
+            )
+        return 200, {}, response
+
+    # ******************************************************************************** #
+
+    def __resource_group(self, method: str, match: re.Match, body: dict) -> tuple:
+        """
+        HEAD, GET, PUT and DELETE subscriptions/{sub}/resourcegroups/{rg}
+        """
+        key = (match["sub"].lower(), match["rg"].lower())
+        resource_group = self.resource_groups.get(key)
+        if method == "PUT":
+            status = 200 if resource_group is not None else 201
+            return status, {}, self.__put_resource_group(
+                match["sub"], match["rg"], body or {}
+            )
+        if resource_group is None:
+            return self.__resource_group_not_found(match)
+        if method == "HEAD":
+            return 204, {}, None
+        if method == "DELETE":
+            del self.resource_groups[key]
+            for deployment_key in [k for k in self.deployments if k[:2] == key]:
+                del self.deployments[deployment_key]
+            return self.__accepted(match["sub"])
+        return 200, {}, resource_group
+
+    # ******************************************************************************** #
+
+    def __deployment_body(self, deployment: dict) -> dict:
+        """
+        Deployment with its provisioning state as of now
+        """
+        properties = deployment["properties"]
+        if properties["provisioningState"] == "Running" and (
+            time.monotonic() >= deployment["done_at"]
+        ):
+            properties["provisioningState"] = "Succeeded"
+            properties["timestamp"] = utc_now()
+            properties["duration"] = f"PT{self.lro_duration}S"
+            properties["outputs"], properties["outputResources"] = deployment_results(
+                deployment
+            )
+        return {key: value for key, value in deployment.items() if key != "done_at"}
+
+    # ******************************************************************************** #
+
+    def __deployments(self, method: str, match: re.Match, body: dict) -> tuple:
+        """
+        GET resourcegroups/{rg}/providers/Microsoft.Resources/deployments
+        """
+        key = (match["sub"].lower(), match["rg"].lower())
+        return 200, {}, {
+            "value": [
+                self.__deployment_body(deployment)
+                for deployment_key, deployment in self.deployments.items()
+                if deployment_key[:2] == key
+            ]
+        }
+
+    # ******************************************************************************** #
+
+    def __deployment(self, method: str, match: re.Match, body: dict) -> tuple:
+        """
+        HEAD, GET, PUT and DELETE .../deployments/{name}
+        """
+        group_key = (match["sub"].lower(), match["rg"].lower())
+        key = (*group_key, match["name"].lower())
+        deployment = self.deployments.get(key)
+        if method == "PUT":
+            if group_key not in self.resource_groups:
+                return self.__resource_group_not_found(match)
+            properties = dict(body["properties"])
+            properties.update(
+                provisioningState="Running",
+                timestamp=utc_now(),
+                correlationId=str(uuid.uuid4()),
+            )
+            deployment = self.deployments[key] = {
+                "id": deployment_id(match),
+                "name": match["name"],
+                "type": "Microsoft.Resources/deployments",
+                "location": self.resource_groups[group_key]["location"],
+                "properties": properties,
+                "done_at": time.monotonic() + self.lro_duration,
+            }
+            operation_id = uuid.uuid4().hex
+            headers = {
+                "Azure-AsyncOperation": (
+                    f"{BASE_URL}{match.group(0)}/operationStatuses/{operation_id}"
+                ),
+                "retry-after-ms": str(int(self.poll_interval * 1000)),
+            }
+            return 201, headers, self.__deployment_body(deployment)
+        if deployment is None:
+            return self.__error(
+                404,
+                "DeploymentNotFound",
+                f"Deployment '{match['name']}' could not be found.",
+            )
+        if method == "HEAD":
+            return 204, {}, None
+        if method == "DELETE":
+            del self.deployments[key]
+            return self.__accepted(match["sub"])
+        return 200, {}, self.__deployment_body(deployment)
+
+    # ******************************************************************************** #
+
+    def __deployment_status(self, method: str, match: re.Match, body: dict) -> tuple:
+        """
+        GET .../deployments/{name}/operationStatuses/{op}
+        """
+        deployment = self.deployments.get(
+            (match["sub"].lower(), match["rg"].lower(), match["name"].lower())
+        )
+        if deployment is None:
+            return self.__error(404, "DeploymentNotFound", match["name"])
+        status = self.__deployment_body(deployment)["properties"]["provisioningState"]
+        headers = {} if status == "Succeeded" else {
+            "retry-after-ms": str(int(self.poll_interval * 1000))
+        }
+        return 200, headers, {"status": status}
+
+    # ******************************************************************************** #
+
+    def __what_if(self, method: str, match: re.Match, body: dict) -> tuple:
+        """
+        POST .../deployments/{name}/whatIf - every resource of the template is
+        a Create, or NoChange if the last deployment had the same properties.
+        In Complete mode the resources of earlier deployments that are not in
+        the template are a Delete
+        """
+        group_key = (match["sub"].lower(), match["rg"].lower())
+        properties = body["properties"]
+        unchanged = any(
+            all(
+                deployment["properties"].get(name) == properties.get(name)
+                for name in ("template", "parameters")
+            )
+            for key, deployment in self.deployments.items()
+            if key[:2] == group_key
+        )
+        _, resource_ids = deployment_results(
+            {"id": deployment_id(match), "properties": properties}
+        )
+        changes = [
+            {
+                "resourceId": resource["id"],
+                "changeType": "NoChange" if unchanged else "Create",
+            }
+            for resource in resource_ids
+        ]
+        if properties.get("mode") == "Complete":
+            deployed = {resource["id"] for resource in resource_ids}
+            for key, deployment in self.deployments.items():
+                if key[:2] != group_key:
+                    continue
+                _, existing = deployment_results(deployment)
+                changes.extend(
+                    {"resourceId": resource["id"], "changeType": "Delete"}
+                    for resource in existing
+                    if resource["id"] not in deployed
+                )
+                deployed.update(resource["id"] for resource in existing)
+        result = {"status": "Succeeded", "properties": {"changes": changes}}
+        return self.__accepted(match["sub"], result)
+
+
+# ******************************************************************************** #
+
+
+def deployment_results(deployment: dict) -> tuple:
+    """Evaluates what a finished deployment reports back - the template
+    outputs and the ids of its top-level resources
+    Parameters
+    ----------
+    deployment: dict - deployment with its id and properties
+
+    Returns
+    -------
+    tuple of the outputs dict and the outputResources list
+    """
+    properties = deployment["properties"]
+    template = properties.get("template") or {}
+    _, _, sub, _, resource_group, *_ = deployment["id"].split("/")
+    evaluator = ExpressionEvaluator(
+        template,
+        {
+            name: value.get("value")
+            for name, value in (properties.get("parameters") or {}).items()
+        },
+        ValidationContext(
+            sub, resource_group, deployment_name=deployment["id"].rsplit("/", 1)[-1]
+        ),
+    )
+
+    outputs = {}
+    for name, output in (template.get("outputs") or {}).items():
+        value = evaluator.evaluate_value(output.get("value"))
+        outputs[name] = {
+            "type": output.get("type"),
+            "value": None if value is UNKNOWN else value,
+        }
+
+    resources = []
+    for resource in template.get("resources") or []:
+        name = evaluator.evaluate(resource.get("name"))
+        if not isinstance(name, str) or "/" not in resource.get("type", "/"):
+            continue
+        namespace, *types = resource["type"].split("/")
+        path = "/".join(f"{t}/{n}" for t, n in zip(types, name.split("/")))
+        resources.append(
+            {
+                "id": f"/subscriptions/{sub}/resourceGroups/{resource_group}"
+                f"/providers/{namespace}/{path}"
+            }
+        )
+    return outputs, resources
+
+
+# ******************************************************************************** #
+
+
+class FakeResponse(HttpResponse):
+    """
+    Buffered response of the fake
+    """
+
+    def __init__(
+        self, request: object, status_code: int, headers: dict, body: dict
+    ) -> None:
+        super().__init__(request, None)
+        self.status_code = status_code
+        self.headers = CaseInsensitiveDict(headers)
+        self.content_type = "application/json"
+        self.__body = json.dumps(body).encode() if body is not None else b""
+        if body is not None:
+            self.headers["Content-Type"] = "application/json"
+
+    def body(self) -> bytes:
+        return self.__body
+
+    def read(self) -> bytes:
+        return self.__body
+
+    def stream_download(self, pipeline: object, **kwargs) -> object:
+        return iter([self.__body])
+
+
+# ******************************************************************************** #
+
+
+class FakeArmTransport(HttpTransport):
+    """
+    azure-core transport answering every request from a FakeArm
+    """
+
+    def __init__(self, arm: FakeArm) -> None:
+        self.arm = arm
+
+    def send(self, request: object, **kwargs) -> FakeResponse:
+        if self.arm.latency:
+            time.sleep(self.arm.latency)
+        status, headers, response = self.arm.handle(
+            request.method, request.url, request_body(request)
+        )
+        return FakeResponse(request, status, headers, response)
+
+    def open(self) -> None:
+        pass
+
+    def close(self) -> None:
+        pass
+
+    def __exit__(self, *args) -> None:
+        pass
+
+    def sleep(self, duration: float) -> None:
+        time.sleep(duration)
+
+
+# ******************************************************************************** #
+
+
+class FakeAsyncResponse(FakeResponse, AsyncHttpResponse):
+    """
+    Buffered response of the fake for the async pipeline
+    """
+
+    async def load_body(self) -> None:
+        pass
+
+    async def read(self) -> bytes:
+        return self.body()
+
+    def stream_download(self, pipeline: object, **kwargs) -> AsyncIterator[bytes]:
+        async def stream() -> AsyncIterator[bytes]:
+            yield self.body()
+
+        return stream()
+
+
+# ******************************************************************************** #
+
+
+class FakeArmAsyncTransport(AsyncHttpTransport):
+    """
+    azure-core async transport answering every request from a FakeArm,
+    the latency is awaited so concurrent requests overlap
+    """
+
+    def __init__(self, arm: FakeArm) -> None:
+        self.arm = arm
+
+    async def send(self, request: object, **kwargs) -> FakeAsyncResponse:
+        if self.arm.latency:
+            await asyncio.sleep(self.arm.latency)
+        status, headers, response = self.arm.handle(
+            request.method, request.url, request_body(request)
+        )
+        return FakeAsyncResponse(request, status, headers, response)
+
+    async def open(self) -> None:
+        pass
+
+    async def close(self) -> None:
+        pass
+
+    async def __aexit__(self, *args) -> None:
+        pass
+
+    async def sleep(self, duration: float) -> None:
+        await asyncio.sleep(duration)
+
+
+# ******************************************************************************** #
+
+
+def request_body(request: object) -> bytes:
+    """
+    Body of an azure-core request, read from a stream if it is one
+    """
+    body = request.body
+    if hasattr(body, "read"):
+        body = body.read()
+    return body
+
+
+# ******************************************************************************** #
+
+
+class FakeCredential:
+    """
+    Token credential that never expires and never calls Entra ID
+    """
+
+    def get_token(self, *scopes, **kwargs) -> AccessToken:
+        return AccessToken("fake-token", int(time.time()) + 3600)
+
+    def close(self) -> None:
+        pass
+
+
+# ******************************************************************************** #
@@ -0,0 +1,88 @@
+import asyncio
+import json
+
+import pytest
+
+pytest.importorskip("aiohttp")
+pytest.importorskip("azure.mgmt.resource.resources.aio")
+
+from pyazuretoolkit import aio
+
+__SUB = "00000000-0000-0000-0000-000000000000"
+
+# ******************************************************************************** #
+
+
+def test_star_import_lists_the_submodules():
+    namespace = {}
+    exec("from pyazuretoolkit.aio import *", namespace)  # noqa: S102
+    assert {"az_deploy", "az_login", "az_resourcegroup"} <= set(namespace)
+
+
+# ******************************************************************************** #
+
+
+def test_login_check_validates_the_async_token(tmp_path, monkeypatch):
+    (tmp_path / "azureProfile.json").write_text(
+        json.dumps({"subscriptions": [{"id": __SUB, "name": "test"}]})
+    )
+    monkeypatch.setenv("AZURE_CONFIG_DIR", str(tmp_path))
+
+    class AsyncCredential:
+        def __init__(self):
+            self.scopes = []
+
+        async def get_token(self, *scopes, **kwargs):
+            self.scopes.append(scopes)
+            return "token"
+
+        async def close(self):
+            pass
+
+    credential = AsyncCredential()
+
+    async def login():
+        client = await aio.az_login.do_login(__SUB, credential)
+        await client.close()
+        return client
+
+    assert asyncio.run(login()) is not None
+    assert credential.scopes == [("https://management.azure.com/.default",)]
+
+
+# ******************************************************************************** #
+
+
+def test_deploys_concurrently_through_the_async_client(tmp_path):
+    from azure.core.pipeline.policies import SansIOHTTPPolicy
+
+    from tests.fake_arm import FakeArm, FakeArmAsyncTransport
+
+    class AsyncCredential:
+        async def close(self):
+            pass
+
+    template = tmp_path / "template.json"
+    template.write_text(json.dumps({"contentVersion": "1.0.0.0", "resources": []}))
+    arm = FakeArm(lro_duration=0.05)
+
+    async def deploy_one(session, name):
+        async with aio.az_deploy.DeploymentHelper(
+            __SUB, name, "australiaeast", session=session
+        ) as deploy:
+            return await deploy.deploy_resource_template(str(template), None)
+
+    async def deploy_all():
+        async with aio.az_login.AzureSession(
+            AsyncCredential(),
+            check_login=False,
+            transport=FakeArmAsyncTransport(arm),
+            authentication_policy=SansIOHTTPPolicy(),
+        ) as session:
+            return await asyncio.gather(
+                *(deploy_one(session, f"rg-{i}") for i in range(3))
+            )
+
+    asyncio.run(deploy_all())
+    assert {name for _, name in arm.resource_groups} == {"rg-0", "rg-1", "rg-2"}
+    assert len(arm.deployments) == 3
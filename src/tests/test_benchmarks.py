@@ -0,0 +1,204 @@
+"""
+Regression benchmarks of the toolkit's hot paths against the in-process
+fake ARM - left out of the default run, run them with
+`pytest -m benchmark src/tests/test_benchmarks.py --benchmark-only` and
+compare runs with --benchmark-autosave / --benchmark-compare
+"""
+import json
+import uuid
+from types import SimpleNamespace
+
+import pytest
+
+pytest.importorskip("pytest_benchmark")
+pytest.importorskip("azure.mgmt.resource")
+
+from pyazuretoolkit import (
+    az_deploy,
+    az_login,
+    az_parallel,
+    az_resourcegroup,
+    az_throttle,
+)
+from pyazuretoolkit.az_manifest import DeploymentTarget
+from pyazuretoolkit.az_polling import WaitStrategy
+from pyazuretoolkit.az_template_store import get_template_store
+
+from tests.fake_arm import DEFAULT_REMAINING, FakeArm, FakeArmTransport, FakeCredential
+
+pytestmark = pytest.mark.benchmark
+
+# ******************************************************************************** #
+
+
+@pytest.fixture
+def subscription_id():
+    """
+    Fresh subscription per benchmark, the client side token buckets would
+    otherwise pace the benchmark loops instead of measuring them
+    """
+    subscription_id = str(uuid.uuid4())
+    az_throttle.get_throttle(
+        subscription_id,
+        limits={kind: (1e9, 1e9) for kind in az_throttle.DEFAULT_LIMITS},
+    )
+    return subscription_id
+
+
+@pytest.fixture
+def template_files(tmp_path):
+    """
+    A template with a few hundred resources and its parameters file
+    """
+    resources = [
+        {
+            "type": "Microsoft.Network/virtualNetworks",
+            "name": f"[concat(parameters('prefix'), '-vnet-{index}')]",
+            "location": "[resourceGroup().location]",
+            "properties": {"addressSpace": {"addressPrefixes": [f"10.{index}.0.0/16"]}},
+        }
+        for index in range(250)
+    ]
+    template = tmp_path / "main.json"
+    template.write_text(
+        json.dumps(
+            {
+                "parameters": {"prefix": {"type": "string"}},
+                "resources": resources,
+                "outputs": {
+                    "first": {
+                        "type": "string",
+                        "value": "[concat(parameters('prefix'), '-vnet-0')]",
+                    }
+                },
+            }
+        )
+    )
+    params = tmp_path / "main.parameters.json"
+    params.write_text(json.dumps({"parameters": {"prefix": {"value": "bench"}}}))
+    return str(template), str(params)
+
+
+# ******************************************************************************** #
+
+
+def test_bench_login(benchmark, subscription_id, tmp_path, monkeypatch):
+    # the CLI profile lists the subscription - no az process is started
+    (tmp_path / "azureProfile.json").write_text(
+        json.dumps({"subscriptions": [{"id": subscription_id, "name": "bench"}]})
+    )
+    monkeypatch.setenv("AZURE_CONFIG_DIR", str(tmp_path))
+    transport = FakeArmTransport(FakeArm())
+
+    client = benchmark(
+        az_login.do_login, subscription_id, FakeCredential(), transport=transport
+    )
+    assert client is not None
+
+
+# ******************************************************************************** #
+
+
+def test_bench_resource_group_check(benchmark, subscription_id):
+    arm = FakeArm(remaining=DEFAULT_REMAINING)
+    arm.add_resource_group(subscription_id, "rg", "eastus")
+    client = arm.client(subscription_id)
+
+    assert benchmark(az_resourcegroup.get_resource_group, client, "rg", use_cache=False)
+
+
+# ******************************************************************************** #
+
+
+def test_bench_resource_group_check_cached(benchmark, subscription_id):
+    arm = FakeArm()
+    arm.add_resource_group(subscription_id, "rg", "eastus")
+    client = arm.client(subscription_id)
+
+    assert benchmark(az_resourcegroup.get_resource_group, client, "rg")
+    assert arm.requests == 1
+
+
+# ******************************************************************************** #
+
+
+def test_bench_resource_group_bulk_check(benchmark, subscription_id):
+    arm = FakeArm()
+    for index in range(200):
+        arm.add_resource_group(subscription_id, f"rg-{index}", "eastus")
+    client = arm.client(subscription_id)
+    names = [f"rg-{index}" for index in range(0, 400, 2)]
+
+    exists = benchmark(az_resourcegroup.get_resource_groups, client, names)
+    assert sum(exists.values()) == 100
+
+
+# ******************************************************************************** #
+
+
+def test_bench_template_load(benchmark, template_files):
+    store = get_template_store()
+
+    def load_cold():
+        store.invalidate()
+        return az_deploy.load_deployment_params(*template_files)
+
+    params = benchmark(load_cold)
+    assert len(params["template"]["resources"]) == 250
+
+
+# ******************************************************************************** #
+
+
+def test_bench_template_load_cached(benchmark, template_files):
+    params = benchmark(az_deploy.load_deployment_params, *template_files)
+    assert params["parameters"] == {"prefix": {"value": "bench"}}
+
+
+# ******************************************************************************** #
+
+
+def test_bench_single_deployment(benchmark, subscription_id, template_files):
+    arm = FakeArm(latency=0.001, lro_duration=0.02, poll_interval=0.005)
+    helper = az_deploy.DeploymentHelper(
+        subscription_id, "rg", "eastus",
+        credentials=FakeCredential(),
+        resource_client=arm.client(subscription_id),
+        wait_strategy=WaitStrategy(initial_delay=0.005),
+    )
+
+    result = benchmark.pedantic(
+        helper.deploy_resource_template, args=template_files, rounds=5, warmup_rounds=1
+    )
+    assert result.outputs["first"] == "bench-vnet-0"
+
+
+# ******************************************************************************** #
+
+
+def test_bench_parallel_deployments(benchmark, subscription_id, template_files):
+    arm = FakeArm(latency=0.001, lro_duration=0.05, poll_interval=0.01)
+    client = arm.client(subscription_id)
+    registry = SimpleNamespace(
+        get_credential=FakeCredential, get_client=lambda subscription_id: client
+    )
+    targets = [
+        DeploymentTarget(subscription_id, f"rg-{index}", "eastus", *template_files)
+        for index in range(8)
+    ]
+
+    results = benchmark.pedantic(
+        az_parallel.deploy_targets,
+        args=(targets,),
+        kwargs={
+            "max_workers": 4,
+            "registry": registry,
+            "wait_strategy": WaitStrategy(initial_delay=0.01),
+        },
+        rounds=3,
+    )
+    assert all(result.succeeded for result in results)
+    assert len(arm.resource_groups) == 8
+
+
+# ******************************************************************************** #
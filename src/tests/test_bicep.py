@@ -0,0 +1,120 @@
+
+
+import json
+import subprocess
+
+from pyazuretoolkit import az_bicep
+
+# ******************************************************************************** #
+
+
+class FakeCompiler:
+    version = "Bicep CLI version 0.0.0"
+
+    def __init__(self):
+        self.builds = 0
+
+    def build(self, bicep_file):
+        self.builds += 1
+        return json.dumps({"resources": [], "build": self.builds})
+
+
+# ******************************************************************************** #
+
+
+def write_templates(tmp_path):
+    (tmp_path / "modules").mkdir()
+    (tmp_path / "modules" / "storage.bicep").write_text("param name string\n")
+    main = tmp_path / "main.bicep"
+    main.write_text(
+        "module stg './modules/storage.bicep' = {\n"
+        "  name: 'stg'\n"
+        "}\n"
+        "module reg 'br/public:avm/res/storage:0.1.0' = {}\n"
+    )
+    return main
+
+
+# ******************************************************************************** #
+
+
+def test_find_module_files(tmp_path):
+    main = write_templates(tmp_path)
+    files = az_bicep.find_module_files(str(main))
+    assert files == [str(main), str(tmp_path / "modules" / "storage.bicep")]
+
+
+# ******************************************************************************** #
+
+
+def test_compile_cache_hits_and_invalidates(tmp_path):
+    main = write_templates(tmp_path)
+    compiler = FakeCompiler()
+    cache = az_bicep.BicepCompileCache(str(tmp_path / "cache"), compiler=compiler)
+
+    assert cache.compile(str(main)) == cache.compile(str(main))
+    assert compiler.builds == 1
+
+    # a change in an imported module is a new cache key
+    (tmp_path / "modules" / "storage.bicep").write_text("param name string = 'x'\n")
+    cache.compile(str(main))
+    assert compiler.builds == 2
+    stats = cache.stats
+    assert (stats["hits"], stats["misses"], stats["entries"]) == (1, 2, 2)
+
+
+# ******************************************************************************** #
+
+
+def test_compile_cache_keys_loaded_files(tmp_path):
+    main = write_templates(tmp_path)
+    (tmp_path / "modules" / "init.sh").write_text("echo one\n")
+    (tmp_path / "modules" / "storage.bicep").write_text(
+        "var script = loadTextContent('init.sh')\n"
+        "var cert = loadFileAsBase64( '../missing.pfx')\n"
+    )
+    files = az_bicep.find_module_files(str(main))
+    assert files[-1] == str(tmp_path / "modules" / "init.sh")
+    compiler = FakeCompiler()
+    cache = az_bicep.BicepCompileCache(str(tmp_path / "cache"), compiler=compiler)
+
+    cache.compile(str(main))
+    cache.compile(str(main))
+    (tmp_path / "modules" / "init.sh").write_text("echo two\n")
+    cache.compile(str(main))
+    assert compiler.builds == 2
+
+
+# ******************************************************************************** #
+
+
+def test_compile_cache_evicts_lru(tmp_path):
+    main = write_templates(tmp_path)
+    cache = az_bicep.BicepCompileCache(
+        str(tmp_path / "cache"), max_bytes=1, compiler=FakeCompiler()
+    )
+    cache.compile(str(main))
+    main.write_text("param other string\n")
+    cache.compile(str(main))
+    assert cache.stats["evictions"] == 2
+    assert cache.stats["entries"] == 0
+
+
+# ******************************************************************************** #
+
+
+def test_load_error_messages():
+    assert az_bicep.load_error_message(
+        FileNotFoundError(2, "No such file", "main.json")
+    ) == "##ERROR - main.json not found>!"
+    # the missing compiler error has no file name
+    missing = FileNotFoundError("##ERROR - Bicep compiler not found")
+    assert az_bicep.load_error_message(missing) == "##ERROR - Bicep compiler not found"
+    failed = subprocess.CalledProcessError(
+        1, ["bicep", "build"], stderr="main.bicep(3,1) : Error BCP007\n"
+    )
+    message = az_bicep.load_error_message(failed)
+    assert message.endswith("main.bicep(3,1) : Error BCP007")
+
+
+# ******************************************************************************** #
@@ -0,0 +1,74 @@
+
+
+import time
+from collections import namedtuple
+
+import pytest
+
+pytest.importorskip("azure.mgmt.resource")
+
+# pylint: disable=wrong-import-position
+from pyazuretoolkit import az_client_cache
+
+Token = namedtuple("Token", ["token", "expires_on"])
+
+# ******************************************************************************** #
+
+
+class FakeCredential:
+    def __init__(self, lifetime=3600):
+        self.calls = 0
+        self.lifetime = lifetime
+
+    def get_token(self, *scopes, **kwargs):
+        self.calls += 1
+        return Token(f"token-{self.calls}", int(time.time()) + self.lifetime)
+
+
+class FakeClient:
+    def __init__(self, subscription_id):
+        self.subscription_id = subscription_id
+        self.closed = False
+
+    def close(self):
+        self.closed = True
+
+
+# ******************************************************************************** #
+
+
+def test_token_cached_until_expiry():
+    credential = FakeCredential()
+    cached = az_client_cache.CachedTokenCredential(credential)
+    scope = "https://management.azure.com/.default"
+    assert cached.get_token(scope) is cached.get_token(scope)
+    assert (credential.calls, cached.hits, cached.misses) == (1, 1, 1)
+
+    expiring = az_client_cache.CachedTokenCredential(FakeCredential(lifetime=60))
+    expiring.get_token(scope)
+    expiring.get_token(scope)
+    assert expiring.misses == 2
+
+
+# ******************************************************************************** #
+
+
+def test_registry_reuses_and_evicts_clients():
+    registry = az_client_cache.ClientRegistry(
+        credential_factories={"cli": FakeCredential},
+        client_factory=lambda sub_id, credential, **kwargs: FakeClient(sub_id),
+    )
+    client = registry.get_client("SUB-1")
+    assert registry.get_client("sub-1") is client
+    assert registry.get_client("sub-2") is not client
+    assert registry.stats["client_hits"] == 1
+    assert registry.stats["client_misses"] == 2
+
+    registry.evict("sub-1")
+    assert client.closed
+    assert registry.get_client("sub-1") is not client
+    registry.close()
+    assert registry.stats["clients"] == 0
+
+
+# ******************************************************************************** #
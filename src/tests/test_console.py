@@ -1,10 +1,20 @@
-
+import io
+import logging
+import threading
 
 from pyazuretoolkit import console_helper as ch
 
 # ******************************************************************************** #
 
 
+class TtyStream(io.StringIO):
+    def isatty(self):
+        return True
+
+
+# ******************************************************************************** #
+
+
 def test_main():
     ch.print_ok_message("ok")
     ch.print_warning_message("warning")
@@ -14,4 +24,76 @@ def test_main():
     ch.print_bold_message("bold")
 
 
-# ******************************************************************************** #
\ No newline at end of file
+# ******************************************************************************** #
+
+
+def test_colours_only_on_terminals():
+    plain, tty = io.StringIO(), TtyStream()
+    ch.ConsoleWriter(ch.StreamSink(plain)).write("error", "failed")
+    ch.ConsoleWriter(ch.StreamSink(tty, colour=True)).write("error", "failed")
+    assert plain.getvalue() == "failed\n"
+    assert tty.getvalue() == "\033[91mfailed\033[0m\n"
+
+
+# ******************************************************************************** #
+
+
+def test_background_writer_keeps_lines_whole_and_prefixed():
+    stream = io.StringIO()
+    ch.configure(ch.StreamSink(stream), background=True)
+    try:
+
+        def worker(label):
+            with ch.target_prefix(label):
+                for index in range(50):
+                    ch.print_command_message(f"line {index}")
+
+        threads = [threading.Thread(target=worker, args=(f"t{i}",)) for i in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        ch.flush()
+    finally:
+        ch.configure()
+
+    lines = stream.getvalue().splitlines()
+    assert len(lines) == 200
+    for label in ("t0", "t1", "t2", "t3"):
+        mine = [line for line in lines if line.startswith(f"[{label}] ")]
+        assert mine == [f"[{label}] line {index}" for index in range(50)]
+
+
+# ******************************************************************************** #
+
+
+def test_progress_is_rate_limited_and_updates_in_place():
+    stream = TtyStream()
+    writer = ch.ConsoleWriter(ch.StreamSink(stream, colour=False), progress_interval=60)
+    for _ in range(10):
+        writer.progress("rg1", "Deployment status - Running")
+    writer.progress("rg1", "Deployment status - Succeeded")
+    writer.progress("rg1", None)
+
+    output = stream.getvalue()
+    assert output.count("Running") == 1
+    assert "\n" not in output
+    assert output.endswith("\r\033[K")
+
+
+# ******************************************************************************** #
+
+
+def test_logging_sink(caplog):
+    caplog.set_level(logging.INFO, logger="pyazuretoolkit.console")
+    ch.configure(ch.LoggingSink())
+    try:
+        with ch.target_prefix("sub/rg"):
+            ch.print_error_message("failed")
+    finally:
+        ch.configure()
+    assert caplog.records[-1].levelno == logging.ERROR
+    assert caplog.records[-1].getMessage() == "[sub/rg] failed"
+
+
+# ******************************************************************************** #
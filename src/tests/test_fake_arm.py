@@ -0,0 +1,137 @@
+import json
+import time
+import uuid
+from types import SimpleNamespace
+
+import pytest
+
+pytest.importorskip("azure.mgmt.resource")
+
+from pyazuretoolkit import az_parallel, az_pipeline, az_resourcegroup, az_throttle
+from pyazuretoolkit.az_deploy import DeploymentHelper
+from pyazuretoolkit.az_manifest import DeploymentTarget
+from pyazuretoolkit.az_polling import WaitStrategy
+
+from tests.fake_arm import FakeArm
+
+__TEMPLATE = {
+    "parameters": {"prefix": {"type": "string", "defaultValue": "app"}},
+    "resources": [
+        {
+            "type": "Microsoft.Storage/storageAccounts",
+            "name": "[concat(parameters('prefix'), 'store')]",
+        }
+    ],
+    "outputs": {
+        "name": {"type": "string", "value": "[concat(parameters('prefix'), 'store')]"}
+    },
+}
+
+# ******************************************************************************** #
+
+
+def test_resource_groups_through_the_sdk():
+    arm = FakeArm()
+    client = arm.client(str(uuid.uuid4()))
+
+    assert az_resourcegroup.get_resource_group(client, "rg-a", use_cache=False) is False
+    az_resourcegroup.create_resource_group(client, "rg-a", "eastus")
+    assert az_resourcegroup.get_resource_group(client, "RG-A", use_cache=False) is True
+    assert az_resourcegroup.get_resource_groups(client, ["rg-a", "rg-b"]) == {
+        "rg-a": True,
+        "rg-b": False,
+    }
+
+    az_resourcegroup.delete_resource_group(client, "rg-a").result()
+    assert az_resourcegroup.get_resource_group(client, "rg-a", use_cache=False) is False
+    assert arm.calls["DELETE resource_group"] == 1
+
+
+# ******************************************************************************** #
+
+
+def test_deployment_end_to_end(tmp_path):
+    template = tmp_path / "main.json"
+    template.write_text(json.dumps(__TEMPLATE))
+    subscription_id = str(uuid.uuid4())
+    arm = FakeArm(lro_duration=0.05)
+    helper = DeploymentHelper(
+        subscription_id, "rg", "eastus",
+        credentials=object(),
+        resource_client=arm.client(subscription_id),
+        wait_strategy=WaitStrategy(initial_delay=0.01),
+    )
+
+    result = helper.deploy_resource_template(str(template), None, what_if=True)
+
+    assert result.succeeded
+    assert result.outputs == {"name": "appstore"}
+    assert result.resource_ids == [
+        f"/subscriptions/{subscription_id}/resourceGroups/rg"
+        "/providers/Microsoft.Storage/storageAccounts/appstore"
+    ]
+    # the deployment polled its async operation until the LRO finished
+    assert arm.calls["GET deployment_status"] >= 1
+    # an identical redeploy has no what-if changes
+    skipped = helper.deploy_resource_template(str(template), None, what_if=True)
+    assert skipped.skipped_reason == "no_changes" and not skipped.failed
+    assert helper.get_deployment_outputs() == {"name": "appstore"}
+
+    # destroying the group waits for the delete to finish
+    helper.destroy_resource_group()
+    assert all(done_at <= time.monotonic() for done_at, _ in arm.operations.values())
+
+
+# ******************************************************************************** #
+
+
+def test_throttled_requests_are_retried():
+    metrics = az_throttle.ThrottleMetrics()
+    arm = FakeArm(throttle_every=3)
+    client = arm.client(
+        str(uuid.uuid4()),
+        retry_policy=az_pipeline.JitteredRetryPolicy(
+            metrics, retry_backoff_factor=0.01
+        ),
+    )
+
+    for name in ("a", "b", "c", "d"):
+        client.resource_groups.create_or_update(name, {"location": "eastus"})
+    names = [group.name for group in client.resource_groups.list()]
+    assert names == ["a", "b", "c", "d"]
+
+    assert arm.throttled >= 1
+    assert metrics.snapshot()["retries"] == arm.throttled
+    assert arm.requests == 5 + arm.throttled
+
+
+# ******************************************************************************** #
+
+
+# ******************************************************************************** #
+
+
+def test_parallel_deployments_count_skips_and_failures(tmp_path):
+    template = tmp_path / "main.json"
+    template.write_text(json.dumps(__TEMPLATE))
+    subscription_id = str(uuid.uuid4())
+    client = FakeArm().client(subscription_id)
+    registry = SimpleNamespace(
+        get_credential=object, get_client=lambda subscription_id: client
+    )
+    missing = DeploymentTarget(
+        subscription_id, "rg-a", "eastus", str(tmp_path / "missing.json"), None
+    )
+    deployed = DeploymentTarget(
+        subscription_id, "rg-a", "eastus", str(template), None
+    )
+
+    results = az_parallel.deploy_targets(
+        [missing, deployed], registry=registry, what_if=True
+    )
+    assert [result.succeeded for result in results] == [False, True]
+    assert "missing.json" in results[0].error
+    assert not results[1].skipped
+
+    (result,) = az_parallel.deploy_targets([deployed], registry=registry, what_if=True)
+    assert result.succeeded and result.skipped
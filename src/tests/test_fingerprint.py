@@ -0,0 +1,44 @@
+
+
+from pyazuretoolkit import az_fingerprint
+
+# ******************************************************************************** #
+
+
+def test_fingerprint_is_normalised():
+    params = {
+        "mode": "Incremental",
+        "template": {"resources": [], "contentVersion": "1.0.0.0"},
+        "parameters": {"name": {"value": "a"}},
+    }
+    reordered = {
+        "parameters": {"name": {"value": "a"}},
+        "template": {
+            "contentVersion": "1.0.0.0",
+            "resources": [],
+            "metadata": {"_generator": {"version": "0.20.4"}},
+        },
+        "mode": "Incremental",
+    }
+    fingerprint = az_fingerprint.deployment_fingerprint("SUB", "RG", params)
+    assert fingerprint == az_fingerprint.deployment_fingerprint("sub", "rg", reordered)
+    assert fingerprint != az_fingerprint.deployment_fingerprint("sub", "rg-2", params)
+
+    params["parameters"]["name"]["value"] = "b"
+    assert fingerprint != az_fingerprint.deployment_fingerprint("sub", "rg", params)
+
+
+# ******************************************************************************** #
+
+
+def test_fingerprint_store(tmp_path):
+    store = az_fingerprint.FingerprintStore(str(tmp_path / "fingerprints.db"))
+    assert store.get("sub", "rg", "pydeploy") is None
+    store.record("sub", "RG", "pydeploy", "abc", "pydeploy2023-06-01")
+    assert store.get("SUB", "rg", "pydeploy") == "abc"
+    store.forget("sub", "rg")
+    assert store.get("sub", "rg", "pydeploy") is None
+    store.close()
+
+
+# ******************************************************************************** #
@@ -0,0 +1,112 @@
+import re
+from datetime import datetime, timedelta, timezone
+from types import SimpleNamespace
+
+import pytest
+from pyazuretoolkit import az_history
+
+__NOW = datetime(2024, 1, 31, 12, 0, 0, tzinfo=timezone.utc)
+
+# ******************************************************************************** #
+
+
+def make_deployment(name, age_days, state="Succeeded"):
+    return SimpleNamespace(
+        name=name,
+        properties=SimpleNamespace(
+            timestamp=__NOW - timedelta(days=age_days), provisioning_state=state
+        ),
+    )
+
+
+class FakePager:
+    def __init__(self, items, page_size=3):
+        self.items = items
+        self.page_size = page_size
+
+    def by_page(self):
+        for i in range(0, len(self.items), self.page_size):
+            yield iter(self.items[i : i + self.page_size])
+
+
+class FakeDeployments:
+    def __init__(self, items):
+        self.items = items
+        self.deleted = []
+
+    def list_by_resource_group(self, resource_group_name):
+        return FakePager(self.items)
+
+    def begin_delete(self, resource_group_name, name):
+        self.deleted.append(name)
+        return SimpleNamespace(result=lambda timeout=None: None, done=lambda: True)
+
+
+# ******************************************************************************** #
+
+
+def test_deployment_names_are_unique_and_valid():
+    names = {
+        az_history.make_deployment_name("app deploy/v1", __NOW) for _ in range(100)
+    }
+    assert len(names) == 100
+    for name in names:
+        assert name.startswith("app-deploy-v1-20240131-120000000-")
+        assert re.fullmatch(r"[\w\-.()]{1,64}", name)
+        assert az_history.deployment_name_pattern("app deploy/v1").fullmatch(name)
+    name = az_history.make_deployment_name("x" * 100)
+    assert len(name) == 64
+    assert az_history.deployment_name_pattern("x" * 100).fullmatch(name)
+
+
+# ******************************************************************************** #
+
+
+def test_retention_policy():
+    deployments = [make_deployment(f"ok{i}", i) for i in range(10)]
+    deployments += [make_deployment(f"failed{i}", i, "Failed") for i in range(4)]
+    deployments.append(make_deployment("running", 30, "Running"))
+
+    policy = az_history.RetentionPolicy(keep_last=3, keep_failed=1, max_age_days=5.5)
+    pruned = [d.name for d in policy.select_for_pruning(deployments, now=__NOW)]
+    # oldest first, young deployments and running ones survive
+    assert pruned == ["ok9", "ok8", "ok7", "ok6"]
+
+    policy = az_history.RetentionPolicy(keep_last=3, keep_failed=1)
+    pruned = {d.name for d in policy.select_for_pruning(deployments, now=__NOW)}
+    failed = {"failed1", "failed2", "failed3"}
+    assert pruned == {f"ok{i}" for i in range(3, 10)} | failed
+
+    with pytest.raises(ValueError):
+        az_history.RetentionPolicy(keep_last=800)
+
+
+# ******************************************************************************** #
+
+
+def test_history_manager_pages_and_prunes_by_prefix():
+    def named(prefix, count):
+        return [
+            make_deployment(
+                az_history.make_deployment_name(prefix, __NOW - timedelta(days=i)), i
+            )
+            for i in range(count)
+        ]
+
+    app, app_db, spaced = named("app", 8), named("app-db", 8), named("my app", 6)
+    client = SimpleNamespace(deployments=FakeDeployments(app + app_db + spaced))
+    manager = az_history.DeploymentHistoryManager(
+        client, "rg", az_history.RetentionPolicy(keep_last=5), max_workers=4
+    )
+    oldest = [d.name for d in app[:4:-1]]
+
+    assert len(manager.list()) == 22
+    # only names generated for the prefix - not app-db, a trailing '-' is ignored
+    assert len(manager.list("app")) == 8
+    assert manager.prune("app-", dry_run=True).succeeded == oldest
+    assert [d.name for d in manager.list("my app")] == [d.name for d in spaced]
+    assert client.deployments.deleted == []
+
+    result = manager.prune("app")
+    assert result.ok
+    assert sorted(client.deployments.deleted) == sorted(oldest)
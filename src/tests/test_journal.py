@@ -0,0 +1,137 @@
+import json
+from types import SimpleNamespace
+
+import pytest
+from pyazuretoolkit import az_journal
+
+__SUB = "00000000-0000-0000-0000-000000000000"
+
+# ******************************************************************************** #
+
+
+def test_journal_tracks_in_flight_deployments(tmp_path):
+    journal = az_journal.DeploymentJournal(str(tmp_path / "journal.db"))
+    journal.record_submitted(
+        __SUB, "RG-App", "pydeploy", "pydeploy-1", "abc", "token-1"
+    )
+
+    entry = journal.find_in_flight(__SUB, "rg-app", "pydeploy")
+    assert entry.deployment_name == "pydeploy-1"
+    assert entry.continuation_token == "token-1"  # noqa: S105 - not a secret
+    assert [e.deployment_name for e in journal.in_flight()] == ["pydeploy-1"]
+
+    journal.mark(__SUB, "rg-app", "pydeploy", az_journal.SUCCEEDED)
+    assert journal.find_in_flight(__SUB, "rg-app", "pydeploy") is None
+    assert journal.get(__SUB, "rg-app", "pydeploy").status == az_journal.SUCCEEDED
+    journal.close()
+
+
+# ******************************************************************************** #
+
+
+class FakePoller:
+    def __init__(self, token):
+        self.token = token
+
+    def continuation_token(self):
+        return self.token
+
+    def polling_method(self):
+        return SimpleNamespace(_pipeline_response=None)
+
+    def done(self):
+        return True
+
+    def status(self):
+        return "Succeeded"
+
+    def wait(self, timeout=None):
+        pass
+
+    def result(self, timeout=None):
+        return SimpleNamespace(properties=SimpleNamespace(outputs={}))
+
+
+class FakeDeployments:
+    def __init__(self):
+        self.submitted = []
+        self.reattached = []
+
+    def begin_create_or_update(
+        self, rg, name, parameters, continuation_token=None, **kwargs
+    ):
+        if continuation_token is not None:
+            self.reattached.append((name, continuation_token))
+        else:
+            self.submitted.append(name)
+        return FakePoller(f"token-{name}")
+
+
+def test_interrupted_deployment_is_reattached(tmp_path):
+    pytest.importorskip("azure.mgmt.resource")
+    from pyazuretoolkit import az_deploy, az_fingerprint
+
+    template = tmp_path / "main.json"
+    template.write_text(json.dumps({"resources": []}))
+    journal = az_journal.DeploymentJournal(str(tmp_path / "journal.db"))
+    client = SimpleNamespace(
+        deployments=FakeDeployments(),
+        resource_groups=SimpleNamespace(check_existence=lambda name: True),
+    )
+    helper = az_deploy.DeploymentHelper(
+        __SUB, "rg-app", "eastus", credentials=object(), resource_client=client,
+        journal=journal,
+    )
+
+    # an earlier run was interrupted after submitting the same deployment
+    fingerprint = az_fingerprint.deployment_fingerprint(
+        __SUB, "rg-app", az_deploy.load_deployment_params(str(template), None)
+    )
+    journal.record_submitted(
+        __SUB, "rg-app", "pydeploy", "pydeploy-old", fingerprint, "t1"
+    )
+    submitted_at = journal.get(__SUB, "rg-app", "pydeploy").submitted_at
+
+    outcome = helper.deploy_resource_template(str(template), None)
+    assert client.deployments.reattached == [("pydeploy-old", "t1")]
+    # timed from the original submission, not from the reattach
+    assert outcome.submitted_at == submitted_at
+    assert client.deployments.submitted == []
+    assert journal.get(__SUB, "rg-app", "pydeploy").status == az_journal.SUCCEEDED
+
+    # nothing in flight any more - the next run submits
+    helper.deploy_resource_template(str(template), None)
+    assert len(client.deployments.submitted) == 1
+    journal.close()
+
+
+# ******************************************************************************** #
+
+
+def test_failed_deployment_is_not_fingerprinted_or_pruned(tmp_path):
+    pytest.importorskip("azure.mgmt.resource")
+    from pyazuretoolkit import az_deploy, az_fingerprint
+
+    template = tmp_path / "main.json"
+    template.write_text(json.dumps({"resources": []}))
+    store = az_fingerprint.FingerprintStore(str(tmp_path / "fingerprints.db"))
+    client = SimpleNamespace(
+        deployments=FakeDeployments(),
+        resource_groups=SimpleNamespace(check_existence=lambda name: True),
+    )
+    helper = az_deploy.DeploymentHelper(
+        __SUB, "rg-app", "eastus", credentials=object(), resource_client=client,
+        fingerprint_store=store,
+    )
+    pruned = []
+    helper.prune_history = pruned.append
+
+    # the fake poller's deployment has no provisioning state - not succeeded
+    outcome = helper.deploy_resource_template(str(template), None)
+    assert outcome.failed
+    assert store.get(__SUB, "rg-app", "pydeploy") is None
+    assert pruned == []
+    # so the next run deploys again instead of skipping it as unchanged
+    helper.deploy_resource_template(str(template), None)
+    assert len(client.deployments.submitted) == 2
+    store.close()
@@ -0,0 +1,42 @@
+
+
+import json
+
+import pytest
+from pyazuretoolkit import az_json
+
+# ******************************************************************************** #
+
+
+@pytest.fixture(params=["json", "orjson", "ujson"])
+def backend(request):
+    previous = az_json.get_backend()
+    try:
+        az_json.set_backend(request.param)
+    except ImportError:
+        pytest.skip(f"{request.param} not installed")
+    yield request.param
+    az_json.set_backend(previous)
+
+
+# ******************************************************************************** #
+
+
+def test_extract_key_skips_other_values(tmp_path, backend):
+    document = {
+        "$schema": "https://schema.management.azure.com/x.json#",
+        "script": 'echo "{[not json]}" \\ done',
+        "resources": [{"name": "a", "tags": {"b": [1, 2, {"c": None}]}}, True, 1.5e3],
+        "parameters": {"storageAccountName": {"value": "stg001"}},
+        "outputs": {},
+    }
+    params_file = tmp_path / "params.json"
+    params_file.write_bytes(b"\xef\xbb\xbf" + json.dumps(document, indent=2).encode())
+
+    assert az_json.extract_key(str(params_file)) == document["parameters"]
+    assert az_json.extract_key(str(params_file), "outputs") == {}
+    assert az_json.extract_key(str(params_file), "missing") is None
+    assert az_json.load_file(str(params_file)) == document
+
+
+# ******************************************************************************** #
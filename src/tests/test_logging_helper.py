@@ -0,0 +1,73 @@
+import logging
+
+import pytest
+from pyazuretoolkit import logging_helper
+
+# ******************************************************************************** #
+
+
+@pytest.fixture
+def debug_logging(caplog):
+    caplog.set_level(logging.DEBUG, logger="pyazuretoolkit")
+    return caplog
+
+
+# ******************************************************************************** #
+
+
+def test_package_logger_is_not_configured_globally():
+    assert logging_helper.logger.name == "pyazuretoolkit"
+    assert any(
+        isinstance(h, logging.NullHandler) for h in logging_helper.logger.handlers
+    )
+
+
+# ******************************************************************************** #
+
+
+def test_disabled_does_not_format_args():
+    class Explosive:
+        def __repr__(self):
+            raise AssertionError("formatted while DEBUG is off")
+
+    @logging_helper.log
+    def deploy(template):
+        return "done"
+
+    logging_helper.logger.setLevel(logging.INFO)
+    try:
+        assert deploy(Explosive()) == "done"
+    finally:
+        logging_helper.logger.setLevel(logging.NOTSET)
+
+
+# ******************************************************************************** #
+
+
+def test_debug_logs_truncated_args_and_duration(debug_logging):
+    @logging_helper.log
+    def deploy(template, mode=None):
+        return len(template["resources"])
+
+    template = {"resources": list(range(100_000)), "script": "x" * 1_000_000}
+    assert deploy(template, mode="Incremental") == 100_000
+
+    called, returned = [r.getMessage() for r in debug_logging.records]
+    assert "deploy called with" in called
+    assert "mode='Incremental'" in called
+    assert len(called) < 500
+    assert "deploy returned in" in returned and returned.endswith("ms")
+
+
+# ******************************************************************************** #
+
+
+def test_exceptions_are_logged_and_reraised(debug_logging):
+    @logging_helper.log(level=logging.INFO)
+    def fail():
+        raise ValueError("boom")
+
+    with pytest.raises(ValueError, match="boom"):
+        fail()
+    assert debug_logging.records[-1].levelno == logging.ERROR
+    assert "Exception in" in debug_logging.records[-1].getMessage()
@@ -0,0 +1,72 @@
+
+
+import json
+
+import pytest
+from pyazuretoolkit import az_manifest
+
+__SUB = "00000000-0000-0000-0000-000000000000"
+
+# ******************************************************************************** #
+
+
+def test_parse_manifest_defaults():
+    manifest = {
+        "defaults": {"location": "australiaeast", "template": "main.json"},
+        "targets": [
+            {"subscriptionId": "sub-1", "resourceGroup": "rg-001"},
+            {"subscriptionId": "sub-2", "resourceGroup": "rg-002", "params": "p.json"},
+        ],
+    }
+    targets = az_manifest.parse_manifest(manifest, "/deploy")
+    assert [t.resource_group_name for t in targets] == ["rg-001", "rg-002"]
+    assert targets[0].template_file == "/deploy/main.json"
+    assert targets[0].template_params_file is None
+    assert targets[1].template_params_file == "/deploy/p.json"
+
+
+# ******************************************************************************** #
+
+
+def test_load_manifest_missing_file(tmp_path):
+    manifest_file = tmp_path / "manifest.json"
+    manifest_file.write_text(
+        json.dumps(
+            {
+                "targets": [
+                    {
+                        "subscriptionId": __SUB,
+                        "resourceGroup": "rg-001",
+                        "location": "australiaeast",
+                        "template": "missing.json",
+                    }
+                ]
+            }
+        )
+    )
+    with pytest.raises(FileNotFoundError):
+        az_manifest.load_manifest(str(manifest_file))
+
+
+# ******************************************************************************** #
+
+
+def test_load_manifest_invalid_subscription(tmp_path):
+    (tmp_path / "main.json").write_text("{}")
+    manifest_file = tmp_path / "manifest.json"
+    manifest_file.write_text(
+        json.dumps(
+            {
+                "defaults": {"location": "australiaeast", "template": "main.json"},
+                "targets": [
+                    {"subscriptionId": __SUB, "resourceGroup": "rg-001"},
+                    {"subscriptionId": "sub-2", "resourceGroup": "rg-002"},
+                ],
+            }
+        )
+    )
+    with pytest.raises(ValueError, match="sub-2/rg-002"):
+        az_manifest.load_manifest(str(manifest_file))
+
+
+# ******************************************************************************** #
@@ -0,0 +1,127 @@
+
+
+import threading
+import time
+
+import pytest
+from pyazuretoolkit import az_polling
+
+# ******************************************************************************** #
+
+
+class FakeResponse:
+    def __init__(self, headers):
+        self.http_response = self
+        self.headers = headers
+
+
+class FakePollingMethod:
+    def __init__(self, headers=None):
+        self._pipeline_response = FakeResponse(headers or {}) if headers else None
+
+
+class FakePoller:
+    """LROPoller stand-in that completes after a fixed duration"""
+
+    def __init__(self, duration, headers=None):
+        self._done = threading.Event()
+        self._callbacks = []
+        self._polling_method = FakePollingMethod(headers)
+        self.status_calls = 0
+        self.wait_calls = 0
+        self.completed_at = None
+        timer = threading.Timer(duration, self._complete)
+        timer.daemon = True
+        timer.start()
+
+    def _complete(self):
+        self.completed_at = time.monotonic()
+        self._done.set()
+        for callback in self._callbacks:
+            callback(self)
+
+    def polling_method(self):
+        return self._polling_method
+
+    def done(self):
+        return self._done.is_set()
+
+    def status(self):
+        self.status_calls += 1
+        return "Succeeded" if self.done() else "InProgress"
+
+    def wait(self, timeout=None):
+        self.wait_calls += 1
+        self._done.wait(timeout)
+
+    def add_done_callback(self, func):
+        self._callbacks.append(func)
+
+    def result(self):
+        return "result"
+
+
+# ******************************************************************************** #
+
+
+def test_short_deployment_has_no_added_latency():
+    poller = FakePoller(0.05)
+    strategy = az_polling.WaitStrategy(initial_delay=3.0)
+    assert az_polling.wait_for_completion(poller, strategy) == "result"
+    assert time.monotonic() - poller.completed_at < 0.05
+    assert poller.status_calls == 1
+
+
+# ******************************************************************************** #
+
+
+def test_backoff_bounds_status_calls():
+    poller = FakePoller(0.5)
+    statuses = []
+    strategy = az_polling.WaitStrategy(initial_delay=0.01, max_delay=0.2)
+    az_polling.wait_for_completion(poller, strategy, status_callback=statuses.append)
+    # 0.01, 0.02, 0.04, 0.08, 0.16, 0.2, ... - a fixed 0.01 loop would need 50
+    assert poller.status_calls < 10
+    assert statuses == ["InProgress"]
+
+
+# ******************************************************************************** #
+
+
+def test_done_callback_and_timeout():
+    poller = FakePoller(0.3)
+    called = []
+    strategy = az_polling.WaitStrategy(initial_delay=0.01, timeout=0.1)
+    with pytest.raises(TimeoutError):
+        az_polling.wait_for_completion(poller, strategy, done_callback=called.append)
+    poller.wait()
+    assert called == [poller]
+
+
+# ******************************************************************************** #
+
+
+def test_retry_after_is_honoured():
+    poller = FakePoller(10.0, headers={"Retry-After": "5"})
+    assert az_polling.get_retry_after(poller) == 5.0
+    strategy = az_polling.WaitStrategy(initial_delay=1.0, max_delay=30.0)
+    assert strategy.next_delay(None, 5.0) == 5.0
+    assert strategy.next_delay(8.0, 5.0) == 16.0
+    assert az_polling.get_retry_after(FakePoller(0.0)) is None
+
+
+# ******************************************************************************** #
+
+
+def test_strategy_polling_backs_off_between_status_requests():
+    strategy = az_polling.WaitStrategy(initial_delay=1.0, max_delay=3.0)
+    polling = az_polling.StrategyPolling(strategy)
+    polling._pipeline_response = FakeResponse({})
+    assert [polling._extract_delay() for _ in range(4)] == [1.0, 2.0, 3.0, 3.0]
+
+    polling = az_polling.StrategyPolling(strategy)
+    polling._pipeline_response = FakeResponse({"retry-after-ms": "2500"})
+    assert polling._extract_delay() == 2.5
+
+
+# ******************************************************************************** #
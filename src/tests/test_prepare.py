@@ -0,0 +1,211 @@
+import json
+import uuid
+from types import SimpleNamespace
+
+import pytest
+
+pytest.importorskip("azure.mgmt.resource")
+
+from pyazuretoolkit import az_deploy, az_fingerprint, az_prepare, az_results
+from pyazuretoolkit.az_manifest import DeploymentTarget
+
+__TEMPLATE = {
+    "parameters": {"name": {"type": "string", "maxLength": 10}},
+    "resources": [
+        {"type": "Microsoft.Storage/storageAccounts", "name": "[parameters('name')]"}
+    ],
+    "outputs": {"name": {"type": "string", "value": "[parameters('name')]"}},
+}
+
+# ******************************************************************************** #
+
+
+def variants(tmp_path, subscription_id, names):
+    template = tmp_path / "main.json"
+    template.write_text(json.dumps(__TEMPLATE))
+    targets = []
+    for index, name in enumerate(names):
+        params = tmp_path / f"tenant{index}.params.json"
+        params.write_text(json.dumps({"parameters": {"name": {"value": name}}}))
+        targets.append(
+            DeploymentTarget(
+                subscription_id, f"rg-{index}", "eastus", str(template), str(params)
+            )
+        )
+    return targets
+
+
+# ******************************************************************************** #
+
+
+def test_prepare_target_ships_the_request_body(tmp_path):
+    good, invalid = variants(
+        tmp_path, str(uuid.uuid4()), ["tenant0", "much-too-long-name"]
+    )
+    missing = DeploymentTarget(
+        good.subscription_id, "rg", "eastus", str(tmp_path / "nope.json")
+    )
+
+    prepared = az_prepare.prepare_target(good)
+    deployment_params = az_deploy.load_deployment_params(
+        good.template_file, good.template_params_file
+    )
+    assert json.loads(prepared.body) == {
+        "properties": {
+            "mode": "Incremental",
+            "template": __TEMPLATE,
+            "parameters": {"name": {"value": "tenant0"}},
+        }
+    }
+    assert prepared.fingerprint == az_fingerprint.deployment_fingerprint(
+        good.subscription_id, good.resource_group_name, deployment_params
+    )
+    assert "maxLength" in az_prepare.prepare_target(invalid).error
+    assert az_prepare.prepare_target(invalid, validate=False).error is None
+    assert "not found" in az_prepare.prepare_target(missing).error
+
+    # an unparsable params file is reported, not raised
+    with open(good.template_params_file, "w") as file:
+        file.write('{"parameters": {')
+    prepared = az_prepare.prepare_target(good)
+    assert prepared.error and prepared.body is None
+
+
+# ******************************************************************************** #
+
+
+def test_multiprocess_deploy_submits_from_one_thread(tmp_path):
+    from pyazuretoolkit.az_polling import WaitStrategy
+
+    from tests.fake_arm import FakeArm
+
+    subscription_id = str(uuid.uuid4())
+    names = [f"tenant{index}" for index in range(5)] + ["much-too-long-name"]
+    targets = variants(tmp_path, subscription_id, names)
+    # a broken params file fails its own target, the others still deploy
+    broken = tmp_path / "broken.params.json"
+    broken.write_text("{")
+    targets.append(
+        DeploymentTarget(
+            subscription_id, "rg-9", "eastus", targets[0].template_file, str(broken)
+        )
+    )
+    arm = FakeArm(lro_duration=0.02)
+    client = arm.client(subscription_id)
+    store = az_results.ResultStore(str(tmp_path / "results.db"))
+
+    results = az_prepare.deploy_targets_multiprocess(
+        targets,
+        processes=2,
+        registry=SimpleNamespace(get_client=lambda subscription_id: client),
+        max_in_flight=2,
+        result_store=store,
+        wait_strategy=WaitStrategy(initial_delay=0.01),
+    )
+
+    assert [result.succeeded for result in results] == [True] * 5 + [False, False]
+    assert [result.outcome.outputs["name"] for result in results[:5]] == names[:5]
+    assert "maxLength" in results[5].error
+    assert results[6].error
+    # the invalid targets were never submitted
+    assert arm.calls["PUT deployment"] == 5
+    assert store.outputs(subscription_id, "rg-4", "pydeploy") == {"name": "tenant4"}
+    store.close()
+
+
+# ******************************************************************************** #
+
+
+# ******************************************************************************** #
+
+
+class FakePoller:
+    def __init__(self, state):
+        self.state = state
+
+    def continuation_token(self):
+        return f"token-{self.state}"
+
+    def polling_method(self):
+        return SimpleNamespace(_pipeline_response=None)
+
+    def done(self):
+        return self.state != "Running"
+
+    def status(self):
+        return self.state
+
+    def wait(self, timeout=None):
+        pass
+
+    def result(self, timeout=None):
+        properties = SimpleNamespace(provisioning_state=self.state, outputs={})
+        return SimpleNamespace(properties=properties)
+
+
+def test_submitter_outcomes_and_journal(tmp_path):
+    from pyazuretoolkit import az_journal
+    from pyazuretoolkit.az_polling import WaitStrategy
+
+    subscription_id = str(uuid.uuid4())
+    targets = variants(tmp_path, subscription_id, ["ok", "failed", "slow", "again"])
+    states = {"rg-0": "Succeeded", "rg-1": "Failed", "rg-2": "Running"}
+    calls = []
+
+    def begin_create_or_update(rg, name, body, continuation_token=None, **kwargs):
+        calls.append((rg, name, continuation_token))
+        return FakePoller(states.get(rg, "Succeeded"))
+
+    client = SimpleNamespace(
+        deployments=SimpleNamespace(begin_create_or_update=begin_create_or_update),
+        resource_groups=SimpleNamespace(check_existence=lambda name: True),
+    )
+    fingerprints = az_fingerprint.FingerprintStore(str(tmp_path / "fingerprints.db"))
+    journal = az_journal.DeploymentJournal(str(tmp_path / "journal.db"))
+    prepared = [az_prepare.prepare_target(target) for target in targets]
+    assert prepared[0].deployment_name.startswith("pydeploy-")
+    # an interrupted run left the last target's deployment running
+    journal.record_submitted(
+        subscription_id, "rg-3", "pydeploy", "pydeploy-old",
+        prepared[3].fingerprint, "t1",
+    )
+    submitter = az_prepare.DeploymentSubmitter(
+        SimpleNamespace(get_client=lambda subscription_id: client),
+        wait_strategy=WaitStrategy(initial_delay=0.01, timeout=0.05),
+        fingerprint_store=fingerprints,
+        journal=journal,
+    )
+
+    results = submitter.run(prepared)
+    assert [result.succeeded for result in results] == [True, False, False, True]
+    assert results[1].error == "provisioning state Failed"
+    assert results[1].outcome.provisioning_state == "Failed"
+    assert "after 0.05s" in results[2].error
+    assert calls[-1] == ("rg-3", "pydeploy-old", "t1")
+    assert results[3].outcome.deployment_name == "pydeploy-old"
+    # only the succeeded deployments are fingerprinted, the timed out one
+    # stays in flight for the next run
+    assert fingerprints.get(subscription_id, "rg-1", "pydeploy") is None
+    status = journal.get(subscription_id, "rg-2", "pydeploy").status
+    assert status == az_journal.RUNNING
+
+    results = submitter.run(
+        [az_prepare.prepare_target(target) for target in targets[:1]]
+    )
+    assert results[0].skipped and results[0].outcome.skipped_reason == "unchanged"
+    assert len(calls) == 4
+    journal.close()
+    fingerprints.close()
+
+
+# ******************************************************************************** #
+
+
+@pytest.mark.parametrize("option", [["--what-if"], ["--keep-deployments", "5"]])
+def test_cli_rejects_options_the_submitter_ignores(option, capsys):
+    from pyazuretoolkit import cli
+
+    with pytest.raises(SystemExit) as exit_info:
+        cli.main(["--manifest", "targets.json", "--processes", "2", *option])
+    assert exit_info.value.code == 2
+    assert "cannot be combined with --processes" in capsys.readouterr().err
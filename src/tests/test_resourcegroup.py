@@ -0,0 +1,112 @@
+
+
+from types import SimpleNamespace
+
+from pyazuretoolkit import az_resourcegroup as az_rg
+
+# ******************************************************************************** #
+
+
+class FakePoller:
+    def __init__(self, error=None):
+        self.error = error
+
+    def result(self, timeout=None):
+        if self.error:
+            raise RuntimeError(self.error)
+
+    def done(self):
+        return True
+
+
+class FakeResourceGroups:
+    def __init__(self, groups):
+        self.groups = {g.name.lower(): g for g in groups}
+        self.calls = {"list": 0, "check_existence": 0}
+
+    def list(self, filter=None):
+        self.calls["list"] += 1
+        return iter(list(self.groups.values()))
+
+    def check_existence(self, name):
+        self.calls["check_existence"] += 1
+        return name.lower() in self.groups
+
+    def create_or_update(self, name, parameters):
+        if name.startswith("bad"):
+            raise RuntimeError("InvalidResourceGroupName")
+        self.groups[name.lower()] = SimpleNamespace(name=name, tags=None)
+
+    def begin_delete(self, name):
+        self.groups.pop(name.lower(), None)
+        return FakePoller("ResourceGroupBeingDeleted" if name == "rg-locked" else None)
+
+
+def make_client(*groups):
+    return SimpleNamespace(resource_groups=FakeResourceGroups(list(groups)))
+
+
+# ******************************************************************************** #
+
+
+def test_index_answers_many_queries_with_one_list():
+    client = make_client(
+        SimpleNamespace(name="rg-App-001", tags={"Env": "dev"}),
+        SimpleNamespace(name="rg-app-002", tags={"env": "prod"}),
+        SimpleNamespace(name="rg-shared", tags=None),
+    )
+    exists = az_rg.get_resource_groups(client, ["rg-app-001", "rg-app-003"])
+    assert exists == {"rg-app-001": True, "rg-app-003": False}
+    assert client.resource_groups.calls == {"list": 1, "check_existence": 0}
+
+    index = az_rg.ResourceGroupIndex.build(client)
+    assert len(index) == 3
+    assert "RG-SHARED" in index
+    assert len(index.with_tag("env")) == 2
+    assert [g.name for g in index.with_tag("ENV", "prod")] == ["rg-app-002"]
+
+
+# ******************************************************************************** #
+
+
+def test_bulk_create_and_delete_report_failures():
+    client = make_client()
+    created = az_rg.create_resource_groups(
+        client, {"rg-1": "australiaeast", "bad-rg": "australiaeast", "rg-locked": "x"}
+    )
+    assert sorted(created.succeeded) == ["rg-1", "rg-locked"]
+    assert list(created.failed) == ["bad-rg"]
+
+    deleted = az_rg.delete_resource_groups(client, ["rg-1", "rg-locked"])
+    assert deleted.succeeded == ["rg-1"]
+    assert "ResourceGroupBeingDeleted" in deleted.failed["rg-locked"]
+    assert not deleted.ok
+
+
+# ******************************************************************************** #
+
+
+class FakeClient:
+    def __init__(self, *groups):
+        self.resource_groups = FakeResourceGroups(list(groups))
+
+
+def test_cache_saves_repeated_checks():
+    client = FakeClient(SimpleNamespace(name="rg-1", tags=None))
+    cache = az_rg.get_resource_group_cache(client)
+
+    assert az_rg.get_resource_group(client, "rg-1")
+    assert az_rg.get_resource_group(client, "RG-1")
+    assert not az_rg.get_resource_group(client, "rg-2")
+    az_rg.create_resource_group(client, "rg-2", "australiaeast")
+    assert az_rg.get_resource_group(client, "rg-2")
+    assert client.resource_groups.calls["check_existence"] == 2
+    assert cache.stats["hits"] == 2
+
+    az_rg.delete_resource_group(client, "rg-2")
+    assert not az_rg.get_resource_group(client, "rg-2")
+    assert client.resource_groups.calls["check_existence"] == 3
+    assert az_rg.get_resource_group_cache(FakeClient()) is not cache
+
+
+# ******************************************************************************** #
@@ -0,0 +1,104 @@
+import json
+import uuid
+from types import SimpleNamespace
+
+import pytest
+from pyazuretoolkit import az_results
+
+__SUB = "00000000-0000-0000-0000-000000000000"
+
+# ******************************************************************************** #
+
+
+def outcome(name, prefix="pydeploy", finished_at=1.0, state="Succeeded", **outputs):
+    return az_results.DeploymentOutcome(
+        __SUB, "RG-App", prefix, name, state, outputs, [f"/ids/{name}"],
+        correlation_id=f"corr-{name}", started_at=0.0, submitted_at=0.5,
+        finished_at=finished_at,
+    )
+
+
+def test_result_store_looks_up_outcomes(tmp_path):
+    store = az_results.ResultStore(str(tmp_path / "results.db"))
+    store.record(outcome("pydeploy-1", finished_at=1.0, url="old"))
+    store.record(outcome("pydeploy-2", finished_at=2.0, url="new"))
+    store.record(outcome("pydeploy-3", finished_at=3.0, state="Failed"))
+    store.record(outcome("api-1", prefix="api", finished_at=4.0, url="api"))
+
+    assert store.outputs(__SUB, "rg-app", "pydeploy") == {"url": "new"}
+    latest = store.latest(__SUB, "rg-app", "pydeploy", succeeded_only=False)
+    assert latest.deployment_name == "pydeploy-3"
+    assert store.outputs(__SUB, "rg-app", "missing") is None
+
+    found = store.find("pydeploy-2")
+    assert found == store.get(__SUB, "RG-APP", "pydeploy-2")
+    assert found.resource_ids == ["/ids/pydeploy-2"]
+    assert found.correlation_id == "corr-pydeploy-2"
+    assert found.elapsed == 2.0 and found.wait_time == 1.5
+
+    newest = store.history(deploy_prefix="pydeploy", limit=2)
+    assert [o.deployment_name for o in newest] == ["pydeploy-3", "pydeploy-2"]
+    assert store.prune(keep_last=1) == 2
+    assert [o.deployment_name for o in store.history()] == ["api-1", "pydeploy-3"]
+    store.close()
+
+
+def test_outcome_keeps_a_missing_provisioning_state(tmp_path):
+    deployment = SimpleNamespace(properties=SimpleNamespace(outputs=None))
+    found = az_results.DeploymentOutcome.from_deployment(
+        deployment, __SUB, "rg-app", "pydeploy", "pydeploy-1", 0.0, 0.5
+    )
+    assert found.provisioning_state is None
+    assert found.failed and not found.succeeded
+
+    store = az_results.ResultStore(str(tmp_path / "results.db"))
+    store.record(found)
+    assert store.latest(__SUB, "rg-app", "pydeploy") is None
+    assert store.find("pydeploy-1").provisioning_state is None
+    store.close()
+
+
+# ******************************************************************************** #
+
+
+def test_outputs_are_served_from_the_store(tmp_path):
+    pytest.importorskip("azure.mgmt.resource")
+    from pyazuretoolkit.az_deploy import DeploymentHelper
+    from pyazuretoolkit.az_polling import WaitStrategy
+
+    from tests.fake_arm import FakeArm
+
+    template = tmp_path / "main.json"
+    template.write_text(
+        json.dumps(
+            {
+                "resources": [{"type": "Microsoft.Web/sites", "name": "site"}],
+                "outputs": {"host": {"type": "string", "value": "site.example"}},
+            }
+        )
+    )
+    subscription_id = str(uuid.uuid4())
+    arm = FakeArm(lro_duration=0.02)
+    store = az_results.ResultStore(str(tmp_path / "results.db"))
+    helper = DeploymentHelper(
+        subscription_id, "rg", "eastus",
+        credentials=object(),
+        resource_client=arm.client(subscription_id),
+        wait_strategy=WaitStrategy(initial_delay=0.01),
+        result_store=store,
+    )
+
+    result = helper.deploy_resource_template(str(template), None)
+    assert isinstance(result, az_results.DeploymentOutcome)
+    assert result.outputs == {"host": "site.example"}
+    assert result.correlation_id
+    assert result.started_at <= result.submitted_at <= result.finished_at
+    assert store.find(result.deployment_name) == result
+
+    # chained steps read the outputs without listing deployments in ARM
+    assert helper.get_deployment_outputs() == {"host": "site.example"}
+    assert arm.calls["GET deployments"] == 0
+    store.close()
+
+
+# ******************************************************************************** #
@@ -0,0 +1,199 @@
+import json
+import threading
+import time
+from types import SimpleNamespace
+
+import pytest
+from pyazuretoolkit import az_manifest, az_scheduler
+
+# ******************************************************************************** #
+
+
+def make_targets(edges, inputs=None):
+    inputs = inputs or {}
+    return [
+        az_manifest.DeploymentTarget(
+            "sub", f"rg-{name}", "australiaeast", "main.json",
+            name=name, depends_on=list(deps), inputs=inputs.get(name, {}),
+        )
+        for name, deps in edges.items()
+    ]
+
+
+# ******************************************************************************** #
+
+
+def test_topological_order_and_cycles():
+    targets = make_targets({"app": ["shared"], "network": [], "shared": ["network"]})
+    order = [t.name for t in az_scheduler.topological_order(targets)]
+    assert order == ["network", "shared", "app"]
+
+    with pytest.raises(az_scheduler.CycleError):
+        az_scheduler.topological_order(make_targets({"a": ["b"], "b": ["a"], "c": []}))
+    with pytest.raises(ValueError, match="unknown"):
+        az_scheduler.topological_order(make_targets({"a": ["missing"]}))
+
+
+# ******************************************************************************** #
+
+
+def test_scheduler_concurrency_outputs_and_critical_path():
+    targets = make_targets(
+        {
+            "network": [],
+            "shared": ["network"],
+            "app1": ["shared"],
+            "app2": ["shared"],
+            "app3": ["shared"],
+            "monitoring": [],
+        },
+        inputs={"app1": {"subnetId": "network.subnetId", "kv": "shared.vaultUri"}},
+    )
+    durations = {"network": 0.05, "shared": 0.05, "monitoring": 0.02}
+    lock = threading.Lock()
+    running = []
+    peak = [0]
+    received = {}
+
+    def deploy(target, overrides):
+        with lock:
+            running.append(target.name)
+            peak[0] = max(peak[0], len(running))
+        received[target.name] = overrides
+        time.sleep(durations.get(target.name, 0.03))
+        with lock:
+            running.remove(target.name)
+        return {"subnetId": "/subnets/app", "vaultUri": "https://kv"}
+
+    schedule = az_scheduler.DeploymentScheduler(
+        targets, max_concurrency=2, deploy_func=deploy
+    ).run()
+
+    assert schedule.succeeded
+    assert peak[0] == 2
+    assert received["app1"] == {"subnetId": "/subnets/app", "kv": "https://kv"}
+    results = schedule.results
+    assert results["shared"].start >= results["network"].end
+    assert all(results[a].start >= results["shared"].end for a in ("app1", "app2"))
+    assert schedule.critical_path[:2] == ["network", "shared"]
+    assert schedule.critical_path_time <= schedule.elapsed
+
+
+# ******************************************************************************** #
+
+
+def test_failure_skips_only_dependents():
+    targets = make_targets({"network": [], "app": ["network"], "dns": []})
+
+    def deploy(target, overrides):
+        if target.name == "network":
+            raise RuntimeError("InvalidTemplate")
+        return {}
+
+    schedule = az_scheduler.DeploymentScheduler(targets, deploy_func=deploy).run()
+    assert not schedule.succeeded
+    assert schedule.results["network"].error == "InvalidTemplate"
+    assert schedule.results["app"].skipped
+    assert schedule.results["dns"].succeeded
+
+
+# ******************************************************************************** #
+
+
+def test_yaml_manifest_inputs_imply_dependencies(tmp_path):
+    pytest.importorskip("yaml")
+    (tmp_path / "main.json").write_text("{}")
+    (tmp_path / "manifest.yaml").write_text(
+        "defaults:\n"
+        "  subscriptionId: 00000000-0000-0000-0000-000000000000\n"
+        "  location: australiaeast\n"
+        "  template: main.json\n"
+        "targets:\n"
+        "  - name: network\n"
+        "    resourceGroup: rg-network\n"
+        "  - name: app\n"
+        "    resourceGroup: rg-app\n"
+        "    inputs:\n"
+        "      subnetId: network.subnetId\n"
+    )
+    network, app = az_manifest.load_manifest(str(tmp_path / "manifest.yaml"))
+    assert network.depends_on == []
+    assert app.depends_on == ["network"]
+
+
+# ******************************************************************************** #
+
+
+class FakePoller:
+    def __init__(self, outputs):
+        self.outputs = outputs
+
+    def polling_method(self):
+        return SimpleNamespace(_pipeline_response=None)
+
+    def done(self):
+        return True
+
+    def status(self):
+        return "Succeeded"
+
+    def wait(self, timeout=None):
+        pass
+
+    def result(self, timeout=None):
+        outputs = {k: {"type": "String", "value": v} for k, v in self.outputs.items()}
+        return SimpleNamespace(
+            properties=SimpleNamespace(provisioning_state="Succeeded", outputs=outputs)
+        )
+
+
+class FakeResourceManagementClient:
+    def __init__(self, outputs):
+        self.outputs = outputs
+        self.deployed = {}
+        self.resource_groups = SimpleNamespace(
+            check_existence=lambda name: False,
+            create_or_update=lambda name, parameters: None,
+        )
+        self.deployments = SimpleNamespace(begin_create_or_update=self.deploy)
+
+    def deploy(self, resource_group_name, deployment_name, parameters, **_):
+        self.deployed[resource_group_name] = parameters["properties"]
+        return FakePoller(self.outputs.get(resource_group_name, {}))
+
+
+def test_scheduler_end_to_end_with_fake_client(tmp_path):
+    pytest.importorskip("azure.mgmt.resource")
+    template = tmp_path / "main.json"
+    template.write_text(
+        json.dumps(
+            {
+                "parameters": {"subnetId": {"type": "string", "defaultValue": ""}},
+                "resources": [],
+                "outputs": {},
+            }
+        )
+    )
+    targets = [
+        az_manifest.DeploymentTarget(
+            "00000000-0000-0000-0000-000000000000", "rg-network", "eastus",
+            str(template), name="network",
+        ),
+        az_manifest.DeploymentTarget(
+            "00000000-0000-0000-0000-000000000000", "rg-app", "eastus",
+            str(template), name="app", depends_on=["network"],
+            inputs={"subnetId": "network.subnetId"},
+        ),
+    ]
+    client = FakeResourceManagementClient({"rg-network": {"subnetId": "/subnets/a"}})
+    registry = SimpleNamespace(
+        get_credential=lambda: object(), get_client=lambda subscription_id: client
+    )
+
+    schedule = az_scheduler.DeploymentScheduler(targets, registry=registry).run()
+
+    assert schedule.succeeded
+    assert schedule.results["network"].outputs == {"subnetId": "/subnets/a"}
+    assert client.deployed["rg-app"]["parameters"] == {
+        "subnetId": {"value": "/subnets/a"}
+    }
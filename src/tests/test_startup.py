@@ -0,0 +1,57 @@
+
+
+import os
+import subprocess
+import sys
+
+import pyazuretoolkit
+
+# cumulative import budget for the CLI entry point, in microseconds
+IMPORT_BUDGET_US = 250_000
+
+SRC_DIR = os.path.dirname(os.path.dirname(os.path.abspath(pyazuretoolkit.__file__)))
+
+# ******************************************************************************** #
+
+
+def run_importtime(*args):
+    env = dict(os.environ, PYTHONPATH=SRC_DIR)
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", *args],  # noqa: S603
+        capture_output=True,
+        text=True,
+        env=env,
+        check=False,
+    )
+    # each -X importtime line holds the self and cumulative microseconds
+    # and the imported package, separated by pipes
+    modules = {}
+    for line in result.stderr.splitlines():
+        if line.startswith("import time:") and "|" in line:
+            _, cumulative, name = line[len("import time:") :].split("|")
+            if cumulative.strip().isdigit():
+                modules[name.strip()] = int(cumulative)
+    return result, modules
+
+
+# ******************************************************************************** #
+
+
+def test_cli_import_within_budget():
+    result, modules = run_importtime("-c", "import pyazuretoolkit.cli")
+    assert result.returncode == 0, result.stderr
+    assert not [name for name in modules if name.startswith("azure")]
+    assert modules["pyazuretoolkit.cli"] < IMPORT_BUDGET_US
+
+
+# ******************************************************************************** #
+
+
+def test_cli_help_does_not_load_sdk():
+    result, modules = run_importtime("-m", "pyazuretoolkit.cli", "--help")
+    assert result.returncode == 0, result.stderr
+    assert "usage:" in result.stdout
+    assert not [name for name in modules if name.startswith("azure")]
+
+
+# ******************************************************************************** #
@@ -0,0 +1,58 @@
+import pytest
+from pyazuretoolkit.az_subscription import (
+    SubscriptionId,
+    check_valid_sub_id,
+    validate_many,
+)
+
+__SUB = "0A1B2C3D-0000-4000-8000-00000000000F"
+
+# ******************************************************************************** #
+
+
+def test_subscription_id_is_normalised_and_cached():
+    sub = SubscriptionId("{" + __SUB + "}")
+    assert str(sub) == __SUB.lower()
+    assert sub == __SUB and sub == SubscriptionId(__SUB.lower())
+    assert SubscriptionId("{" + __SUB + "}") is sub
+    assert SubscriptionId(sub) is sub
+    assert len({sub, SubscriptionId(__SUB)}) == 1
+
+
+# ******************************************************************************** #
+
+
+@pytest.mark.parametrize(
+    "value", ["", "not-a-guid", __SUB + "0", __SUB + "\n", " " + __SUB, None, 42]
+)
+def test_invalid_ids(value):
+    assert not check_valid_sub_id(value)
+    assert SubscriptionId.parse(value) is None
+    with pytest.raises(ValueError):
+        SubscriptionId(value)
+
+
+# ******************************************************************************** #
+
+
+def test_validate_many_keeps_order():
+    ids = [__SUB, "bad", "{" + __SUB + "}", __SUB + "\nbad", None, __SUB]
+    results = validate_many(ids)
+    assert results[0] is results[5]
+    assert results[2] == results[0]
+    assert [r is None for r in results] == [False, True, False, True, True, False]
+
+
+# ******************************************************************************** #
+
+
+def test_validate_many_past_the_cache_limit(monkeypatch):
+    monkeypatch.setattr(SubscriptionId, "_cache", {})
+    monkeypatch.setattr(SubscriptionId, "_max_cache", 8)
+    preloaded = [f"00000000-0000-4000-8000-{i:012d}" for i in range(6)]
+    validate_many(preloaded)
+    batch = [f"00000000-0000-4000-8000-{i:012d}" for i in range(4, 30)]
+    results = validate_many(preloaded + batch)
+    assert None not in results
+    assert [str(r) for r in results] == preloaded + batch
+    assert len(SubscriptionId._cache) <= 8
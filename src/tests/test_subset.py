@@ -0,0 +1,201 @@
+import copy
+import dataclasses
+import json
+import uuid
+
+import pytest
+from pyazuretoolkit.az_subset import plan_subset
+
+# ******************************************************************************** #
+
+
+def template():
+    return {
+        "parameters": {"sku": {"type": "string"}},
+        "variables": {"vnetName": "vnet"},
+        "resources": [
+            {
+                "type": "Microsoft.Network/virtualNetworks",
+                "name": "[variables('vnetName')]",
+                "properties": {},
+            },
+            {
+                "type": "Microsoft.Network/virtualNetworks/subnets",
+                "name": "[concat(variables('vnetName'), '/default')]",
+                "dependsOn": [
+                    "[resourceId('Microsoft.Network/virtualNetworks',"
+                    " variables('vnetName'))]"
+                ],
+            },
+            {
+                "type": "Microsoft.Storage/storageAccounts",
+                "name": "store",
+                "sku": "[parameters('sku')]",
+            },
+            {
+                "type": "Microsoft.Web/sites",
+                "name": "site",
+                "properties": {
+                    "storage": "[reference(resourceId("
+                    "'Microsoft.Storage/storageAccounts', 'store')).primaryEndpoints]"
+                },
+            },
+        ],
+        "outputs": {
+            "host": {
+                "type": "string",
+                "value": "[reference('site').defaultHostName]",
+            },
+            "vnet": {
+                "type": "string",
+                "value": "[reference(resourceId("
+                "'Microsoft.Network/virtualNetworks', 'vnet')).id]",
+            },
+        },
+    }
+
+
+def test_plan_subset_deploys_changed_resources_and_dependencies():
+    parameters = {"sku": {"value": "Standard_LRS"}}
+    previous = template()
+    previous["resources"].append({"type": "Microsoft.Web/serverfarms", "name": "plan"})
+
+    current = template()
+    current["resources"][3]["properties"]["httpsOnly"] = True
+    plan = plan_subset(previous, current, parameters)
+    assert plan.changed == ["microsoft.web/sites/site"]
+    assert plan.included == [
+        "microsoft.storage/storageaccounts/store",
+        "microsoft.web/sites/site",
+    ]
+    assert plan.removed == ["microsoft.web/serverfarms/plan"]
+    assert [r["name"] for r in plan.template["resources"]] == ["store", "site"]
+    # the vnet output needs a resource outside the subset
+    assert list(plan.template["outputs"]) == ["host"]
+
+    # a parameter value change shows up in the evaluated resource, dependsOn is followed
+    plan = plan_subset(current, current, {"sku": {"value": "Premium_LRS"}}, parameters)
+    assert plan.changed == ["microsoft.storage/storageaccounts/store"]
+    previous = copy.deepcopy(current)
+    current["resources"][1]["properties"] = {"addressPrefix": "10.0.0.0/24"}
+    plan = plan_subset(previous, current, parameters)
+    assert plan.included == [
+        "microsoft.network/virtualnetworks/vnet",
+        "microsoft.network/virtualnetworks/subnets/vnet/default",
+    ]
+
+    assert plan_subset(current, copy.deepcopy(current), parameters).empty
+
+
+# ******************************************************************************** #
+
+
+def test_complete_mode_refuses_deletes(tmp_path):
+    pytest.importorskip("azure.mgmt.resource")
+    from pyazuretoolkit.az_deploy import DeploymentHelper, UnsafeDeploymentError
+    from pyazuretoolkit.az_polling import WaitStrategy
+
+    from tests.fake_arm import FakeArm
+
+    def write(name, *names):
+        path = tmp_path / name
+        path.write_text(
+            json.dumps(
+                {
+                    "resources": [
+                        {"type": "Microsoft.Web/sites", "name": n} for n in names
+                    ]
+                }
+            )
+        )
+        return str(path)
+
+    subscription_id = str(uuid.uuid4())
+    arm = FakeArm(lro_duration=0.01)
+    helper = DeploymentHelper(
+        subscription_id, "rg", "eastus",
+        credentials=object(),
+        resource_client=arm.client(subscription_id),
+        wait_strategy=WaitStrategy(initial_delay=0.01),
+    )
+    both, one = write("both.json", "a", "b"), write("one.json", "a")
+    assert helper.deploy_resource_template(both, None).succeeded
+
+    with pytest.raises(UnsafeDeploymentError):
+        helper.deploy_resource_template(one, None, mode="Complete")
+    with pytest.raises(UnsafeDeploymentError):
+        helper.deploy_resource_template(write("none.json"), None, mode="Complete")
+    with pytest.raises(ValueError):
+        helper.deploy_resource_template(
+            one, None, mode="Complete", previous_template_file=both
+        )
+    assert arm.calls["PUT deployment"] == 1
+
+    assert helper.deploy_resource_template(
+        one, None, mode="Complete", allow_deletes=True
+    ).succeeded
+
+    # subset deployment - only the changed resource is sent
+    outcome = helper.deploy_resource_template(both, None, previous_template_file=one)
+    names = [resource_id.rsplit("/", 1)[-1] for resource_id in outcome.resource_ids]
+    assert names == ["b"]
+    skipped = helper.deploy_resource_template(both, None, previous_template_file=both)
+    assert skipped.skipped_reason == "no_changed_resources"
+
+
+# ******************************************************************************** #
+
+
+def test_subset_outcome_keeps_every_output(tmp_path):
+    pytest.importorskip("azure.mgmt.resource")
+    from pyazuretoolkit.az_deploy import DeploymentHelper
+    from pyazuretoolkit.az_polling import WaitStrategy
+    from pyazuretoolkit.az_results import ResultStore
+
+    from tests.fake_arm import FakeArm
+
+    def write(name, b_properties):
+        path = tmp_path / name
+        path.write_text(
+            json.dumps(
+                {
+                    "resources": [
+                        {"type": "Microsoft.Web/sites", "name": "a"},
+                        {
+                            "type": "Microsoft.Web/sites",
+                            "name": "b",
+                            "properties": b_properties,
+                        },
+                    ],
+                    "outputs": {
+                        name: {"type": "string", "value": f"[reference('{name}').id]"}
+                        for name in ("a", "b")
+                    },
+                }
+            )
+        )
+        return str(path)
+
+    subscription_id = str(uuid.uuid4())
+    arm = FakeArm(lro_duration=0.01)
+    store = ResultStore(str(tmp_path / "results.db"))
+    helper = DeploymentHelper(
+        subscription_id, "rg", "eastus",
+        credentials=object(),
+        resource_client=arm.client(subscription_id),
+        wait_strategy=WaitStrategy(initial_delay=0.01),
+        result_store=store,
+    )
+    before, after = write("before.json", {}), write("after.json", {"httpsOnly": True})
+    full = helper.deploy_resource_template(before, None)
+    assert set(full.outputs) == {"a", "b"}
+    # stands in for the value ARM would have reported for a
+    store.record(dataclasses.replace(full, outputs={"a": "/sites/a", "b": "/sites/b"}))
+
+    # only b is deployed, the output of a is carried over from the last deployment
+    subset = helper.deploy_resource_template(after, None, previous_template_file=before)
+    names = [resource_id.rsplit("/", 1)[-1] for resource_id in subset.resource_ids]
+    assert names == ["b"]
+    assert subset.outputs == {"a": "/sites/a", "b": None}
+    assert store.outputs(subscription_id, "rg", "pydeploy") == subset.outputs
+    store.close()
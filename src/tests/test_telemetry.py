@@ -0,0 +1,86 @@
+import json
+
+import pytest
+from pyazuretoolkit import az_telemetry
+
+# ******************************************************************************** #
+
+
+class ListExporter(az_telemetry.TelemetryExporter):
+    def __init__(self):
+        self.spans = []
+        self.metrics = []
+
+    def export_span(self, span):
+        self.spans.append(span)
+
+    def export_metric(self, name, value, attributes):
+        self.metrics.append((name, value, attributes))
+
+
+@pytest.fixture
+def exporter():
+    exporter = ListExporter()
+    az_telemetry.add_exporter(exporter)
+    yield exporter
+    az_telemetry.remove_exporter(exporter)
+
+
+# ******************************************************************************** #
+
+
+def test_disabled_is_noop():
+    assert not az_telemetry.enabled()
+    first = az_telemetry.span("deploy", resource_group="rg")
+    assert first is az_telemetry.span("deploy.poll")
+    with first as span:
+        span.set_attribute("skipped", "unchanged")
+    az_telemetry.count("arm.requests")
+
+
+# ******************************************************************************** #
+
+
+def test_nested_spans_and_counters(exporter):
+    with az_telemetry.span("deploy", resource_group="rg") as outer:
+        with az_telemetry.span("deploy.submit"):
+            az_telemetry.count("arm.requests", method="PUT")
+        outer.set_attribute("skipped", "no_changes")
+
+    inner, parent = exporter.spans
+    assert inner["name"] == "deploy.submit"
+    assert inner["parent_id"] == parent["span_id"]
+    assert parent["parent_id"] is None
+    assert parent["attributes"] == {"resource_group": "rg", "skipped": "no_changes"}
+    assert parent["duration_ms"] >= inner["duration_ms"] >= 0
+    assert exporter.metrics == [("arm.requests", 1, {"method": "PUT"})]
+
+
+# ******************************************************************************** #
+
+
+def test_span_records_errors(exporter):
+    with pytest.raises(ValueError), az_telemetry.span("deploy.load_files"):
+        raise ValueError("bad template")
+    assert exporter.spans[0]["status"] == "error"
+    assert "bad template" in exporter.spans[0]["error"]
+
+
+# ******************************************************************************** #
+
+
+def test_json_lines_exporter(tmp_path):
+    file_name = tmp_path / "telemetry.jsonl"
+    exporter = az_telemetry.JsonLinesExporter(str(file_name))
+    az_telemetry.add_exporter(exporter)
+    try:
+        with az_telemetry.span("login"):
+            az_telemetry.count("arm.retries")
+    finally:
+        az_telemetry.remove_exporter(exporter)
+
+    records = [json.loads(line) for line in file_name.read_text().splitlines()]
+    assert [(r["type"], r["name"]) for r in records] == [
+        ("metric", "arm.retries"),
+        ("span", "login"),
+    ]
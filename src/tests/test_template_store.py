@@ -0,0 +1,79 @@
+
+
+import json
+import os
+
+import pytest
+from pyazuretoolkit import az_template_store
+
+# ******************************************************************************** #
+
+
+def test_store_parses_once_and_invalidates(tmp_path):
+    template = tmp_path / "template.json"
+    template.write_text(json.dumps({"resources": [{"name": "a"}]}))
+    store = az_template_store.TemplateStore()
+
+    first = store.load(str(template))
+    assert store.load(str(template)) == first
+    assert (store.stats["hits"], store.stats["misses"]) == (1, 1)
+
+    template.write_text(json.dumps({"resources": [{"name": "b"}, {"name": "c"}]}))
+    stat = os.stat(template)
+    os.utime(template, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000))
+    assert len(store.load(str(template))["resources"]) == 2
+    assert store.stats["misses"] == 2
+
+
+# ******************************************************************************** #
+
+
+def test_views_are_read_only(tmp_path):
+    template = tmp_path / "template.json"
+    template.write_text(json.dumps({"resources": [{"name": "a"}]}))
+    view = az_template_store.TemplateStore().load(str(template))
+
+    with pytest.raises(TypeError):
+        view["resources"] = []
+    with pytest.raises(TypeError):
+        view["resources"][0]["name"] = "b"
+
+    copy = az_template_store.thaw(view)
+    copy["resources"][0]["name"] = "b"
+    assert view["resources"][0]["name"] == "a"
+
+
+# ******************************************************************************** #
+
+
+def test_missing_file_raises(tmp_path):
+    with pytest.raises(FileNotFoundError):
+        az_template_store.TemplateStore().load(str(tmp_path / "missing.json"))
+
+
+# ******************************************************************************** #
+
+
+def test_deployment_params_do_not_share_the_cache(tmp_path):
+    pytest.importorskip("azure.mgmt.resource")
+    from pyazuretoolkit import az_deploy
+
+    template, params = tmp_path / "template.json", tmp_path / "params.json"
+    template.write_text(json.dumps({"resources": [{"name": "a"}]}))
+    params.write_text(json.dumps({"parameters": {"sku": {"value": "S1"}}}))
+
+    deployment_params = az_deploy.load_deployment_params(str(template), str(params))
+    with pytest.raises(TypeError):
+        deployment_params["parameters"]["sku"] = {"value": "S2"}
+
+    overridden = az_deploy.apply_parameter_overrides(deployment_params, {"sku": "S2"})
+    properties = az_deploy.deployment_properties(overridden)
+    properties["template"]["resources"].clear()
+    assert properties["parameters"] == {"sku": {"value": "S2"}}
+
+    reloaded = az_deploy.load_deployment_params(str(template), str(params))
+    assert reloaded["template"] == {"resources": [{"name": "a"}]}
+    assert reloaded["parameters"] == {"sku": {"value": "S1"}}
+
+
+# ******************************************************************************** #
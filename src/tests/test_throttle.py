@@ -0,0 +1,158 @@
+import uuid
+
+import pytest
+from pyazuretoolkit import az_throttle
+
+# ******************************************************************************** #
+
+
+def test_token_bucket_reserves_and_follows_remaining():
+    bucket = az_throttle.TokenBucket(capacity=2, refill_rate=10.0)
+    assert bucket.reserve() == 0.0
+    assert bucket.reserve() == 0.0
+    # third request goes into debt - wait for one token at 10 per second
+    assert bucket.reserve() == pytest.approx(0.1, abs=0.01)
+
+    bucket = az_throttle.TokenBucket(capacity=100, refill_rate=10.0)
+    bucket.observe_remaining(0)
+    assert bucket.reserve() > 0.0
+
+
+# ******************************************************************************** #
+
+
+def test_subscription_throttle_reads_rate_limit_headers():
+    metrics = az_throttle.ThrottleMetrics()
+    throttle = az_throttle.SubscriptionThrottle(low_remaining=10)
+    throttle.observe_headers(
+        {
+            "x-ms-ratelimit-remaining-subscription-reads": "11999",
+            "x-ms-ratelimit-remaining-subscription-writes": "3",
+        },
+        metrics,
+    )
+    assert throttle.buckets["reads"].tokens == pytest.approx(250, abs=1)
+    assert throttle.buckets["writes"].tokens <= 3.5
+    assert metrics.snapshot()["lowest_remaining"] == {
+        "x-ms-ratelimit-remaining-subscription-reads": 11999,
+        "x-ms-ratelimit-remaining-subscription-writes": 3,
+    }
+
+    assert az_throttle.request_kind("head") == "reads"
+    assert az_throttle.request_kind("DELETE") == "deletes"
+    assert (
+        az_throttle.subscription_from_url(
+            "https://management.azure.com/subscriptions/ABC/resourcegroups/rg?api-version=1"
+        )
+        == "abc"
+    )
+    assert az_throttle.get_throttle("ABC") is az_throttle.get_throttle("abc")
+
+
+# ******************************************************************************** #
+
+
+def throttling_transport(throttled: int):
+    """
+    Mock transport answering the first requests with 429, then 204
+    """
+    # pylint: disable=import-outside-toplevel
+    from azure.core.pipeline.transport import HttpResponse, HttpTransport
+    from azure.core.utils import CaseInsensitiveDict
+
+    class MockResponse(HttpResponse):
+        def __init__(self, request, status_code, headers):
+            super().__init__(request, None)
+            self.status_code = status_code
+            self.headers = CaseInsensitiveDict(headers)
+
+        def body(self):
+            return b""
+
+    class ThrottlingTransport(HttpTransport):
+        def __init__(self):
+            self.requests = []
+
+        def send(self, request, **kwargs):
+            self.requests.append(request)
+            if len(self.requests) <= throttled:
+                return MockResponse(request, 429, {})
+            return MockResponse(
+                request, 204, {"x-ms-ratelimit-remaining-subscription-reads": "5"}
+            )
+
+        def open(self):
+            pass
+
+        def close(self):
+            pass
+
+        def __exit__(self, *args):
+            pass
+
+        def sleep(self, duration):
+            pass
+
+    return ThrottlingTransport()
+
+
+def test_pipeline_retries_throttled_requests():
+    pytest.importorskip("azure.core")
+    from azure.core.pipeline import Pipeline
+    from azure.core.rest import HttpRequest
+    from pyazuretoolkit import az_pipeline
+
+    metrics = az_throttle.ThrottleMetrics()
+    transport = throttling_transport(throttled=2)
+    pipeline = Pipeline(
+        transport,
+        policies=[
+            az_pipeline.JitteredRetryPolicy(metrics, retry_backoff_factor=0.01),
+            az_pipeline.ThrottlePolicy(metrics),
+        ],
+    )
+    subscription_id = str(uuid.uuid4())
+    request = HttpRequest(
+        "GET", f"https://management.azure.com/subscriptions/{subscription_id}/resourcegroups"
+    )
+    response = pipeline.run(request)
+
+    assert response.http_response.status_code == 204
+    assert len(transport.requests) == 3
+    counters = metrics.snapshot()
+    assert counters["requests"] == 3
+    assert counters["throttled"] == 2
+    assert counters["retries"] == 2
+    # the 429 emptied the bucket - the retry waited for a token
+    assert counters["waits"] >= 1
+
+
+# ******************************************************************************** #
+
+
+def test_resource_client_gets_the_pipeline_policies():
+    pytest.importorskip("azure.mgmt.resource")
+    from azure.core.credentials import AccessToken
+    from azure.mgmt.resource import ResourceManagementClient
+    from pyazuretoolkit import az_pipeline
+
+    class FakeCredential:
+        def get_token(self, *scopes, **kwargs):
+            return AccessToken("token", 2**31)
+
+    metrics = az_throttle.get_metrics()
+    before = metrics.snapshot()
+    transport = throttling_transport(throttled=1)
+    client = ResourceManagementClient(
+        FakeCredential(),
+        str(uuid.uuid4()),
+        **az_pipeline.apply_pipeline_policies({"transport": transport}),
+    )
+    assert client.resource_groups.check_existence("rg") is True
+    assert len(transport.requests) == 2
+    after = metrics.snapshot()
+    assert after["throttled"] == before["throttled"] + 1
+    assert after["retries"] == before["retries"] + 1
+
+
+# ******************************************************************************** #
@@ -0,0 +1,208 @@
+import json
+from types import SimpleNamespace
+
+import pytest
+from pyazuretoolkit import az_validate
+
+__TEMPLATE = {
+    "parameters": {
+        "prefix": {"type": "string", "maxLength": 8},
+        "count": {"type": "int", "defaultValue": 2, "minValue": 1, "maxValue": 5},
+        "sku": {"type": "string", "defaultValue": "a", "allowedValues": ["a", "b"]},
+        "location": {"type": "string", "defaultValue": "[resourceGroup().location]"},
+    },
+    "variables": {"vnetName": "[concat(parameters('prefix'), '-vnet')]"},
+    "resources": [
+        {
+            "type": "Microsoft.Network/virtualNetworks",
+            "name": "[variables('vnetName')]",
+            "location": "[parameters('location')]",
+        },
+        {
+            "type": "Microsoft.Network/virtualNetworks/subnets",
+            "name": "[concat(variables('vnetName'), '/default')]",
+            "dependsOn": [
+                "[resourceId('Microsoft.Network/virtualNetworks',"
+                " variables('vnetName'))]"
+            ],
+        },
+        {
+            "type": "Microsoft.Compute/virtualMachines",
+            "name": "[concat('vm', copyIndex())]",
+            "copy": {"name": "vmLoop", "count": "[parameters('count')]"},
+            "dependsOn": [
+                "[resourceId('Microsoft.Network/virtualNetworks/subnets',"
+                " variables('vnetName'), 'default')]"
+            ],
+        },
+        {"type": "Microsoft.Compute/disks", "name": "disk", "dependsOn": ["vmLoop"]},
+    ],
+    "outputs": {"vnet": {"type": "string", "value": "[variables('vnetName')]"}},
+}
+
+# ******************************************************************************** #
+
+
+def test_parse_and_evaluate_expressions():
+    node = az_validate.parse_expression("[concat(parameters('a')[0].b, 'it''s', -1)]")
+    assert node == (
+        "call",
+        "concat",
+        (
+            (
+                "prop",
+                ("index", ("call", "parameters", (("lit", "a"),)), ("lit", 0)),
+                "b",
+            ),
+            ("lit", "it's"),
+            ("lit", -1),
+        ),
+    )
+    for bad in ("[concat('a',]", "[foo]", "[parameters('a') 'b']", "[a().]"):
+        with pytest.raises(az_validate.ExpressionError):
+            az_validate.parse_expression(bad)
+
+    context = az_validate.ValidationContext(
+        resource_group_name="rg", location="westeurope"
+    )
+    evaluator = az_validate.ExpressionEvaluator(__TEMPLATE, {"prefix": "app"}, context)
+    assert evaluator.evaluate("[variables('vnetName')]") == "app-vnet"
+    assert evaluator.parameter("location") == "westeurope"
+    evaluate = evaluator.evaluate
+    assert evaluate("[format('{0}-{1}', parameters('sku'), add(1, 2))]") == "a-3"
+    assert evaluate("[if(equals(parameters('count'), 2), 'two', 'other')]") == "two"
+    assert evaluator.evaluate(
+        "[resourceId('Microsoft.Network/virtualNetworks/subnets', 'v', 's')]"
+    ) == (
+        "/subscriptions/00000000-0000-0000-0000-000000000000/resourceGroups/rg"
+        "/providers/Microsoft.Network/virtualNetworks/v/subnets/s"
+    )
+    # deployment-time values stay unknown
+    assert evaluator.evaluate("[reference('x').id]") is az_validate.UNKNOWN
+    assert evaluator.evaluate("[[not an expression]") == "[not an expression]"
+
+
+# ******************************************************************************** #
+
+
+def test_valid_template_passes():
+    report = az_validate.validate_template(__TEMPLATE, {"prefix": {"value": "app"}})
+    assert report.issues == []
+    assert report.resources == 4
+    assert report.expressions > 0
+
+
+# ******************************************************************************** #
+
+
+def test_parameter_errors():
+    report = az_validate.validate_template(
+        __TEMPLATE,
+        {
+            "prefix": {"value": "much-too-long"},
+            "count": {"value": 9},
+            "sku": {"value": "c"},
+            "location": {"value": 1},
+            "extra": {"value": True},
+        },
+    )
+    messages = {issue.path: issue.message for issue in report.errors}
+    assert "maxLength" in messages["parameters.prefix"]
+    assert "maxValue" in messages["parameters.count"]
+    assert "allowedValues" in messages["parameters.sku"]
+    assert "expected string" in messages["parameters.location"]
+    assert "not a parameter" in messages["parameters.extra"]
+
+    missing = az_validate.validate_template(__TEMPLATE, None)
+    assert [str(issue) for issue in missing.errors] == [
+        "parameters.prefix: has no value and no defaultValue"
+    ]
+
+
+# ******************************************************************************** #
+
+
+def test_types_nullable_and_lambdas():
+    node = az_validate.parse_expression("[filter(parameters('a'), x => x.b)]")
+    assert node[2][1] == (
+        "call",
+        "lambda",
+        (("lit", "x"), ("prop", ("call", "lambdavariables", (("lit", "x"),)), "b")),
+    )
+    reduce = "[reduce(variables('v'), 0, (a, b) => add(a, b))]"
+    assert az_validate.parse_expression(reduce)[2][2][0:2] == ("call", "lambda")
+
+    template = {
+        "definitions": {
+            "names": {"type": "array", "minLength": 1},
+            "alias": {"$ref": "#/definitions/names"},
+        },
+        "parameters": {
+            "names": {"$ref": "#/definitions/alias"},
+            "tag": {"type": "string", "nullable": True},
+            "odd": {"$ref": "#/definitions/missing", "defaultValue": 1},
+        },
+        "variables": {
+            "picked": "[filter(parameters('names'), n => startsWith(n, 'a'))]",
+            "tag": "[coalesce(parameters('tag'), 'none')]",
+        },
+        "resources": [],
+    }
+    report = az_validate.validate_template(template, {"names": {"value": ["ab"]}})
+    assert report.errors == []
+    assert [str(issue) for issue in report.warnings] == [
+        "parameters.odd.defaultValue: unknown parameter type 'None' - not checked"
+    ]
+    short = az_validate.validate_template(template, {"names": {"value": []}})
+    assert "minLength" in short.errors[0].message
+
+
+# ******************************************************************************** #
+
+
+def test_reference_and_dependency_errors():
+    template = json.loads(json.dumps(__TEMPLATE))
+    template["outputs"]["bad"] = {"type": "string", "value": "[variables('nope')]"}
+    template["resources"][0]["dependsOn"] = ["disk"]
+    template["resources"][3]["dependsOn"].append(
+        "[resourceId('Microsoft.Web/sites', 'missing')]"
+    )
+    template["resources"][3]["properties"] = {"x": "[frobnicate(parameters('sku'))]"}
+
+    report = az_validate.validate_template(template, {"prefix": {"value": "app"}})
+    errors = [str(issue) for issue in report.errors]
+    assert "outputs.bad.value: variable 'nope' is not defined" in errors
+    assert any("resources[3].dependsOn[1]" in error for error in errors)
+    # vnet -> disk -> vmLoop -> subnet -> vnet
+    cycle = [error for error in errors if "dependsOn cycle" in error]
+    assert len(cycle) == 1 and cycle[0].count("->") == 4
+    assert [str(issue) for issue in report.warnings] == [
+        "resources[3].properties.x: unknown function 'frobnicate'"
+    ]
+    with pytest.raises(az_validate.TemplateValidationError):
+        report.raise_for_errors()
+
+
+# ******************************************************************************** #
+
+
+def test_deploy_stops_before_touching_azure(tmp_path):
+    pytest.importorskip("azure.mgmt.resource")
+    from pyazuretoolkit import az_deploy
+
+    template = tmp_path / "main.json"
+    template.write_text(json.dumps(__TEMPLATE))
+    calls = []
+    client = SimpleNamespace(
+        resource_groups=SimpleNamespace(check_existence=lambda name: calls.append(name))
+    )
+    helper = az_deploy.DeploymentHelper(
+        "00000000-0000-0000-0000-000000000000", "rg", "eastus",
+        credentials=object(), resource_client=client,
+    )
+    with pytest.raises(az_validate.TemplateValidationError):
+        helper.deploy_resource_template(str(template), None)
+    assert calls == []
+
+
+# ******************************************************************************** #